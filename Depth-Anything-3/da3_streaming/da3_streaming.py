@@ -21,16 +21,22 @@ import json
 import os
 import shutil
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import torch
+from loop_utils.adaptive_chunking import AdaptiveChunker
 from loop_utils.alignment_torch import (
     apply_sim3_direct_torch,
     depth_to_point_cloud_optimized_torch,
 )
+from loop_utils.chunk_store import ChunkStore
 from loop_utils.config_utils import load_config
+from loop_utils.frame_cache import FrameCache
 from loop_utils.loop_detector import LoopDetector
 from loop_utils.sim3loop import Sim3LoopOptimizer
 from loop_utils.sim3utils import (
@@ -46,6 +52,8 @@ from loop_utils.sim3utils import (
 from safetensors.torch import load_file
 
 from depth_anything_3.api import DepthAnything3
+from depth_anything_3.utils.memory import get_gpu_memory_info
+from depth_anything_3.utils.memory_model import get_memory_model
 
 matplotlib.use("Agg")
 
@@ -135,8 +143,6 @@ class DA3_Streaming:
 
         self.chunk_size = self.config["Model"]["chunk_size"]
         self.overlap = self.config["Model"]["overlap"]
-        self.overlap_s = 0
-        self.overlap_e = self.overlap - self.overlap_s
         self.conf_threshold = 1.5
         self.seed = 42
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -146,16 +152,20 @@ class DA3_Streaming:
 
         self.img_dir = image_dir
         self.img_list = None
+        self.frame_cache = None  # decoded frames, created once img_list is known
         self.output_dir = save_dir
 
-        self.result_unaligned_dir = os.path.join(save_dir, "_tmp_results_unaligned")
-        self.result_aligned_dir = os.path.join(save_dir, "_tmp_results_aligned")
-        self.result_loop_dir = os.path.join(save_dir, "_tmp_results_loop")
+        # Per-chunk raw arrays, read back memory-mapped (see loop_utils/chunk_store.py)
+        store_dtype = self.config["Model"].get("chunk_store_dtype", "float32")
+        self.unaligned_store = ChunkStore(
+            os.path.join(save_dir, "_tmp_results_unaligned"), store_dtype
+        )
+        self.aligned_store = ChunkStore(
+            os.path.join(save_dir, "_tmp_results_aligned"), store_dtype
+        )
+        self.loop_store = ChunkStore(os.path.join(save_dir, "_tmp_results_loop"), store_dtype)
         self.result_output_dir = os.path.join(save_dir, "results_output")
         self.pcd_dir = os.path.join(save_dir, "pcd")
-        os.makedirs(self.result_unaligned_dir, exist_ok=True)
-        os.makedirs(self.result_aligned_dir, exist_ok=True)
-        os.makedirs(self.result_loop_dir, exist_ok=True)
         os.makedirs(self.pcd_dir, exist_ok=True)
 
         self.all_camera_poses = []
@@ -176,7 +186,8 @@ class DA3_Streaming:
 
         self.skyseg_session = None
 
-        self.chunk_indices = None  # [(begin_idx, end_idx), ...]
+        self.chunker = None  # plans the chunks, see loop_utils/adaptive_chunking.py
+        self.chunk_indices = None  # [(begin_idx, end_idx), ...], grows as chunks are planned
 
         self.loop_list = []  # e.g. [(1584, 139), ...]
 
@@ -188,7 +199,12 @@ class DA3_Streaming:
 
         self.loop_predict_list = []
 
+        self.loop_chunks = []  # [(chunk_idx_a, range_a, chunk_idx_b, range_b), ...]
+        self.loop_chunk_queue = []  # loop chunks not run yet
+
         self.loop_enable = self.config["Model"]["loop_enable"]
+        # Detect loops while the sequence streams instead of after the last chunk
+        self.loop_online = self.loop_enable and self.config["Loop"]["SALAD"].get("online", False)
 
         if self.loop_enable:
             loop_info_save_path = os.path.join(save_dir, "loop_closures.txt")
@@ -204,19 +220,43 @@ class DA3_Streaming:
         loop_list = self.loop_detector.get_loop_list()
         return loop_list
 
+    def schedule_loop_chunks(self, loop_list):
+        """Queue the loop chunks of new loop pairs, skipping chunk pairs already queued."""
+        loop_results = process_loop_list(
+            self.chunk_indices,
+            loop_list,
+            half_window=int(self.config["Model"]["loop_chunk_size"] / 2),
+        )
+        # return e.g. (31, (1574, 1594), 2, (129, 149))
+        num_known = len(self.loop_chunks)
+        self.loop_chunks = remove_duplicates(self.loop_chunks + loop_results)
+        for item in self.loop_chunks[num_known:]:
+            print(f"Loop chunk scheduled: {item}")
+            self.frame_cache.prefetch(list(range(*item[1])) + list(range(*item[3])))
+            self.loop_chunk_queue.append(item)
+
+    def run_loop_chunks(self, num_frames):
+        """Run the queued loop chunks whose frames are all among the first ``num_frames``."""
+        waiting = []
+        for item in self.loop_chunk_queue:
+            if max(item[1][1], item[3][1]) > num_frames:
+                waiting.append(item)
+                continue
+            single_chunk_predictions = self.process_single_chunk(
+                item[1], range_2=item[3], is_loop=True
+            )
+            self.loop_predict_list.append((item, single_chunk_predictions))
+            print(item)
+        self.loop_chunk_queue = waiting
+
     def save_depth_conf_result(self, predictions, chunk_idx, s, R, T):
         if not self.config["Model"]["save_depth_conf_result"]:
             return
         os.makedirs(self.result_output_dir, exist_ok=True)
 
-        chunk_start, chunk_end = self.chunk_indices[chunk_idx]
-
-        if chunk_idx == 0:
-            save_indices = list(range(0, chunk_end - chunk_start - self.overlap_e))
-        elif chunk_idx == len(self.chunk_indices) - 1:
-            save_indices = list(range(self.overlap_s, chunk_end - chunk_start))
-        else:
-            save_indices = list(range(self.overlap_s, chunk_end - chunk_start - self.overlap_e))
+        chunk_start = self.chunk_indices[chunk_idx][0]
+        emit_begin, emit_end = self.emit_range(chunk_idx)
+        save_indices = list(range(emit_begin - chunk_start, emit_end - chunk_start))
 
         print("[save_depth_conf_result] save_indices:")
 
@@ -225,7 +265,7 @@ class DA3_Streaming:
             print(f"{global_idx}, ", end="")
 
             image = predictions.processed_images[local_idx]  # [H, W, 3] uint8
-            depth = predictions.depth[local_idx]  # [H, W] float32
+            depth = predictions.depth[local_idx] * s  # [H, W] float32, scaled to chunk 0
             conf = predictions.conf[local_idx]  # [H, W] float32
             intrinsics = predictions.intrinsics[local_idx]  # [3, 3] float32
 
@@ -251,14 +291,12 @@ class DA3_Streaming:
         print("")
 
     def process_single_chunk(self, range_1, chunk_idx=None, range_2=None, is_loop=False):
-        start_idx, end_idx = range_1
-        chunk_image_paths = self.img_list[start_idx:end_idx]
+        frame_indices = list(range(*range_1))
         if range_2 is not None:
-            start_idx, end_idx = range_2
-            chunk_image_paths += self.img_list[start_idx:end_idx]
+            frame_indices += list(range(*range_2))
 
-        # images = load_and_preprocess_images(chunk_image_paths).to(self.device)
-        print(f"Loaded {len(chunk_image_paths)} images")
+        images = self.frame_cache.get(frame_indices)
+        print(f"Loaded {len(images)} images")
 
         ref_view_strategy = self.config["Model"][
             "ref_view_strategy" if not is_loop else "ref_view_strategy_loop"
@@ -267,10 +305,13 @@ class DA3_Streaming:
         torch.cuda.empty_cache()
         with torch.no_grad():
             with torch.cuda.amp.autocast(dtype=self.dtype):
-                images = chunk_image_paths
-                # images: ['xxx.png', 'xxx.png', ...]
-
-                predictions = self.model.inference(images, ref_view_strategy=ref_view_strategy)
+                # images: [H, W, 3] uint8 frames already at the processing resolution
+                predictions = self.model.inference(
+                    images,
+                    ref_view_strategy=ref_view_strategy,
+                    process_res=self.frame_cache.process_res,
+                    process_res_method=self.frame_cache.process_res_method,
+                )
 
                 predictions.depth = np.squeeze(predictions.depth)
                 predictions.conf -= 1.0
@@ -284,15 +325,13 @@ class DA3_Streaming:
 
         # Save predictions to disk instead of keeping in memory
         if is_loop:
-            save_dir = self.result_loop_dir
-            filename = f"loop_{range_1[0]}_{range_1[1]}_{range_2[0]}_{range_2[1]}.npy"
+            store = self.loop_store
+            key = f"loop_{range_1[0]}_{range_1[1]}_{range_2[0]}_{range_2[1]}"
         else:
             if chunk_idx is None:
                 raise ValueError("chunk_idx must be provided when is_loop is False")
-            save_dir = self.result_unaligned_dir
-            filename = f"chunk_{chunk_idx}.npy"
-
-        save_path = os.path.join(save_dir, filename)
+            store = self.unaligned_store
+            key = f"chunk_{chunk_idx}"
 
         if not is_loop and range_2 is None:
             extrinsics = predictions.extrinsics
@@ -300,24 +339,37 @@ class DA3_Streaming:
             chunk_range = self.chunk_indices[chunk_idx]
             self.all_camera_poses.append((chunk_range, extrinsics))
             self.all_camera_intrinsics.append((chunk_range, intrinsics))
+            self.chunker.observe_motion(chunk_idx, extrinsics, predictions.depth)
 
-        np.save(save_path, predictions)
+        store.save(key, predictions)
 
         return predictions
 
-    def get_chunk_indices(self):
-        if len(self.img_list) <= self.chunk_size:
-            num_chunks = 1
-            chunk_indices = [(0, len(self.img_list))]
-        else:
-            step = self.chunk_size - self.overlap
-            num_chunks = (len(self.img_list) - self.overlap + step - 1) // step
-            chunk_indices = []
-            for i in range(num_chunks):
-                start_idx = i * step
-                end_idx = min(start_idx + self.chunk_size, len(self.img_list))
-                chunk_indices.append((start_idx, end_idx))
-        return chunk_indices, num_chunks
+    def chunk_overlap(self, chunk_idx):
+        """Number of frames chunk ``chunk_idx`` shares with chunk ``chunk_idx - 1``."""
+        return self.chunk_indices[chunk_idx - 1][1] - self.chunk_indices[chunk_idx][0]
+
+    def emit_range(self, chunk_idx):
+        """Frames [begin, end) output from chunk ``chunk_idx``: up to the next chunk's start."""
+        begin, end = self.chunk_indices[chunk_idx]
+        if chunk_idx + 1 < len(self.chunk_indices):
+            end = self.chunk_indices[chunk_idx + 1][0]
+        return begin, end
+
+    def max_chunk_views(self):
+        """Views per forward pass that fit the adaptive chunking GPU budget, None if unbounded."""
+        adaptive = self.config["Model"].get("Adaptive_Chunk", {})
+        if not adaptive.get("enable", False):
+            return None
+        budget_gb = adaptive.get("max_gpu_gb", 0)
+        if budget_gb <= 0:
+            mem_info = get_gpu_memory_info()
+            if mem_info is None:
+                return None
+            budget_gb = mem_info["free_gb"]
+        return get_memory_model().max_views(
+            getattr(self.model, "model_name", None), budget_gb, self.frame_cache.process_res
+        )
 
     def align_2pcds(
         self,
@@ -329,6 +381,7 @@ class DA3_Streaming:
         chunk2_depth,
         chunk1_depth_conf,
         chunk2_depth_conf,
+        return_stats=False,
     ):
 
         conf_threshold = min(np.median(conf1), np.median(conf2)) * 0.1
@@ -348,7 +401,7 @@ class DA3_Streaming:
             )
             scale_factor = scale_factor_return
 
-        s, R, t = weighted_align_point_maps(
+        result = weighted_align_point_maps(
             point_map1,
             conf1,
             point_map2,
@@ -356,12 +409,14 @@ class DA3_Streaming:
             conf_threshold=conf_threshold,
             config=self.config,
             precompute_scale=scale_factor,
+            return_stats=return_stats,
         )
+        s, R, t = result[:3]
         print("Estimated Scale:", s)
         print("Estimated Rotation:\n", R)
         print("Estimated Translation:", t)
 
-        return s, R, t
+        return result
 
     def get_loop_sim3_from_loop_predict(self, loop_predict_list):
         loop_sim3_list = []
@@ -393,22 +448,20 @@ class DA3_Streaming:
             print(self.chunk_indices[chunk_idx_a])
             print(chunk_a_range)
             print(chunk_a_rela_begin, chunk_a_rela_end)
-            chunk_data_a = np.load(
-                os.path.join(self.result_unaligned_dir, f"chunk_{chunk_idx_a}.npy"),
-                allow_pickle=True,
-            ).item()
+            chunk_data_a = self.unaligned_store.read(
+                f"chunk_{chunk_idx_a}",
+                ("depth", "conf", "intrinsics", "extrinsics"),
+                frames=slice(chunk_a_rela_begin, chunk_a_rela_end),
+            )
 
             point_map_a = depth_to_point_cloud_vectorized(
                 chunk_data_a.depth, chunk_data_a.intrinsics, chunk_data_a.extrinsics
             )
-            point_map_a = point_map_a[chunk_a_rela_begin:chunk_a_rela_end]
-            conf_a = chunk_data_a.conf[chunk_a_rela_begin:chunk_a_rela_end]
+            conf_a = chunk_data_a.conf
 
             if self.config["Model"]["align_method"] == "scale+se3":
-                chunk_a_depth = np.squeeze(chunk_data_a.depth[chunk_a_rela_begin:chunk_a_rela_end])
-                chunk_a_depth_conf = np.squeeze(
-                    chunk_data_a.conf[chunk_a_rela_begin:chunk_a_rela_end]
-                )
+                chunk_a_depth = np.squeeze(chunk_data_a.depth)
+                chunk_a_depth_conf = np.squeeze(chunk_data_a.conf)
                 chunk_a_loop_depth = np.squeeze(item[1].depth[chunk_a_s:chunk_a_e])
                 chunk_a_loop_depth_conf = np.squeeze(item[1].conf[chunk_a_s:chunk_a_e])
             else:
@@ -435,22 +488,20 @@ class DA3_Streaming:
             print(self.chunk_indices[chunk_idx_b])
             print(chunk_b_range)
             print(chunk_b_rela_begin, chunk_b_rela_end)
-            chunk_data_b = np.load(
-                os.path.join(self.result_unaligned_dir, f"chunk_{chunk_idx_b}.npy"),
-                allow_pickle=True,
-            ).item()
+            chunk_data_b = self.unaligned_store.read(
+                f"chunk_{chunk_idx_b}",
+                ("depth", "conf", "intrinsics", "extrinsics"),
+                frames=slice(chunk_b_rela_begin, chunk_b_rela_end),
+            )
 
             point_map_b = depth_to_point_cloud_vectorized(
                 chunk_data_b.depth, chunk_data_b.intrinsics, chunk_data_b.extrinsics
             )
-            point_map_b = point_map_b[chunk_b_rela_begin:chunk_b_rela_end]
-            conf_b = chunk_data_b.conf[chunk_b_rela_begin:chunk_b_rela_end]
+            conf_b = chunk_data_b.conf
 
             if self.config["Model"]["align_method"] == "scale+se3":
-                chunk_b_depth = np.squeeze(chunk_data_b.depth[chunk_b_rela_begin:chunk_b_rela_end])
-                chunk_b_depth_conf = np.squeeze(
-                    chunk_data_b.conf[chunk_b_rela_begin:chunk_b_rela_end]
-                )
+                chunk_b_depth = np.squeeze(chunk_data_b.depth)
+                chunk_b_depth_conf = np.squeeze(chunk_data_b.conf)
                 chunk_b_loop_depth = np.squeeze(item[1].depth[chunk_b_s:chunk_b_e])
                 chunk_b_loop_depth_conf = np.squeeze(item[1].conf[chunk_b_s:chunk_b_e])
             else:
@@ -520,94 +571,205 @@ class DA3_Streaming:
         plt.savefig(save_path, dpi=300, bbox_inches="tight")
         plt.close()
 
-    def process_long_sequence(self):
-        if self.overlap >= self.chunk_size:
-            raise ValueError(
-                f"[SETTING ERROR] Overlap ({self.overlap}) \
-                    must be less than chunk size ({self.chunk_size})"
-            )
+    def align_with_previous(self, chunk_idx, cur_predictions):
+        """
+        Sim(3) of chunk ``chunk_idx`` relative to chunk ``chunk_idx - 1``, and the IRLS
+        statistics of the fit: (s, R, t, stats).
+        """
+        overlap = self.chunk_overlap(chunk_idx)
+        print(f"Aligning {chunk_idx-1} and {chunk_idx} on {overlap} frames")
+
+        # Only the overlapping frames are read back and unprojected
+        chunk_data1 = self.unaligned_store.read(
+            f"chunk_{chunk_idx-1}",
+            ("depth", "conf", "intrinsics", "extrinsics"),
+            frames=slice(-overlap, None),
+        )
+        depth2 = cur_predictions.depth[:overlap]
+        conf2 = cur_predictions.conf[:overlap]
 
-        self.chunk_indices, num_chunks = self.get_chunk_indices()
+        point_map1 = depth_to_point_cloud_vectorized(
+            chunk_data1.depth, chunk_data1.intrinsics, chunk_data1.extrinsics
+        )
+        point_map2 = depth_to_point_cloud_vectorized(
+            depth2,
+            cur_predictions.intrinsics[:overlap],
+            cur_predictions.extrinsics[:overlap],
+        )
+        conf1 = chunk_data1.conf
 
-        print(
-            f"Processing {len(self.img_list)} images in {num_chunks} \
-                chunks of size {self.chunk_size} with {self.overlap} overlap"
+        if self.config["Model"]["align_method"] == "scale+se3":
+            chunk1_depth = np.squeeze(chunk_data1.depth)
+            chunk2_depth = np.squeeze(depth2)
+            chunk1_depth_conf = np.squeeze(conf1)
+            chunk2_depth_conf = np.squeeze(conf2)
+        else:
+            chunk1_depth = None
+            chunk2_depth = None
+            chunk1_depth_conf = None
+            chunk2_depth_conf = None
+
+        return self.align_2pcds(
+            point_map1,
+            conf1,
+            point_map2,
+            conf2,
+            chunk1_depth,
+            chunk2_depth,
+            chunk1_depth_conf,
+            chunk2_depth_conf,
+            return_stats=True,
         )
 
-        pre_predictions = None
-        for chunk_idx in range(len(self.chunk_indices)):
-            print(f"[Progress]: {chunk_idx}/{len(self.chunk_indices)}")
-            cur_predictions = self.process_single_chunk(
-                self.chunk_indices[chunk_idx], chunk_idx=chunk_idx
+    def write_chunk(self, chunk_idx, chunk_data, sim3=None):
+        """
+        Write the point cloud (and depth/conf results) of one chunk in the frame of chunk 0.
+
+        chunk_data: predictions of the chunk
+        sim3: accumulated (s, R, t) from the chunk to chunk 0, None for chunk 0
+        """
+        point_cloud_save = self.config["Model"]["Pointcloud_Save"]
+
+        if sim3 is None:
+            self.aligned_store.save(f"chunk_{chunk_idx}", chunk_data)
+            points = depth_to_point_cloud_vectorized(
+                chunk_data.depth, chunk_data.intrinsics, chunk_data.extrinsics
+            )
+            s, R, t = 1, np.eye(3), np.array([0, 0, 0])
+        else:
+            s, R, t = sim3
+            points = depth_to_point_cloud_optimized_torch(
+                chunk_data.depth, chunk_data.intrinsics, chunk_data.extrinsics
+            )
+            points = apply_sim3_direct_torch(points, s, R, t)
+            self.aligned_store.save(
+                f"chunk_{chunk_idx}",
+                {
+                    "world_points": points,
+                    "conf": chunk_data.conf,
+                    "images": chunk_data.processed_images,
+                },
             )
-            torch.cuda.empty_cache()
 
-            if chunk_idx > 0:
-                print(
-                    f"Aligning {chunk_idx-1} and {chunk_idx} (Total {len(self.chunk_indices)-1})"
+        confs = chunk_data.conf.reshape(-1)
+        save_confident_pointcloud_batch(
+            points=points.reshape(-1, 3),
+            colors=chunk_data.processed_images.reshape(-1, 3).astype(np.uint8),
+            confs=confs,
+            output_path=os.path.join(self.pcd_dir, f"{chunk_idx}_pcd.ply"),
+            conf_threshold=np.mean(confs) * point_cloud_save["conf_threshold_coef"],
+            sample_ratio=point_cloud_save["sample_ratio"],
+            voxel_size=point_cloud_save.get("voxel_size", 0.0),
+        )
+
+        if self.config["Model"]["save_depth_conf_result"]:
+            self.save_depth_conf_result(chunk_data, chunk_idx, s, R, t)
+
+    def _align_and_write(self, chunk_idx, cur_predictions):
+        """Pipeline worker step: align a chunk to the previous one and write it out."""
+        start = time.perf_counter()
+        if chunk_idx == 0:
+            self.written_sim3.append(None)
+        else:
+            s, R, t, stats = self.align_with_previous(chunk_idx, cur_predictions)
+            self.chunker.observe_alignment(chunk_idx, stats)
+            self.sim3_list.append((s, R, t))
+            if chunk_idx == 1:
+                self.written_sim3.append(self.sim3_list[0])
+            else:
+                self.written_sim3.append(
+                    accumulate_sim3_transforms([self.written_sim3[-1], self.sim3_list[-1]])[-1]
                 )
-                chunk_data1 = pre_predictions
-                chunk_data2 = cur_predictions
+        self.write_chunk(chunk_idx, cur_predictions, self.written_sim3[-1])
+        return time.perf_counter() - start
+
+    def process_long_sequence(self):
+        self.chunker = AdaptiveChunker(
+            self.config, len(self.img_list), max_views=self.max_chunk_views()
+        )
+        self.chunk_indices = self.chunker.chunks
+        self.chunker.next_chunk()
+
+        print(
+            f"Processing {len(self.img_list)} images in chunks of size {self.chunk_size} "
+            f"with {self.overlap} overlap"
+            + (" (adaptive)" if self.chunker.enable else "")
+        )
 
-                point_map1 = depth_to_point_cloud_vectorized(
-                    chunk_data1.depth, chunk_data1.intrinsics, chunk_data1.extrinsics
+        # Pipeline: inference of chunk k+1 runs on this thread while a single worker
+        # aligns chunk k to chunk k-1 and writes its point cloud, in chunk order
+        self.written_sim3 = []  # accumulated Sim(3) each chunk was written with
+        pending = deque()  # (chunk_idx, future) of the chunks queued on the worker
+        num_described = 0  # frames given to the online loop detector
+        inference_time = 0.0
+        worker_time = 0.0
+        pipeline_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1) as worker:
+            chunk_idx = 0
+            while chunk_idx < len(self.chunk_indices):
+                print(
+                    f"[Progress]: chunk {chunk_idx}, "
+                    f"frames {self.chunk_indices[chunk_idx][0]}/{len(self.img_list)}"
                 )
-                point_map2 = depth_to_point_cloud_vectorized(
-                    chunk_data2.depth, chunk_data2.intrinsics, chunk_data2.extrinsics
+                # Plan the next chunk, so its frames prefetch. The plan uses the alignment
+                # of a fixed earlier chunk: wait for it, so the chunking is reproducible
+                awaited = self.chunker.awaited_alignment()
+                while awaited is not None and pending and pending[0][0] <= awaited:
+                    worker_time += pending.popleft()[1].result()
+                next_chunk = self.chunker.next_chunk()
+                if next_chunk is not None:
+                    self.frame_cache.prefetch(range(*next_chunk))
+                start = time.perf_counter()
+                cur_predictions = self.process_single_chunk(
+                    self.chunk_indices[chunk_idx], chunk_idx=chunk_idx
                 )
+                torch.cuda.empty_cache()
 
-                point_map1 = point_map1[-self.overlap :]
-                point_map2 = point_map2[: self.overlap]
-                conf1 = chunk_data1.conf[-self.overlap :]
-                conf2 = chunk_data2.conf[: self.overlap]
-
-                if self.config["Model"]["align_method"] == "scale+se3":
-                    chunk1_depth = np.squeeze(chunk_data1.depth[-self.overlap :])
-                    chunk2_depth = np.squeeze(chunk_data2.depth[: self.overlap])
-                    chunk1_depth_conf = np.squeeze(chunk_data1.conf[-self.overlap :])
-                    chunk2_depth_conf = np.squeeze(chunk_data2.conf[: self.overlap])
-                else:
-                    chunk1_depth = None
-                    chunk2_depth = None
-                    chunk1_depth_conf = None
-                    chunk2_depth_conf = None
-
-                s, R, t = self.align_2pcds(
-                    point_map1,
-                    conf1,
-                    point_map2,
-                    conf2,
-                    chunk1_depth,
-                    chunk2_depth,
-                    chunk1_depth_conf,
-                    chunk2_depth_conf,
+                # Keep at most one chunk queued behind the one being aligned
+                while len(pending) >= 2 or (pending and pending[0][1].done()):
+                    worker_time += pending.popleft()[1].result()
+                pending.append(
+                    (chunk_idx, worker.submit(self._align_and_write, chunk_idx, cur_predictions))
                 )
-                self.sim3_list.append((s, R, t))
-
-            pre_predictions = cur_predictions
+                del cur_predictions
+
+                if self.loop_online:
+                    chunk_end = self.chunk_indices[chunk_idx][1]
+                    new_loops = self.loop_detector.add_frames(
+                        self.frame_cache.get(range(num_described, chunk_end))
+                    )
+                    num_described = chunk_end
+                    self.schedule_loop_chunks([(idx1, idx2) for idx1, idx2, _ in new_loops])
+                    self.run_loop_chunks(num_described)
+                inference_time += time.perf_counter() - start
+                chunk_idx += 1
+
+            while pending:
+                worker_time += pending.popleft()[1].result()
+        pipeline_time = time.perf_counter() - pipeline_start
+
+        overlapped = max(0.0, inference_time + worker_time - pipeline_time)
+        print(
+            f"[Pipeline] {pipeline_time:.1f}s for inference {inference_time:.1f}s + "
+            f"alignment/writing {worker_time:.1f}s, overlapped {overlapped:.1f}s "
+            f"({100 * overlapped / max(worker_time, 1e-9):.0f}% of alignment/writing hidden)"
+        )
+        self.chunker.save(os.path.join(self.output_dir, "chunk_stats.json"))
 
         if self.loop_enable:
-            self.loop_list = self.get_loop_pairs()
+            if self.loop_online:
+                self.loop_detector.get_image_paths()
+                self.loop_detector.save_results()
+                self.loop_list = self.loop_detector.get_loop_list()
+            else:
+                self.loop_list = self.get_loop_pairs()
+                self.schedule_loop_chunks(self.loop_list)
             del self.loop_detector  # Save GPU Memory
 
             torch.cuda.empty_cache()
 
             print("Loop SIM(3) estimating...")
-            loop_results = process_loop_list(
-                self.chunk_indices,
-                self.loop_list,
-                half_window=int(self.config["Model"]["loop_chunk_size"] / 2),
-            )
-            loop_results = remove_duplicates(loop_results)
-            print(loop_results)
-            # return e.g. (31, (1574, 1594), 2, (129, 149))
-            for item in loop_results:
-                single_chunk_predictions = self.process_single_chunk(
-                    item[1], range_2=item[3], is_loop=True
-                )
-
-                self.loop_predict_list.append((item, single_chunk_predictions))
-                print(item)
+            self.run_loop_chunks(len(self.img_list))
 
             self.loop_sim3_list = self.get_loop_sim3_from_loop_predict(self.loop_predict_list)
 
@@ -623,76 +785,17 @@ class DA3_Streaming:
                 input_abs_poses, optimized_abs_poses, save_name="sim3_opt_result.png"
             )
 
-        print("Apply alignment")
         self.sim3_list = accumulate_sim3_transforms(self.sim3_list)
-        for chunk_idx in range(len(self.chunk_indices) - 1):
-            print(f"Applying {chunk_idx+1} -> {chunk_idx} (Total {len(self.chunk_indices)-1})")
-            s, R, t = self.sim3_list[chunk_idx]
-
-            chunk_data = np.load(
-                os.path.join(self.result_unaligned_dir, f"chunk_{chunk_idx+1}.npy"),
-                allow_pickle=True,
-            ).item()
-
-            aligned_chunk_data = {}
-
-            aligned_chunk_data["world_points"] = depth_to_point_cloud_optimized_torch(
-                chunk_data.depth, chunk_data.intrinsics, chunk_data.extrinsics
-            )
-            aligned_chunk_data["world_points"] = apply_sim3_direct_torch(
-                aligned_chunk_data["world_points"], s, R, t
-            )
-
-            aligned_chunk_data["conf"] = chunk_data.conf
-            aligned_chunk_data["images"] = chunk_data.processed_images
-
-            aligned_path = os.path.join(self.result_aligned_dir, f"chunk_{chunk_idx+1}.npy")
-            np.save(aligned_path, aligned_chunk_data)
-
-            if chunk_idx == 0:
-                chunk_data_first = np.load(
-                    os.path.join(self.result_unaligned_dir, "chunk_0.npy"), allow_pickle=True
-                ).item()
-                np.save(os.path.join(self.result_aligned_dir, "chunk_0.npy"), chunk_data_first)
-                points_first = depth_to_point_cloud_vectorized(
-                    chunk_data_first.depth,
-                    chunk_data_first.intrinsics,
-                    chunk_data_first.extrinsics,
-                )
-                colors_first = chunk_data_first.processed_images
-                confs_first = chunk_data_first.conf
-                ply_path_first = os.path.join(self.pcd_dir, "0_pcd.ply")
-                save_confident_pointcloud_batch(
-                    points=points_first,  # shape: (H, W, 3)
-                    colors=colors_first,  # shape: (H, W, 3)
-                    confs=confs_first,  # shape: (H, W)
-                    output_path=ply_path_first,
-                    conf_threshold=np.mean(confs_first)
-                    * self.config["Model"]["Pointcloud_Save"]["conf_threshold_coef"],
-                    sample_ratio=self.config["Model"]["Pointcloud_Save"]["sample_ratio"],
-                )
-                if self.config["Model"]["save_depth_conf_result"]:
-                    predictions = chunk_data_first
-                    self.save_depth_conf_result(predictions, 0, 1, np.eye(3), np.array([0, 0, 0]))
-
-            points = aligned_chunk_data["world_points"].reshape(-1, 3)
-            colors = (aligned_chunk_data["images"].reshape(-1, 3)).astype(np.uint8)
-            confs = aligned_chunk_data["conf"].reshape(-1)
-            ply_path = os.path.join(self.pcd_dir, f"{chunk_idx+1}_pcd.ply")
-            save_confident_pointcloud_batch(
-                points=points,  # shape: (H, W, 3)
-                colors=colors,  # shape: (H, W, 3)
-                confs=confs,  # shape: (H, W)
-                output_path=ply_path,
-                conf_threshold=np.mean(confs)
-                * self.config["Model"]["Pointcloud_Save"]["conf_threshold_coef"],
-                sample_ratio=self.config["Model"]["Pointcloud_Save"]["sample_ratio"],
-            )
 
-            if self.config["Model"]["save_depth_conf_result"]:
-                predictions = chunk_data
-                predictions.depth *= s
-                self.save_depth_conf_result(predictions, chunk_idx + 1, s, R, t)
+        # Correction pass: rewrite the chunks whose pose loop closure changed
+        for chunk_idx in range(1, len(self.chunk_indices)):
+            s, R, t = self.sim3_list[chunk_idx - 1]
+            s_w, R_w, t_w = self.written_sim3[chunk_idx]
+            if np.isclose(s, s_w) and np.allclose(R, R_w) and np.allclose(t, t_w):
+                continue
+            print(f"Re-applying {chunk_idx} -> 0 after loop closure")
+            chunk_data = self.unaligned_store.read(f"chunk_{chunk_idx}")
+            self.write_chunk(chunk_idx, chunk_data, (s, R, t))
 
         self.save_camera_poses()
 
@@ -709,7 +812,14 @@ class DA3_Streaming:
             raise ValueError(f"[DIR EMPTY] No images found in {self.img_dir}!")
         print(f"Found {len(self.img_list)} images")
 
+        self.frame_cache = FrameCache(
+            self.img_list, max_bytes=int(self.config["Model"].get("frame_cache_gb", 2.0) * 2**30)
+        )
+        if self.loop_enable and self.config["Loop"]["SALAD"].get("from_frame_cache", False):
+            self.loop_detector.frame_cache = self.frame_cache
+
         self.process_long_sequence()
+        print(f"[FrameCache] {self.frame_cache.summary()}")
 
     def save_camera_poses(self):
         """
@@ -734,12 +844,10 @@ class DA3_Streaming:
         all_poses = [None] * len(self.img_list)
         all_intrinsics = [None] * len(self.img_list)
 
-        first_chunk_range, first_chunk_extrinsics = self.all_camera_poses[0]
+        _, first_chunk_extrinsics = self.all_camera_poses[0]
         _, first_chunk_intrinsics = self.all_camera_intrinsics[0]
 
-        for i, idx in enumerate(
-            range(first_chunk_range[0], first_chunk_range[1] - self.overlap_e)
-        ):
+        for i, idx in enumerate(range(*self.emit_range(0))):
             w2c = np.eye(4)
             w2c[:3, :] = first_chunk_extrinsics[i]
             c2w = np.linalg.inv(w2c)
@@ -747,7 +855,7 @@ class DA3_Streaming:
             all_intrinsics[idx] = first_chunk_intrinsics[i]
 
         for chunk_idx in range(1, len(self.all_camera_poses)):
-            chunk_range, chunk_extrinsics = self.all_camera_poses[chunk_idx]
+            _, chunk_extrinsics = self.all_camera_poses[chunk_idx]
             _, chunk_intrinsics = self.all_camera_intrinsics[chunk_idx]
             s, R, t = self.sim3_list[
                 chunk_idx - 1
@@ -757,22 +865,16 @@ class DA3_Streaming:
             S[:3, :3] = s * R
             S[:3, 3] = t
 
-            chunk_range_end = (
-                chunk_range[1] - self.overlap_e
-                if chunk_idx < len(self.all_camera_poses) - 1
-                else chunk_range[1]
-            )
-
-            for i, idx in enumerate(range(chunk_range[0] + self.overlap_s, chunk_range_end)):
+            for i, idx in enumerate(range(*self.emit_range(chunk_idx))):
                 w2c = np.eye(4)
-                w2c[:3, :] = chunk_extrinsics[i + self.overlap_s]
+                w2c[:3, :] = chunk_extrinsics[i]
                 c2w = np.linalg.inv(w2c)
 
                 transformed_c2w = S @ c2w  # Be aware of the left multiplication!
                 transformed_c2w[:3, :3] /= s  # Normalize rotation
 
                 all_poses[idx] = transformed_c2w
-                all_intrinsics[idx] = chunk_intrinsics[i + self.overlap_s]
+                all_intrinsics[idx] = chunk_intrinsics[i]
 
         poses_path = os.path.join(self.output_dir, "camera_poses.txt")
         with open(poses_path, "w") as f:
@@ -820,7 +922,7 @@ class DA3_Streaming:
         """
         Clean up temporary files and calculate reclaimed disk space.
 
-        This method deletes all temporary files generated during processing from three directories:
+        This method deletes the three chunk stores (``_tmp_results_*``) written during processing:
         - Unaligned results
         - Aligned results
         - Loop results
@@ -829,31 +931,16 @@ class DA3_Streaming:
         ~35 GiB for 2700-frame KITTI 05,
         or ~5 GiB for 300-frame short seq.
         """
+        if self.frame_cache is not None:
+            self.frame_cache.close()
+
         if not self.delete_temp_files:
             return
 
         total_space = 0
-
-        print(f"Deleting the temp files under {self.result_unaligned_dir}")
-        for filename in os.listdir(self.result_unaligned_dir):
-            file_path = os.path.join(self.result_unaligned_dir, filename)
-            if os.path.isfile(file_path):
-                total_space += os.path.getsize(file_path)
-                os.remove(file_path)
-
-        print(f"Deleting the temp files under {self.result_aligned_dir}")
-        for filename in os.listdir(self.result_aligned_dir):
-            file_path = os.path.join(self.result_aligned_dir, filename)
-            if os.path.isfile(file_path):
-                total_space += os.path.getsize(file_path)
-                os.remove(file_path)
-
-        print(f"Deleting the temp files under {self.result_loop_dir}")
-        for filename in os.listdir(self.result_loop_dir):
-            file_path = os.path.join(self.result_loop_dir, filename)
-            if os.path.isfile(file_path):
-                total_space += os.path.getsize(file_path)
-                os.remove(file_path)
+        for store in (self.unaligned_store, self.aligned_store, self.loop_store):
+            print(f"Deleting the temp files under {store.root}")
+            total_space += store.clear()
         print("Deleting temp files done.")
 
         print(f"Saved disk space: {total_space/1024/1024/1024:.4f} GiB")
@@ -912,16 +999,20 @@ if __name__ == "__main__":
         warmup_numba()
 
     da3_streaming = DA3_Streaming(image_dir, save_dir, config)
-    da3_streaming.run()
-    da3_streaming.close()
+    try:
+        da3_streaming.run()
+    finally:
+        da3_streaming.close()
 
     del da3_streaming
     torch.cuda.empty_cache()
     gc.collect()
 
-    all_ply_path = os.path.join(save_dir, "pcd/combined_pcd.ply")
+    point_cloud_save = config["Model"]["Pointcloud_Save"]
+    merged_format = point_cloud_save.get("merged_format", "ply")
+    all_ply_path = os.path.join(save_dir, f"pcd/combined_pcd.{merged_format}")
     input_dir = os.path.join(save_dir, "pcd")
     print("Saving all the point clouds")
-    merge_ply_files(input_dir, all_ply_path)
+    merge_ply_files(input_dir, all_ply_path, voxel_size=point_cloud_save.get("voxel_size", 0.0))
     print("DA3-Streaming done.")
     sys.exit()
@@ -0,0 +1,252 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import threading
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+
+def frame_motion_deg(extrinsics, depth, percentile=90):
+    """
+    View change between consecutive frames of a chunk, in degrees per frame.
+
+    The change of a frame pair is its relative rotation angle plus the parallax angle
+    of the camera translation perpendicular to the viewing direction, at the median
+    scene depth. Returns the ``percentile`` over the pairs, so a turn in part of the
+    chunk is not averaged away.
+
+    extrinsics: [N, 3, 4] w2c of the chunk
+    depth: [N, H, W] depth of the chunk, in the units of ``extrinsics``
+    """
+    if len(extrinsics) < 2:
+        return 0.0
+    R = extrinsics[:, :3, :3].astype(np.float64)
+    t = extrinsics[:, :3, 3].astype(np.float64)
+    centers = -np.einsum("nji,nj->ni", R, t)
+
+    rotation = Rotation.from_matrix(R[1:] @ R[:-1].transpose(0, 2, 1)).magnitude()
+    step = centers[1:] - centers[:-1]
+    axis = R[:-1, 2]  # viewing direction in world coordinates
+    lateral = np.linalg.norm(step - np.sum(step * axis, axis=1, keepdims=True) * axis, axis=1)
+    sampled = depth[:, ::8, ::8]
+    scene_depth = np.median(sampled[sampled > 0]) if np.any(sampled > 0) else 1.0
+    parallax = np.arctan2(lateral, scene_depth)
+    return float(np.degrees(np.percentile(rotation + parallax, percentile)))
+
+
+class AdaptiveChunker:
+    """
+    Plans the chunks of a sequence one at a time.
+
+    With ``Model.Adaptive_Chunk.enable``, the size of the next chunk and its overlap
+    with the previous one follow the latest observations:
+    - the IRLS residual and inlier ratio of the latest chunk-to-chunk alignment
+      (``weighted_align_point_maps(..., return_stats=True)``)
+    - the view change per frame of the latest chunk (``frame_motion_deg``)
+
+    A hard step (poor alignment or fast motion) grows the overlap and shrinks the
+    chunk; an easy step (good alignment and slow motion) shrinks the overlap and grows
+    the chunk. Both stay within the configured bounds, and the chunk size within the
+    views that fit the GPU memory budget (``max_views``). ``Model.chunk_size`` and
+    ``Model.overlap`` are the initial values.
+
+    Disabled, the chunks are the fixed ``chunk_size``/``overlap`` ones; the statistics
+    are recorded in both cases, for comparison.
+
+    Chunk ``j`` is planned while chunk ``j - 1`` is inferred and chunk ``j - 2`` is
+    aligned on the pipeline worker, so the plan of chunk ``j`` uses the motion of
+    chunk ``j - MOTION_LAG`` and the alignment of chunk ``j - ALIGNMENT_LAG``. Before
+    planning, the caller waits for that alignment (``awaited_alignment``), so the
+    chunking does not depend on thread timing. The observations may be recorded from
+    another thread than the planning.
+    """
+
+    MOTION_LAG = 2
+    ALIGNMENT_LAG = 3
+
+    def __init__(self, config, num_frames, max_views=None):
+        model_config = config["Model"]
+        adaptive = model_config.get("Adaptive_Chunk", {})
+        self.enable = adaptive.get("enable", False)
+        self.num_frames = num_frames
+        self.chunk_size = model_config["chunk_size"]
+        self.overlap = model_config["overlap"]
+        if self.overlap >= self.chunk_size:
+            raise ValueError(
+                f"[SETTING ERROR] Overlap ({self.overlap}) \
+                    must be less than chunk size ({self.chunk_size})"
+            )
+
+        self.min_chunk_size = adaptive.get("min_chunk_size", self.chunk_size)
+        self.max_chunk_size = adaptive.get("max_chunk_size", self.chunk_size)
+        self.min_overlap = adaptive.get("min_overlap", self.overlap)
+        self.max_overlap = adaptive.get("max_overlap", self.overlap)
+        self.min_new_frames = adaptive.get("min_new_frames", 1)
+        if self.enable and max_views is not None and max_views < self.max_chunk_size:
+            print(f"[Adaptive chunk] GPU memory budget fits {max_views} views per chunk")
+            self.max_chunk_size = max(max_views, 2)
+            self.min_chunk_size = min(self.min_chunk_size, self.max_chunk_size)
+            self.chunk_size = min(self.chunk_size, self.max_chunk_size)
+            self.overlap = min(self.overlap, self.chunk_size // 2)
+        self.step = adaptive.get("step", 0.25)
+        self.min_inlier_ratio = adaptive.get("min_inlier_ratio", 0.6)
+        self.good_inlier_ratio = adaptive.get("good_inlier_ratio", 0.8)
+        self.max_residual = adaptive.get("max_residual", 0.05)
+        self.slow_motion_deg = adaptive.get("slow_motion_deg", 0.5)
+        self.fast_motion_deg = adaptive.get("fast_motion_deg", 2.0)
+
+        self.chunks = []  # [(begin_idx, end_idx), ...]
+        self.records = []  # per chunk: range, overlap, decision, motion, alignment stats
+        self._lock = threading.Lock()
+
+    def awaited_alignment(self):
+        """Chunk whose alignment statistics the next plan uses, None if there is none."""
+        with self._lock:
+            chunk_idx = len(self.chunks) - self.ALIGNMENT_LAG
+        return chunk_idx if self.enable and chunk_idx >= 1 else None
+
+    def next_chunk(self):
+        """Plan the next chunk and return its (begin_idx, end_idx), or None at the end."""
+        with self._lock:
+            return self._next_chunk()
+
+    def _next_chunk(self):
+        if not self.chunks:
+            chunk = (0, min(self.chunk_size, self.num_frames))
+            decision = "initial"
+        else:
+            prev_begin, prev_end = self.chunks[-1]
+            if prev_end >= self.num_frames:
+                return None
+            decision = self._decide() if self.enable else "fixed"
+            overlap = min(self.overlap, prev_end - prev_begin - 1)
+            begin = prev_end - overlap
+            chunk = (begin, min(begin + self.chunk_size, self.num_frames))
+
+        self.chunks.append(chunk)
+        self.records.append(
+            {
+                "chunk": len(self.chunks) - 1,
+                "begin": chunk[0],
+                "end": chunk[1],
+                "overlap": self.chunks[-2][1] - chunk[0] if len(self.chunks) > 1 else 0,
+                "decision": decision,
+            }
+        )
+        if self.enable and len(self.chunks) > 1:
+            print(
+                f"[Adaptive chunk] chunk {len(self.chunks) - 1}: frames [{chunk[0]}, {chunk[1]}), "
+                f"overlap {self.records[-1]['overlap']} ({decision})"
+            )
+        return chunk
+
+    def _observed(self, chunk_idx, key):
+        if chunk_idx < 0 or key not in self.records[chunk_idx]:
+            return None
+        return self.records[chunk_idx]
+
+    def _decide(self):
+        """Update ``chunk_size`` and ``overlap`` from the observations of earlier chunks."""
+        chunk_idx = len(self.chunks)
+        motion = self._observed(chunk_idx - self.MOTION_LAG, "motion_deg")
+        alignment = self._observed(chunk_idx - self.ALIGNMENT_LAG, "inlier_ratio")
+        motion_deg = motion["motion_deg"] if motion is not None else None
+
+        hard = (motion_deg is not None and motion_deg > self.fast_motion_deg) or (
+            alignment is not None
+            and (
+                alignment["inlier_ratio"] < self.min_inlier_ratio
+                or alignment["residual"] > self.max_residual
+            )
+        )
+        easy = (
+            motion_deg is not None
+            and motion_deg < self.slow_motion_deg
+            and (
+                alignment is None
+                or (
+                    alignment["inlier_ratio"] >= self.good_inlier_ratio
+                    and alignment["residual"] <= 0.5 * self.max_residual
+                )
+            )
+        )
+
+        if hard:
+            factor, decision = 1 + self.step, "hard"
+        elif easy:
+            factor, decision = 1 / (1 + self.step), "easy"
+        else:
+            return "keep"
+
+        size = round(self.chunk_size / factor)
+        self.chunk_size = int(np.clip(size, self.min_chunk_size, self.max_chunk_size))
+        max_overlap = max(min(self.max_overlap, self.chunk_size - self.min_new_frames), 1)
+        overlap = round(self.overlap * factor)
+        self.overlap = int(np.clip(overlap, min(self.min_overlap, max_overlap), max_overlap))
+        return decision
+
+    def observe_motion(self, chunk_idx, extrinsics, depth):
+        """Record the view change per frame of an inferred chunk."""
+        motion_deg = frame_motion_deg(extrinsics, depth)
+        with self._lock:
+            self.records[chunk_idx]["motion_deg"] = motion_deg
+
+    def observe_alignment(self, chunk_idx, stats):
+        """Record the alignment statistics of chunk ``chunk_idx`` to the previous one."""
+        with self._lock:
+            self.records[chunk_idx].update(stats)
+            record = dict(self.records[chunk_idx])
+        print(
+            f"[Chunk stats] chunk {chunk_idx}: motion {record.get('motion_deg', math.nan):.2f} "
+            f"deg/frame, IRLS residual {stats['residual']:.5f}, "
+            f"inlier ratio {stats['inlier_ratio']:.3f}"
+        )
+
+    def summary(self):
+        """Inference cost and alignment error of the chunking of the whole sequence."""
+        with self._lock:
+            return self._summary()
+
+    def _summary(self):
+        aligned = [r for r in self.records if "residual" in r]
+        num_overlap = sum(r["overlap"] for r in self.records)
+        return {
+            "adaptive": self.enable,
+            "num_frames": self.num_frames,
+            "num_chunks": len(self.chunks),
+            "inferred_frames": sum(end - begin for begin, end in self.chunks),
+            "overlap_per_output_frame": num_overlap / max(self.num_frames, 1),
+            "mean_residual": float(np.mean([r["residual"] for r in aligned])) if aligned else None,
+            "max_residual": float(np.max([r["residual"] for r in aligned])) if aligned else None,
+            "min_inlier_ratio": (
+                float(np.min([r["inlier_ratio"] for r in aligned])) if aligned else None
+            ),
+        }
+
+    def save(self, path):
+        """Write the summary and the per-chunk records to ``path`` (JSON)."""
+        with self._lock:
+            summary = self._summary()
+            records = [dict(r) for r in self.records]
+        print(
+            f"[Chunking] {summary['num_chunks']} chunks, "
+            f"{summary['overlap_per_output_frame']:.3f} overlap frames per output frame, "
+            f"IRLS residual mean {summary['mean_residual']} / max {summary['max_residual']}, "
+            f"min inlier ratio {summary['min_inlier_ratio']}"
+        )
+        with open(path, "w") as f:
+            json.dump({"summary": summary, "chunks": records}, f, indent=2)
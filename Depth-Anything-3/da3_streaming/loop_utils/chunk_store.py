@@ -0,0 +1,108 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+
+# Fields of a Prediction kept on disk for each chunk
+PREDICTION_FIELDS = ("depth", "conf", "processed_images", "extrinsics", "intrinsics")
+
+# Fields that may be stored at reduced precision
+_COMPRESSIBLE_FIELDS = ("depth", "conf", "world_points")
+
+
+class ChunkStore:
+    """
+    Per-chunk directories of raw ``.npy`` arrays.
+
+    Each chunk is a directory ``<root>/<key>/`` holding one plain ``.npy`` file per
+    field, so a chunk is never unpickled as a whole: ``read`` memory-maps the files
+    and copies out only the frames it is asked for.
+
+    Args:
+        root: Directory of the store, created if missing
+        float_dtype: Storage dtype of depth, conf and world points ("float32" or
+            "float16"); everything is read back as float32
+    """
+
+    def __init__(self, root, float_dtype="float32"):
+        if np.dtype(float_dtype) not in (np.float16, np.float32):
+            raise ValueError(f"Unsupported chunk store dtype: {float_dtype}")
+        self.root = root
+        self.float_dtype = np.dtype(float_dtype)
+        os.makedirs(self.root, exist_ok=True)
+
+    def chunk_dir(self, key):
+        return os.path.join(self.root, str(key))
+
+    def save(self, key, arrays):
+        """
+        Save the arrays of one chunk.
+
+        Args:
+            key: Chunk name, e.g. ``chunk_3``
+            arrays: Mapping of field name to array, or an object with the
+                ``PREDICTION_FIELDS`` attributes (e.g. a Prediction)
+        """
+        if not isinstance(arrays, dict):
+            arrays = {field: getattr(arrays, field) for field in PREDICTION_FIELDS}
+        chunk_dir = self.chunk_dir(key)
+        os.makedirs(chunk_dir, exist_ok=True)
+        for field, array in arrays.items():
+            array = np.asarray(array)
+            if field in _COMPRESSIBLE_FIELDS:
+                array = array.astype(self.float_dtype, copy=False)
+            np.save(os.path.join(chunk_dir, f"{field}.npy"), array)
+
+    def read(self, key, fields=None, frames=slice(None)):
+        """
+        Read frames of one chunk into memory.
+
+        Args:
+            key: Chunk name
+            fields: Fields to read (all stored fields by default)
+            frames: Index along the frame axis, e.g. ``slice(-overlap, None)``;
+                only these frames are read from disk
+
+        Returns:
+            Namespace with one array attribute per field
+        """
+        chunk_dir = self.chunk_dir(key)
+        if fields is None:
+            fields = [name[:-4] for name in sorted(os.listdir(chunk_dir)) if name.endswith(".npy")]
+        chunk = SimpleNamespace()
+        for field in fields:
+            array = np.load(os.path.join(chunk_dir, f"{field}.npy"), mmap_mode="r")[frames]
+            dtype = np.float32 if array.dtype == np.float16 else array.dtype
+            setattr(chunk, field, np.array(array, dtype=dtype))
+        return chunk
+
+    def nbytes(self):
+        """Disk space used by the store."""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+        return total
+
+    def clear(self):
+        """Delete the store from disk and return the number of bytes freed."""
+        if not os.path.isdir(self.root):
+            return 0
+        total = self.nbytes()
+        shutil.rmtree(self.root)
+        return total
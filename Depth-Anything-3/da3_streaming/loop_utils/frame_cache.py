@@ -0,0 +1,123 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from depth_anything_3.services.upload import prescale_frame
+
+
+class FrameCache:
+    """
+    Byte-budgeted LRU cache of decoded frames, shared by overlapping chunks, loop
+    chunks and the loop detector.
+
+    Frames are kept as RGB uint8 arrays downscaled to the size the model's input
+    processor resizes them to (see ``prescale_frame``), so feeding a cached frame to
+    ``DepthAnything3.inference`` gives the same result as feeding its path. Misses
+    and prefetches are decoded on a pool of background threads.
+
+    Args:
+        image_paths: Paths of the sequence, indexed by frame index
+        max_bytes: Budget of the decoded frames kept resident
+        process_res: Processing resolution of the model
+        process_res_method: Resize method of the model
+        num_workers: Decoding threads
+    """
+
+    def __init__(
+        self,
+        image_paths,
+        max_bytes,
+        process_res=504,
+        process_res_method="upper_bound_resize",
+        num_workers=4,
+    ):
+        self.image_paths = list(image_paths)
+        self.max_bytes = max_bytes
+        self.process_res = process_res
+        self.process_res_method = process_res_method
+
+        self.nbytes = 0
+        self.requested = 0
+        self.decoded = 0
+
+        self._frames = OrderedDict()  # frame index -> frame, least recently used first
+        self._pending = {}  # frame index -> Future of a decode in flight
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="frame-cache")
+
+    def _decode(self, index):
+        with Image.open(self.image_paths[index]) as img:
+            frame = np.asarray(img.convert("RGB"))
+        return prescale_frame(frame, self.process_res, self.process_res_method)
+
+    def _load(self, index):
+        frame = self._decode(index)
+        with self._lock:
+            self._pending.pop(index, None)
+            self.decoded += 1
+            self._frames[index] = frame
+            self.nbytes += frame.nbytes
+            while self.nbytes > self.max_bytes and self._frames:
+                _, evicted = self._frames.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return frame
+
+    def _submit(self, index):
+        # Called with the lock held
+        future = self._pending.get(index)
+        if future is None:
+            future = self._pool.submit(self._load, index)
+            self._pending[index] = future
+        return future
+
+    def prefetch(self, indices):
+        """Start decoding the frames of ``indices`` that are not resident."""
+        with self._lock:
+            for index in indices:
+                if index not in self._frames:
+                    self._submit(index)
+
+    def get(self, indices):
+        """Frames of ``indices``, decoding the missing ones in parallel."""
+        frames = [None] * len(indices)
+        futures = {}
+        with self._lock:
+            self.requested += len(indices)
+            for i, index in enumerate(indices):
+                if index in self._frames:
+                    self._frames.move_to_end(index)
+                    frames[i] = self._frames[index]
+                else:
+                    futures[i] = self._submit(index)
+        for i, future in futures.items():
+            frames[i] = future.result()
+        return frames
+
+    def summary(self):
+        return (
+            f"{self.requested} frames requested, {self.decoded} decoded, "
+            f"{len(self._frames)} resident ({self.nbytes / 2**20:.0f} MiB)"
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._frames.clear()
+            self.nbytes = 0
@@ -19,6 +19,7 @@ import os
 import sys
 from pathlib import Path
 import faiss
+import numpy as np
 import torch
 import torchvision.transforms as T
 from PIL import Image
@@ -74,11 +75,13 @@ class VPRModel(nn.Module):
 class LoopDetector:
     """Loop detector class for detecting loop closures in image sequences"""
 
-    def __init__(self, image_dir, output="loop_closures.txt", config=None):
+    def __init__(self, image_dir, output="loop_closures.txt", config=None, frame_cache=None):
         """Initialize the loop detector
 
         Args:
             image_dir: Directory path containing images
+            frame_cache: Optional FrameCache; if set, its image list and decoded frames
+                are used instead of reading the images from image_dir
             ckpt_path: Model checkpoint path
             image_size: Image resize dimensions [height width]
             batch_size: Batch size for processing
@@ -97,13 +100,24 @@ class LoopDetector:
         self.top_k = self.config["Loop"]["SALAD"]["top_k"]
         self.use_nms = self.config["Loop"]["SALAD"]["use_nms"]
         self.nms_threshold = self.config["Loop"]["SALAD"]["nms_threshold"]
+        # Minimum frame distance of a loop pair
+        self.exclusion_window = self.config["Loop"]["SALAD"].get("exclusion_window", 10)
+        # Number of descriptors above which retrieval switches to an HNSW index (0: never)
+        self.ann_threshold = self.config["Loop"]["SALAD"].get("ann_threshold", 20000)
         self.output = output
+        self.frame_cache = frame_cache
 
         self.model = None
         self.device = None
         self.image_paths = None
         self.descriptors = None
         self.loop_closures = None
+        self.embed_size = None
+
+        # Online mode state (see add_descriptors)
+        self.online_index = None
+        self.online_pending = None
+        self.online_suppressed = None
 
     def _input_transform(self, image_size=None):
         """Create image transformation function"""
@@ -150,6 +164,10 @@ class LoopDetector:
 
     def get_image_paths(self):
         """Get paths of all image files in directory"""
+        if self.frame_cache is not None:
+            self.image_paths = [Path(path) for path in self.frame_cache.image_paths]
+            return self.image_paths
+
         image_extensions = [".jpg", ".jpeg", ".png"]
         image_paths = []
 
@@ -178,96 +196,124 @@ class LoopDetector:
             batch_paths = self.image_paths[i : i + self.batch_size]
             batch_imgs = []
 
-            for path in batch_paths:
-                try:
-                    img = Image.open(path).convert("RGB")
-                    img = transform(img)
-                    batch_imgs.append(img)
-                except Exception as e:
-                    print(f"Error processing image {path}: {e}")
-                    img = (
-                        torch.zeros(3, 224, 224)
-                        if self.image_size is None
-                        else torch.zeros(3, self.image_size[0], self.image_size[1])
-                    )
-                    batch_imgs.append(img)
-
-            batch_tensor = torch.stack(batch_imgs).to(self.device)
-
-            with torch.no_grad():
-                with torch.autocast(
-                    device_type="cuda" if torch.cuda.is_available() else "cpu", dtype=torch.float16
-                ):
-                    batch_descriptors = self.model(batch_tensor).cpu()
-
-            descriptors.append(batch_descriptors)
+            if self.frame_cache is not None:
+                # Frames decoded for the chunks, at the model's processing resolution
+                batch_frames = self.frame_cache.get(range(i, i + len(batch_paths)))
+                batch_imgs = [transform(Image.fromarray(frame)) for frame in batch_frames]
+            else:
+                for path in batch_paths:
+                    try:
+                        img = Image.open(path).convert("RGB")
+                        img = transform(img)
+                        batch_imgs.append(img)
+                    except Exception as e:
+                        print(f"Error processing image {path}: {e}")
+                        img = (
+                            torch.zeros(3, 224, 224)
+                            if self.image_size is None
+                            else torch.zeros(3, self.image_size[0], self.image_size[1])
+                        )
+                        batch_imgs.append(img)
+
+            descriptors.append(self._describe(torch.stack(batch_imgs)))
 
         self.descriptors = torch.cat(descriptors)
         return self.descriptors
 
-    def _apply_nms_filter(self, loop_closures, nms_threshold):
-        """Apply Non-Maximum Suppression (NMS) filtering to loop pairs"""
+    def _describe(self, batch_tensor):
+        """Descriptors of a batch of transformed images."""
+        batch_tensor = batch_tensor.to(self.device)
+        with torch.no_grad():
+            with torch.autocast(
+                device_type="cuda" if torch.cuda.is_available() else "cpu", dtype=torch.float16
+            ):
+                return self.model(batch_tensor).cpu()
+
+    def _make_index(self, descriptors=None):
+        """Inner-product index, approximate (HNSW) above ``ann_threshold`` descriptors."""
+        embed_size = self.embed_size
+        num = 0 if descriptors is None else len(descriptors)
+        if self.ann_threshold and num > self.ann_threshold:
+            index = faiss.IndexHNSWFlat(embed_size, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = max(64, 4 * self.top_k)
+        else:
+            index = faiss.IndexFlatIP(embed_size)
+        if num:
+            index.add(descriptors)
+        return index
+
+    def _apply_nms_filter(self, loop_closures, nms_threshold, suppressed=None):
+        """
+        Apply Non-Maximum Suppression (NMS) filtering to loop pairs
+
+        Pairs are taken by decreasing similarity; a pair is dropped if either frame is
+        within ``nms_threshold`` frames of an accepted pair. ``suppressed`` (boolean per
+        frame) carries the suppression state across calls in online mode.
+        """
         if not loop_closures or nms_threshold <= 0:
             return loop_closures
 
         sorted_loops = sorted(loop_closures, key=lambda x: x[2], reverse=True)
-        filtered_loops = []
-        suppressed = set()
-
-        max_frame = max(max(idx1, idx2) for idx1, idx2, _ in loop_closures)
+        if suppressed is None:
+            max_frame = max(max(idx1, idx2) for idx1, idx2, _ in loop_closures)
+            suppressed = np.zeros(max_frame + 1, dtype=bool)
 
+        filtered_loops = []
         for idx1, idx2, sim in sorted_loops:
-            if idx1 in suppressed or idx2 in suppressed:
+            if suppressed[idx1] or suppressed[idx2]:
                 continue
 
             filtered_loops.append((idx1, idx2, sim))
 
-            suppress_range = set()
-
-            start1 = max(0, idx1 - nms_threshold)
-            end1 = min(idx1 + nms_threshold + 1, idx2)
-            suppress_range.update(range(start1, end1))
-
-            start2 = max(idx1 + 1, idx2 - nms_threshold)
-            end2 = min(idx2 + nms_threshold + 1, max_frame + 1)
-            suppress_range.update(range(start2, end2))
-
-            suppressed.update(suppress_range)
+            suppressed[max(0, idx1 - nms_threshold) : min(idx1 + nms_threshold + 1, idx2)] = True
+            suppressed[max(idx1 + 1, idx2 - nms_threshold) : idx2 + nms_threshold + 1] = True
 
         return filtered_loops
 
     def _ensure_decending_order(self, tuples_list):
         return [(max(a, b), min(a, b), score) for a, b, score in tuples_list]
 
+    def _candidate_pairs(self, query_ids, similarities, indices):
+        """
+        Loop candidates ``(idx1, idx2, similarity)`` with ``idx1 < idx2`` from a search.
+
+        Of the ``top_k`` nearest neighbours of each query outside the temporal
+        exclusion window, keeps those above the similarity threshold, each pair once.
+        """
+        query_ids = np.broadcast_to(np.asarray(query_ids)[:, None], indices.shape)
+        valid = (indices >= 0) & (np.abs(query_ids - indices) > self.exclusion_window)
+        valid &= np.cumsum(valid, axis=1) <= self.top_k
+        valid &= similarities > self.similarity_threshold
+
+        idx1 = np.minimum(query_ids, indices)[valid]
+        idx2 = np.maximum(query_ids, indices)[valid]
+        sims = similarities[valid]
+
+        # One entry per pair, with its highest similarity
+        order = np.lexsort((-sims, idx2, idx1))
+        idx1, idx2, sims = idx1[order], idx2[order], sims[order]
+        first = np.ones(len(idx1), dtype=bool)
+        first[1:] = (idx1[1:] != idx1[:-1]) | (idx2[1:] != idx2[:-1])
+        return [
+            (int(a), int(b), float(s)) for a, b, s in zip(idx1[first], idx2[first], sims[first])
+        ]
+
     def find_loop_closures(self):
         """Find loop closures"""
         if self.descriptors is None:
             self.extract_descriptors()
 
-        embed_size = self.descriptors.shape[1]
-        faiss_index = faiss.IndexFlatIP(embed_size)
-
-        normalized_descriptors = self.descriptors.numpy()
-        faiss_index.add(normalized_descriptors)
+        normalized_descriptors = np.ascontiguousarray(self.descriptors.numpy(), dtype=np.float32)
+        self.embed_size = normalized_descriptors.shape[1]
+        faiss_index = self._make_index(normalized_descriptors)
 
         similarities, indices = faiss_index.search(
             normalized_descriptors, self.top_k + 1
         )  # +1 because self is most similar
 
-        loop_closures = []
-        for i in range(len(self.descriptors)):
-            # Skip first result (self)
-            for j in range(1, self.top_k + 1):
-                neighbor_idx = indices[i, j]
-                similarity = similarities[i, j]
-
-                if similarity > self.similarity_threshold and abs(i - neighbor_idx) > 10:
-                    if i < neighbor_idx:
-                        loop_closures.append((i, neighbor_idx, similarity))
-                    else:
-                        loop_closures.append((neighbor_idx, i, similarity))
-
-        loop_closures = list(set(loop_closures))
+        loop_closures = self._candidate_pairs(
+            np.arange(len(normalized_descriptors)), similarities[:, 1:], indices[:, 1:]
+        )
         loop_closures.sort(key=lambda x: x[2], reverse=True)
 
         if self.use_nms and self.nms_threshold > 0:
@@ -276,6 +322,82 @@ class LoopDetector:
         self.loop_closures = self._ensure_decending_order(loop_closures)
         return self.loop_closures
 
+    def add_frames(self, frames):
+        """
+        Online mode: describe the next frames of the sequence and return new loops.
+
+        Args:
+            frames: RGB uint8 arrays of the frames following the ones already added
+
+        Returns:
+            New loop closures ``(idx1, idx2, similarity)`` with ``idx1 > idx2``
+        """
+        if self.model is None or self.device is None:
+            self.load_model()
+
+        transform = self._input_transform(self.image_size)
+        descriptors = []
+        for i in range(0, len(frames), self.batch_size):
+            batch = frames[i : i + self.batch_size]
+            batch = torch.stack([transform(Image.fromarray(frame)) for frame in batch])
+            descriptors.append(self._describe(batch))
+        return self.add_descriptors(torch.cat(descriptors))
+
+    def add_descriptors(self, descriptors):
+        """
+        Online mode: add descriptors of the next frames and return new loops.
+
+        Each new frame is only compared with frames older than the exclusion window,
+        so every loop is found once, from its most recent frame, and loops are
+        reported while the sequence is still streaming. NMS is applied against the
+        loops accepted so far.
+        """
+        descriptors = np.ascontiguousarray(torch.as_tensor(descriptors).float().numpy())
+        if self.online_index is None:
+            self.embed_size = descriptors.shape[1]
+            self.online_index = self._make_index()
+            self.online_pending = np.zeros((0, self.embed_size), dtype=np.float32)
+            self.online_suppressed = np.zeros(0, dtype=bool)
+            self.loop_closures = []
+
+        num_indexed = self.online_index.ntotal
+        first = num_indexed + len(self.online_pending)
+        self.online_pending = np.concatenate([self.online_pending, descriptors])
+        num_frames = first + len(descriptors)
+
+        # Frames old enough for every query of the batch to be compared with
+        num_insert = max(0, num_frames - self.exclusion_window - 1 - num_indexed)
+        self.online_index.add(self.online_pending[:num_insert])
+        self.online_pending = self.online_pending[num_insert:]
+        if isinstance(self.online_index, faiss.IndexFlatIP) and self.ann_threshold:
+            if self.online_index.ntotal > self.ann_threshold:
+                self.online_index = self._make_index(
+                    self.online_index.reconstruct_n(0, self.online_index.ntotal)
+                )
+
+        if self.online_index.ntotal == 0:
+            return []
+
+        # Extra neighbours make up for the ones inside a query's exclusion window
+        k = min(self.online_index.ntotal, self.top_k + len(descriptors) + self.exclusion_window)
+        similarities, indices = self.online_index.search(descriptors, k)
+        candidates = self._candidate_pairs(np.arange(first, num_frames), similarities, indices)
+        candidates.sort(key=lambda x: x[2], reverse=True)
+
+        if self.use_nms and self.nms_threshold > 0:
+            size = num_frames + self.nms_threshold + 1
+            if len(self.online_suppressed) < size:
+                self.online_suppressed = np.pad(
+                    self.online_suppressed, (0, size - len(self.online_suppressed))
+                )
+            candidates = self._apply_nms_filter(
+                candidates, self.nms_threshold, self.online_suppressed
+            )
+
+        new_loops = self._ensure_decending_order(candidates)
+        self.loop_closures.extend(new_loops)
+        return new_loops
+
     def save_results(self):
         """Save loop detection results to file"""
         if self.loop_closures is None:
@@ -0,0 +1,325 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+VERTEX_DTYPE = np.dtype(
+    [
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("z", "<f4"),
+        ("red", "u1"),
+        ("green", "u1"),
+        ("blue", "u1"),
+    ]
+)
+VERTEX_CONF_DTYPE = np.dtype(VERTEX_DTYPE.descr + [("confidence", "<f4")])
+
+_PLY_TYPES = {
+    "char": "i1",
+    "uchar": "u1",
+    "short": "<i2",
+    "ushort": "<u2",
+    "int": "<i4",
+    "uint": "<u4",
+    "float": "<f4",
+    "double": "<f8",
+}
+_PLY_NAMES = {np.dtype(v): k for k, v in _PLY_TYPES.items()}
+
+
+def make_vertices(points, colors, confs=None):
+    """(N, 3) points, (N, 3) colors and optional (N,) confidences -> PLY vertex records."""
+    vertices = np.empty(len(points), dtype=VERTEX_DTYPE if confs is None else VERTEX_CONF_DTYPE)
+    vertices["x"], vertices["y"], vertices["z"] = points[:, 0], points[:, 1], points[:, 2]
+    vertices["red"], vertices["green"], vertices["blue"] = colors[:, 0], colors[:, 1], colors[:, 2]
+    if confs is not None:
+        vertices["confidence"] = confs
+    return vertices
+
+
+def write_ply_header(f, num_vertices, dtype=VERTEX_DTYPE):
+    lines = ["ply", "format binary_little_endian 1.0", f"element vertex {num_vertices}"]
+    lines += [f"property {_PLY_NAMES[dtype[name]]} {name}" for name in dtype.names]
+    lines.append("end_header")
+    f.write("\n".join(lines).encode() + b"\n")
+
+
+def read_ply_header(path):
+    """
+    Parse the header of a binary little-endian PLY holding a single vertex element.
+
+    Returns:
+        (number of vertices, vertex dtype, byte offset of the vertex data)
+    """
+    num_vertices, fields = 0, []
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: PLY header has no end_header")
+            words = line.split()
+            if words[:1] == [b"format"] and words[1] != b"binary_little_endian":
+                raise ValueError(f"{path}: only binary_little_endian PLY files are supported")
+            if words[:2] == [b"element", b"vertex"]:
+                num_vertices = int(words[2])
+            elif words[:1] == [b"element"]:
+                raise ValueError(f"{path}: only vertex elements are supported")
+            elif words[:1] == [b"property"]:
+                fields.append((words[2].decode(), _PLY_TYPES[words[1].decode()]))
+            elif words[:1] == [b"end_header"]:
+                return num_vertices, np.dtype(fields), f.tell()
+
+
+def read_ply_vertices(path):
+    """Memory-map the vertex records of a PLY written by ``write_ply_header``."""
+    num_vertices, dtype, offset = read_ply_header(path)
+    if num_vertices == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(num_vertices,))
+
+
+def voxel_keys(points, voxel_size):
+    return np.floor(points / voxel_size).astype(np.int64)
+
+
+def voxel_downsample(points, confs, voxel_size):
+    """
+    Indices of one point per voxel of a ``voxel_size`` grid anchored at the origin:
+    the one with the highest confidence (the first one on ties).
+    """
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = voxel_keys(points, voxel_size)
+    order = np.lexsort((-confs, keys[:, 2], keys[:, 1], keys[:, 0]))
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+    return order[first]
+
+
+def _spatial_hash(keys, num_partitions):
+    h = keys[:, 0] * 73856093 ^ keys[:, 1] * 19349663 ^ keys[:, 2] * 83492791
+    return h.view(np.uint64) % np.uint64(num_partitions)
+
+
+def _append_file(out_f, path, offset=0):
+    """Copy ``path`` from ``offset`` to the end of ``out_f``, in kernel space when possible."""
+    out_f.flush()
+    with open(path, "rb") as in_f:
+        size = os.fstat(in_f.fileno()).st_size - offset
+        if hasattr(os, "sendfile"):
+            try:
+                while size > 0:
+                    sent = os.sendfile(out_f.fileno(), in_f.fileno(), offset, size)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    size -= sent
+                out_f.seek(0, os.SEEK_END)
+                return
+            except OSError:
+                pass
+        in_f.seek(offset)
+        shutil.copyfileobj(in_f, out_f, 16 * 2**20)
+
+
+def _iter_batches(vertices, batch_size):
+    for start in range(0, len(vertices), batch_size):
+        yield np.asarray(vertices[start : start + batch_size])
+
+
+def write_glb_points(path, num_points, batches, bounds):
+    """
+    Write a point cloud as a GLB (POINTS primitive, float positions, RGBA8 colors).
+
+    Args:
+        path: Output file
+        num_points: Total number of points
+        batches: Callable returning a fresh iterator of vertex-record batches; it is
+            iterated twice (positions, then colors), so nothing is held in memory
+        bounds: (min [3], max [3]) of the positions, required by glTF
+    """
+    bin_length = num_points * 16
+    gltf = {
+        "asset": {"version": "2.0", "generator": "DA3-Streaming"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "COLOR_0": 1}, "mode": 0}]}],
+        "buffers": [{"byteLength": bin_length}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": num_points * 12, "target": 34962},
+            {
+                "buffer": 0,
+                "byteOffset": num_points * 12,
+                "byteLength": num_points * 4,
+                "target": 34962,
+            },
+        ],
+        "accessors": [
+            {
+                "bufferView": 0,
+                "componentType": 5126,
+                "count": num_points,
+                "type": "VEC3",
+                "min": [float(v) for v in bounds[0]],
+                "max": [float(v) for v in bounds[1]],
+            },
+            {
+                "bufferView": 1,
+                "componentType": 5121,
+                "normalized": True,
+                "count": num_points,
+                "type": "VEC4",
+            },
+        ],
+    }
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(json_chunk) + 8 + bin_length))
+        f.write(struct.pack("<I4s", len(json_chunk), b"JSON") + json_chunk)
+        f.write(struct.pack("<I4s", bin_length, b"BIN\x00"))
+        for batch in batches():
+            positions = np.empty((len(batch), 3), dtype="<f4")
+            positions[:, 0], positions[:, 1], positions[:, 2] = batch["x"], batch["y"], batch["z"]
+            f.write(positions.tobytes())
+        for batch in batches():
+            colors = np.full((len(batch), 4), 255, dtype=np.uint8)
+            colors[:, 0], colors[:, 1], colors[:, 2] = batch["red"], batch["green"], batch["blue"]
+            f.write(colors.tobytes())
+
+
+def _bounds(batches):
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    for batch in batches():
+        if len(batch):
+            xyz = np.stack([batch["x"], batch["y"], batch["z"]], axis=1)
+            lo, hi = np.minimum(lo, xyz.min(axis=0)), np.maximum(hi, xyz.max(axis=0))
+    if not np.isfinite(lo).all():
+        lo, hi = np.zeros(3), np.zeros(3)
+    return lo, hi
+
+
+def concat_point_clouds(input_files, output_path, batch_size=2000000):
+    """
+    Concatenate chunk PLYs without deduplication. PLY output copies the vertex data of
+    each file as is (no parsing, see ``_append_file``); GLB output streams it in batches.
+
+    Returns:
+        Number of points written
+    """
+    headers = [read_ply_header(file) for file in input_files]
+    total = sum(num_vertices for num_vertices, _, _ in headers)
+
+    if output_path.endswith(".glb"):
+
+        def batches():
+            for file in input_files:
+                yield from _iter_batches(read_ply_vertices(file), batch_size)
+
+        write_glb_points(output_path, total, batches, _bounds(batches))
+        return total
+
+    dtype = headers[0][1]
+    if any(other != dtype for _, other, _ in headers):
+        raise ValueError("Chunk PLY files have different vertex properties, cannot concatenate")
+    with open(output_path, "wb") as out_f:
+        write_ply_header(out_f, total, dtype)
+        for idx_file, (file, (_, _, offset)) in enumerate(zip(input_files, headers)):
+            print(f"Processing {idx_file}/{len(input_files)}: {file}")
+            _append_file(out_f, file, offset)
+    return total
+
+
+def dedup_point_clouds(
+    input_files, output_path, voxel_size, num_partitions=64, tmp_dir=None, batch_size=2000000
+):
+    """
+    Merge chunk PLYs keeping one point per voxel across chunks, the most confident.
+
+    Chunk points are streamed into ``num_partitions`` spill files by a spatial hash of
+    their voxel, so every voxel lands in exactly one partition; partitions are then
+    deduplicated one at a time, which bounds memory by the largest partition rather
+    than the whole cloud. The chunk PLYs must carry a ``confidence`` property (see
+    ``save_confident_pointcloud_batch`` with ``voxel_size``).
+
+    Returns:
+        Number of points written
+    """
+    tmp_dir = tempfile.mkdtemp(
+        prefix="merge_", dir=tmp_dir or os.path.dirname(os.path.abspath(output_path))
+    )
+    partition_paths = [os.path.join(tmp_dir, f"{p}.bin") for p in range(num_partitions)]
+    try:
+        # Pass 1: spill
+        partition_files = [open(path, "wb") for path in partition_paths]
+        try:
+            for idx_file, file in enumerate(input_files):
+                print(f"Processing {idx_file}/{len(input_files)}: {file}")
+                vertices = read_ply_vertices(file)
+                if vertices.dtype != VERTEX_CONF_DTYPE:
+                    raise ValueError(f"{file} has no confidence property, cannot deduplicate")
+                for batch in _iter_batches(vertices, batch_size):
+                    xyz = np.stack([batch["x"], batch["y"], batch["z"]], axis=1)
+                    parts = _spatial_hash(voxel_keys(xyz, voxel_size), num_partitions)
+                    order = np.argsort(parts, kind="stable")
+                    splits = np.searchsorted(parts[order], np.arange(1, num_partitions))
+                    for p, idx in enumerate(np.split(order, splits)):
+                        if len(idx):
+                            partition_files[p].write(batch[idx].tobytes())
+        finally:
+            for f in partition_files:
+                f.close()
+
+        # Pass 2: deduplicate each partition in place, dropping the confidence
+        total = 0
+        lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+        for path in partition_paths:
+            vertices = np.fromfile(path, dtype=VERTEX_CONF_DTYPE)
+            xyz = np.stack([vertices["x"], vertices["y"], vertices["z"]], axis=1)
+            keep = np.sort(voxel_downsample(xyz, vertices["confidence"], voxel_size))
+            xyz = xyz[keep]
+            colors = np.stack([vertices["red"], vertices["green"], vertices["blue"]], axis=1)
+            make_vertices(xyz, colors[keep]).tofile(path)
+            total += len(keep)
+            if len(keep):
+                lo, hi = np.minimum(lo, xyz.min(axis=0)), np.maximum(hi, xyz.max(axis=0))
+
+        # Output
+        if output_path.endswith(".glb"):
+
+            def batches():
+                for path in partition_paths:
+                    yield np.fromfile(path, dtype=VERTEX_DTYPE)
+
+            if total == 0:
+                lo, hi = np.zeros(3), np.zeros(3)
+            write_glb_points(output_path, total, batches, (lo, hi))
+        else:
+            with open(output_path, "wb") as out_f:
+                write_ply_header(out_f, total)
+                for path in partition_paths:
+                    _append_file(out_f, path)
+        return total
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,249 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sim(3) pose-graph optimization in numpy/scipy.
+
+Same problem and Levenberg-Marquardt scheme as ``Sim3LoopOptimizer.optimize`` with
+the C++ ``sim3solve`` extension, without torch/pypose: residuals
+``Log(C_ij @ Exp(g_i) @ Exp(g_j)^-1)`` over the tangent vectors ``g`` of the
+inverse absolute poses, closed-form Jacobians, and block-sparse normal equations
+assembled with array operations.
+
+Group elements are 4x4 matrices ``[[s R, t], [0, 1]]``; tangent vectors are
+``[tau (3), phi (3), sigma (1)]`` like pypose's ``sim3``.
+"""
+
+import time
+
+import numpy as np
+from scipy.linalg import expm
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import spsolve
+from scipy.spatial.transform import Rotation
+
+try:
+    from sksparse.cholmod import cholesky
+except ImportError:
+    cholesky = None
+
+
+def hat(v):
+    """[..., 3] -> [..., 3, 3] skew-symmetric matrices."""
+    out = np.zeros(v.shape[:-1] + (3, 3))
+    out[..., 0, 1], out[..., 0, 2] = -v[..., 2], v[..., 1]
+    out[..., 1, 0], out[..., 1, 2] = v[..., 2], -v[..., 0]
+    out[..., 2, 0], out[..., 2, 1] = -v[..., 1], v[..., 0]
+    return out
+
+
+def _phi(A):
+    """sum_k A^k / (k+1)! for a batch of square matrices (top-right block of an expm)."""
+    n = A.shape[-1]
+    M = np.zeros(A.shape[:-2] + (2 * n, 2 * n))
+    M[..., :n, :n] = A
+    M[..., :n, n:] = np.eye(n)
+    return expm(M)[..., :n, n:]
+
+
+def sim3_matrix(s, R, t):
+    """Scales [N], rotations [N, 3, 3] and translations [N, 3] -> [N, 4, 4]."""
+    T = np.tile(np.eye(4), (len(s), 1, 1))
+    T[:, :3, :3] = np.asarray(s, dtype=np.float64)[:, None, None] * R
+    T[:, :3, 3] = t
+    return T
+
+
+def sim3_decompose(T):
+    """[N, 4, 4] -> scales [N], rotations [N, 3, 3], translations [N, 3]."""
+    s = np.cbrt(np.linalg.det(T[:, :3, :3]))
+    return s, T[:, :3, :3] / s[:, None, None], T[:, :3, 3].copy()
+
+
+def sim3_inv(T):
+    s, R, t = sim3_decompose(T)
+    Rt = R.transpose(0, 2, 1) / s[:, None, None]
+    out = np.tile(np.eye(4), (len(T), 1, 1))
+    out[:, :3, :3] = Rt
+    out[:, :3, 3] = -np.einsum("nij,nj->ni", Rt, t)
+    return out
+
+
+def sim3_exp(x):
+    """Tangent vectors [N, 7] -> group elements [N, 4, 4]."""
+    M = np.zeros((len(x), 4, 4))
+    M[:, :3, :3] = hat(x[:, 3:6]) + x[:, 6, None, None] * np.eye(3)
+    M[:, :3, 3] = x[:, :3]
+    return expm(M)
+
+
+def sim3_log(T):
+    """Group elements [N, 4, 4] -> tangent vectors [N, 7]."""
+    s, R, t = sim3_decompose(T)
+    phi = Rotation.from_matrix(R).as_rotvec()
+    sigma = np.log(s)
+    W = _phi(hat(phi) + sigma[:, None, None] * np.eye(3))
+    tau = np.linalg.solve(W, t[..., None])[..., 0]
+    return np.concatenate([tau, phi, sigma[:, None]], axis=1)
+
+
+def sim3_adjoint(T):
+    """Adjoint matrices [N, 7, 7] of group elements [N, 4, 4]."""
+    s, R, t = sim3_decompose(T)
+    Ad = np.zeros((len(T), 7, 7))
+    Ad[:, :3, :3] = s[:, None, None] * R
+    Ad[:, :3, 3:6] = hat(t) @ R
+    Ad[:, :3, 6] = -t
+    Ad[:, 3:6, 3:6] = R
+    Ad[:, 6, 6] = 1.0
+    return Ad
+
+
+def sim3_ad(x):
+    """Lie bracket matrices [N, 7, 7] of tangent vectors [N, 7]."""
+    ad = np.zeros((len(x), 7, 7))
+    ad[:, :3, :3] = hat(x[:, 3:6]) + x[:, 6, None, None] * np.eye(3)
+    ad[:, :3, 3:6] = hat(x[:, :3])
+    ad[:, :3, 6] = -x[:, :3]
+    ad[:, 3:6, 3:6] = hat(x[:, 3:6])
+    return ad
+
+
+def sim3_left_jacobian(x):
+    """Left Jacobians [N, 7, 7]: Exp(x + d) ~ Exp(Jl(x) d) Exp(x)."""
+    return _phi(sim3_ad(x))
+
+
+def residuals(G, constants, ii, jj):
+    """
+    Edge residuals ``Log(C_ij @ Exp(g_i) @ Exp(g_j)^-1)``.
+
+    Args:
+        G: Tangent vectors of the inverse absolute poses [N, 7]
+        constants: Measured edge transforms [M, 4, 4]
+        ii, jj: Edge end points [M]
+
+    Returns:
+        (residuals [M, 7], group elements of the residuals [M, 4, 4])
+    """
+    expG = sim3_exp(G)
+    X = constants @ expG[ii] @ sim3_inv(expG[jj])
+    return sim3_log(X), X
+
+
+def jacobians(G, constants, ii, jj, r, X):
+    """
+    Closed-form Jacobians of ``Log(C @ Exp(g_i) @ Exp(g_j)^-1)``:
+    ``J_i = Jl(r)^-1 Ad(C) Jl(g_i)`` and ``J_j = -Jl(r)^-1 Ad(X) Jl(g_j)``.
+    """
+    Jl_G = sim3_left_jacobian(G)
+    Jl_r_inv = np.linalg.inv(sim3_left_jacobian(r))
+    J_i = Jl_r_inv @ sim3_adjoint(constants) @ Jl_G[ii]
+    J_j = -Jl_r_inv @ sim3_adjoint(X) @ Jl_G[jj]
+    return J_i, J_j
+
+
+def solve_system(J_i, J_j, ii, jj, r, ep, lm, num_nodes):
+    """
+    Damped Gauss-Newton step of ``sim3solve.solve_system`` (with ``freen=-1``).
+
+    The normal equations ``(J^T J + diag) delta = -J^T r`` are assembled block-wise
+    from the per-edge Jacobians and solved with a sparse Cholesky factorization
+    (scikit-sparse) if installed, else a sparse LU solve.
+    """
+    H_blocks = np.concatenate(
+        [
+            J_i.transpose(0, 2, 1) @ J_i,
+            J_j.transpose(0, 2, 1) @ J_j,
+            J_i.transpose(0, 2, 1) @ J_j,
+            J_j.transpose(0, 2, 1) @ J_i,
+        ]
+    )
+    block_rows = np.concatenate([ii, jj, ii, jj])
+    block_cols = np.concatenate([ii, jj, jj, ii])
+    k = np.arange(7)
+    rows = np.broadcast_to(block_rows[:, None, None] * 7 + k[None, :, None], H_blocks.shape)
+    cols = np.broadcast_to(block_cols[:, None, None] * 7 + k[None, None, :], H_blocks.shape)
+    size = num_nodes * 7
+    A = coo_matrix((H_blocks.ravel(), (rows.ravel(), cols.ravel())), shape=(size, size)).tocsc()
+
+    b = np.zeros((num_nodes, 7))
+    np.add.at(b, ii, -np.einsum("mki,mk->mi", J_i, r))
+    np.add.at(b, jj, -np.einsum("mki,mk->mi", J_j, r))
+
+    A.setdiag(A.diagonal() * (1.0 + lm) + ep)
+    if cholesky is not None:
+        delta = cholesky(A)(b.ravel())
+    else:
+        delta = spsolve(A, b.ravel())
+    return delta.reshape(num_nodes, 7)
+
+
+def optimize_pose_graph(
+    poses, constants, ii, jj, max_iterations=30, lambda_init=1e-6, verbose=True
+):
+    """
+    Levenberg-Marquardt over absolute Sim(3) poses, as ``Sim3LoopOptimizer.optimize``.
+
+    Args:
+        poses: Initial absolute poses [N, 4, 4]
+        constants: Edge measurements [M, 4, 4], matching ``C_ij ~ T_j^-1 T_i`` at the optimum
+        ii, jj: Edge end points [M]
+        max_iterations: Maximum L-M iterations
+        lambda_init: Initial damping
+
+    Returns:
+        (optimized absolute poses [N, 4, 4], cost history)
+    """
+    G = sim3_log(sim3_inv(poses))
+    lmbda = lambda_init
+    residual_history = []
+
+    r, X = residuals(G, constants, ii, jj)
+    for itr in range(max_iterations):
+        current_cost = np.square(r).mean()
+        residual_history.append(current_cost)
+
+        begin_time = time.time()
+        J_i, J_j = jacobians(G, constants, ii, jj, r, X)
+        delta = solve_system(J_i, J_j, ii, jj, r, 0.0, lmbda, len(G))
+        end_time = time.time()
+
+        G_tmp = G + delta
+        r_tmp, X_tmp = residuals(G_tmp, constants, ii, jj)
+        new_cost = np.square(r_tmp).mean()
+
+        # L-M
+        if new_cost < current_cost:
+            G, r, X = G_tmp, r_tmp, X_tmp
+            lmbda /= 2
+            status = "(accepted)"
+        else:
+            lmbda *= 2
+            status = "(rej)     "
+        if verbose:
+            print(
+                f"Iteration {itr}: cost {current_cost:.14f} -> {new_cost:.14f} {status} | "
+                f"Time of solver (numpy): {(end_time - begin_time)*1000:.4f} ms"
+            )
+
+        if (current_cost < 1e-5) and (itr >= 4):
+            if len(residual_history) >= 5:
+                improvement_ratio = residual_history[-5] / residual_history[-1]
+                if improvement_ratio < 1.5:
+                    if verbose:
+                        print(f"Converged at iteration {itr}")
+                    break
+
+    return sim3_inv(sim3_exp(G)), residual_history
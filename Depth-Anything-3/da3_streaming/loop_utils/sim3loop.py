@@ -20,6 +20,7 @@ import numpy as np
 import pypose as pp
 import torch
 from fastloop.solve_python import solve_system_py
+from loop_utils import sim3_numpy
 from scipy.spatial.transform import Rotation as R
 
 cpp_version = False
@@ -28,7 +29,7 @@ try:
 
     cpp_version = True
 except Exception:
-    print("Sim3solve of C++ Version failed, Will using Python Version.")
+    print("Sim3solve of C++ Version failed, Will using Numpy Version.")
 
 
 class Sim3LoopOptimizer:
@@ -52,10 +53,10 @@ class Sim3LoopOptimizer:
         self.config = config
         self.solve_system_version = self.config["Loop"]["SIM3_Optimizer"][
             "lang_version"
-        ]  # choose between 'python' and 'cpp'
+        ]  # choose among 'cpp', 'numpy' and 'python'
 
-        if not cpp_version:
-            self.solve_system_version = "python"
+        if not cpp_version and self.solve_system_version == "cpp":
+            self.solve_system_version = "numpy"
 
     def numpy_to_pypose_sim3(self, s: float, R_mat: np.ndarray, t_vec: np.ndarray) -> pp.Sim3:
         """Convert numpy s,R,t to pypose Sim3"""
@@ -234,6 +235,11 @@ class Sim3LoopOptimizer:
             print("Warning: No loop constraints provided, returning original transforms")
             return sequential_transforms
 
+        if self.solve_system_version == "numpy":
+            return self.optimize_numpy(
+                sequential_transforms, loop_constraints, max_iterations, lambda_init
+            )
+
         Ginv = pp.Sim3(input_poses).Inv().Log()
         lmbda = lambda_init
         residual_history = []
@@ -267,7 +273,7 @@ class Sim3LoopOptimizer:
                         J_Ginv_i, J_Ginv_j, iii, jjj, resid, 0.0, lmbda, -1
                     )
                 else:
-                    print("Solver version has not been chosen! ('python' or 'cpp')")
+                    print("Solver version has not been chosen! ('cpp', 'numpy' or 'python')")
                 end_time = time.time()
             except Exception as e:
                 print(f"Solver failed at iteration {itr}: {e}")
@@ -316,11 +322,53 @@ class Sim3LoopOptimizer:
 
         return optimized_sequential
 
+    def optimize_numpy(self, sequential_transforms, loop_constraints, max_iterations, lambda_init):
+        """
+        ``optimize`` without torch/pypose in the loop: closed-form Jacobians and a
+        block-sparse solve (see ``loop_utils/sim3_numpy.py``), in float64.
+        """
+        s, R_mat, t_vec = (np.array(x) for x in zip(*sequential_transforms))
+        rel = sim3_numpy.sim3_matrix(s, R_mat, t_vec)
+        input_poses = [np.eye(4)]
+        for S in rel:
+            input_poses.append(input_poses[-1] @ S)
+        input_poses = np.stack(input_poses)
+
+        pred_inv_poses = sim3_numpy.sim3_inv(input_poses)
+        kk = np.arange(1, len(input_poses))
+        ll = kk - 1
+        dSij = pred_inv_poses[ll] @ sim3_numpy.sim3_inv(pred_inv_poses[kk])
+
+        ii_loop, jj_loop, loop_sim3 = zip(*loop_constraints)
+        s, R_mat, t_vec = (np.array(x) for x in zip(*loop_sim3))
+        dSloop = sim3_numpy.sim3_matrix(s, R_mat, t_vec)
+
+        print(
+            f"Starting optimization with {len(sequential_transforms)} poses \
+                and {len(loop_constraints)} loop constraints"
+        )
+        optimized_poses, residual_history = sim3_numpy.optimize_pose_graph(
+            input_poses,
+            np.concatenate([dSij, dSloop]),
+            np.concatenate([kk, np.array(ii_loop, dtype=np.int64)]),
+            np.concatenate([ll, np.array(jj_loop, dtype=np.int64)]),
+            max_iterations=max_iterations,
+            lambda_init=lambda_init,
+        )
+
+        rel = sim3_numpy.sim3_inv(optimized_poses[:-1]) @ optimized_poses[1:]
+        s, R_mat, t_vec = sim3_numpy.sim3_decompose(rel)
+        print(
+            f"Optimization completed. Final cost: \
+                {residual_history[-1] if residual_history else 'N/A'}"
+        )
+        return list(zip(s, R_mat, t_vec))
+
 
 # ======== TEST CODE ========
 
 
-def create_ring_transforms(num_poses=6, radius=5.0, rot_noise_deg=2.0):
+def create_ring_transforms(num_poses=6, radius=5.0, rot_noise_deg=2.0, scale_noise=0.2):
     """Generate a ring of Sim3 transforms with rotation, adding slight rotational noise"""
     transforms = []
     angle_step = 2 * np.pi / num_poses
@@ -341,7 +389,7 @@ def create_ring_transforms(num_poses=6, radius=5.0, rot_noise_deg=2.0):
         # Translation: simulate a circular trajectory
         t = np.array([radius * np.sin(angle), radius * (1 - np.cos(angle)), 0.0])
 
-        s = np.random.uniform(0.8, 1.2)
+        s = np.random.uniform(1.0 - scale_noise, 1.0 + scale_noise)
 
         transforms.append((s, R_mat, t))
 
@@ -395,5 +443,59 @@ def example_usage():
     return optimized_transforms
 
 
+def benchmark_ring(num_poses=10000, versions=("numpy", "cpp"), seed=0):
+    """
+    Time ``optimize`` with each solver version on a noisy ring of ``num_poses`` poses
+    closed by one loop constraint, and compare the optimized trajectories. The noise
+    is scaled down so the drift accumulated over the ring stays that of a few loops.
+    """
+    np.random.seed(seed)
+    sequential_transforms = create_ring_transforms(
+        num_poses=num_poses, radius=3.0, rot_noise_deg=0.05, scale_noise=0.002
+    )
+    loop_constraints = [(num_poses, 0, (1.0, np.eye(3), np.zeros(3)))]
+
+    results = {}
+    for version in versions:
+        if version == "cpp" and not cpp_version:
+            print("sim3solve not built, skipping the C++ solver")
+            continue
+        config = {
+            "Loop": {
+                "SIM3_Optimizer": {
+                    "lang_version": version,
+                    "max_iterations": 30,
+                    "lambda_init": "1e-6",
+                }
+            }
+        }
+        optimizer = Sim3LoopOptimizer(config)
+        begin_time = time.time()
+        optimized = optimizer.optimize(sequential_transforms, loop_constraints)
+        elapsed = time.time() - begin_time
+        t_abs = optimizer.sequential_to_absolute_poses(optimized).tensor()[:, :3].cpu().numpy()
+        results[version] = (elapsed, t_abs)
+
+    reference = next(iter(results), None)
+    for version, (elapsed, t_abs) in results.items():
+        diff = np.abs(t_abs - results[reference][1]).max()
+        print(
+            f"{version:>8}: {elapsed:8.2f} s, "
+            f"max position difference to {reference}: {diff:.3e}"
+        )
+
+
 if __name__ == "__main__":
-    example_usage()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sim3 loop closure optimizer demo")
+    parser.add_argument("--bench", type=int, default=0, help="Benchmark a ring of N poses")
+    parser.add_argument(
+        "--versions", nargs="+", default=["numpy", "cpp"], help="Solver versions to benchmark"
+    )
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark_ring(args.bench, args.versions)
+    else:
+        example_usage()
@@ -21,6 +21,14 @@ import numpy as np
 import trimesh
 from loop_utils.alignment_torch import robust_weighted_estimate_sim3_torch
 from loop_utils.alignment_triton import robust_weighted_estimate_sim3_triton
+from loop_utils.pointcloud_merge import (
+    VERTEX_CONF_DTYPE,
+    concat_point_clouds,
+    dedup_point_clouds,
+    make_vertices,
+    voxel_downsample,
+    write_ply_header,
+)
 from numba import njit
 from sklearn.linear_model import LinearRegression, RANSACRegressor
 
@@ -235,7 +243,14 @@ def save_confident_pointcloud(
 
 
 def save_confident_pointcloud_batch(
-    points, colors, confs, output_path, conf_threshold, sample_ratio=1.0, batch_size=1000000
+    points,
+    colors,
+    confs,
+    output_path,
+    conf_threshold,
+    sample_ratio=1.0,
+    batch_size=1000000,
+    voxel_size=0.0,
 ):
     """
     - points: np.ndarray,  (b, H, W, 3) / (N, 3)
@@ -245,6 +260,9 @@ def save_confident_pointcloud_batch(
     - conf_threshold: float,
     - sample_ratio: float (0 < sample_ratio <= 1.0)
     - batch_size: int
+    - voxel_size: float, if > 0, keep the most confident point per voxel instead of
+      sampling, and save the confidences so that merge_ply_files can deduplicate
+      the voxels shared by overlapping chunks
     """
     if points.ndim == 2:
         b = 1
@@ -256,6 +274,24 @@ def save_confident_pointcloud_batch(
     else:
         raise ValueError("Unsupported points dimension. Must be 2 (N,3) or 4 (b,H,W,3)")
 
+    if voxel_size > 0:
+        vertices = []
+        for i in range(b):
+            pts = points[i].reshape(-1, 3).astype(np.float32)
+            cfs = confs[i].reshape(-1).astype(np.float32)
+            mask = (cfs >= conf_threshold) & (cfs > 1e-5)
+            pts, cfs = pts[mask], cfs[mask]
+            keep = voxel_downsample(pts, cfs, voxel_size)
+            cls = colors[i].reshape(-1, 3)[mask][keep].astype(np.uint8)
+            vertices.append(make_vertices(pts[keep], cls, cfs[keep]))
+        vertices = np.concatenate(vertices)
+        xyz = np.stack([vertices["x"], vertices["y"], vertices["z"]], axis=1)
+        vertices = vertices[np.sort(voxel_downsample(xyz, vertices["confidence"], voxel_size))]
+        with open(output_path, "wb") as f:
+            write_ply_header(f, len(vertices), VERTEX_CONF_DTYPE)
+            f.write(vertices.tobytes())
+        return
+
     total_valid = 0
     for i in range(b):
         cfs = confs[i].reshape(-1)
@@ -412,22 +448,6 @@ def optimized_vectorized_reservoir_sampling(
     return current_count + num_new_points, reservoir_points, reservoir_colors
 
 
-def write_ply_header(f, num_vertices):
-    header = [
-        "ply",
-        "format binary_little_endian 1.0",
-        f"element vertex {num_vertices}",
-        "property float x",
-        "property float y",
-        "property float z",
-        "property uchar red",
-        "property uchar green",
-        "property uchar blue",
-        "end_header",
-    ]
-    f.write("\n".join(header).encode() + b"\n")
-
-
 def write_ply_batch(f, points, colors):
     structured = np.zeros(
         len(points),
@@ -543,61 +563,38 @@ def compute_sim3_ab(S_a, S_b):
     return (s_ab, R_ab, T_ab)
 
 
-def merge_ply_files(input_dir, output_path):
+def merge_ply_files(input_dir, output_path, voxel_size=0.0, num_partitions=64):
     """
     Merge all PLY files in a directory into one file (without loading into memory)
 
     Args:
     - input_dir: Input directory containing multiple '{idx}_pcd.ply' files
-    - output_path: Output file path (e.g., 'combined.ply')
+    - output_path: Output file path (e.g., 'combined.ply'); '.glb' writes a GLB
+    - voxel_size: if > 0, keep one point per voxel across chunks, the most confident
+      (the chunk files must have been saved with the same voxel_size). Otherwise the
+      chunk files are concatenated as is.
+    - num_partitions: spill files of the deduplication, which bounds its memory to
+      about 1 / num_partitions of the points
     """
 
     print("Merging PLY files...")
 
-    input_files = sorted(glob.glob(os.path.join(input_dir, "*_pcd.ply")))
+    # Chunk files only, not a previous combined_pcd.ply
+    input_files = [
+        file
+        for file in glob.glob(os.path.join(input_dir, "*_pcd.ply"))
+        if os.path.basename(file)[: -len("_pcd.ply")].isdigit()
+    ]
+    input_files.sort(key=lambda file: int(os.path.basename(file)[: -len("_pcd.ply")]))
 
     if not input_files:
         print("No PLY files found")
         return
 
-    idx_file = 0
-    len(input_files)
-
-    total_vertices = 0
-    for file in input_files:  # Count total vertices
-        with open(file, "rb") as f:
-            for line in f:
-                if line.startswith(b"element vertex"):
-                    vertex_count = int(line.split()[-1])
-                    total_vertices += vertex_count
-                elif line.startswith(b"end_header"):
-                    break
-
-    with open(output_path, "wb") as out_f:
-        # Write new header
-        out_f.write(b"ply\n")
-        out_f.write(b"format binary_little_endian 1.0\n")
-        out_f.write(f"element vertex {total_vertices}\n".encode())
-        out_f.write(b"property float x\n")
-        out_f.write(b"property float y\n")
-        out_f.write(b"property float z\n")
-        out_f.write(b"property uchar red\n")
-        out_f.write(b"property uchar green\n")
-        out_f.write(b"property uchar blue\n")
-        out_f.write(b"end_header\n")
-
-        for file in input_files:
-            print(f"Processing {idx_file}/{len(input_files)}: {file}")
-            idx_file += 1
-            with open(file, "rb") as in_f:
-                # Skip the head
-                in_header = True
-                while in_header:
-                    line = in_f.readline()
-                    if line.startswith(b"end_header"):
-                        in_header = False
-                data = in_f.read()
-                out_f.write(data)
+    if voxel_size > 0:
+        total_vertices = dedup_point_clouds(input_files, output_path, voxel_size, num_partitions)
+    else:
+        total_vertices = concat_point_clouds(input_files, output_path)
 
     print(f"Merge completed! Total points: {total_vertices}")
     print(f"Output file: {output_path}")
@@ -1164,10 +1161,47 @@ def precompute_scale_chunks_with_depth(
 # ===== Scale precompute end =====
 
 
+def compute_alignment_stats(
+    target_points, source_points, weights, s, R, t, delta, max_points=2**20
+):
+    """
+    Fit quality of the IRLS Sim(3) on the matched points of ``weighted_align_point_maps``.
+
+    Returns a dict with
+    - residual: confidence-weighted mean residual relative to the median distance of
+      the target points to their median (scale-free, comparable across chunks)
+    - inlier_ratio: share of points within the Huber threshold ``delta``, i.e. with
+      full weight in the last IRLS iteration
+    - num_points: number of matched points
+    """
+    num_points = target_points.shape[0]
+    step = max(1, num_points // max_points)
+    tgt, src, w = target_points[::step], source_points[::step], weights[::step]
+
+    residuals = np.linalg.norm(tgt - (s * (src @ R.T) + t), axis=1)
+    extent = np.median(np.linalg.norm(tgt - np.median(tgt, axis=0), axis=1))
+    return {
+        "residual": float(np.sum(w * residuals) / max(np.sum(w), 1e-12) / max(extent, 1e-12)),
+        "inlier_ratio": float(np.mean(residuals <= delta)),
+        "num_points": int(num_points),
+    }
+
+
 def weighted_align_point_maps(
-    point_map1, conf1, point_map2, conf2, conf_threshold, config, precompute_scale=None
+    point_map1,
+    conf1,
+    point_map2,
+    conf2,
+    conf_threshold,
+    config,
+    precompute_scale=None,
+    return_stats=False,
 ):
-    """point_map2 -> point_map1"""
+    """
+    point_map2 -> point_map1
+
+    With ``return_stats``, also returns the ``compute_alignment_stats`` of the fit.
+    """
     b1, _, _, _ = point_map1.shape
     b2, _, _, _ = point_map2.shape
     b = min(b1, b2)
@@ -1249,6 +1283,14 @@ def weighted_align_point_maps(
     else:
         raise ValueError(f"Unknown align_lib: {config['Model']['align_lib']}")
 
+    if return_stats:
+        stats = compute_alignment_stats(
+            all_pts1, all_pts2, all_weights, s, R, t, config["Model"]["IRLS"]["delta"]
+        )
+        print(
+            f"IRLS residual: {stats['residual']:.5f}, inlier ratio: {stats['inlier_ratio']:.3f}"
+        )
+
     if precompute_scale is not None:  # meaning we are using align method 'scale+se3'
         # we need this precompute_scale for loop align
         s = precompute_scale
@@ -1258,4 +1300,6 @@ def weighted_align_point_maps(
     )
     print(f"Mean error: {mean_error}")
 
+    if return_stats:
+        return s, R, t, stats
     return s, R, t
@@ -25,10 +25,12 @@ from typing import Optional, Sequence
 import numpy as np
 import torch
 import torch.nn as nn
+from addict import Dict as AddictDict
 from huggingface_hub import PyTorchModelHubMixin
 from PIL import Image
 
 from depth_anything_3.cfg import create_object, load_config
+from depth_anything_3.model.sparse_global_attention import SparseGlobalAttnConfig
 from depth_anything_3.registry import MODEL_REGISTRY
 from depth_anything_3.specs import Prediction
 from depth_anything_3.utils.export import export
@@ -37,6 +39,7 @@ from depth_anything_3.utils.io.input_processor import InputProcessor
 from depth_anything_3.utils.io.output_processor import OutputProcessor
 from depth_anything_3.utils.logger import logger
 from depth_anything_3.utils.pose_align import align_poses_umeyama
+from depth_anything_3.utils.progress import ProgressCallback, ProgressReporter
 
 torch.backends.cudnn.benchmark = False
 # logger.info("CUDNN Benchmark Disabled")
@@ -106,6 +109,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         infer_gs: bool = False,
         use_ray_pose: bool = False,
         ref_view_strategy: str = "saddle_balanced",
+        sparse_attn: SparseGlobalAttnConfig | None = None,
     ) -> dict[str, torch.Tensor]:
         """
         Forward pass through the model.
@@ -118,6 +122,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
             infer_gs: Enable Gaussian Splatting branch.
             use_ray_pose: Use ray-based pose estimation instead of camera decoder.
             ref_view_strategy: Strategy for selecting reference view from multiple views.
+            sparse_attn: Optional view-sparse pattern for the global attention blocks.
 
         Returns:
             Dictionary containing model predictions
@@ -127,7 +132,14 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         with torch.no_grad():
             with torch.autocast(device_type=image.device.type, dtype=autocast_dtype):
                 return self.model(
-                    image, extrinsics, intrinsics, export_feat_layers, infer_gs, use_ray_pose, ref_view_strategy
+                    image,
+                    extrinsics,
+                    intrinsics,
+                    export_feat_layers,
+                    infer_gs,
+                    use_ray_pose,
+                    ref_view_strategy,
+                    sparse_attn=sparse_attn,
                 )
 
     def inference(
@@ -139,6 +151,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         infer_gs: bool = False,
         use_ray_pose: bool = False,
         ref_view_strategy: str = "saddle_balanced",
+        sparse_attn: SparseGlobalAttnConfig | None = None,
         render_exts: np.ndarray | None = None,
         render_ixts: np.ndarray | None = None,
         render_hw: tuple[int, int] | None = None,
@@ -155,6 +168,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         feat_vis_fps: int = 15,
         # Other export parameters, e.g., gs_ply, gs_video
         export_kwargs: Optional[dict] = {},
+        progress_callback: ProgressCallback | ProgressReporter | None = None,
     ) -> Prediction:
         """
         Run inference on input images.
@@ -169,6 +183,9 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
             ref_view_strategy: Strategy for selecting reference view from multiple views.
                 Options: "first", "middle", "saddle_balanced", "saddle_sim_range".
                 Default: "saddle_balanced". For single view input (S ≤ 2), no reordering is performed.
+            sparse_attn: Optional view-sparse global attention pattern for long inputs. Each view
+                attends to the reference view, a temporal window and strided anchor views, which
+                keeps memory linear in the number of views (default: None, full attention)
             render_exts: Optional render extrinsics for Gaussian video export
             render_ixts: Optional render intrinsics for Gaussian video export
             render_hw: Optional render resolution for Gaussian video export
@@ -182,10 +199,15 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
             show_cameras: [GLB] Show camera wireframes in the exported scene (default: True)
             feat_vis_fps: [FEAT_VIS] Frame rate for output video (default: 15)
             export_kwargs: additional arguments to export functions.
+            progress_callback: Optional callable receiving ``ProgressEvent`` updates for the
+                preprocess (per image), forward (per transformer block), postprocess and
+                export (per format) stages. See ``depth_anything_3.utils.progress``.
 
         Returns:
             Prediction object containing depth maps and camera parameters
         """
+        progress = ProgressReporter.wrap(progress_callback)
+
         if "gs" in export_format:
             assert infer_gs, "must set `infer_gs=True` to perform gs-related export."
 
@@ -194,7 +216,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
 
         # Preprocess images
         imgs_cpu, extrinsics, intrinsics = self._preprocess_inputs(
-            image, extrinsics, intrinsics, process_res, process_res_method
+            image, extrinsics, intrinsics, process_res, process_res_method, progress
         )
 
         # Prepare tensors for model
@@ -206,11 +228,20 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         # Run model forward pass
         export_feat_layers = list(export_feat_layers) if export_feat_layers is not None else []
 
-        raw_output = self._run_model_forward(
-            imgs, ex_t_norm, in_t, export_feat_layers, infer_gs, use_ray_pose, ref_view_strategy
-        )
+        with progress.track_forward(self.model):
+            raw_output = self._run_model_forward(
+                imgs,
+                ex_t_norm,
+                in_t,
+                export_feat_layers,
+                infer_gs,
+                use_ray_pose,
+                ref_view_strategy,
+                sparse_attn,
+            )
 
         # Convert raw output to prediction
+        progress.report("postprocess", 0.0, "Converting model outputs")
         prediction = self._convert_to_prediction(raw_output)
 
         # Align prediction to extrinsincs
@@ -220,57 +251,165 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
 
         # Add processed images for visualization
         prediction = self._add_processed_images(prediction, imgs_cpu)
+        progress.report("postprocess", 1.0, "Outputs converted")
 
         # Export if requested
         if export_dir is not None:
+            self.export_prediction(
+                prediction,
+                image,
+                export_dir,
+                export_format,
+                infer_gs=infer_gs,
+                render_exts=render_exts,
+                render_ixts=render_ixts,
+                render_hw=render_hw,
+                process_res=process_res,
+                process_res_method=process_res_method,
+                conf_thresh_percentile=conf_thresh_percentile,
+                num_max_points=num_max_points,
+                show_cameras=show_cameras,
+                feat_vis_fps=feat_vis_fps,
+                export_kwargs=export_kwargs,
+                progress_callback=progress,
+            )
+
+        progress.report("done", 1.0, "Inference done")
+        return prediction
 
-            if "gs" in export_format:
-                if infer_gs and "gs_video" not in export_format:
-                    export_format = f"{export_format}-gs_video"
-                if "gs_video" in export_format:
-                    if "gs_video" not in export_kwargs:
-                        export_kwargs["gs_video"] = {}
-                    export_kwargs["gs_video"].update(
-                        {
-                            "extrinsics": render_exts,
-                            "intrinsics": render_ixts,
-                            "out_image_hw": render_hw,
-                        }
-                    )
-            # Add GLB export parameters
-            if "glb" in export_format:
-                if "glb" not in export_kwargs:
-                    export_kwargs["glb"] = {}
-                export_kwargs["glb"].update(
-                    {
-                        "conf_thresh_percentile": conf_thresh_percentile,
-                        "num_max_points": num_max_points,
-                        "show_cameras": show_cameras,
-                    }
-                )
-            # Add Feat_vis export parameters
-            if "feat_vis" in export_format:
-                if "feat_vis" not in export_kwargs:
-                    export_kwargs["feat_vis"] = {}
-                export_kwargs["feat_vis"].update(
-                    {
-                        "fps": feat_vis_fps,
-                    }
-                )
-            # Add COLMAP export parameters
-            if "colmap" in export_format:
-                if "colmap" not in export_kwargs:
-                    export_kwargs["colmap"] = {}
-                export_kwargs["colmap"].update(
+    def inference_batch(
+        self,
+        images: Sequence[list[np.ndarray | Image.Image | str]],
+        process_res: int = 504,
+        process_res_method: str = "upper_bound_resize",
+        ref_view_strategy: str = "saddle_balanced",
+    ) -> list[Prediction]:
+        """
+        Run several independent requests in one batched forward pass.
+
+        Each element of ``images`` is the view list of one request. The requests are
+        stacked along the batch dimension ``B`` and the outputs are split back into one
+        Prediction per request. All requests must preprocess to the same ``(N, H, W)``.
+        Camera conditioning, feature export and Gaussian heads are not supported here;
+        use ``inference`` for such requests.
+
+        Batch-level statistics (the metric scale of nested models, the sky-depth
+        quantile of models with a sky head) are computed over the whole batch, so only
+        batch independent requests when ``supports_batching`` is True.
+
+        Args:
+            images: One list of input images per request
+            process_res: Processing resolution
+            process_res_method: Resize method for processing
+            ref_view_strategy: Strategy for selecting reference view from multiple views
+
+        Returns:
+            List of Prediction objects in the order of ``images``
+        """
+        if len(images) == 0:
+            return []
+
+        imgs_cpu_list = []
+        for views in images:
+            imgs_cpu, _, _ = self._preprocess_inputs(
+                views, None, None, process_res, process_res_method
+            )
+            imgs_cpu_list.append(imgs_cpu)
+
+        shapes = {tuple(imgs_cpu.shape) for imgs_cpu in imgs_cpu_list}
+        if len(shapes) != 1:
+            raise ValueError(f"Batched requests must share the same input shape, got {shapes}")
+
+        device = self._get_model_device()
+        imgs = torch.stack(imgs_cpu_list).to(device, non_blocking=True).float()
+        raw_output = self._run_model_forward(
+            imgs, None, None, ref_view_strategy=ref_view_strategy
+        )
+
+        predictions = []
+        for b, imgs_cpu in enumerate(imgs_cpu_list):
+            prediction = self._convert_to_prediction(_select_batch_item(raw_output, b))
+            predictions.append(self._add_processed_images(prediction, imgs_cpu))
+        return predictions
+
+    def export_prediction(
+        self,
+        prediction: Prediction,
+        image: list[np.ndarray | Image.Image | str],
+        export_dir: str,
+        export_format: str = "mini_npz",
+        infer_gs: bool = False,
+        render_exts: np.ndarray | None = None,
+        render_ixts: np.ndarray | None = None,
+        render_hw: tuple[int, int] | None = None,
+        process_res: int = 504,
+        process_res_method: str = "upper_bound_resize",
+        conf_thresh_percentile: float = 40.0,
+        num_max_points: int = 1_000_000,
+        show_cameras: bool = True,
+        feat_vis_fps: int = 15,
+        export_kwargs: Optional[dict] = {},
+        progress_callback: ProgressCallback | ProgressReporter | None = None,
+    ) -> None:
+        """
+        Export a prediction with the same per-format parameters as ``inference``.
+
+        Used by ``inference`` itself and by callers that assemble a Prediction
+        from several forward passes (e.g. chunked OOM fallbacks).
+        """
+        progress = ProgressReporter.wrap(progress_callback)
+
+        if "gs" in export_format:
+            if infer_gs and "gs_video" not in export_format:
+                export_format = f"{export_format}-gs_video"
+            if "gs_video" in export_format:
+                if "gs_video" not in export_kwargs:
+                    export_kwargs["gs_video"] = {}
+                export_kwargs["gs_video"].update(
                     {
-                        "image_paths": image,
-                        "conf_thresh_percentile": conf_thresh_percentile,
-                        "process_res_method": process_res_method,
+                        "extrinsics": render_exts,
+                        "intrinsics": render_ixts,
+                        "out_image_hw": render_hw,
                     }
                 )
-            self._export_results(prediction, export_format, export_dir, **export_kwargs)
-
-        return prediction
+        # Add GLB export parameters
+        if "glb" in export_format:
+            if "glb" not in export_kwargs:
+                export_kwargs["glb"] = {}
+            export_kwargs["glb"].update(
+                {
+                    "conf_thresh_percentile": conf_thresh_percentile,
+                    "num_max_points": num_max_points,
+                    "show_cameras": show_cameras,
+                }
+            )
+        # Add Feat_vis export parameters
+        if "feat_vis" in export_format:
+            if "feat_vis" not in export_kwargs:
+                export_kwargs["feat_vis"] = {}
+            export_kwargs["feat_vis"].update(
+                {
+                    "fps": feat_vis_fps,
+                }
+            )
+        # Add COLMAP export parameters
+        if "colmap" in export_format:
+            if "colmap" not in export_kwargs:
+                export_kwargs["colmap"] = {}
+            export_kwargs["colmap"].update(
+                {
+                    "image_paths": image,
+                    "conf_thresh_percentile": conf_thresh_percentile,
+                    "process_res": process_res,
+                    "process_res_method": process_res_method,
+                }
+            )
+
+        formats = export_format.split("-")
+        for i, fmt in enumerate(formats):
+            progress.report("export", i / len(formats), f"Exporting {fmt}", i, len(formats))
+            self._export_results(prediction, fmt, export_dir, **export_kwargs)
+        progress.report("export", 1.0, "Export done", len(formats), len(formats))
 
     def _preprocess_inputs(
         self,
@@ -279,15 +418,21 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         intrinsics: np.ndarray | None = None,
         process_res: int = 504,
         process_res_method: str = "upper_bound_resize",
+        progress: ProgressReporter | None = None,
     ) -> tuple[torch.Tensor, torch.Tensor | None, torch.Tensor | None]:
         """Preprocess input images using input processor."""
         start_time = time.time()
+        on_image_done = None
+        if progress is not None and progress.enabled:
+            progress.report("preprocess", 0.0, "Preprocessing images", 0, len(image))
+            on_image_done = progress.counter("preprocess", len(image), "Preprocessing images")
         imgs_cpu, extrinsics, intrinsics = self.input_processor(
             image,
             extrinsics.copy() if extrinsics is not None else None,
             intrinsics.copy() if intrinsics is not None else None,
             process_res,
             process_res_method,
+            on_image_done=on_image_done,
         )
         end_time = time.time()
         logger.info(
@@ -373,6 +518,7 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         infer_gs: bool = False,
         use_ray_pose: bool = False,
         ref_view_strategy: str = "saddle_balanced",
+        sparse_attn: SparseGlobalAttnConfig | None = None,
     ) -> dict[str, torch.Tensor]:
         """Run model forward pass."""
         device = imgs.device
@@ -381,7 +527,16 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
             torch.cuda.synchronize(device)
         start_time = time.time()
         feat_layers = list(export_feat_layers) if export_feat_layers is not None else None
-        output = self.forward(imgs, ex_t, in_t, feat_layers, infer_gs, use_ray_pose, ref_view_strategy)
+        output = self.forward(
+            imgs,
+            ex_t,
+            in_t,
+            feat_layers,
+            infer_gs,
+            use_ray_pose,
+            ref_view_strategy,
+            sparse_attn=sparse_attn,
+        )
         if need_sync:
             torch.cuda.synchronize(device)
         end_time = time.time()
@@ -420,6 +575,40 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
         end_time = time.time()
         logger.info(f"Export Results Done. Time: {end_time - start_time} seconds")
 
+    def set_head_chunk_size(self, chunk_size: int | None) -> None:
+        """
+        Set the number of views decoded at once by the DPT/DualDPT heads.
+
+        Smaller values lower the peak memory of the head at the cost of speed;
+        ``None`` decodes all views in a single pass.
+        """
+        for module in self.model.modules():
+            if hasattr(module, "head_chunk_size"):
+                module.head_chunk_size = chunk_size
+
+    @property
+    def supports_batching(self) -> bool:
+        """
+        Whether independent requests may share a batched forward (``inference_batch``).
+
+        Nested models align the depth to the metric branch with one scale factor and
+        models with a sky head set the sky depth from a quantile; both statistics are
+        computed over the whole batch, so one request would depend on the others.
+        """
+        if hasattr(self.model, "da3_metric"):  # NestedDepthAnything3Net
+            return False
+        return not any(getattr(module, "use_sky_head", False) for module in self.model.modules())
+
+    @property
+    def predicts_pose(self) -> bool:
+        """
+        Whether ``inference`` predicts camera poses without camera inputs.
+
+        Mono and metric models have no camera decoder and only predict depth.
+        """
+        net = getattr(self.model, "da3", self.model)  # NestedDepthAnything3Net
+        return getattr(net, "cam_dec", None) is not None
+
     def _get_model_device(self) -> torch.device:
         """
         Get the device where the model is located.
@@ -444,3 +633,16 @@ class DepthAnything3(nn.Module, PyTorchModelHubMixin):
             return buffer.device
 
         raise ValueError("No tensor found in model")
+
+
+def _select_batch_item(output, index: int):
+    """Slice item ``index`` of the batch dimension out of a (nested) model output dict."""
+    item = AddictDict()
+    for key, value in output.items():
+        if isinstance(value, torch.Tensor) and value.ndim > 0:
+            item[key] = value[index : index + 1]
+        elif isinstance(value, dict):
+            item[key] = _select_batch_item(value, index)
+        else:
+            item[key] = value
+    return item
@@ -401,6 +401,8 @@ class DepthAnything3App:
             filter_black_bg,
             filter_white_bg,
             process_res_method_dropdown,
+            save_percentage,
+            num_max_points,
             target_dir_output,
             is_example,
             reconstruction_output,
@@ -460,12 +462,14 @@ class DepthAnything3App:
         filter_black_bg: gr.Checkbox,
         filter_white_bg: gr.Checkbox,
         process_res_method_dropdown: gr.Dropdown,
+        save_percentage: gr.Slider,
+        num_max_points: gr.Slider,
         target_dir_output: gr.Textbox,
         is_example: gr.Textbox,
         reconstruction_output: gr.Model3D,
         log_output: gr.Markdown,
     ) -> None:
-        """Set up visualization update handlers."""
+        """Set up visualization update handlers (GLB re-export from the cached prediction)."""
         # Common inputs for visualization updates
         viz_inputs = [
             target_dir_output,
@@ -474,6 +478,8 @@ class DepthAnything3App:
             filter_black_bg,
             filter_white_bg,
             process_res_method_dropdown,
+            save_percentage,
+            num_max_points,
         ]
 
         # Set up change handlers for all visualization controls
@@ -483,6 +489,13 @@ class DepthAnything3App:
                 inputs=viz_inputs,
                 outputs=[reconstruction_output, log_output],
             )
+        # Sliders re-export once released rather than on every step of a drag
+        for component in [save_percentage, num_max_points]:
+            component.release(
+                fn=self.event_handlers.update_visualization,
+                inputs=viz_inputs,
+                outputs=[reconstruction_output, log_output],
+            )
 
     def _setup_navigation_handlers(
         self,
@@ -28,6 +28,7 @@ import torch
 
 from depth_anything_3.app.modules.file_handlers import FileHandler
 from depth_anything_3.app.modules.model_inference import ModelInference
+from depth_anything_3.app.modules.prediction_cache import load_npz_mmap
 from depth_anything_3.utils.memory import cleanup_cuda_memory
 from depth_anything_3.app.modules.visualization import VisualizationHandler
 
@@ -268,10 +269,12 @@ class EventHandlers:
         filter_black_bg: bool = False,
         filter_white_bg: bool = False,
         process_res_method: str = "upper_bound_resize",
+        save_percentage: float = 30.0,
+        num_max_points: int = 1000,
     ) -> Tuple[gr.update, str]:
         """
-        Reload saved predictions from npz, create (or reuse) the GLB for new parameters,
-        and return it for the 3D viewer.
+        Re-export the GLB for new display parameters from the cached prediction,
+        without running inference again.
 
         Args:
             target_dir: Directory containing results
@@ -280,6 +283,8 @@ class EventHandlers:
             filter_black_bg: Whether to filter black background
             filter_white_bg: Whether to filter white background
             process_res_method: Method for resizing input images
+            save_percentage: Filter percentage for point cloud
+            num_max_points: Maximum number of points (in thousands)
 
         Returns:
             Tuple of (glb_file, log_message)
@@ -290,8 +295,27 @@ class EventHandlers:
                 "No reconstruction available. Please click the Reconstruct button first.",
             )
 
-        # Check if GLB exists (could be cached example or reconstructed scene)
         glbfile = os.path.join(target_dir, "scene.glb")
+        prediction = self.model_inference.prediction_cache.get(target_dir)
+        if prediction is not None:
+            start_time = time.time()
+            try:
+                glbfile = self.model_inference.export_glb(
+                    target_dir,
+                    prediction,
+                    filter_black_bg=filter_black_bg,
+                    filter_white_bg=filter_white_bg,
+                    show_camera=show_cam,
+                    save_percentage=save_percentage,
+                    num_max_points=int(num_max_points * 1000),  # Convert K to actual count
+                    export_depth_vis=False,
+                )
+                return glbfile, f"Visualization updated in {time.time() - start_time:.2f}s."
+            except Exception as e:
+                # e.g. caches of older versions without confidence or cameras
+                print(f"Re-export from cached predictions failed: {e}")
+
+        # Fall back to the GLB on disk (could be cached example or reconstructed scene)
         if os.path.exists(glbfile):
             return (
                 glbfile,
@@ -302,28 +326,9 @@ class EventHandlers:
                 ),
             )
 
-        # If no GLB but it's an example that hasn't been reconstructed yet
-        if is_example == "True":
-            return (
-                gr.update(),
-                "No reconstruction available. Please click the Reconstruct button first.",
-            )
-
-        # For non-examples, check predictions.npz
-        predictions_path = os.path.join(target_dir, "predictions.npz")
-        if not os.path.exists(predictions_path):
-            error_message = (
-                f"No reconstruction available at {predictions_path}. "
-                "Please run 'Reconstruct' first."
-            )
-            return gr.update(), error_message
-
-        loaded = np.load(predictions_path, allow_pickle=True)
-        predictions = {key: loaded[key] for key in loaded.keys()}  # noqa: F841
-
         return (
-            glbfile,
-            "Visualization updated.",
+            gr.update(),
+            "No reconstruction available. Please click the Reconstruct button first.",
         )
 
     def handle_uploads(
@@ -388,9 +393,8 @@ class EventHandlers:
             predictions_path = os.path.join(target_dir, "predictions.npz")
             if os.path.exists(predictions_path):
                 try:
-                    # Load predictions from cache
-                    loaded = np.load(predictions_path, allow_pickle=True)
-                    predictions = {key: loaded[key] for key in loaded.keys()}
+                    # Load predictions from cache (memory-mapped when stored uncompressed)
+                    predictions = load_npz_mmap(predictions_path)
 
                     # Reconstruct processed_data structure
                     num_images = len(predictions.get("images", []))
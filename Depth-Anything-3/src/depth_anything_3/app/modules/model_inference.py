@@ -19,14 +19,25 @@ This module handles all model-related operations including inference,
 data processing, and result preparation.
 """
 
+import dataclasses
 import glob
+import math
 import os
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import torch
+from PIL import Image
 
 from depth_anything_3.api import DepthAnything3
-from depth_anything_3.utils.memory import cleanup_cuda_memory
+from depth_anything_3.app.modules.prediction_cache import PredictionCache
+from depth_anything_3.utils.memory import (
+    check_memory_availability,
+    cleanup_cuda_memory,
+    estimate_memory_requirement,
+    get_gpu_memory_info,
+)
+from depth_anything_3.utils.memory_model import get_memory_model
+from depth_anything_3.utils.oom_recovery import ResilientInference
 from depth_anything_3.utils.export.glb import export_to_glb
 from depth_anything_3.utils.export.gs import export_to_gs_video
 
@@ -39,6 +50,7 @@ class ModelInference:
     def __init__(self):
         """Initialize the model inference handler."""
         self.model = None
+        self.prediction_cache = PredictionCache()
 
     def initialize_model(self, device: str = "cuda") -> None:
         """
@@ -65,6 +77,7 @@ class ModelInference:
         filter_black_bg: bool = False,
         filter_white_bg: bool = False,
         process_res_method: str = "upper_bound_resize",
+        process_res: int = 504,
         show_camera: bool = True,
         save_percentage: float = 30.0,
         num_max_points: int = 1_000_000,
@@ -81,6 +94,7 @@ class ModelInference:
             filter_black_bg: Whether to filter black background
             filter_white_bg: Whether to filter white background
             process_res_method: Method for resizing input images
+            process_res: Processing resolution
             show_camera: Whether to show camera in 3D view
             save_percentage: Percentage of points to save (0-100)
             num_max_points: Maximum number of points in point cloud
@@ -128,25 +142,34 @@ class ModelInference:
         method_mapping = {"high_res": "lower_bound_resize", "low_res": "upper_bound_resize"}
         actual_method = method_mapping.get(process_res_method, "upper_bound_crop")
 
+        # Decide chunking up front from the calibrated memory model
+        max_views_per_pass = self._plan_max_views(
+            image_paths, infer_gs, process_res, actual_method
+        )
+
         # Run model inference
         print(f"Running inference with method: {actual_method}")
+        runner = ResilientInference(self.model)
         with torch.no_grad():
-            prediction = self.model.inference(
+            prediction = runner.inference(
                 image_paths,
+                max_views_per_pass=max_views_per_pass,
                 export_dir=None,
+                process_res=process_res,
                 process_res_method=actual_method,
                 infer_gs=infer_gs,
                 ref_view_strategy=ref_view_strategy,
             )
-        # num_max_points: int = 1_000_000,
-        export_to_glb(
+        if runner.last_attempt is not None and runner.last_attempt.strategy != "default":
+            print(f"Inference used OOM fallback: {runner.last_attempt.describe()}")
+        self.export_glb(
+            target_dir,
             prediction,
             filter_black_bg=filter_black_bg,
             filter_white_bg=filter_white_bg,
-            export_dir=target_dir,
-            show_cameras=show_camera,
-            conf_thresh_percentile=save_percentage,
-            num_max_points=int(num_max_points),
+            show_camera=show_camera,
+            save_percentage=save_percentage,
+            num_max_points=num_max_points,
         )
 
         # export to gs video if needed
@@ -174,44 +197,114 @@ class ModelInference:
 
         return prediction, processed_data
 
-    def _save_predictions_cache(self, target_dir: str, prediction: Any) -> None:
+    def _plan_max_views(
+        self,
+        image_paths: List[str],
+        infer_gs: bool,
+        process_res: int,
+        process_res_method: str,
+    ) -> Optional[int]:
         """
-        Save predictions data to predictions.npz for caching.
+        Number of views per forward pass that fits the free GPU memory.
 
         Args:
-            target_dir: Directory to save the cache
-            prediction: Model prediction object
+            image_paths: Input images; the first one gives the aspect ratio
+            infer_gs: Whether the Gaussian branch is enabled
+            process_res: Processing resolution
+            process_res_method: Resize method passed to ``inference``
+
+        Returns:
+            Views per pass, or None when all views fit in one pass
         """
-        try:
-            output_file = os.path.join(target_dir, "predictions.npz")
+        num_views = len(image_paths)
+        with Image.open(image_paths[0]) as img:
+            width, height = img.size
+        aspect_ratio = width / height
+        # The memory model takes the longer side; lower-bound resizing puts
+        # process_res on the shorter one
+        if process_res_method.startswith("lower_bound"):
+            process_res = math.ceil(process_res * max(aspect_ratio, 1.0 / aspect_ratio))
+
+        model_name = getattr(self.model, "model_name", None)
+        estimated = estimate_memory_requirement(
+            num_views, process_res, model_name=model_name, infer_gs=infer_gs
+        )
+        mem_available, mem_msg = check_memory_availability(estimated)
+        print(mem_msg)
+        mem_info = get_gpu_memory_info()
+        if mem_available or mem_info is None:
+            return None
+
+        plan = get_memory_model().plan(
+            model_name,
+            num_views,
+            process_res,
+            mem_info["free_gb"],
+            infer_gs=infer_gs,
+            aspect_ratio=aspect_ratio,
+        )
+        if plan.fits and plan.process_res == process_res and plan.chunked:
+            print(f"Processing {plan.max_views} views per pass to fit GPU memory")
+            return plan.max_views
+        return None
 
-            # Build save dict with prediction data
-            save_dict = {}
+    def export_glb(
+        self,
+        target_dir: str,
+        prediction: Any,
+        filter_black_bg: bool = False,
+        filter_white_bg: bool = False,
+        show_camera: bool = True,
+        save_percentage: float = 30.0,
+        num_max_points: int = 1_000_000,
+        export_depth_vis: bool = True,
+    ) -> str:
+        """
+        Export ``target_dir/scene.glb`` from a prediction.
 
-            # Save processed images if available
-            if prediction.processed_images is not None:
-                save_dict["images"] = prediction.processed_images
+        The background filters write into the confidence map, so they are applied
+        to a copy and the prediction can be exported again with other parameters.
 
-            # Save depth data
-            if prediction.depth is not None:
-                save_dict["depths"] = np.round(prediction.depth, 6)
+        Args:
+            target_dir: Directory to write the GLB to
+            prediction: Model prediction object
+            filter_black_bg: Whether to filter black background
+            filter_white_bg: Whether to filter white background
+            show_camera: Whether to show cameras in the 3D view
+            save_percentage: Percentage of points to save (0-100)
+            num_max_points: Maximum number of points in point cloud
+            export_depth_vis: Whether to also export depth visualizations
 
-            # Save confidence if available
-            if prediction.conf is not None:
-                save_dict["conf"] = np.round(prediction.conf, 2)
+        Returns:
+            Path to the exported GLB file
+        """
+        if (filter_black_bg or filter_white_bg) and prediction.conf is not None:
+            prediction = dataclasses.replace(prediction, conf=np.array(prediction.conf))
+
+        return export_to_glb(
+            prediction,
+            filter_black_bg=filter_black_bg,
+            filter_white_bg=filter_white_bg,
+            export_dir=target_dir,
+            show_cameras=show_camera,
+            conf_thresh_percentile=save_percentage,
+            num_max_points=int(num_max_points),
+            export_depth_vis=export_depth_vis,
+        )
 
-            # Save camera parameters
-            if prediction.extrinsics is not None:
-                save_dict["extrinsics"] = prediction.extrinsics
-            if prediction.intrinsics is not None:
-                save_dict["intrinsics"] = prediction.intrinsics
+    def _save_predictions_cache(self, target_dir: str, prediction: Any) -> None:
+        """
+        Cache the prediction of a session for parameter-only re-export.
 
-            # Save to file
-            np.savez_compressed(output_file, **save_dict)
-            print(f"Saved predictions cache to: {output_file}")
+        The prediction stays in memory while the session is recent and is written
+        to an uncompressed predictions.npz that can be memory-mapped later.
 
-        except Exception as e:
-            print(f"Warning: Failed to save predictions cache: {e}")
+        Args:
+            target_dir: Directory to save the cache
+            prediction: Model prediction object
+        """
+        self.prediction_cache.put(target_dir, prediction)
+        print(f"Saved predictions cache to: {os.path.join(target_dir, 'predictions.npz')}")
 
     def _process_results(
         self, target_dir: str, prediction: Any, image_paths: list
@@ -0,0 +1,163 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Prediction cache for the Depth Anything 3 Gradio app.
+
+The last prediction of each session (keyed by its target directory) is kept in
+memory in a small LRU. Sessions evicted from the LRU, or from a previous run of
+the app, are restored from ``predictions.npz``, which is written uncompressed so
+its arrays can be memory-mapped instead of read and inflated.
+"""
+
+import os
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from depth_anything_3.specs import Prediction
+
+PREDICTIONS_FILE = "predictions.npz"
+
+# Prediction fields stored in predictions.npz, under the keys used by earlier caches
+NPZ_FIELDS = {
+    "images": "processed_images",
+    "depths": "depth",
+    "conf": "conf",
+    "extrinsics": "extrinsics",
+    "intrinsics": "intrinsics",
+}
+
+
+class PredictionCache:
+    """
+    Per-session LRU of predictions with an on-disk fallback.
+
+    Args:
+        max_sessions: Number of sessions whose prediction stays in memory
+    """
+
+    def __init__(self, max_sessions: int = 4):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, Prediction]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, target_dir: str, prediction: Prediction) -> None:
+        """Keep ``prediction`` in memory and write it to ``target_dir/predictions.npz``."""
+        key = os.path.realpath(target_dir)
+        # Only the arrays needed for re-export, not Gaussians or auxiliary outputs
+        prediction = Prediction(
+            is_metric=prediction.is_metric,
+            **{field: getattr(prediction, field) for field in NPZ_FIELDS.values()},
+        )
+        with self._lock:
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+        try:
+            save_prediction(os.path.join(target_dir, PREDICTIONS_FILE), prediction)
+        except Exception as e:
+            print(f"Warning: Failed to save predictions cache: {e}")
+
+    def get(self, target_dir: str) -> Optional[Prediction]:
+        """Prediction of a session, from memory or from its ``predictions.npz``."""
+        key = os.path.realpath(target_dir)
+        with self._lock:
+            prediction = self._entries.get(key)
+            if prediction is not None:
+                self._entries.move_to_end(key)
+                return prediction
+
+        path = os.path.join(target_dir, PREDICTIONS_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            prediction = load_prediction(path)
+        except Exception as e:
+            print(f"Warning: Failed to load predictions cache {path}: {e}")
+            return None
+
+        with self._lock:
+            self._entries[key] = prediction
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        return prediction
+
+
+def save_prediction(path: str, prediction: Prediction) -> None:
+    """Write the arrays needed for re-export to an uncompressed NPZ."""
+    arrays = {
+        key: getattr(prediction, field)
+        for key, field in NPZ_FIELDS.items()
+        if getattr(prediction, field) is not None
+    }
+    arrays["is_metric"] = np.asarray(prediction.is_metric)
+    np.savez(path, **arrays)
+
+
+def load_prediction(path: str) -> Prediction:
+    """Restore a prediction from ``predictions.npz``, memory-mapping stored arrays."""
+    arrays = load_npz_mmap(path)
+    fields = {field: arrays.get(key) for key, field in NPZ_FIELDS.items()}
+    if fields["depth"] is None:
+        raise ValueError("Cache has no depth")
+    return Prediction(is_metric=int(arrays.get("is_metric", 0)), **fields)
+
+
+def load_npz_mmap(path: str) -> Dict[str, np.ndarray]:
+    """
+    Load an NPZ, memory-mapping uncompressed members read-only.
+
+    ``np.load`` ignores ``mmap_mode`` for NPZ files. Uncompressed members are
+    plain ``.npy`` files stored contiguously in the archive, so they are mapped
+    at their offset; compressed members are read normally.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    with open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            key = info.filename[: -len(".npy")] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type == zipfile.ZIP_STORED:
+                # Data follows the local file header, whose name / extra lengths may
+                # differ from the central directory entry
+                f.seek(info.header_offset)
+                name_len, extra_len = struct.unpack("<HH", f.read(30)[26:30])
+                f.seek(info.header_offset + 30 + name_len + extra_len)
+
+                version = np.lib.format.read_magic(f)
+                read_header = (
+                    np.lib.format.read_array_header_1_0
+                    if version == (1, 0)
+                    else np.lib.format.read_array_header_2_0
+                )
+                shape, fortran_order, dtype = read_header(f)
+                if not dtype.hasobject and np.prod(shape) > 0:
+                    arrays[key] = np.memmap(
+                        path,
+                        dtype=dtype,
+                        mode="r",
+                        offset=f.tell(),
+                        shape=shape,
+                        order="F" if fortran_order else "C",
+                    )
+                    continue
+
+            with zf.open(info) as member:
+                arrays[key] = np.lib.format.read_array(member, allow_pickle=False)
+    return arrays
@@ -0,0 +1,252 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+COLMAP binary model I/O benchmark.
+
+Writes a synthetic model, then times the readers of ``read_write_model`` against
+a per-record reference reader (the classic ``struct.unpack`` loop) and checks that
+both return the same model. With ``--export``, times ``export_to_colmap`` on a
+synthetic prediction instead, against building the same points one by one with
+pycolmap (if installed), and checks that pycolmap reads the exported model.
+
+Usage:
+    python -m depth_anything_3.bench.colmap_io [--points 1000000] [--images 5000]
+    python -m depth_anything_3.bench.colmap_io --export [--frames 200]
+"""
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from depth_anything_3.utils.read_write_model import (
+    Camera,
+    Image,
+    Points3DArrays,
+    read_images_binary,
+    read_model,
+    read_points3D_arrays,
+    read_points3D_binary,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3D_arrays,
+)
+
+
+def make_model(path: str, num_points: int, num_images: int, num_obs: int, seed: int = 0):
+    """Write a random binary model with tracks of 2 to 6 observations."""
+    rng = np.random.default_rng(seed)
+    cameras = {1: Camera(1, "PINHOLE", 1920, 1080, np.array([1500.0, 1500.0, 960.0, 540.0]))}
+    images = {}
+    for image_id in range(1, num_images + 1):
+        qvec = rng.normal(size=4)
+        images[image_id] = Image(
+            id=image_id,
+            qvec=qvec / np.linalg.norm(qvec),
+            tvec=rng.normal(size=3),
+            camera_id=1,
+            name=f"frame_{image_id:06d}.jpg",
+            xys=rng.uniform(0, 1080, (num_obs, 2)),
+            point3D_ids=rng.integers(-1, num_points, num_obs),
+        )
+    track_lengths = rng.integers(2, 7, num_points)
+    num_track = int(track_lengths.sum())
+    points = Points3DArrays(
+        ids=np.arange(1, num_points + 1, dtype=np.uint64),
+        xyz=rng.normal(size=(num_points, 3)),
+        rgb=rng.integers(0, 256, (num_points, 3)),
+        error=rng.uniform(0, 2, num_points),
+        track_lengths=track_lengths,
+        image_ids=rng.integers(1, num_images + 1, num_track),
+        point2D_idxs=rng.integers(0, num_obs, num_track),
+    )
+    write_cameras_binary(cameras, os.path.join(path, "cameras.bin"))
+    write_images_binary(images, os.path.join(path, "images.bin"))
+    write_points3D_arrays(points, os.path.join(path, "points3D.bin"))
+
+
+def reference_read_images(path: str) -> dict:
+    """Per-record ``images.bin`` reader, for comparison."""
+    images = {}
+    with open(path, "rb") as fid:
+        for _ in range(struct.unpack("<Q", fid.read(8))[0]):
+            props = struct.unpack("<idddddddi", fid.read(64))
+            name = b""
+            char = fid.read(1)
+            while char != b"\x00":
+                name += char
+                char = fid.read(1)
+            num_points2D = struct.unpack("<Q", fid.read(8))[0]
+            elems = struct.unpack("<" + "ddq" * num_points2D, fid.read(24 * num_points2D))
+            images[props[0]] = Image(
+                id=props[0],
+                qvec=np.array(props[1:5]),
+                tvec=np.array(props[5:8]),
+                camera_id=props[8],
+                name=name.decode("utf-8"),
+                xys=np.column_stack(
+                    [tuple(map(float, elems[0::3])), tuple(map(float, elems[1::3]))]
+                ),
+                point3D_ids=np.array(tuple(map(int, elems[2::3]))),
+            )
+    return images
+
+
+def reference_read_points3D(path: str) -> dict:
+    """Per-record ``points3D.bin`` reader, for comparison."""
+    points3D = {}
+    with open(path, "rb") as fid:
+        for _ in range(struct.unpack("<Q", fid.read(8))[0]):
+            props = struct.unpack("<QdddBBBd", fid.read(43))
+            track_length = struct.unpack("<Q", fid.read(8))[0]
+            track = struct.unpack("<" + "ii" * track_length, fid.read(8 * track_length))
+            points3D[props[0]] = (
+                np.array(props[1:4]),
+                np.array(props[4:7]),
+                np.array(props[7]),
+                np.array(tuple(map(int, track[0::2]))),
+                np.array(tuple(map(int, track[1::2]))),
+            )
+    return points3D
+
+
+def bench_export(num_frames: int, height: int = 378, width: int = 504, seed: int = 0):
+    """Time ``export_to_colmap`` on a random prediction of ``num_frames`` frames."""
+    from PIL import Image as PILImage
+
+    from depth_anything_3.specs import Prediction
+    from depth_anything_3.utils.export.colmap import export_to_colmap
+    from depth_anything_3.utils.read_write_model import qvecs2rotmats
+
+    rng = np.random.default_rng(seed)
+    qvecs = rng.normal(size=(num_frames, 4))
+    extrinsics = np.zeros((num_frames, 3, 4), dtype=np.float32)
+    extrinsics[:, :3, :3] = qvecs2rotmats(qvecs / np.linalg.norm(qvecs, axis=1, keepdims=True))
+    extrinsics[:, :3, 3] = rng.normal(size=(num_frames, 3))
+    intrinsics = np.tile(
+        np.array([[400.0, 0, width / 2], [0, 400.0, height / 2], [0, 0, 1]], np.float32),
+        (num_frames, 1, 1),
+    )
+    prediction = Prediction(
+        depth=rng.uniform(1, 10, (num_frames, height, width)).astype(np.float32),
+        is_metric=0,
+        conf=rng.uniform(0, 1, (num_frames, height, width)).astype(np.float32),
+        extrinsics=extrinsics,
+        intrinsics=intrinsics,
+        processed_images=rng.integers(0, 256, (num_frames, height, width, 3), dtype=np.uint8),
+    )
+
+    with tempfile.TemporaryDirectory() as path:
+        image_paths = []
+        for i in range(num_frames):
+            image_paths.append(os.path.join(path, f"frame_{i:06d}.jpg"))
+            PILImage.new("RGB", (width * 2, height * 2)).save(image_paths[-1])
+        export_dir = os.path.join(path, "sparse")
+        _, t_export = timed(export_to_colmap, prediction, export_dir, image_paths)
+        print(f"export_to_colmap, {num_frames} frames: {t_export:.2f}s")
+
+        try:
+            import pycolmap
+        except ImportError:
+            print("pycolmap not installed, skipping the per-point reference and read-back")
+            return
+
+        points = read_points3D_arrays(os.path.join(export_dir, "points3D.bin"))
+
+        def add_points_one_by_one():
+            reconstruction = pycolmap.Reconstruction()
+            for xyz, rgb in zip(points.xyz, points.rgb):
+                reconstruction.add_point3D(xyz, pycolmap.Track(), rgb)
+
+        _, t_reference = timed(add_points_one_by_one)
+        print(f"pycolmap add_point3D loop alone, {len(points.ids)} points: {t_reference:.2f}s")
+
+        reconstruction = pycolmap.Reconstruction(export_dir)
+        print(
+            f"pycolmap read back {reconstruction.num_points3D()} points, "
+            f"{reconstruction.num_images()} images"
+        )
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def same_arrays(a: np.ndarray, b: np.ndarray) -> bool:
+    return a.dtype == b.dtype and a.shape == b.shape and np.array_equal(a, b)
+
+
+def main():
+    """Command-line interface for the COLMAP I/O benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark COLMAP binary model I/O.")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Number of 3D points")
+    parser.add_argument("--images", type=int, default=5000, help="Number of images")
+    parser.add_argument("--obs", type=int, default=200, help="2D observations per image")
+    parser.add_argument("--export", action="store_true", help="Benchmark export_to_colmap")
+    parser.add_argument("--frames", type=int, default=200, help="Frames of the exported scene")
+    args = parser.parse_args()
+
+    if args.export:
+        bench_export(args.frames)
+        return
+
+    with tempfile.TemporaryDirectory() as path:
+        _, t_write = timed(make_model, path, args.points, args.images, args.obs)
+        print(f"Wrote {args.points} points / {args.images} images in {t_write:.2f}s")
+        images_bin = os.path.join(path, "images.bin")
+        points_bin = os.path.join(path, "points3D.bin")
+
+        ref_images, t_ref_images = timed(reference_read_images, images_bin)
+        ref_points, t_ref_points = timed(reference_read_points3D, points_bin)
+        images, t_images = timed(read_images_binary, images_bin)
+        points, t_points = timed(read_points3D_binary, points_bin)
+        _, t_arrays = timed(read_points3D_arrays, points_bin)
+        _, t_poses = timed(read_model, path, ".bin", poses_only=True)
+
+        print(f"{'step':<36}{'time (s)':>10}")
+        print(f"{'images.bin, reference':<36}{t_ref_images:>10.3f}")
+        print(f"{'images.bin, read_images_binary':<36}{t_images:>10.3f}")
+        print(f"{'points3D.bin, reference':<36}{t_ref_points:>10.3f}")
+        print(f"{'points3D.bin, read_points3D_binary':<36}{t_points:>10.3f}")
+        print(f"{'points3D.bin, read_points3D_arrays':<36}{t_arrays:>10.3f}")
+        print(f"{'read_model(poses_only=True)':<36}{t_poses:>10.3f}")
+
+        same = list(images) == list(ref_images) and all(
+            images[k].name == ref_images[k].name
+            and all(
+                same_arrays(getattr(images[k], f), getattr(ref_images[k], f))
+                for f in ("qvec", "tvec", "xys", "point3D_ids")
+            )
+            for k in images
+        )
+        same &= list(points) == list(ref_points) and all(
+            all(
+                same_arrays(a, b)
+                for a, b in zip(
+                    (p.xyz, p.rgb, p.error, p.image_ids, p.point2D_idxs), ref_points[k]
+                )
+            )
+            for k, p in points.items()
+        )
+        print("Output identical to the reference reader" if same else "OUTPUT DIFFERS")
+
+
+if __name__ == "__main__":
+    main()
@@ -127,7 +127,7 @@ class ScanNetPP(Dataset):
         depth_path_dir = os.path.join(input_path, "render_depth")
 
         # Read COLMAP model
-        cams, images, points3d = read_model(colmap_path)
+        cams, images, _ = read_model(colmap_path, poses_only=True)
 
         # Map image names to IDs
         name2id = {image.name: k for k, image in images.items()}
@@ -0,0 +1,117 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+RANSAC Sim(3) pose alignment benchmark.
+
+Times ``align_poses_umeyama(..., ransac=True)`` on a synthetic trajectory with
+outlier poses against a one-hypothesis-at-a-time reference (the classic loop over
+``PosePath3D.align``), for increasing numbers of hypotheses, and checks that both
+return the same alignment for the same seed.
+
+Usage:
+    python -m depth_anything_3.bench.pose_align [--poses 500] [--iters 10 100 1000]
+"""
+
+import argparse
+
+import numpy as np
+
+from depth_anything_3.bench.colmap_io import timed
+from depth_anything_3.utils.geometry import affine_inverse_np
+from depth_anything_3.utils.pose_align import (
+    _apply_sim3_to_poses,
+    _poses_from_ext,
+    _umeyama_sim3_from_paths,
+    align_poses_umeyama,
+)
+from depth_anything_3.utils.read_write_model import qvecs2rotmats
+
+
+def make_trajectories(num_poses: int, outlier_ratio: float = 0.3, seed: int = 0):
+    """Reference and estimated extrinsics related by a Sim(3), plus noise and outliers."""
+    rng = np.random.default_rng(seed)
+    qvecs = rng.normal(size=(num_poses, 4))
+    pose_ref = np.tile(np.eye(4), (num_poses, 1, 1))
+    pose_ref[:, :3, :3] = qvecs2rotmats(qvecs / np.linalg.norm(qvecs, axis=1, keepdims=True))
+    pose_ref[:, :3, 3] = np.cumsum(rng.normal(size=(num_poses, 3)), axis=0)
+
+    qvec = rng.normal(size=4)
+    rot = qvecs2rotmats((qvec / np.linalg.norm(qvec))[None])[0]
+    pose_est = _apply_sim3_to_poses(pose_ref, rot, rng.normal(size=3), 0.5)
+    pose_est[:, :3, 3] += rng.normal(scale=0.01, size=(num_poses, 3))
+    outliers = rng.random(num_poses) < outlier_ratio
+    pose_est[outliers, :3, 3] += rng.normal(scale=5.0, size=(int(outliers.sum()), 3))
+    return affine_inverse_np(pose_ref), affine_inverse_np(pose_est)
+
+
+def reference_ransac(ext_ref, ext_est, max_iters, random_state):
+    """One-hypothesis-at-a-time RANSAC, for comparison."""
+    pose_ref, pose_est = _poses_from_ext(ext_ref, ext_est)
+    rng = np.random.default_rng(random_state)
+    N = len(pose_ref)
+    sub_n = max(3, (N + 1) // 2)
+    r0, t0, s0, pose_est0 = _umeyama_sim3_from_paths(pose_ref, pose_est)
+    P_ref = pose_ref[:, :3, 3]
+    inlier_thresh = float(
+        np.median([np.linalg.norm(P_ref - p, axis=1).min() for p in pose_est0[:, :3, 3]])
+    )
+
+    best_model, best_inliers, best_score = (r0, t0, s0), None, (-1, np.inf)
+    for _ in range(max_iters):
+        sample = rng.choice(np.arange(N), size=sub_n, replace=False)
+        try:
+            r, t, s, _ = _umeyama_sim3_from_paths(pose_ref[sample], pose_est[sample])
+        except Exception:
+            continue
+        errs = np.linalg.norm(_apply_sim3_to_poses(pose_est, r, t, s)[:, :3, 3] - P_ref, axis=1)
+        inliers = errs <= inlier_thresh
+        k = int(inliers.sum())
+        mean_err = float(errs[inliers].mean()) if k > 0 else np.inf
+        if (k > best_score[0]) or (k == best_score[0] and mean_err < best_score[1]):
+            best_model, best_inliers, best_score = (r, t, s), inliers, (k, mean_err)
+
+    if best_inliers is not None and best_inliers.sum() >= 3:
+        r, t, s, _ = _umeyama_sim3_from_paths(pose_ref[best_inliers], pose_est[best_inliers])
+        return r, t, s
+    return best_model
+
+
+def main():
+    """Command-line interface for the RANSAC alignment benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark RANSAC Sim(3) pose alignment.")
+    parser.add_argument("--poses", type=int, default=500, help="Number of poses")
+    parser.add_argument(
+        "--iters", type=int, nargs="+", default=[10, 100, 1000], help="RANSAC hypotheses"
+    )
+    args = parser.parse_args()
+
+    ext_ref, ext_est = make_trajectories(args.poses)
+    print(f"{'hypotheses':<12}{'reference (s)':>15}{'batched (s)':>13}{'max diff':>12}")
+    for max_iters in args.iters:
+        ref, t_ref = timed(reference_ransac, ext_ref, ext_est, max_iters, 42)
+        out, t_out = timed(
+            align_poses_umeyama,
+            ext_ref,
+            ext_est,
+            ransac=True,
+            ransac_max_iters=max_iters,
+            random_state=42,
+        )
+        diff = max(float(np.abs(np.asarray(a) - np.asarray(b)).max()) for a, b in zip(ref, out))
+        print(f"{max_iters:<12}{t_ref:>15.3f}{t_out:>13.3f}{diff:>12.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CLI startup-time benchmark.
+
+Times fresh interpreter runs of light CLI invocations and lists the heavy modules
+that importing the CLI pulls in (there should be none).
+
+Usage:
+    python -m depth_anything_3.bench.startup [--repeats 10]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that light CLI commands must not import
+HEAVY_MODULES = ("torch", "fastapi", "uvicorn", "gradio", "cv2", "requests", "trimesh")
+
+COMMANDS = {
+    "import cli": ["-c", "import depth_anything_3.cli"],
+    "da3 --help": ["-m", "depth_anything_3.cli", "--help"],
+    "da3 image --help": ["-m", "depth_anything_3.cli", "image", "--help"],
+    "da3 daemon --status": ["-m", "depth_anything_3.cli", "daemon", "--status"],
+    "python baseline": ["-c", "pass"],
+}
+
+
+def time_command(args, repeats: int):
+    """Wall-clock seconds of ``repeats`` fresh interpreter runs."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def heavy_imports():
+    """Heavy modules present after importing the CLI."""
+    code = (
+        "import json, sys; import depth_anything_3.cli; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip())
+    return json.loads(out.stdout)
+
+
+def main():
+    """Command-line interface for the startup benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark Depth Anything 3 CLI startup time.")
+    parser.add_argument("--repeats", type=int, default=10, help="Runs per command")
+    args = parser.parse_args()
+
+    print(f"{'command':<24}{'min (s)':>10}{'median (s)':>12}")
+    for name, command in COMMANDS.items():
+        times = time_command(command, args.repeats)
+        print(f"{name:<24}{min(times):>10.3f}{statistics.median(times):>12.3f}")
+
+    heavy = heavy_imports()
+    if heavy:
+        print(f"Heavy modules imported by the CLI: {', '.join(heavy)}")
+    else:
+        print("No heavy modules imported by the CLI")
+
+
+if __name__ == "__main__":
+    main()
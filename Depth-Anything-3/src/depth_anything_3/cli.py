@@ -20,19 +20,11 @@ Clean, modular command-line interface
 from __future__ import annotations
 
 import os
+from typing import Optional
 import typer
 
-from depth_anything_3.services import start_server
-from depth_anything_3.services.gallery import gallery as gallery_main
-from depth_anything_3.services.inference_service import run_inference
-from depth_anything_3.services.input_handlers import (
-    ColmapHandler,
-    ImageHandler,
-    ImagesHandler,
-    InputHandler,
-    VideoHandler,
-    parse_export_feat,
-)
+# Heavy modules (torch, the model, FastAPI, OpenCV) are imported inside the commands
+# that need them, so that `--help` and light commands start quickly
 from depth_anything_3.utils.constants import (
     DEFAULT_EXPORT_DIR,
     DEFAULT_GALLERY_DIR,
@@ -99,6 +91,35 @@ def detect_input_type(input_path: str) -> str:
     return "unknown"
 
 
+def _run_inference(model_dir: str, device: str, backend_url: Optional[str], **kwargs):
+    """Run inference on the backend, on the warm daemon if one is running, or in process."""
+    if backend_url is None:
+        from depth_anything_3.services.warm_daemon import DaemonError, run_on_daemon
+
+        try:
+            reply = run_on_daemon(model_dir, device, echo=typer.echo, **kwargs)
+        except DaemonError as e:
+            typer.echo(f"❌ Warm daemon inference failed: {e}", err=True)
+            raise typer.Exit(1)
+        if reply is not None:
+            typer.echo(f"⚡ Served by the warm daemon in {reply['elapsed']:.2f}s")
+            return
+
+    from depth_anything_3.services.inference_service import run_inference
+
+    run_inference(model_dir=model_dir, device=device, backend_url=backend_url, **kwargs)
+
+
+def _frames_on_disk(save_frames: bool, use_backend: bool, export_format: str) -> bool:
+    """Video frames stay in memory unless requested or read from disk later."""
+    # COLMAP export names its images after the input files
+    if save_frames or use_backend or "colmap" in export_format:
+        return True
+    from depth_anything_3.services.warm_daemon import daemon_available
+
+    return daemon_available()
+
+
 # ============================================================================
 # Common parameters and configuration
 # ============================================================================
@@ -134,6 +155,9 @@ def auto(
     ),
     # Video-specific options
     fps: float = typer.Option(1.0, help="[Video] Sampling FPS for frame extraction"),
+    save_frames: bool = typer.Option(
+        False, help="[Video] Write sampled frames to <export_dir>/input_images as PNG"
+    ),
     # COLMAP-specific options
     sparse_subdir: str = typer.Option(
         "", help="[COLMAP] Sparse reconstruction subdirectory (e.g., '0' for sparse/0/)"
@@ -171,6 +195,15 @@ def auto(
     - Video file (.mp4, .avi, etc.)
     - COLMAP directory (with 'images' and 'sparse' subdirectories)
     """
+    from depth_anything_3.services.input_handlers import (
+        ColmapHandler,
+        ImageHandler,
+        ImagesHandler,
+        InputHandler,
+        VideoHandler,
+        parse_export_feat,
+    )
+
     # Detect input type
     input_type = detect_input_type(input_path)
 
@@ -204,7 +237,7 @@ def auto(
         export_dir = InputHandler.handle_export_dir(export_dir, auto_cleanup)
 
         # Run inference
-        run_inference(
+        _run_inference(
             image_paths=image_files,
             export_dir=export_dir,
             model_dir=model_dir,
@@ -231,7 +264,7 @@ def auto(
         export_dir = InputHandler.handle_export_dir(export_dir, auto_cleanup)
 
         # Run inference
-        run_inference(
+        _run_inference(
             image_paths=image_files,
             export_dir=export_dir,
             model_dir=model_dir,
@@ -255,10 +288,17 @@ def auto(
         export_dir = InputHandler.handle_export_dir(export_dir, auto_cleanup)
 
         # Process input
-        image_files = VideoHandler.process(input_path, export_dir, fps)
+        image_files = VideoHandler.process(
+            input_path,
+            export_dir,
+            fps,
+            save_frames=_frames_on_disk(save_frames, use_backend, export_format),
+            process_res=process_res,
+            process_res_method=process_res_method,
+        )
 
         # Run inference
-        run_inference(
+        _run_inference(
             image_paths=image_files,
             export_dir=export_dir,
             model_dir=model_dir,
@@ -287,7 +327,7 @@ def auto(
         export_dir = InputHandler.handle_export_dir(export_dir, auto_cleanup)
 
         # Run inference
-        run_inference(
+        _run_inference(
             image_paths=image_files,
             export_dir=export_dir,
             model_dir=model_dir,
@@ -356,6 +396,12 @@ def image(
     feat_vis_fps: int = typer.Option(15, help="[FEAT_VIS] Frame rate for output video"),
 ):
     """Run camera pose and depth estimation on a single image."""
+    from depth_anything_3.services.input_handlers import (
+        ImageHandler,
+        InputHandler,
+        parse_export_feat,
+    )
+
     # Process input
     image_files = ImageHandler.process(image_path)
 
@@ -369,7 +415,7 @@ def image(
     final_backend_url = backend_url if use_backend else None
 
     # Run inference
-    run_inference(
+    _run_inference(
         image_paths=image_files,
         export_dir=export_dir,
         model_dir=model_dir,
@@ -380,7 +426,7 @@ def image(
         process_res_method=process_res_method,
         export_feat_layers=export_feat_layers,
         use_ray_pose=use_ray_pose,
-        reference_view_strategy=reference_view_strategy,
+        ref_view_strategy=ref_view_strategy,
         conf_thresh_percentile=conf_thresh_percentile,
         num_max_points=num_max_points,
         show_cameras=show_cameras,
@@ -435,6 +481,12 @@ def images(
     feat_vis_fps: int = typer.Option(15, help="[FEAT_VIS] Frame rate for output video"),
 ):
     """Run camera pose and depth estimation on a directory of images."""
+    from depth_anything_3.services.input_handlers import (
+        ImagesHandler,
+        InputHandler,
+        parse_export_feat,
+    )
+
     # Process input
     image_files = ImagesHandler.process(images_dir, image_extensions)
 
@@ -448,7 +500,7 @@ def images(
     final_backend_url = backend_url if use_backend else None
 
     # Run inference
-    run_inference(
+    _run_inference(
         image_paths=image_files,
         export_dir=export_dir,
         model_dir=model_dir,
@@ -459,7 +511,7 @@ def images(
         process_res_method=process_res_method,
         export_feat_layers=export_feat_layers,
         use_ray_pose=use_ray_pose,
-        reference_view_strategy=reference_view_strategy,
+        ref_view_strategy=ref_view_strategy,
         conf_thresh_percentile=conf_thresh_percentile,
         num_max_points=num_max_points,
         show_cameras=show_cameras,
@@ -519,6 +571,12 @@ def colmap(
     feat_vis_fps: int = typer.Option(15, help="[FEAT_VIS] Frame rate for output video"),
 ):
     """Run pose conditioned depth estimation on COLMAP data."""
+    from depth_anything_3.services.input_handlers import (
+        ColmapHandler,
+        InputHandler,
+        parse_export_feat,
+    )
+
     # Process input
     image_files, extrinsics, intrinsics = ColmapHandler.process(colmap_dir, sparse_subdir)
 
@@ -532,7 +590,7 @@ def colmap(
     final_backend_url = backend_url if use_backend else None
 
     # Run inference
-    run_inference(
+    _run_inference(
         image_paths=image_files,
         export_dir=export_dir,
         model_dir=model_dir,
@@ -546,7 +604,7 @@ def colmap(
         intrinsics=intrinsics,
         align_to_input_ext_scale=align_to_input_ext_scale,
         use_ray_pose=use_ray_pose,
-        reference_view_strategy=reference_view_strategy,
+        ref_view_strategy=ref_view_strategy,
         conf_thresh_percentile=conf_thresh_percentile,
         num_max_points=num_max_points,
         show_cameras=show_cameras,
@@ -558,6 +616,9 @@ def colmap(
 def video(
     video_path: str = typer.Argument(..., help="Path to input video file"),
     fps: float = typer.Option(1.0, help="Sampling FPS for frame extraction"),
+    save_frames: bool = typer.Option(
+        False, help="Write sampled frames to <export_dir>/input_images as PNG"
+    ),
     model_dir: str = typer.Option(DEFAULT_MODEL, help="Model directory path"),
     export_dir: str = typer.Option(DEFAULT_EXPORT_DIR, help="Export directory"),
     export_format: str = typer.Option("glb", help="Export format"),
@@ -598,12 +659,25 @@ def video(
     # Feat_vis export options
     feat_vis_fps: int = typer.Option(15, help="[FEAT_VIS] Frame rate for output video"),
 ):
-    """Run depth estimation on video by extracting frames and processing them."""
+    """Run depth estimation on frames sampled from a video."""
+    from depth_anything_3.services.input_handlers import (
+        InputHandler,
+        VideoHandler,
+        parse_export_feat,
+    )
+
     # Handle export directory
     export_dir = InputHandler.handle_export_dir(export_dir, auto_cleanup)
 
     # Process input
-    image_files = VideoHandler.process(video_path, export_dir, fps)
+    image_files = VideoHandler.process(
+        video_path,
+        export_dir,
+        fps,
+        save_frames=_frames_on_disk(save_frames, use_backend, export_format),
+        process_res=process_res,
+        process_res_method=process_res_method,
+    )
 
     # Parse export_feat parameter
     export_feat_layers = parse_export_feat(export_feat)
@@ -612,7 +686,7 @@ def video(
     final_backend_url = backend_url if use_backend else None
 
     # Run inference
-    run_inference(
+    _run_inference(
         image_paths=image_files,
         export_dir=export_dir,
         model_dir=model_dir,
@@ -623,7 +697,7 @@ def video(
         process_res_method=process_res_method,
         export_feat_layers=export_feat_layers,
         use_ray_pose=use_ray_pose,
-        reference_view_strategy=reference_view_strategy,
+        ref_view_strategy=ref_view_strategy,
         conf_thresh_percentile=conf_thresh_percentile,
         num_max_points=num_max_points,
         show_cameras=show_cameras,
@@ -643,13 +717,30 @@ def backend(
     host: str = typer.Option("127.0.0.1", help="Host to bind to"),
     port: int = typer.Option(8008, help="Port to bind to"),
     gallery_dir: str = typer.Option(DEFAULT_GALLERY_DIR, help="Gallery directory path (optional)"),
+    extra_models: str = typer.Option(
+        "",
+        help="Extra models served next to the default one, as name=model_dir[@device],... "
+        "(e.g., 'nested=depth-anything/DA3NESTED-GIANT-LARGE@cuda:1')",
+    ),
+    vram_budget_gb: Optional[float] = typer.Option(
+        None, help="Resident weight budget per GPU; cold models are offloaded to CPU memory"
+    ),
 ):
     """Start model backend service with integrated gallery."""
+    from depth_anything_3.services.backend import start_server
+    from depth_anything_3.services.model_residency import parse_model_specs
+
     typer.echo("=" * 60)
     typer.echo("🚀 Starting Depth Anything 3 Backend Server")
     typer.echo("=" * 60)
     typer.echo(f"Model directory: {model_dir}")
     typer.echo(f"Device: {device}")
+    try:
+        models = parse_model_specs(extra_models, device)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    for name, (extra_dir, extra_device) in models.items():
+        typer.echo(f"Extra model: {name} = {extra_dir} on {extra_device}")
 
     # Check if gallery directory exists
     if gallery_dir and os.path.exists(gallery_dir):
@@ -669,7 +760,7 @@ def backend(
     typer.echo("=" * 60)
 
     try:
-        start_server(model_dir, device, host, port, gallery_dir)
+        start_server(model_dir, device, host, port, gallery_dir, models, vram_budget_gb)
     except KeyboardInterrupt:
         typer.echo("\n👋 Backend server stopped.")
     except Exception as e:
@@ -677,6 +768,53 @@ def backend(
         raise typer.Exit(1)
 
 
+@app.command()
+def daemon(
+    model_dir: str = typer.Option(DEFAULT_MODEL, help="Model directory path"),
+    device: str = typer.Option("cuda", help="Device to use"),
+    stop: bool = typer.Option(False, help="Stop the running daemon"),
+    status: bool = typer.Option(False, help="Show the running daemon and exit"),
+):
+    """
+    Keep a model resident for the inference commands.
+
+    While the daemon runs, auto/image/images/colmap/video send their requests to it
+    over a local Unix socket (DA3_DAEMON_SOCKET) instead of loading the model.
+    Set DA3_DAEMON=0 to bypass it.
+    """
+    from depth_anything_3.services.warm_daemon import (
+        DAEMON_SOCKET,
+        daemon_status,
+        serve_daemon,
+        stop_daemon,
+    )
+
+    if status:
+        info = daemon_status()
+        if info is None:
+            typer.echo(f"No daemon listening on {DAEMON_SOCKET}")
+            raise typer.Exit(1)
+        typer.echo(f"Daemon pid {info['pid']} on {DAEMON_SOCKET}")
+        typer.echo(f"Model: {info['model_dir']} on {info['device']}")
+        typer.echo(f"Requests served: {info['served']}, uptime: {info['uptime_sec']:.0f}s")
+        return
+    if stop:
+        if not stop_daemon():
+            typer.echo(f"No daemon listening on {DAEMON_SOCKET}")
+            raise typer.Exit(1)
+        typer.echo("Daemon stopped.")
+        return
+
+    typer.echo(f"Starting warm daemon with {model_dir} on {device}...")
+    try:
+        serve_daemon(model_dir, device)
+    except KeyboardInterrupt:
+        typer.echo("\nDaemon stopped.")
+    except Exception as e:
+        typer.echo(f"❌ Failed to start daemon: {e}")
+        raise typer.Exit(1)
+
+
 # ============================================================================
 # Application launch commands
 # ============================================================================
@@ -770,6 +908,7 @@ def gallery(
     open_browser: bool = typer.Option(False, help="Open browser after launch"),
 ):
     """Launch Depth Anything 3 Gallery server"""
+    from depth_anything_3.services.gallery import gallery as gallery_main
 
     # Validate gallery directory
     if not os.path.exists(gallery_dir):
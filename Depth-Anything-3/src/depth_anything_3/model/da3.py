@@ -20,6 +20,7 @@ from addict import Dict
 from omegaconf import DictConfig, OmegaConf
 
 from depth_anything_3.cfg import create_object
+from depth_anything_3.model.sparse_global_attention import SparseGlobalAttnConfig
 from depth_anything_3.model.utils.transform import pose_encoding_to_extri_intri
 from depth_anything_3.utils.alignment import (
     apply_metric_scaling,
@@ -62,6 +63,8 @@ class DepthAnything3Net(nn.Module):
 
     # Patch size for feature extraction
     PATCH_SIZE = 14
+    # Default number of views decoded at once by the depth head
+    HEAD_CHUNK_SIZE = 8
 
     def __init__(self, net, head, cam_dec=None, cam_enc=None, gs_head=None, gs_adapter=None):
         """
@@ -70,6 +73,7 @@ class DepthAnything3Net(nn.Module):
         super().__init__()
         self.backbone = net if isinstance(net, nn.Module) else create_object(_wrap_cfg(net))
         self.head = head if isinstance(head, nn.Module) else create_object(_wrap_cfg(head))
+        self.head_chunk_size = self.HEAD_CHUNK_SIZE
         self.cam_dec, self.cam_enc = None, None
         if cam_dec is not None:
             self.cam_dec = (
@@ -106,6 +110,7 @@ class DepthAnything3Net(nn.Module):
         infer_gs: bool = False,
         use_ray_pose: bool = False,
         ref_view_strategy: str = "saddle_balanced",
+        sparse_attn: SparseGlobalAttnConfig | None = None,
     ) -> Dict[str, torch.Tensor]:
         """
         Forward pass through the network.
@@ -118,6 +123,7 @@ class DepthAnything3Net(nn.Module):
             infer_gs: Enable Gaussian Splatting branch
             use_ray_pose: Use ray-based pose estimation
             ref_view_strategy: Strategy for selecting reference view
+            sparse_attn: Optional view-sparse pattern for the global attention blocks
 
         Returns:
             Dictionary containing predictions and auxiliary features
@@ -130,7 +136,11 @@ class DepthAnything3Net(nn.Module):
             cam_token = None
 
         feats, aux_feats = self.backbone(
-            x, cam_token=cam_token, export_feat_layers=export_feat_layers, ref_view_strategy=ref_view_strategy
+            x,
+            cam_token=cam_token,
+            export_feat_layers=export_feat_layers,
+            ref_view_strategy=ref_view_strategy,
+            sparse_attn=sparse_attn,
         )
         # feats = [[item for item in feat] for feat in feats]
         H, W = x.shape[-2], x.shape[-1]
@@ -206,7 +216,7 @@ class DepthAnything3Net(nn.Module):
         self, feats: list[torch.Tensor], H: int, W: int
     ) -> Dict[str, torch.Tensor]:
         """Process features through the depth prediction head."""
-        return self.head(feats, H, W, patch_start_idx=0)
+        return self.head(feats, H, W, patch_start_idx=0, chunk_size=self.head_chunk_size)
 
     def _process_camera_estimation(
         self, feats: list[torch.Tensor], H: int, W: int, output: Dict[str, torch.Tensor]
@@ -342,6 +352,7 @@ class NestedDepthAnything3Net(nn.Module):
         infer_gs: bool = False,
         use_ray_pose: bool = False,
         ref_view_strategy: str = "saddle_balanced",
+        sparse_attn: SparseGlobalAttnConfig | None = None,
     ) -> Dict[str, torch.Tensor]:
         """
         Forward pass through both branches with metric scaling alignment.
@@ -354,13 +365,21 @@ class NestedDepthAnything3Net(nn.Module):
             infer_gs: Enable Gaussian Splatting branch
             use_ray_pose: Use ray-based pose estimation
             ref_view_strategy: Strategy for selecting reference view
+            sparse_attn: Optional view-sparse pattern for the global attention blocks
 
         Returns:
             Dictionary containing aligned depth predictions and camera parameters
         """
         # Get predictions from both branches
         output = self.da3(
-            x, extrinsics, intrinsics, export_feat_layers=export_feat_layers, infer_gs=infer_gs, use_ray_pose=use_ray_pose, ref_view_strategy=ref_view_strategy
+            x,
+            extrinsics,
+            intrinsics,
+            export_feat_layers=export_feat_layers,
+            infer_gs=infer_gs,
+            use_ray_pose=use_ray_pose,
+            ref_view_strategy=ref_view_strategy,
+            sparse_attn=sparse_attn,
         )
         metric_output = self.da3_metric(x)
 
@@ -74,8 +74,12 @@ class Block(nn.Module):
 
         self.sample_drop_ratio = drop_path
 
-    def forward(self, x: Tensor, pos=None, attn_mask=None) -> Tensor:
+    def forward(self, x: Tensor, pos=None, attn_mask=None, attn_fn=None) -> Tensor:
+        # attn_fn: optional replacement of the attention call, invoked as
+        # attn_fn(self.attn, normed_x, pos), e.g. view-sparse global attention
         def attn_residual_func(x: Tensor, pos=None, attn_mask=None) -> Tensor:
+            if attn_fn is not None:
+                return self.ls1(attn_fn(self.attn, self.norm1(x), pos))
             return self.ls1(self.attn(self.norm1(x), pos=pos, attn_mask=attn_mask))
 
         def ffn_residual_func(x: Tensor) -> Tensor:
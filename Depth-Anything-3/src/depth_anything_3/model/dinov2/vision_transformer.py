@@ -32,6 +32,7 @@ from depth_anything_3.model.reference_view_selector import (
     reorder_by_reference,
     restore_original_order,
 )
+from depth_anything_3.model.sparse_global_attention import sparse_global_block
 from depth_anything_3.utils.constants import THRESH_FOR_REF_SELECTION
 
 # logger = logging.getLogger("dinov2")
@@ -303,6 +304,14 @@ class DinoVisionTransformer(nn.Module):
         output, total_block_len, aux_output = [], len(self.blocks), []
         blocks_to_take = range(total_block_len - n, total_block_len) if isinstance(n, int) else n
         pos, pos_nodiff = self._prepare_rope(B, S, H, W, x.device)
+        sparse_attn = kwargs.get("sparse_attn", None)
+        use_sparse = (
+            sparse_attn is not None
+            and sparse_attn.is_active(S)
+            and kwargs.get("attn_mask", None) is None
+        )
+        if use_sparse:
+            logger.info(f"Using sparse global attention for {S} views: {sparse_attn}")
 
         for i, blk in enumerate(self.blocks):
             if i < self.rope_start or self.rope is None:
@@ -330,7 +339,9 @@ class DinoVisionTransformer(nn.Module):
                     cam_token = torch.cat([ref_token, src_token], dim=1)
                 x[:, :, 0] = cam_token
 
-            if self.alt_start != -1 and i >= self.alt_start and i % 2 == 1:
+            if self.alt_start != -1 and i >= self.alt_start and i % 2 == 1 and use_sparse:
+                x = sparse_global_block(blk, x, g_pos, sparse_attn)
+            elif self.alt_start != -1 and i >= self.alt_start and i % 2 == 1:
                 x = self.process_attention(
                     x, blk, "global", pos=g_pos, attn_mask=kwargs.get("attn_mask", None)
                 )
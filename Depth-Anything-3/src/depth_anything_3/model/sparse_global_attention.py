@@ -0,0 +1,221 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sparse Global Attention
+
+The alternating "global" blocks of the backbone attend over all S x N tokens at
+once, so their memory and compute grow quadratically with the number of views.
+This module provides a view-sparse replacement for long inputs: every query view
+only attends to
+
+    - the reference view (index 0 after ``reorder_by_reference``),
+    - a sliding temporal window of neighbouring views,
+    - a fixed number of evenly strided anchor views.
+
+Because the key set of each view is bounded, memory is linear in S. Local blocks
+are left unchanged.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Tuple
+import torch
+import torch.nn.functional as F
+
+
+@dataclass
+class SparseGlobalAttnConfig:
+    """
+    Pattern of the view-sparse global attention.
+
+    Args:
+        window: Number of neighbouring views attended on each side of a query chunk.
+        num_anchors: Number of evenly strided anchor views shared by all queries.
+        query_chunk: Number of consecutive query views processed in one attention call.
+        min_views: Full global attention is used below this number of views.
+    """
+
+    window: int = 4
+    num_anchors: int = 8
+    query_chunk: int = 8
+    min_views: int = 32
+
+    def is_active(self, num_views: int) -> bool:
+        return num_views >= self.min_views
+
+
+def plan_view_groups(
+    num_views: int, cfg: SparseGlobalAttnConfig, device: torch.device | None = None
+) -> List[Tuple[int, int, torch.Tensor]]:
+    """
+    Build the (query_start, query_end, key_views) groups of the sparse pattern.
+
+    Args:
+        num_views: Number of views S (reference view is expected at index 0)
+        cfg: Sparse attention pattern
+        device: Device of the returned key index tensors
+
+    Returns:
+        List of tuples, one per query chunk, with the sorted key view indices
+    """
+    num_anchors = min(max(cfg.num_anchors, 0), num_views)
+    anchors = (
+        torch.linspace(0, num_views - 1, num_anchors).round().long().tolist()
+        if num_anchors > 0
+        else []
+    )
+    shared = {0, *anchors}
+    chunk = max(cfg.query_chunk, 1)
+
+    groups = []
+    for s0 in range(0, num_views, chunk):
+        s1 = min(s0 + chunk, num_views)
+        lo = max(0, s0 - cfg.window)
+        hi = min(num_views, s1 + cfg.window)
+        keys = sorted(shared.union(range(lo, hi)))
+        groups.append((s0, s1, torch.tensor(keys, dtype=torch.long, device=device)))
+    return groups
+
+
+def sparse_global_attention(
+    attn: torch.nn.Module,
+    x: torch.Tensor,
+    pos: torch.Tensor | None,
+    cfg: SparseGlobalAttnConfig,
+) -> torch.Tensor:
+    """
+    View-sparse equivalent of ``attn(x.flatten(1, 2), pos=pos.flatten(1, 2))``.
+
+    Args:
+        attn: Attention module of a global block (dinov2 ``layers.Attention``)
+        x: Normalized tokens (B, S, N, C)
+        pos: Optional RoPE positions (B, S, N, 2)
+        cfg: Sparse attention pattern
+
+    Returns:
+        Attention output after the output projection, shape (B, S, N, C)
+    """
+    B, S, N, C = x.shape
+    H = attn.num_heads
+    D = C // H
+
+    qkv = attn.qkv(x.reshape(B, S * N, C)).reshape(B, S * N, 3, H, D).permute(2, 0, 3, 1, 4)
+    q, k, v = qkv[0], qkv[1], qkv[2]
+    q, k = attn.q_norm(q), attn.k_norm(k)
+    if attn.rope is not None and pos is not None:
+        flat_pos = pos.reshape(B, S * N, 2)
+        q = attn.rope(q, flat_pos)
+        k = attn.rope(k, flat_pos)
+    del qkv
+
+    q = q.reshape(B, H, S, N, D)
+    k = k.reshape(B, H, S, N, D)
+    v = v.reshape(B, H, S, N, D)
+
+    out = torch.empty_like(q)
+    for s0, s1, key_views in plan_view_groups(S, cfg, device=x.device):
+        q_c = q[:, :, s0:s1].reshape(B, H, (s1 - s0) * N, D)
+        k_c = k.index_select(2, key_views).reshape(B, H, -1, D)
+        v_c = v.index_select(2, key_views).reshape(B, H, -1, D)
+        if attn.fused_attn:
+            o_c = F.scaled_dot_product_attention(q_c, k_c, v_c)
+        else:
+            o_c = ((q_c * attn.scale) @ k_c.transpose(-2, -1)).softmax(dim=-1) @ v_c
+        out[:, :, s0:s1] = o_c.reshape(B, H, s1 - s0, N, D)
+
+    out = out.permute(0, 2, 3, 1, 4).reshape(B, S, N, C)
+    out = attn.proj(out)
+    return attn.proj_drop(out)
+
+
+def sparse_global_block(
+    block: torch.nn.Module,
+    x: torch.Tensor,
+    pos: torch.Tensor | None,
+    cfg: SparseGlobalAttnConfig,
+) -> torch.Tensor:
+    """
+    Run a dinov2 ``Block`` in inference mode with sparse global attention.
+
+    The block is called through ``Block.forward`` with ``sparse_global_attention`` as its
+    attention function, so forward hooks on the block (e.g. progress reporting) still fire.
+
+    Args:
+        block: Transformer block of a global layer
+        x: Tokens (B, S, N, C)
+        pos: Optional RoPE positions (B, S, N, 2)
+        cfg: Sparse attention pattern
+
+    Returns:
+        Updated tokens (B, S, N, C)
+    """
+    return block(x, pos=pos, attn_fn=partial(sparse_global_attention, cfg=cfg))
+
+
+if __name__ == "__main__":
+    # Accuracy / latency benchmark of sparse vs. full global attention on real frames.
+    # Usage: python -m depth_anything_3.model.sparse_global_attention image_dir \
+    #            [num_views] [model_id]
+    import glob
+    import os
+    import sys
+
+    import numpy as np
+
+    from depth_anything_3.api import DepthAnything3
+
+    if len(sys.argv) < 2:
+        sys.exit(__doc__ + "\nUsage: sparse_global_attention.py image_dir [num_views] [model_id]")
+    image_dir = sys.argv[1]
+    num_views = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    model_id = sys.argv[3] if len(sys.argv) > 3 else "depth-anything/DA3-SMALL"
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    images = sorted(
+        path
+        for ext in ("png", "jpg", "jpeg")
+        for path in glob.glob(os.path.join(image_dir, f"*.{ext}"))
+    )[:num_views]
+    if not images:
+        sys.exit(f"No images found in {image_dir}")
+    model = DepthAnything3.from_pretrained(model_id).to(device)
+    cfg = SparseGlobalAttnConfig(min_views=1)
+
+    def _run(sparse_attn):
+        if device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(device)
+            torch.cuda.synchronize(device)
+        start = time.time()
+        pred = model.inference(images, ref_view_strategy="middle", sparse_attn=sparse_attn)
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        elapsed = time.time() - start
+        peak = torch.cuda.max_memory_allocated(device) / 1024**3 if device.type == "cuda" else 0.0
+        return pred, elapsed, peak
+
+    _run(None)  # warm-up
+    full, t_full, m_full = _run(None)
+    sparse, t_sparse, m_sparse = _run(cfg)
+
+    depth_err = np.mean(np.abs(sparse.depth - full.depth) / np.maximum(np.abs(full.depth), 1e-6))
+    pose_err = np.linalg.norm(sparse.extrinsics[..., :3, 3] - full.extrinsics[..., :3, 3], axis=-1)
+    print(f"{model_id}: views={len(images)} device={device.type}")
+    print(f"full   : {t_full:.3f}s peak={m_full:.2f}GB")
+    print(f"sparse : {t_sparse:.3f}s peak={m_sparse:.2f}GB {cfg}")
+    print(f"depth AbsRel vs. full: {depth_err:.4f}")
+    print(f"camera translation L2 vs. full: {pose_err.mean():.4f}")
@@ -16,9 +16,17 @@
 Services module for Depth Anything 3.
 """
 
-from depth_anything_3.services.backend import create_app, start_server
+
+def __getattr__(name):
+    """Lazy import so that light submodules (gallery, warm daemon) do not load the backend."""
+    if name in ("create_app", "start_server"):
+        from depth_anything_3.services import backend
+
+        return getattr(backend, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
-    start_server,
-    create_app,
+    "start_server",
+    "create_app",
 ]
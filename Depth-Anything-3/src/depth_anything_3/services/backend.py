@@ -18,28 +18,57 @@ Model backend service for Depth Anything 3.
 Provides HTTP API for model inference with persistent model loading.
 """
 
+import json
+import mimetypes
 import os
-import posixpath
+import shutil
+import tempfile
+import threading
 import time
 import uuid
+import zipfile
+from contextlib import ExitStack
 
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List, Optional
-from urllib.parse import quote
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
+from PIL import Image
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from ..api import DepthAnything3
+from ..streaming import GlbSink, NpzChunkSink, StreamingConfig, reconstruct
 from ..utils.memory import (
     get_gpu_memory_info,
     cleanup_cuda_memory,
     check_memory_availability,
     estimate_memory_requirement,
 )
+from ..utils.memory_model import get_memory_model, tokens_per_view
+from ..utils.oom_recovery import FallbackMemory, ResilientInference
+from ..utils.progress import ProgressEvent
+from .gallery_index import (
+    CachedJSON,
+    GalleryIndex,
+    file_etag,
+    http_date,
+    is_not_modified,
+    is_plain_name,
+    parse_range,
+)
+from .model_residency import ModelResidencyManager, parse_model_specs
+from .scheduler import PRIORITY_CLASSES, ScheduledTask, TaskScheduler
+from .task_events import TERMINAL_STATUSES, TaskEventBroker
+from .task_store import InMemoryTaskStore, TaskStore, open_task_store
+from .upload import (
+    UploadTooLargeError,
+    decode_image,
+    read_image_archive,
+    sample_video_frames,
+    spool_upload,
+)
 
 
 class InferenceRequest(BaseModel):
@@ -60,6 +89,11 @@ class InferenceRequest(BaseModel):
     show_cameras: bool = True
     # Feat_vis export parameters
     feat_vis_fps: int = 15
+    # Model routing: name of a model registered with the backend (None for the default model)
+    model: Optional[str] = None
+    # Scheduling parameters
+    priority: str = "normal"  # "interactive", "normal" or "batch"
+    deadline_s: Optional[float] = None  # Seconds from submission the task should start within
 
 
 class InferenceResponse(BaseModel):
@@ -71,6 +105,7 @@ class InferenceResponse(BaseModel):
     export_dir: Optional[str] = None
     export_format: str = "mini_npz-glb"
     processing_time: Optional[float] = None
+    result_url: Optional[str] = None  # Download handle of the main export (uploads)
 
 
 class TaskStatus(BaseModel):
@@ -91,53 +126,87 @@ class TaskStatus(BaseModel):
     export_format: Optional[str] = None  # Export format
     process_res_method: Optional[str] = None  # Processing resolution method
     video_path: Optional[str] = None  # Source video path
+    priority: Optional[str] = None  # Scheduling priority class
+    queue_position: Optional[int] = None  # Position in the scheduler queue while pending
+    batch_size: Optional[int] = None  # Number of requests sharing the forward pass
+    stage: Optional[str] = None  # Current inference stage (preprocess, forward, export, ...)
 
 
 class ModelBackend:
-    """Model backend service with persistent model loading."""
+    """Model backend service with persistent model loading.
+
+    Serves the default model plus optional extra models; their GPU residency is
+    handled by a ``ModelResidencyManager``.
+    """
 
-    def __init__(self, model_dir: str, device: str = "cuda"):
+    DEFAULT_MODEL = "default"
+
+    def __init__(
+        self,
+        model_dir: str,
+        device: str = "cuda",
+        extra_models: Optional[Dict[str, Tuple[str, str]]] = None,
+        vram_budget_gb: Optional[float] = None,
+    ):
         self.model_dir = model_dir
         self.device = device
-        self.model = None
-        self.model_loaded = False
-        self.load_time = None
-        self.load_start_time = None  # Time when model loading started
-        self.load_completed_time = None  # Time when model loading completed
-        self.last_used = None
-
-    def load_model(self):
-        """Load model if not already loaded."""
-        if self.model_loaded and self.model is not None:
-            self.last_used = time.time()
-            return self.model
+        self.residency = ModelResidencyManager(vram_budget_gb=vram_budget_gb)
+        self.residency.register(self.DEFAULT_MODEL, model_dir, device)
+        for name, (extra_dir, extra_device) in (extra_models or {}).items():
+            self.residency.register(name, extra_dir, extra_device)
 
-        try:
-            print(f"Loading model from {self.model_dir}...")
-            self.load_start_time = time.time()
-            start_time = time.time()
+    @property
+    def model_names(self) -> List[str]:
+        return self.residency.names
+
+    @property
+    def model(self):
+        return self.residency.entry(self.DEFAULT_MODEL).model
 
-            self.model = DepthAnything3.from_pretrained(self.model_dir).to(self.device)
-            self.model.eval()
+    @property
+    def model_loaded(self) -> bool:
+        return self.residency.entry(self.DEFAULT_MODEL).state != "unloaded"
 
-            self.model_loaded = True
-            self.load_time = time.time() - start_time
-            self.load_completed_time = time.time()
-            self.last_used = time.time()
+    @property
+    def load_time(self) -> Optional[float]:
+        return self.residency.entry(self.DEFAULT_MODEL).load_time
 
-            print(f"Model loaded successfully in {self.load_time:.2f}s")
-            return self.model
+    @property
+    def load_completed_time(self) -> Optional[float]:
+        return self.residency.entry(self.DEFAULT_MODEL).loaded_at
 
+    @property
+    def last_used(self) -> Optional[float]:
+        return self.residency.entry(self.DEFAULT_MODEL).last_used
+
+    def load_model(self, name: Optional[str] = None):
+        """Load a model (the default one if ``name`` is None) onto its device."""
+        try:
+            return self.residency.get(name or self.DEFAULT_MODEL)
         except Exception as e:
             print(f"Failed to load model: {e}")
             raise e
 
-    def get_model(self):
-        """Get model, loading if necessary."""
-        if not self.model_loaded:
-            return self.load_model()
-        self.last_used = time.time()
-        return self.model
+    def get_model(self, name: Optional[str] = None):
+        """Get model, loading or promoting it to its device if necessary."""
+        return self.load_model(name)
+
+    def acquire_model(self, name: Optional[str] = None):
+        """Context manager holding a model on its device while it is used."""
+        return self.residency.acquire(name or self.DEFAULT_MODEL)
+
+    def loaded_model(self, name: Optional[str] = None):
+        """A model if it has been loaded (on its device or offloaded), without loading it."""
+        return self.residency.entry(name or self.DEFAULT_MODEL).model
+
+    def model_name_of(self, name: Optional[str] = None) -> Optional[str]:
+        """Preset name of a loaded model, or None if it has not been loaded yet."""
+        model = self.loaded_model(name)
+        return model.model_name if model is not None else None
+
+    def reload_model(self, name: Optional[str] = None):
+        """Drop and reload a model."""
+        return self.residency.reload(name or self.DEFAULT_MODEL)
 
     def get_status(self) -> Dict[str, Any]:
         """Get backend status information."""
@@ -153,38 +222,205 @@ class ModelBackend:
             "load_time": self.load_time,
             "last_used": self.last_used,
             "uptime": uptime,
+            # Per-model residency state and swap-in/out latencies
+            "residency": self.residency.status(),
         }
 
 
 # Global backend instance
 _backend: Optional[ModelBackend] = None
 _app: Optional[FastAPI] = None
-_tasks: Dict[str, TaskStatus] = {}
-_executor = ThreadPoolExecutor(max_workers=1)  # Restrict to single-task execution
-_running_task_id: Optional[str] = None  # Currently running task ID
-_task_queue: List[str] = []  # Pending task queue
-
-# Task cleanup configuration
-MAX_TASK_HISTORY = 100  # Maximum number of tasks to keep in memory
+_tasks: TaskStore[TaskStatus] = InMemoryTaskStore()  # Replaced by the configured store in create_app
+_scheduler: Optional[TaskScheduler] = None  # Priority scheduler, runs one forward at a time
+_events = TaskEventBroker()  # Task progress fan-out for SSE / WebSocket subscribers
+_task_images: Dict[str, List[np.ndarray]] = {}  # Decoded frames of uploaded tasks until they run
+# OOM fallback that succeeded per workload shape, shared across tasks
+_fallback_memory = FallbackMemory(os.environ.get("DA3_FALLBACK_MEMORY_PATH"))
+
+# Task store configuration ("memory" keeps tasks in memory only)
+TASK_STORE_PATH = os.environ.get(
+    "DA3_TASK_STORE", os.path.join(tempfile.gettempdir(), "da3_tasks.sqlite3")
+)
+TASK_RETENTION_SEC = float(os.environ.get("DA3_TASK_RETENTION_SEC", 7 * 24 * 3600))
+MAX_TASK_HISTORY = int(os.environ.get("DA3_TASK_MAX_HISTORY", 10000))  # Maximum number of tasks kept
+TASK_PRUNE_BATCH = 100  # Finished tasks removed per cleanup pass
 CLEANUP_INTERVAL = 300  # Cleanup interval in seconds (5 minutes)
 
+# Scheduling configuration
+SCHEDULER_AGING_SEC = float(os.environ.get("DA3_SCHEDULER_AGING_SEC", 30.0))
+MAX_BATCH_SIZE = int(os.environ.get("DA3_MAX_BATCH_SIZE", 8))
+BATCH_WINDOW_SEC = float(os.environ.get("DA3_BATCH_WINDOW_SEC", 0.02))
+BATCH_MAX_VIEWS = 2  # Only small requests are coalesced into batched forwards
+
+# Upload configuration
+UPLOAD_MAX_MB = float(os.environ.get("DA3_UPLOAD_MAX_MB", 2048))
+UPLOAD_MAX_FRAMES = int(os.environ.get("DA3_UPLOAD_MAX_FRAMES", 256))
+MAX_PENDING_UPLOADS = int(os.environ.get("DA3_MAX_PENDING_UPLOADS", 4))
+UPLOAD_RESULT_DIR = os.environ.get(
+    "DA3_UPLOAD_RESULT_DIR", os.path.join(tempfile.gettempdir(), "da3_uploads")
+)
+ARCHIVE_CONTENT_TYPES = (
+    "application/zip",
+    "application/x-tar",
+    "application/gzip",
+    "application/x-gzip",
+)
+# Streaming reconstruction of long sequences in overlapping chunks (see streaming.reconstruct)
+STREAMING_MIN_FRAMES = int(os.environ.get("DA3_STREAMING_MIN_FRAMES", 256))
+STREAMING_CHUNK_SIZE = int(os.environ.get("DA3_STREAMING_CHUNK_SIZE", 64))
+STREAMING_OVERLAP = int(os.environ.get("DA3_STREAMING_OVERLAP", 16))
+STREAMING_EXPORT_FORMATS = {"glb", "mini_npz"}
+# Main artifact returned for each export format, relative to the export directory
+RESULT_FILES = {
+    "glb": "scene.glb",
+    "mini_npz": "exports/mini_npz/results.npz",
+    "npz": "exports/npz/results.npz",
+}
+
+
+def _get_scheduler() -> TaskScheduler:
+    """Create the task scheduler on first use."""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = TaskScheduler(
+            run_single=_run_inference_task,
+            run_batch=_run_inference_batch,
+            aging_sec=SCHEDULER_AGING_SEC,
+            max_batch_size=MAX_BATCH_SIZE,
+            batch_window_sec=BATCH_WINDOW_SEC,
+        )
+    return _scheduler
+
 
-def _process_next_task():
-    """Process the next task in the queue."""
-    global _task_queue, _running_task_id
+def _publish_task(task_id: str, progress_event: Optional[ProgressEvent] = None):
+    """Push the current state of a task to its stream subscribers.
 
-    if not _task_queue or _running_task_id is not None:
+    State changes (no ``progress_event``) are also written to the task store;
+    progress ticks only update the cached task.
+    """
+    task = _tasks.get(task_id)
+    if task is None:
         return
+    if progress_event is None:
+        _tasks.save(task_id)
+
+    event = {
+        "task_id": task_id,
+        "status": task.status,
+        "stage": task.stage,
+        "progress": task.progress,
+        "message": task.message,
+        "timestamp": time.time(),
+    }
+    if progress_event is not None:
+        event["detail"] = progress_event.to_dict()
+    _events.publish(task_id, event)
+
+
+def _progress_updater(task_id: str, start: float, end: float):
+    """Progress callback mapping inference progress onto ``[start, end]`` of the task."""
+
+    def on_progress(event: ProgressEvent):
+        task = _tasks.get(task_id)
+        if task is None:
+            return
+        task.stage = event.stage
+        task.progress = start + (end - start) * event.progress
+        _publish_task(task_id, event)
 
-    # Get next task from queue
-    task_id = _task_queue.pop(0)
+    return on_progress
 
-    # Get task request from tasks dict (we need to store the request)
-    if task_id not in _tasks:
-        return
 
-    # Submit task to executor
-    _executor.submit(_run_inference_task, task_id)
+def _use_streaming(request: InferenceRequest, num_images: int, model) -> bool:
+    """
+    Whether a request runs through ``streaming.reconstruct`` instead of one inference call.
+
+    Only long sequences without camera conditioning or feature export, and with
+    exports the streaming sinks can produce, are streamed. Chunks are aligned with
+    the predicted poses, so models that predict none always run in one call.
+    """
+    if num_images < STREAMING_MIN_FRAMES or not model.predicts_pose:
+        return False
+    if request.extrinsics or request.intrinsics or request.export_feat_layers:
+        return False
+    return set(request.export_format.split("-")) <= STREAMING_EXPORT_FORMATS
+
+
+def _streaming_sinks(request: InferenceRequest) -> list:
+    """Chunk sinks producing the requested exports of a streamed request."""
+    if not request.export_dir:
+        return []
+    formats = request.export_format.split("-")
+    sinks = []
+    if "glb" in formats:
+        sinks.append(
+            GlbSink(
+                request.export_dir,
+                num_max_points=request.num_max_points,
+                conf_thresh_percentile=request.conf_thresh_percentile,
+                show_cameras=request.show_cameras,
+            )
+        )
+    if "mini_npz" in formats:
+        sinks.append(NpzChunkSink(request.export_dir))
+    return sinks
+
+
+def _check_model_name(name: Optional[str]):
+    """Reject requests routed to a model that is not registered with the backend."""
+    if name is not None and name not in _backend.model_names:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown model '{name}', available: {_backend.model_names}"
+        )
+
+
+def _image_size(path: str) -> Optional[tuple]:
+    """Read the image size from the file header, or None if it cannot be read."""
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def _batch_key(request: InferenceRequest) -> Optional[tuple]:
+    """
+    Key under which a request may share a batched forward with others.
+
+    Only small requests without camera conditioning, feature export or Gaussian
+    outputs are batched, and never on models whose outputs depend on batch-level
+    statistics. Input sizes are only read by the worker (``_run_inference_batch``),
+    which splits a coalesced batch by size.
+    """
+    if len(request.image_paths) == 0 or len(request.image_paths) > BATCH_MAX_VIEWS:
+        return None
+    if request.extrinsics or request.intrinsics or request.export_feat_layers:
+        return None
+    if "gs" in request.export_format or "colmap" in request.export_format:
+        return None
+    model = _backend.loaded_model(request.model) if _backend is not None else None
+    if model is not None and not model.supports_batching:
+        return None
+    return (request.model, request.process_res, request.process_res_method)
+
+
+def _schedule_task(task_id: str, request: InferenceRequest) -> ScheduledTask:
+    """Build the scheduler entry of a request with its cost and deadline."""
+    submitted_at = time.time()
+    num_images = len(_task_images.get(task_id, request.image_paths))
+    model_name = _backend.model_name_of(request.model) if _backend is not None else None
+    expected_sec = get_memory_model().estimate_latency_sec(model_name, num_images, request.process_res)
+
+    return ScheduledTask(
+        task_id=task_id,
+        priority=request.priority,
+        cost=num_images * tokens_per_view(request.process_res),
+        submitted_at=submitted_at,
+        deadline=submitted_at + request.deadline_s if request.deadline_s is not None else None,
+        batch_key=_batch_key(request),
+        expected_sec=expected_sec or 0.0,
+    )
 
 
 # get_gpu_memory_info imported from depth_anything_3.utils.memory
@@ -201,11 +437,13 @@ def _process_next_task():
 
 def _run_inference_task(task_id: str):
     """Run inference task in background thread with OOM protection."""
-    global _tasks, _backend, _running_task_id, _task_queue
+    global _tasks
 
     model = None
     inference_started = False
     start_time = time.time()
+    # Holds the model on its device until the task ends, see ModelResidencyManager.acquire
+    held_models = ExitStack()
 
     try:
         # Get task request
@@ -214,50 +452,29 @@ def _run_inference_task(task_id: str):
             return
 
         request = _tasks[task_id].request
-        num_images = len(request.image_paths)
-
-        # Set current running task
-        _running_task_id = task_id
+        # Uploaded tasks carry decoded frames instead of paths
+        images = _task_images.pop(task_id, None) or request.image_paths
+        num_images = len(images)
 
         # Update task status to running
         _tasks[task_id].status = "running"
         _tasks[task_id].started_at = start_time
+        _tasks[task_id].queue_position = None
         _tasks[task_id].message = f"[{task_id}] Starting inference on {num_images} frames..."
+        _publish_task(task_id)
         print(f"[{task_id}] Starting inference on {num_images} frames")
 
         # Pre-inference cleanup to ensure maximum available memory
         print(f"[{task_id}] Pre-inference cleanup...")
         cleanup_cuda_memory()
 
-        # Check memory availability
-        estimated_memory = estimate_memory_requirement(num_images, request.process_res)
-        mem_available, mem_msg = check_memory_availability(estimated_memory)
-        print(f"[{task_id}] {mem_msg}")
-
-        if not mem_available:
-            # Try aggressive cleanup
-            print(f"[{task_id}] Insufficient memory, attempting aggressive cleanup...")
-            cleanup_cuda_memory()
-            time.sleep(0.5)  # Give system time to reclaim memory
-
-            # Check again
-            mem_available, mem_msg = check_memory_availability(estimated_memory)
-            if not mem_available:
-                raise RuntimeError(
-                    f"Insufficient GPU memory after cleanup. {mem_msg}\n"
-                    f"Suggestions:\n"
-                    f"  1. Reduce process_res (current: {request.process_res})\n"
-                    f"  2. Process fewer images at once (current: {num_images})\n"
-                    f"  3. Clear other GPU processes"
-                )
-
         # Get model (with error handling)
         print(f"[{task_id}] Loading model...")
         _tasks[task_id].message = f"[{task_id}] Loading model..."
         _tasks[task_id].progress = 0.1
 
         try:
-            model = _backend.get_model()
+            model = held_models.enter_context(_backend.acquire_model(request.model))
         except RuntimeError as e:
             if "out of memory" in str(e).lower():
                 cleanup_cuda_memory()
@@ -269,10 +486,42 @@ def _run_inference_task(task_id: str):
 
         print(f"[{task_id}] Model loaded successfully")
         _tasks[task_id].progress = 0.2
+        _publish_task(task_id)
+
+        # Streamed requests only ever hold one chunk of views on the GPU
+        streaming = _use_streaming(request, num_images, model)
+        num_views = min(num_images, STREAMING_CHUNK_SIZE) if streaming else num_images
+
+        # Admission control with the calibrated memory model of the loaded preset
+        estimated_memory = estimate_memory_requirement(
+            num_views, request.process_res, model_name=model.model_name
+        )
+        mem_available, mem_msg = check_memory_availability(estimated_memory)
+        print(f"[{task_id}] {mem_msg}")
+
+        max_views_per_pass = None
+        if not mem_available:
+            # Try aggressive cleanup
+            print(f"[{task_id}] Insufficient memory, attempting aggressive cleanup...")
+            cleanup_cuda_memory()
+            time.sleep(0.5)  # Give system time to reclaim memory
+
+            # Check again, then split the views into chunks that fit
+            mem_available, mem_msg = check_memory_availability(estimated_memory)
+            mem_info = get_gpu_memory_info()
+            if not mem_available and mem_info is not None and not streaming:
+                plan = get_memory_model().plan(
+                    model.model_name, num_images, request.process_res, mem_info["free_gb"]
+                )
+                if plan.fits and plan.process_res == request.process_res and plan.chunked:
+                    max_views_per_pass = plan.max_views
+                    print(f"[{task_id}] {mem_msg} - processing {plan.max_views} views per pass")
+                else:
+                    print(f"[{task_id}] {mem_msg} - continuing with OOM fallbacks enabled")
 
         # Prepare inference parameters
         inference_kwargs = {
-            "image": request.image_paths,
+            "image": images,
             "export_format": request.export_format,
             "process_res": request.process_res,
             "process_res_method": request.process_res_method,
@@ -298,11 +547,33 @@ def _run_inference_task(task_id: str):
         print(f"[{task_id}] Running model inference...")
         _tasks[task_id].message = f"[{task_id}] Running model inference on {num_images} images..."
         _tasks[task_id].progress = 0.3
+        _publish_task(task_id)
 
         inference_started = True
 
+        runner = ResilientInference(model, memory=_fallback_memory)
         try:
-            model.inference(**inference_kwargs)
+            if streaming:
+                print(f"[{task_id}] Streaming {num_images} frames in chunks of {STREAMING_CHUNK_SIZE}")
+                result = reconstruct(
+                    images,
+                    runner,
+                    StreamingConfig(
+                        chunk_size=STREAMING_CHUNK_SIZE,
+                        overlap=STREAMING_OVERLAP,
+                        process_res=request.process_res,
+                        process_res_method=request.process_res_method,
+                    ),
+                    sinks=_streaming_sinks(request),
+                    num_frames=num_images,
+                    progress_callback=_progress_updater(task_id, 0.3, 0.9),
+                )
+            else:
+                runner.inference(
+                    max_views_per_pass=max_views_per_pass,
+                    progress_callback=_progress_updater(task_id, 0.3, 0.9),
+                    **inference_kwargs,
+                )
             inference_time = time.time() - inference_start_time
             avg_time_per_image = inference_time / num_images if num_images > 0 else 0
 
@@ -315,7 +586,7 @@ def _run_inference_task(task_id: str):
             if "out of memory" in str(e).lower():
                 cleanup_cuda_memory()
                 raise RuntimeError(
-                    f"OOM during inference: {str(e)}\n"
+                    f"OOM during inference after all fallbacks: {str(e)}\n"
                     f"Settings: {num_images} images, resolution={request.process_res}\n"
                     f"Suggestions:\n"
                     f"  1. Reduce process_res to {int(request.process_res * 0.75)}\n"
@@ -339,14 +610,13 @@ def _run_inference_task(task_id: str):
         _tasks[task_id].message = (
             f"[{task_id}] Completed in {total_time:.2f}s " f"({avg_time_per_image:.2f}s per image)"
         )
+        if streaming:
+            _tasks[task_id].message += f", streamed in {result.num_chunks} chunks"
+        if runner.last_attempt is not None and runner.last_attempt.strategy != "default":
+            _tasks[task_id].message += f", OOM fallback: {runner.last_attempt.describe()}"
         _tasks[task_id].progress = 1.0
         _tasks[task_id].export_dir = request.export_dir
-
-        # Clear running state
-        _running_task_id = None
-
-        # Process next task in queue
-        _process_next_task()
+        _publish_task(task_id)
 
         print(f"[{task_id}] Task completed successfully")
         print(
@@ -368,14 +638,10 @@ def _run_inference_task(task_id: str):
         _tasks[task_id].status = "failed"
         _tasks[task_id].completed_at = time.time()
         _tasks[task_id].message = f"[{task_id}] Failed after {total_time:.2f}s: {error_msg}"
-
-        # Clear running state
-        _running_task_id = None
-
-        # Process next task in queue
-        _process_next_task()
+        _publish_task(task_id)
 
     finally:
+        held_models.close()
         # Final cleanup in finally block to ensure it always runs
         # This is critical for releasing resources even if unexpected errors occur
         try:
@@ -389,51 +655,204 @@ def _run_inference_task(task_id: str):
         _schedule_task_cleanup()
 
 
+def _run_inference_batch(task_ids: List[str]):
+    """Run several small compatible tasks in batched forward passes.
+
+    The tasks are grouped by the sizes of their input images, read here on the
+    worker thread. Groups of one, and all tasks of a model that does not support
+    batching (``DepthAnything3.supports_batching``), run one by one.
+    """
+    task_ids = [t for t in task_ids if t in _tasks and _tasks[t].request is not None]
+    if not task_ids:
+        return
+
+    with ExitStack() as held_models:
+        try:
+            model = held_models.enter_context(
+                _backend.acquire_model(_tasks[task_ids[0]].request.model)
+            )
+            batchable = model.supports_batching
+        except Exception as e:
+            print(f"[BATCH] Could not load the model for batching ({e})")
+            model, batchable = None, False
+
+        groups: Dict[Any, List[str]] = {}
+        for task_id in task_ids:
+            sizes = tuple(_image_size(path) for path in _tasks[task_id].request.image_paths)
+            key = sizes if batchable and None not in sizes else task_id
+            groups.setdefault(key, []).append(task_id)
+
+        for group in groups.values():
+            if len(group) == 1:
+                _run_inference_task(group[0])
+            else:
+                _run_batched_forward(group, model)
+
+
+def _run_batched_forward(task_ids: List[str], model):
+    """Run tasks with inputs of identical sizes in one batched forward pass.
+
+    Falls back to running the tasks one by one if the batched forward fails.
+    """
+    start_time = time.time()
+    batch_tag = f"batch of {len(task_ids)}"
+    for task_id in task_ids:
+        _tasks[task_id].status = "running"
+        _tasks[task_id].started_at = start_time
+        _tasks[task_id].queue_position = None
+        _tasks[task_id].batch_size = len(task_ids)
+        _tasks[task_id].message = f"[{task_id}] Running model inference ({batch_tag})..."
+        _tasks[task_id].progress = 0.3
+        _publish_task(task_id)
+
+    requests = [_tasks[task_id].request for task_id in task_ids]
+    print(f"[BATCH] Running {batch_tag}: {', '.join(task_ids)}")
+
+    try:
+        predictions = model.inference_batch(
+            [request.image_paths for request in requests],
+            process_res=requests[0].process_res,
+            process_res_method=requests[0].process_res_method,
+        )
+    except Exception as e:
+        print(f"[BATCH] Batched forward failed ({e}), running tasks individually")
+        cleanup_cuda_memory()
+        for task_id in task_ids:
+            _tasks[task_id].batch_size = None
+            _run_inference_task(task_id)
+        return
+
+    inference_time = time.time() - start_time
+    for task_id, request, prediction in zip(task_ids, requests, predictions):
+        try:
+            if request.export_dir:
+                model.export_prediction(
+                    prediction,
+                    request.image_paths,
+                    request.export_dir,
+                    request.export_format,
+                    process_res=request.process_res,
+                    process_res_method=request.process_res_method,
+                    conf_thresh_percentile=request.conf_thresh_percentile,
+                    num_max_points=request.num_max_points,
+                    show_cameras=request.show_cameras,
+                    feat_vis_fps=request.feat_vis_fps,
+                    export_kwargs={},
+                )
+            total_time = time.time() - start_time
+            _tasks[task_id].status = "completed"
+            _tasks[task_id].completed_at = time.time()
+            _tasks[task_id].message = (
+                f"[{task_id}] Completed in {total_time:.2f}s "
+                f"({batch_tag}, forward {inference_time:.2f}s)"
+            )
+            _tasks[task_id].progress = 1.0
+            _tasks[task_id].export_dir = request.export_dir
+        except Exception as e:
+            total_time = time.time() - start_time
+            print(f"[{task_id}] Export failed after {total_time:.2f}s: {e}")
+            _tasks[task_id].status = "failed"
+            _tasks[task_id].completed_at = time.time()
+            _tasks[task_id].message = f"[{task_id}] Failed after {total_time:.2f}s: {e}"
+        _publish_task(task_id)
+
+    print(f"[BATCH] Completed {batch_tag} in {time.time() - start_time:.2f}s")
+    cleanup_cuda_memory()
+    _schedule_task_cleanup()
+
+
 def _cleanup_old_tasks():
-    """Clean up old completed/failed tasks to prevent memory buildup."""
-    global _tasks
+    """Remove finished tasks past the retention age or history size, one batch per call."""
+    for task in _tasks.prune(TASK_RETENTION_SEC, MAX_TASK_HISTORY, batch=TASK_PRUNE_BATCH):
+        _release_task(task)
+        print(f"[CLEANUP] Removed old task: {task.task_id}")
 
-    current_time = time.time()
-    tasks_to_remove = []
-
-    # Find tasks to remove - more aggressive cleanup
-    for task_id, task in _tasks.items():
-        # Remove completed/failed tasks older than 10 minutes (instead of 1 hour)
-        if (
-            task.status in ["completed", "failed"]
-            and task.completed_at
-            and current_time - task.completed_at > 600
-        ):  # 10 minutes
-            tasks_to_remove.append(task_id)
-
-    # Remove old tasks
-    for task_id in tasks_to_remove:
-        del _tasks[task_id]
-        print(f"[CLEANUP] Removed old task: {task_id}")
-
-    # If still too many tasks, remove oldest completed/failed tasks
-    if len(_tasks) > MAX_TASK_HISTORY:
-        completed_tasks = [
-            (task_id, task)
-            for task_id, task in _tasks.items()
-            if task.status in ["completed", "failed"]
-        ]
-        completed_tasks.sort(key=lambda x: x[1].completed_at or 0)
-
-        excess_count = len(_tasks) - MAX_TASK_HISTORY
-        for i in range(min(excess_count, len(completed_tasks))):
-            task_id = completed_tasks[i][0]
-            del _tasks[task_id]
-            print(f"[CLEANUP] Removed excess task: {task_id}")
-
-    # Count active tasks (only pending and running)
-    active_count = sum(1 for task in _tasks.values() if task.status in ["pending", "running"])
+    counts = _tasks.counts()
+    active_count = counts.get("pending", 0) + counts.get("running", 0)
     print(
         "[CLEANUP] Task cleanup completed. "
-        f"Total tasks: {len(_tasks)}, Active tasks: {active_count}"
+        f"Total tasks: {sum(counts.values())}, Active tasks: {active_count}"
     )
 
 
+def _forget_task(task_id: str):
+    """Remove a task with its event snapshot, pending frames and upload results."""
+    task = _tasks.pop(task_id, None)
+    if task is not None:
+        _release_task(task)
+
+
+def _release_task(task: TaskStatus):
+    """Drop the event snapshot, pending frames and upload results of a removed task."""
+    _events.forget(task.task_id)
+    _task_images.pop(task.task_id, None)
+
+    if task.export_dir and _is_upload_dir(task.export_dir):
+        shutil.rmtree(task.export_dir, ignore_errors=True)
+
+
+def _is_upload_dir(path: str) -> bool:
+    root = os.path.realpath(UPLOAD_RESULT_DIR)
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def _result_file(task: TaskStatus, name: Optional[str] = None) -> str:
+    """Resolve a file of a task's export directory, defaulting to its main artifact."""
+    if not task.export_dir:
+        raise HTTPException(status_code=404, detail="Task has no export directory")
+
+    export_root = os.path.realpath(task.export_dir)
+    if name is None:
+        export_format = task.export_format or ""
+        candidates = [RESULT_FILES[f] for f in export_format.split("-") if f in RESULT_FILES]
+        if not candidates:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No default result for format '{export_format}', pass ?file=",
+            )
+        name = candidates[0]
+
+    path = os.path.realpath(os.path.join(export_root, name))
+    if os.path.commonpath([export_root, path]) != export_root or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Result file not found: {name}")
+    return path
+
+
+def _decode_upload(
+    path: str,
+    content_type: str,
+    fps: float,
+    max_frames: int,
+    process_res: int,
+    process_res_method: str,
+) -> List[np.ndarray]:
+    """Decode a spooled upload (video, archive of images or single image) into frames.
+
+    Undecodable or oversized images and corrupt archives raise ``ValueError``.
+    """
+    try:
+        if content_type.startswith("image/"):
+            with open(path, "rb") as f:
+                return [decode_image(f.read(), process_res, process_res_method)]
+
+        if content_type in ARCHIVE_CONTENT_TYPES:
+            with open(path, "rb") as f:
+                return read_image_archive(f, max_frames, process_res, process_res_method)
+
+        try:
+            frames, _ = sample_video_frames(
+                path, fps, max_frames, process_res, process_res_method
+            )
+            return frames
+        except ValueError:
+            # Generic content types may still carry an image archive
+            with open(path, "rb") as f:
+                return read_image_archive(f, max_frames, process_res, process_res_method)
+    except (OSError, Image.DecompressionBombError, zipfile.BadZipFile) as e:
+        # PIL's UnidentifiedImageError is an OSError
+        raise ValueError(f"Could not decode the upload: {e}") from e
+
+
 def _schedule_task_cleanup():
     """Schedule task cleanup in background."""
 
@@ -445,14 +864,14 @@ def _schedule_task_cleanup():
             print(f"[CLEANUP] Cleanup worker failed: {e}")
 
     # Run cleanup in background thread
-    _executor.submit(cleanup_worker)
+    threading.Thread(target=cleanup_worker, daemon=True).start()
 
 
 # ============================================================================
-# Gallery utilities (extracted from gallery.py)
+# Gallery utilities (index and HTTP helpers shared with gallery.py)
 # ============================================================================
 
-GALLERY_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+GALLERY_CHUNK_SIZE = 1 << 20  # Read size for ranged gallery downloads
 
 
 def _load_gallery_html() -> str:
@@ -475,92 +894,66 @@ def _load_gallery_html() -> str:
     return html
 
 
-def _gallery_url_join(*parts: str) -> str:
-    """Join URL parts safely."""
-    norm = posixpath.join(*[p.replace("\\", "/") for p in parts])
-    segs = [s for s in norm.split("/") if s not in ("", ".")]
-    return "/".join(quote(s) for s in segs)
-
-
-def _is_plain_name(name: str) -> bool:
-    """Check if name is safe for use in paths."""
-    return all(c not in name for c in ("/", "\\")) and name not in (".", "..")
-
-
-def build_group_list(root_dir: str) -> dict:
-    """Build list of groups from gallery directory."""
-    groups = []
-    try:
-        for gname in sorted(os.listdir(root_dir)):
-            gpath = os.path.join(root_dir, gname)
-            if not os.path.isdir(gpath):
-                continue
-            has_scene = False
-            try:
-                for sname in os.listdir(gpath):
-                    spath = os.path.join(gpath, sname)
-                    if not os.path.isdir(spath):
-                        continue
-                    if os.path.exists(os.path.join(spath, "scene.glb")) and os.path.exists(
-                        os.path.join(spath, "scene.jpg")
-                    ):
-                        has_scene = True
-                        break
-            except Exception:
-                pass
-            if has_scene:
-                groups.append({"id": gname, "title": gname})
-    except Exception as e:
-        print(f"[warn] build_group_list failed: {e}")
-    return {"groups": groups}
-
+def _gallery_file_response(request: Request, file_path: str):
+    """Serve a gallery file with ETag / Last-Modified validation and single byte ranges."""
+    st = os.stat(file_path)
+    etag = file_etag(st)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(st.st_mtime),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request.headers.get, etag, st.st_mtime):
+        return Response(status_code=304, headers={"ETag": etag})
 
-def build_group_manifest(root_dir: str, group: str) -> dict:
-    """Build manifest for a specific group."""
-    items = []
-    gpath = os.path.join(root_dir, group)
     try:
-        if not os.path.isdir(gpath):
-            return {"group": group, "items": []}
-        for sname in sorted(os.listdir(gpath)):
-            spath = os.path.join(gpath, sname)
-            if not os.path.isdir(spath):
-                continue
-            glb_fs = os.path.join(spath, "scene.glb")
-            jpg_fs = os.path.join(spath, "scene.jpg")
-            if not (os.path.exists(glb_fs) and os.path.exists(jpg_fs)):
-                continue
-            depth_images = []
-            dpath = os.path.join(spath, "depth_vis")
-            if os.path.isdir(dpath):
-                files = [
-                    f
-                    for f in os.listdir(dpath)
-                    if os.path.splitext(f)[1].lower() in GALLERY_IMAGE_EXTS
-                ]
-                for fn in sorted(files):
-                    depth_images.append(
-                        "/gallery/" + _gallery_url_join(group, sname, "depth_vis", fn)
-                    )
-            items.append(
-                {
-                    "id": sname,
-                    "title": sname,
-                    "model": "/gallery/" + _gallery_url_join(group, sname, "scene.glb"),
-                    "thumbnail": "/gallery/" + _gallery_url_join(group, sname, "scene.jpg"),
-                    "depth_images": depth_images,
-                }
-            )
-    except Exception as e:
-        print(f"[warn] build_group_manifest failed for {group}: {e}")
-    return {"group": group, "items": items}
-
-
-def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str] = None) -> FastAPI:
-    """Create FastAPI application with model backend."""
-    global _backend, _app
+        byte_range = parse_range(request.headers.get, st.st_size, etag)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{st.st_size}"})
+    if byte_range is None:
+        # Whole file: FileResponse sends it with sendfile where the server supports it
+        return FileResponse(file_path, headers=headers, stat_result=st)
+
+    start, end = byte_range
+
+    def read_range():
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(GALLERY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    return StreamingResponse(read_range(), status_code=206, media_type=media_type, headers=headers)
+
+
+def create_app(
+    model_dir: str,
+    device: str = "cuda",
+    gallery_dir: Optional[str] = None,
+    extra_models: Optional[Dict[str, Tuple[str, str]]] = None,
+    vram_budget_gb: Optional[float] = None,
+) -> FastAPI:
+    """Create FastAPI application with model backend.
+
+    ``extra_models`` maps model names to ``(model_dir, device)``; requests select one
+    with their ``model`` field and cold models are offloaded to CPU memory when the
+    weights on a device exceed ``vram_budget_gb``.
+    """
+    global _backend, _app, _tasks
 
-    _backend = ModelBackend(model_dir, device)
+    _backend = ModelBackend(model_dir, device, extra_models, vram_budget_gb)
+    _tasks = open_task_store(TASK_STORE_PATH, TaskStatus)
+    interrupted = _tasks.fail_interrupted("Interrupted by a backend restart")
+    if interrupted:
+        print(f"[TASKS] Marked {interrupted} interrupted tasks as failed")
     _app = FastAPI(
         title="Depth Anything 3 Backend",
         description="Model inference service for Depth Anything 3",
@@ -847,11 +1240,9 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
         else:
             uptime_str = "Not running"
 
-        # Get tasks information
-        active_tasks = [task for task in _tasks.values() if task.status in ["pending", "running"]]
-        completed_tasks = [
-            task for task in _tasks.values() if task.status in ["completed", "failed"]
-        ]
+        # Get tasks information: the active set and one page of history
+        active_tasks = _tasks.active()
+        completed_tasks, completed_count = _tasks.list_tasks(TERMINAL_STATUSES, limit=10)
 
         # Generate task HTML
         active_tasks_html = ""
@@ -881,7 +1272,7 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
 
         completed_tasks_html = ""
         if completed_tasks:
-            for task in completed_tasks[-10:]:
+            for task in completed_tasks:
                 task_details = f"""
                 <div class="task-item completed">
                     <div class="task-header">
@@ -1100,7 +1491,7 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
                 </div>
                 <div class="status-item">
                     <span>Completed Tasks:</span>
-                    <span class="status-value">{len(completed_tasks)}</span>
+                    <span class="status-value">{completed_count}</span>
                 </div>
                 <div class="status-item">
                     <span>Total Tasks:</span>
@@ -1173,22 +1564,31 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
         else:
             status["gpu_memory"] = None
 
+        # Queue state and queue-wait / batch-size / latency percentiles
+        status["scheduler"] = _get_scheduler().stats()
+
         return status
 
     @_app.post("/inference", response_model=InferenceResponse)
     async def run_inference(request: InferenceRequest):
         """Submit inference task and return task ID."""
-        global _running_task_id
-
         if _backend is None:
             raise HTTPException(status_code=500, detail="Backend not initialized")
+        if request.priority not in PRIORITY_CLASSES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid priority '{request.priority}', expected one of {list(PRIORITY_CLASSES)}",
+            )
+        _check_model_name(request.model)
 
         # Generate unique task ID
         task_id = str(uuid.uuid4())
+        scheduler = _get_scheduler()
 
         # Create task status
-        if _running_task_id is not None:
-            status_msg = f"[{task_id}] Task queued (waiting for {_running_task_id} to complete)"
+        running = scheduler.running
+        if running:
+            status_msg = f"[{task_id}] Task queued (waiting for {', '.join(running)} to complete)"
         else:
             status_msg = f"[{task_id}] Task submitted"
 
@@ -1206,14 +1606,12 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
             video_path=(
                 request.image_paths[0] if request.image_paths else None
             ),  # Use first image path as video reference
+            priority=request.priority,
         )
 
-        # Add task to queue
-        _task_queue.append(task_id)
-
-        # If no task is running, start processing the queue
-        if _running_task_id is None:
-            _process_next_task()
+        # Hand the task to the priority scheduler
+        _publish_task(task_id)
+        scheduler.submit(_schedule_task(task_id, request))
 
         return InferenceResponse(
             success=True,
@@ -1223,13 +1621,177 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
             export_format=request.export_format,
         )
 
+    @_app.post("/inference/upload", response_model=InferenceResponse)
+    async def upload_and_infer(
+        request: Request,
+        fps: float = 1.0,
+        max_frames: int = UPLOAD_MAX_FRAMES,
+        process_res: int = 504,
+        process_res_method: str = "upper_bound_resize",
+        export_format: str = "glb",
+        conf_thresh_percentile: float = 40.0,
+        num_max_points: int = 1_000_000,
+        show_cameras: bool = True,
+        priority: str = "normal",
+        deadline_s: Optional[float] = None,
+        wait: bool = False,
+        model: Optional[str] = None,
+    ):
+        """Infer on a video, image or zip/tar of images sent as the raw request body.
+
+        The body is decoded in memory without writing frames to disk. Results are
+        exported to a per-task directory and served by ``/task/{task_id}/result``;
+        with ``wait=true`` the main artifact is returned directly.
+        """
+        if _backend is None:
+            raise HTTPException(status_code=500, detail="Backend not initialized")
+        if priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail=f"Invalid priority '{priority}'")
+        _check_model_name(model)
+        if any(f.startswith("gs") or f == "colmap" for f in export_format.split("-")):
+            raise HTTPException(
+                status_code=400, detail="Gaussian and COLMAP exports are not supported for uploads"
+            )
+        if len(_task_images) >= MAX_PENDING_UPLOADS:
+            raise HTTPException(status_code=429, detail="Too many pending uploads, retry later")
+
+        max_frames = max(1, min(max_frames, UPLOAD_MAX_FRAMES))
+        content_type = request.headers.get("content-type", "application/octet-stream").split(";")[0]
+
+        # Spool the compressed upload, then decode the sampled frames off the event loop
+        with tempfile.NamedTemporaryFile(prefix="da3_upload_") as spool:
+            try:
+                await spool_upload(request.stream(), spool, int(UPLOAD_MAX_MB * 2**20))
+                frames = await run_in_threadpool(
+                    _decode_upload,
+                    spool.name,
+                    content_type,
+                    fps,
+                    max_frames,
+                    process_res,
+                    process_res_method,
+                )
+            except UploadTooLargeError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        if not frames:
+            raise HTTPException(status_code=400, detail="No images found in the upload")
+
+        task_id = str(uuid.uuid4())
+        inference_request = InferenceRequest(
+            image_paths=[],
+            export_dir=os.path.join(UPLOAD_RESULT_DIR, task_id),
+            export_format=export_format,
+            process_res=process_res,
+            process_res_method=process_res_method,
+            conf_thresh_percentile=conf_thresh_percentile,
+            num_max_points=num_max_points,
+            show_cameras=show_cameras,
+            priority=priority,
+            deadline_s=deadline_s,
+            model=model,
+        )
+        _tasks[task_id] = TaskStatus(
+            task_id=task_id,
+            status="pending",
+            message=f"[{task_id}] Upload decoded ({len(frames)} frames), task submitted",
+            created_at=time.time(),
+            export_dir=inference_request.export_dir,
+            request=inference_request,
+            num_images=len(frames),
+            export_format=export_format,
+            process_res_method=process_res_method,
+            video_path=request.headers.get("x-filename"),
+            priority=priority,
+        )
+        _task_images[task_id] = frames
+        _publish_task(task_id)
+        _get_scheduler().submit(_schedule_task(task_id, inference_request))
+
+        if wait:
+            async for event in _events.subscribe(task_id):
+                if event is not None and event["status"] in TERMINAL_STATUSES:
+                    break
+            task = _tasks.get(task_id)
+            if task is None or task.status != "completed":
+                message = task.message if task is not None else "Task was removed"
+                raise HTTPException(status_code=500, detail=message)
+            path = _result_file(task)
+            return FileResponse(
+                path, filename=os.path.basename(path), headers={"X-Task-Id": task_id}
+            )
+
+        return InferenceResponse(
+            success=True,
+            message=f"Upload decoded into {len(frames)} frames, task submitted",
+            task_id=task_id,
+            export_dir=inference_request.export_dir,
+            export_format=export_format,
+            result_url=f"/task/{task_id}/result",
+        )
+
+    @_app.get("/task/{task_id}/result")
+    async def get_task_result(task_id: str, file: Optional[str] = None):
+        """Download the main export of a completed task, or ``file`` from its export directory."""
+        task = _tasks.get(task_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if task.status != "completed":
+            raise HTTPException(status_code=409, detail=f"Task is {task.status}")
+
+        path = _result_file(task, file)
+        return FileResponse(path, filename=os.path.basename(path))
+
     @_app.get("/task/{task_id}", response_model=TaskStatus)
     async def get_task_status(task_id: str):
         """Get task status by task ID."""
         if task_id not in _tasks:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        return _tasks[task_id]
+        task = _tasks[task_id]
+        if task.status == "pending":
+            task.queue_position = _get_scheduler().position(task_id)
+        return task
+
+    @_app.get("/task/{task_id}/events")
+    async def stream_task_events(task_id: str):
+        """Stream task progress as server-sent events until the task finishes."""
+        if task_id not in _tasks:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        async def event_stream():
+            async for event in _events.subscribe(task_id):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @_app.websocket("/task/{task_id}/ws")
+    async def task_events_websocket(websocket: WebSocket, task_id: str):
+        """Push task progress over a WebSocket until the task finishes."""
+        await websocket.accept()
+        if task_id not in _tasks:
+            await websocket.send_json({"task_id": task_id, "status": "not_found"})
+            await websocket.close(code=4404)
+            return
+
+        try:
+            async for event in _events.subscribe(task_id):
+                if event is None:
+                    await websocket.send_json({"task_id": task_id, "status": "keep-alive"})
+                    continue
+                await websocket.send_json(event)
+            await websocket.close()
+        except WebSocketDisconnect:
+            pass
 
     @_app.get("/gpu-memory")
     async def get_gpu_memory():
@@ -1256,20 +1818,26 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
         }
 
     @_app.get("/tasks")
-    async def list_tasks():
-        """List all tasks."""
-        # Separate active and completed tasks
-        active_tasks = [task for task in _tasks.values() if task.status in ["pending", "running"]]
-        completed_tasks = [
-            task for task in _tasks.values() if task.status in ["completed", "failed"]
-        ]
+    async def list_tasks(status: Optional[str] = None, limit: int = 100, offset: int = 0):
+        """List tasks newest first, one page at a time.
+
+        ``status`` filters by a comma-separated list of statuses.
+        """
+        statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+        limit = max(1, min(limit, 1000))
+        tasks, total = _tasks.list_tasks(statuses, limit=limit, offset=max(offset, 0))
+        active_tasks = _tasks.active()
 
         return {
-            "tasks": list(_tasks.values()),
+            "tasks": tasks,
             "active_tasks": active_tasks,
-            "completed_tasks": completed_tasks,
+            "completed_tasks": [task for task in tasks if task.status in TERMINAL_STATUSES],
             "active_count": len(active_tasks),
-            "total_count": len(_tasks),
+            "total_count": total,
+            "counts": _tasks.counts(),
+            "limit": limit,
+            "offset": offset,
+            "scheduler": _get_scheduler().stats(),
         }
 
     @_app.post("/cleanup")
@@ -1287,24 +1855,28 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
         if task_id not in _tasks:
             raise HTTPException(status_code=404, detail="Task not found")
 
+        # Pending tasks are cancelled if they have not been dispatched yet
+        if _tasks[task_id].status == "pending" and _get_scheduler().cancel(task_id):
+            _forget_task(task_id)
+            return {"message": f"Task {task_id} cancelled successfully"}
+
         # Only allow deletion of completed/failed tasks
         if _tasks[task_id].status not in ["completed", "failed"]:
             raise HTTPException(status_code=400, detail="Cannot delete running or pending tasks")
 
-        del _tasks[task_id]
+        _forget_task(task_id)
         return {"message": f"Task {task_id} deleted successfully"}
 
     @_app.post("/reload")
-    async def reload_model():
-        """Reload the model."""
+    async def reload_model(model: Optional[str] = None):
+        """Reload a model (the default one if ``model`` is not given)."""
         if _backend is None:
             raise HTTPException(status_code=500, detail="Backend not initialized")
+        _check_model_name(model)
 
         try:
-            _backend.model = None
-            _backend.model_loaded = False
-            _backend.load_model()
-            return {"message": "Model reloaded successfully"}
+            await run_in_threadpool(_backend.reload_model, model)
+            return {"message": f"Model {model or ModelBackend.DEFAULT_MODEL} reloaded successfully"}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to reload model: {str(e)}")
 
@@ -1322,34 +1894,48 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
             """Gallery home page."""
             return HTMLResponse(_gallery_html)
 
+        # Cached manifests, rescanned incrementally when the gallery changes
+        gallery_index = GalleryIndex(_gallery_dir, url_prefix="/gallery/")
+
+        def manifest_response(request: Request, manifest: CachedJSON):
+            if is_not_modified(request.headers.get, manifest.etag, None):
+                return Response(status_code=304, headers={"ETag": manifest.etag})
+            return Response(
+                manifest.data,
+                media_type="application/json",
+                headers={"ETag": manifest.etag, "Cache-Control": "no-cache"},
+            )
+
         @_app.get("/gallery/manifest.json")
-        async def gallery_manifest():
+        async def gallery_manifest(request: Request):
             """Get gallery group list."""
             try:
-                return build_group_list(_gallery_dir)
+                manifest = await run_in_threadpool(gallery_index.group_list_json)
             except Exception as e:
                 raise HTTPException(
                     status_code=500, detail=f"Failed to build group list: {str(e)}"
                 )
+            return manifest_response(request, manifest)
 
         @_app.get("/gallery/manifest/{group}.json")
-        async def gallery_group_manifest(group: str):
+        async def gallery_group_manifest(request: Request, group: str):
             """Get manifest for a specific group."""
-            if not _is_plain_name(group):
+            if not is_plain_name(group):
                 raise HTTPException(status_code=400, detail="Invalid group name")
             try:
-                return build_group_manifest(_gallery_dir, group)
+                manifest = await run_in_threadpool(gallery_index.group_manifest_json, group)
             except Exception as e:
                 raise HTTPException(
                     status_code=500, detail=f"Failed to build group manifest: {str(e)}"
                 )
+            return manifest_response(request, manifest)
 
         @_app.get("/gallery/{path:path}")
-        async def gallery_files(path: str):
+        async def gallery_files(request: Request, path: str):
             """Serve gallery static files (GLB, JPG, etc.)."""
             # Security check: prevent directory traversal
             path_parts = path.split("/")
-            if any(not _is_plain_name(part) for part in path_parts if part):
+            if any(not is_plain_name(part) for part in path_parts if part):
                 raise HTTPException(status_code=400, detail="Invalid path")
 
             file_path = os.path.join(_gallery_dir, *path_parts)
@@ -1357,13 +1943,13 @@ def create_app(model_dir: str, device: str = "cuda", gallery_dir: Optional[str]
             # Ensure the file is within gallery directory
             real_file_path = os.path.realpath(file_path)
             real_gallery_dir = os.path.realpath(_gallery_dir)
-            if not real_file_path.startswith(real_gallery_dir):
+            if os.path.commonpath([real_gallery_dir, real_file_path]) != real_gallery_dir:
                 raise HTTPException(status_code=403, detail="Access denied")
 
             if not os.path.exists(file_path) or not os.path.isfile(file_path):
                 raise HTTPException(status_code=404, detail="File not found")
 
-            return FileResponse(file_path)
+            return _gallery_file_response(request, file_path)
 
     return _app
 
@@ -1374,13 +1960,17 @@ def start_server(
     host: str = "127.0.0.1",
     port: int = 8000,
     gallery_dir: Optional[str] = None,
+    extra_models: Optional[Dict[str, Tuple[str, str]]] = None,
+    vram_budget_gb: Optional[float] = None,
 ):
     """Start the backend server."""
-    app = create_app(model_dir, device, gallery_dir)
+    app = create_app(model_dir, device, gallery_dir, extra_models, vram_budget_gb)
 
     print("Starting Depth Anything 3 Backend...")
     print(f"Model directory: {model_dir}")
     print(f"Device: {device}")
+    for name, (extra_dir, extra_device) in (extra_models or {}).items():
+        print(f"Extra model: {name} = {extra_dir} on {extra_device}")
     print(f"Server: http://{host}:{port}")
     print(f"Dashboard: http://{host}:{port}/dashboard")
     print(f"API Status: http://{host}:{port}/status")
@@ -1412,6 +2002,20 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     parser.add_argument("--gallery-dir", help="Gallery directory path (optional)")
+    parser.add_argument(
+        "--extra-models", default="", help="Extra models as name=model_dir[@device],..."
+    )
+    parser.add_argument(
+        "--vram-budget-gb", type=float, default=None, help="Resident weight budget per GPU"
+    )
 
     args = parser.parse_args()
-    start_server(args.model_dir, args.device, args.host, args.port, args.gallery_dir)
+    start_server(
+        args.model_dir,
+        args.device,
+        args.host,
+        args.port,
+        args.gallery_dir,
+        parse_model_specs(args.extra_models, args.device),
+        args.vram_budget_gb,
+    )
@@ -15,20 +15,32 @@
 # limitations under the License.
 
 """
-Depth Anything 3 Gallery Server (two-level, single-file)
+Depth Anything 3 Gallery Server (two-level)
 Now supports paginated depth preview (4 per page).
+Manifests come from a cached GalleryIndex; files are served with ETag /
+Last-Modified validation, range requests and sendfile.
 """
 
 import argparse
-import json
 import mimetypes
 import os
-import posixpath
+import stat
 import sys
 from functools import partial
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
-from urllib.parse import quote, unquote
+from typing import Optional
+from urllib.parse import unquote
+
+from depth_anything_3.services.gallery_index import (
+    CachedJSON,
+    GalleryIndex,
+    file_etag,
+    http_date,
+    is_not_modified,
+    is_plain_name,
+    parse_range,
+)
 
 # ------------------------------ Embedded HTML ------------------------------ #
 
@@ -625,87 +637,32 @@ routeFromURL();
 
 # ------------------------------ Utilities ------------------------------ #
 
-IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
-
-
-def _url_join(*parts: str) -> str:
-    norm = posixpath.join(*[p.replace("\\", "/") for p in parts])
-    segs = [s for s in norm.split("/") if s not in ("", ".")]
-    return "/".join(quote(s) for s in segs)
-
-
-def _is_plain_name(name: str) -> bool:
-    return all(c not in name for c in ("/", "\\")) and name not in (".", "..")
-
 
 def build_group_list(root_dir: str) -> dict:
-    groups = []
-    try:
-        for gname in sorted(os.listdir(root_dir)):
-            gpath = os.path.join(root_dir, gname)
-            if not os.path.isdir(gpath):
-                continue
-            has_scene = False
-            try:
-                for sname in os.listdir(gpath):
-                    spath = os.path.join(gpath, sname)
-                    if not os.path.isdir(spath):
-                        continue
-                    if os.path.exists(os.path.join(spath, "scene.glb")) and os.path.exists(
-                        os.path.join(spath, "scene.jpg")
-                    ):
-                        has_scene = True
-                        break
-            except Exception:
-                pass
-            if has_scene:
-                groups.append({"id": gname, "title": gname})
-    except Exception as e:
-        print(f"[warn] build_group_list failed: {e}", file=sys.stderr)
-    return {"groups": groups}
+    return GalleryIndex(root_dir).group_list()
 
 
 def build_group_manifest(root_dir: str, group: str) -> dict:
-    items = []
-    gpath = os.path.join(root_dir, group)
-    try:
-        if not os.path.isdir(gpath):
-            return {"group": group, "items": []}
-        for sname in sorted(os.listdir(gpath)):
-            spath = os.path.join(gpath, sname)
-            if not os.path.isdir(spath):
-                continue
-            glb_fs = os.path.join(spath, "scene.glb")
-            jpg_fs = os.path.join(spath, "scene.jpg")
-            if not (os.path.exists(glb_fs) and os.path.exists(jpg_fs)):
-                continue
-            depth_images = []
-            dpath = os.path.join(spath, "depth_vis")
-            if os.path.isdir(dpath):
-                files = [
-                    f for f in os.listdir(dpath) if os.path.splitext(f)[1].lower() in IMAGE_EXTS
-                ]
-                for fn in sorted(files):
-                    depth_images.append("/" + _url_join(group, sname, "depth_vis", fn))
-            items.append(
-                {
-                    "id": sname,
-                    "title": sname,
-                    "model": "/" + _url_join(group, sname, "scene.glb"),
-                    "thumbnail": "/" + _url_join(group, sname, "scene.jpg"),
-                    "depth_images": depth_images,
-                }
-            )
-    except Exception as e:
-        print(f"[warn] build_group_manifest failed for {group}: {e}", file=sys.stderr)
-    return {"group": group, "items": items}
+    return GalleryIndex(root_dir).group_manifest(group)
 
 
 class GalleryHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args, directory=None, **kwargs):
+    """
+    Gallery request handler serving cached manifests and files with conditional
+    and range requests; file bodies are sent with ``sendfile``.
+    """
+
+    def __init__(self, *args, directory=None, index: Optional[GalleryIndex] = None, **kwargs):
+        self.index = index or GalleryIndex(directory)
         super().__init__(*args, directory=directory, **kwargs)
 
     def do_GET(self):
+        self._handle(head_only=False)
+
+    def do_HEAD(self):
+        self._handle(head_only=True)
+
+    def _handle(self, head_only: bool):
         if self.path in ("/", "/index.html") or self.path.startswith("/?"):
             content = HTML_PAGE.encode("utf-8")
             self.send_response(HTTPStatus.OK)
@@ -713,18 +670,11 @@ class GalleryHandler(SimpleHTTPRequestHandler):
             self.send_header("Content-Length", str(len(content)))
             self.send_header("Cache-Control", "no-store")
             self.end_headers()
-            self.wfile.write(content)
+            if not head_only:
+                self.wfile.write(content)
             return
         if self.path == "/manifest.json":
-            data = json.dumps(
-                build_group_list(self.directory), ensure_ascii=False, indent=2
-            ).encode("utf-8")
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "application/json; charset=utf-8")
-            self.send_header("Content-Length", str(len(data)))
-            self.send_header("Cache-Control", "no-store")
-            self.end_headers()
-            self.wfile.write(data)
+            self._send_json(self.index.group_list_json(), head_only)
             return
         if self.path.startswith("/manifest/") and self.path.endswith(".json"):
             group_enc = self.path[len("/manifest/") : -len(".json")]
@@ -732,24 +682,82 @@ class GalleryHandler(SimpleHTTPRequestHandler):
                 group = unquote(group_enc)
             except Exception:
                 group = group_enc
-            if not _is_plain_name(group):
+            if not is_plain_name(group):
                 self.send_error(HTTPStatus.BAD_REQUEST, "Invalid group name")
                 return
-            data = json.dumps(
-                build_group_manifest(self.directory, group), ensure_ascii=False, indent=2
-            ).encode("utf-8")
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "application/json; charset=utf-8")
-            self.send_header("Content-Length", str(len(data)))
-            self.send_header("Cache-Control", "no-store")
-            self.end_headers()
-            self.wfile.write(data)
+            self._send_json(self.index.group_manifest_json(group), head_only)
             return
         if self.path == "/favicon.ico":
             self.send_response(HTTPStatus.NO_CONTENT)
             self.end_headers()
             return
-        return super().do_GET()
+        self._send_file(self.translate_path(self.path), head_only)
+
+    def _send_json(self, manifest: CachedJSON, head_only: bool):
+        if is_not_modified(self.headers.get, manifest.etag, None):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", manifest.etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(manifest.data)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", manifest.etag)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(manifest.data)
+
+    def _send_file(self, path: str, head_only: bool):
+        try:
+            f = open(path, "rb")
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        except OSError:
+            self.send_error(HTTPStatus.FORBIDDEN, "Access denied")
+            return
+
+        with f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+                return
+            etag = file_etag(st)
+            if is_not_modified(self.headers.get, etag, st.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            try:
+                byte_range = parse_range(self.headers.get, st.st_size, etag)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = byte_range or (0, st.st_size - 1)
+            if byte_range is not None:
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+            else:
+                self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", http_date(st.st_mtime))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            if not head_only and end >= start:
+                self.wfile.flush()
+                try:
+                    self.connection.sendfile(f, start, end - start + 1)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client went away mid-download
 
     def list_directory(self, path):
         self.send_error(HTTPStatus.NOT_FOUND, "Directory listing disabled")
@@ -773,7 +781,8 @@ def gallery():
         print(f"[error] Directory not found: {root_dir}", file=sys.stderr)
         sys.exit(1)
 
-    Handler = partial(GalleryHandler, directory=root_dir)
+    # One index shared by all handler threads
+    Handler = partial(GalleryHandler, directory=root_dir, index=GalleryIndex(root_dir))
     server = ThreadingHTTPServer((args.host, args.port), Handler)
 
     addr = f"http://{args.host}:{args.port}/"
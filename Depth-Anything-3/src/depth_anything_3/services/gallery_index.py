@@ -0,0 +1,285 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cached index of a two-level gallery directory (``group/scene``).
+
+Shared by the standalone gallery server and the backend. Manifests are built
+once and kept as serialized JSON with an ETag. A later request only rescans what
+changed, detected from directory mtimes: a group is relisted when its directory
+changed, and a scene is re-read when its own directory or its ``depth_vis``
+directory changed. Checks of a group are rate-limited by ``check_interval_sec``.
+
+Also provides the HTTP caching and range helpers used to serve gallery files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+@dataclass
+class CachedJSON:
+    """Serialized manifest with its ETag."""
+
+    data: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, obj: dict) -> CachedJSON:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        return cls(data, '"' + hashlib.sha1(data).hexdigest()[:20] + '"')
+
+
+@dataclass
+class _Scene:
+    mtime_ns: Optional[int]
+    depth_mtime_ns: Optional[int]
+    item: Optional[dict]  # None if the scene has no scene.glb / scene.jpg
+
+
+@dataclass
+class _Group:
+    mtime_ns: int = -1
+    names: List[str] = field(default_factory=list)
+    scenes: Dict[str, _Scene] = field(default_factory=dict)
+    checked_at: float = 0.0
+    manifest: Optional[CachedJSON] = None
+
+    @property
+    def has_items(self) -> bool:
+        return any(scene.item is not None for scene in self.scenes.values())
+
+
+def url_join(*parts: str) -> str:
+    """Join URL parts safely."""
+    norm = posixpath.join(*[p.replace("\\", "/") for p in parts])
+    segs = [s for s in norm.split("/") if s not in ("", ".")]
+    return "/".join(quote(s) for s in segs)
+
+
+def is_plain_name(name: str) -> bool:
+    return all(c not in name for c in ("/", "\\")) and name not in (".", "..")
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class GalleryIndex:
+    """
+    Incrementally refreshed manifests of a gallery root.
+
+    Args:
+        root_dir: Gallery root directory (two-level: group/scene)
+        url_prefix: Prefix of the file URLs in the manifests (e.g. ``/gallery/``)
+        check_interval_sec: Minimum time between two freshness checks of a group
+    """
+
+    def __init__(self, root_dir: str, url_prefix: str = "/", check_interval_sec: float = 2.0):
+        self.root_dir = root_dir
+        self.url_prefix = url_prefix
+        self.check_interval_sec = check_interval_sec
+        self._lock = threading.Lock()
+        self._root_mtime_ns: Optional[int] = None
+        self._group_names: List[str] = []
+        self._groups: Dict[str, _Group] = {}
+        self._group_list: Optional[CachedJSON] = None
+        self._group_list_key: Optional[tuple] = None
+
+    def group_list_json(self) -> CachedJSON:
+        """Groups with at least one complete scene."""
+        with self._lock:
+            mtime = _mtime_ns(self.root_dir)
+            if mtime != self._root_mtime_ns:
+                self._root_mtime_ns = mtime
+                self._group_names = self._list_dirs(self.root_dir)
+                for gone in set(self._groups) - set(self._group_names):
+                    del self._groups[gone]
+
+            groups = [g for g in self._group_names if self._refresh_group(g).has_items]
+            key = tuple(groups)
+            if self._group_list is None or key != self._group_list_key:
+                self._group_list = CachedJSON.of(
+                    {"groups": [{"id": g, "title": g} for g in groups]}
+                )
+                self._group_list_key = key
+            return self._group_list
+
+    def group_manifest_json(self, group: str) -> CachedJSON:
+        """Complete scenes of a group with their model, thumbnail and depth images."""
+        with self._lock:
+            return self._refresh_group(group).manifest
+
+    def group_list(self) -> dict:
+        return json.loads(self.group_list_json().data)
+
+    def group_manifest(self, group: str) -> dict:
+        return json.loads(self.group_manifest_json(group).data)
+
+    # ---------------------------------------------------------------- internals
+
+    def _refresh_group(self, group: str) -> _Group:
+        entry = self._groups.get(group)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval_sec:
+            return entry
+
+        gpath = os.path.join(self.root_dir, group)
+        mtime = _mtime_ns(gpath)
+        if mtime is None:
+            # Missing groups are not cached
+            self._groups.pop(group, None)
+            return _Group(manifest=CachedJSON.of({"group": group, "items": []}))
+
+        entry = self._groups.setdefault(group, _Group())
+        entry.checked_at = now
+        if mtime != entry.mtime_ns:
+            entry.mtime_ns = mtime
+            entry.names = self._list_dirs(gpath)
+            entry.scenes = {n: s for n, s in entry.scenes.items() if n in entry.names}
+
+        changed = entry.manifest is None
+        for sname in entry.names:
+            changed |= self._refresh_scene(entry, group, sname)
+
+        if changed:
+            items = [entry.scenes[n].item for n in entry.names if entry.scenes[n].item is not None]
+            entry.manifest = CachedJSON.of({"group": group, "items": items})
+        return entry
+
+    def _refresh_scene(self, entry: _Group, group: str, sname: str) -> bool:
+        """Re-read a scene whose directory changed; returns whether it did."""
+        spath = os.path.join(self.root_dir, group, sname)
+        mtime = _mtime_ns(spath)
+        depth_mtime = _mtime_ns(os.path.join(spath, "depth_vis"))
+        cached = entry.scenes.get(sname)
+        if (
+            cached is not None
+            and cached.mtime_ns == mtime
+            and cached.depth_mtime_ns == depth_mtime
+        ):
+            return False
+
+        entry.scenes[sname] = _Scene(mtime, depth_mtime, self._scene_item(group, sname, spath))
+        return True
+
+    def _scene_item(self, group: str, sname: str, spath: str) -> Optional[dict]:
+        if not (
+            os.path.exists(os.path.join(spath, "scene.glb"))
+            and os.path.exists(os.path.join(spath, "scene.jpg"))
+        ):
+            return None
+
+        depth_images = []
+        dpath = os.path.join(spath, "depth_vis")
+        if os.path.isdir(dpath):
+            files = [f for f in os.listdir(dpath) if os.path.splitext(f)[1].lower() in IMAGE_EXTS]
+            for fn in sorted(files):
+                depth_images.append(self.url_prefix + url_join(group, sname, "depth_vis", fn))
+        return {
+            "id": sname,
+            "title": sname,
+            "model": self.url_prefix + url_join(group, sname, "scene.glb"),
+            "thumbnail": self.url_prefix + url_join(group, sname, "scene.jpg"),
+            "depth_images": depth_images,
+        }
+
+    @staticmethod
+    def _list_dirs(path: str) -> List[str]:
+        try:
+            with os.scandir(path) as it:
+                return sorted(e.name for e in it if e.is_dir())
+        except OSError as e:
+            print(f"[warn] Cannot list gallery directory {path}: {e}", file=sys.stderr)
+            return []
+
+
+# ------------------------------ HTTP helpers ------------------------------ #
+
+
+def file_etag(st: os.stat_result) -> str:
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(
+    get_header: Callable[[str], Optional[str]], etag: str, mtime: Optional[float]
+) -> bool:
+    """
+    Evaluate ``If-None-Match`` / ``If-Modified-Since`` against a resource.
+
+    Resources without a modification time (``mtime`` None) are only validated by
+    their ETag.
+    """
+    if_none_match = get_header("If-None-Match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = get_header("If-Modified-Since")
+    if if_modified_since is not None and mtime is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_range(
+    get_header: Callable[[str], Optional[str]], size: int, etag: str
+) -> Optional[Tuple[int, int]]:
+    """
+    Single byte range requested by ``Range``, as inclusive ``(start, end)``.
+
+    Returns None to serve the whole file (no range, a stale ``If-Range`` or several
+    ranges) and raises ``ValueError`` for an unsatisfiable range.
+    """
+    header = get_header("Range")
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    if_range = get_header("If-Range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+
+    start_s, _, end_s = header[len("bytes=") :].strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = min(int(end_s), size - 1) if end_s else size - 1
+        else:  # suffix range: the last N bytes
+            start, end = max(size - int(end_s), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
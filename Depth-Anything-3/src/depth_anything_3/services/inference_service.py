@@ -42,7 +42,7 @@ class InferenceService:
 
     def run_local_inference(
         self,
-        image_paths: List[str],
+        image_paths: List[Union[str, np.ndarray]],
         export_dir: str,
         export_format: str = "mini_npz-glb",
         process_res: int = 504,
@@ -98,7 +98,7 @@ class InferenceService:
 
     def run_backend_inference(
         self,
-        image_paths: List[str],
+        image_paths: List[Union[str, np.ndarray]],
         export_dir: str,
         backend_url: str,
         export_format: str = "mini_npz-glb",
@@ -177,7 +177,7 @@ class InferenceService:
 
 
 def run_inference(
-    image_paths: List[str],
+    image_paths: List[Union[str, np.ndarray]],
     export_dir: str,
     model_dir: str,
     device: str = "cuda",
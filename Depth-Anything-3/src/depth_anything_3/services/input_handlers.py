@@ -18,13 +18,16 @@ Handles different types of inputs (image, images, colmap, video)
 """
 
 import glob
+import itertools
+import math
 import os
-from typing import List, Tuple
+from typing import Iterator, List, Tuple, Union
 import cv2
 import numpy as np
 import typer
 
-from ..utils.read_write_model import read_model
+from ..utils.read_write_model import qvecs2rotmats, read_model
+from .upload import prescale_frame
 
 
 class InputHandler:
@@ -123,62 +126,47 @@ class ColmapHandler(InputHandler):
         InputHandler.validate_path(images_dir, "Images directory")
         InputHandler.validate_path(sparse_dir, "Sparse reconstruction directory")
 
-        # Load COLMAP data
+        # Load COLMAP data (poses only: 3D points and 2D observations are not read)
         typer.echo("Loading COLMAP reconstruction data...")
         try:
-            cameras, images, points3D = read_model(sparse_dir)
+            cameras, images, _ = read_model(sparse_dir, poses_only=True)
 
-            typer.echo(
-                f"Loaded COLMAP data: {len(cameras)} cameras, {len(images)} images, "
-                f"{len(points3D)} 3D points."
-            )
+            typer.echo(f"Loaded COLMAP data: {len(cameras)} cameras, {len(images)} images.")
 
-            # Get image files and pose data
-            image_files = []
-            extrinsics = []
-            intrinsics = []
-
-            for image_id, image_data in images.items():
-                image_name = image_data.name
-                image_path = os.path.join(images_dir, image_name)
-
-                if os.path.exists(image_path):
-                    image_files.append(image_path)
-
-                    # Get camera parameters
-                    camera = cameras[image_data.camera_id]
-
-                    # Convert quaternion to rotation matrix
-                    R = image_data.qvec2rotmat()
-                    t = image_data.tvec
-
-                    # Create extrinsic matrix (world to camera)
-                    extrinsic = np.eye(4)
-                    extrinsic[:3, :3] = R
-                    extrinsic[:3, 3] = t
-                    extrinsics.append(extrinsic)
-
-                    # Create intrinsic matrix
-                    if camera.model == "PINHOLE":
-                        fx, fy, cx, cy = camera.params
-                    elif camera.model == "SIMPLE_PINHOLE":
-                        f, cx, cy = camera.params
-                        fx = fy = f
-                    else:
-                        # For other models, use basic pinhole approximation
-                        fx = fy = camera.params[0] if len(camera.params) > 0 else 1000
-                        cx = camera.width / 2
-                        cy = camera.height / 2
-
-                    intrinsic = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]])
-                    intrinsics.append(intrinsic)
-
-            if not image_files:
+            # Keep images present on disk
+            images = [
+                image
+                for image in images.values()
+                if os.path.exists(os.path.join(images_dir, image.name))
+            ]
+            if not images:
                 raise typer.BadParameter("No valid images found in COLMAP data")
+            image_files = [os.path.join(images_dir, image.name) for image in images]
+
+            # Create extrinsic matrices (world to camera)
+            extrinsics = np.tile(np.eye(4), (len(images), 1, 1))
+            extrinsics[:, :3, :3] = qvecs2rotmats([image.qvec for image in images])
+            extrinsics[:, :3, 3] = [image.tvec for image in images]
+
+            # Create one intrinsic matrix per camera
+            camera_intrinsics = {}
+            for camera_id, camera in cameras.items():
+                if camera.model == "PINHOLE":
+                    fx, fy, cx, cy = camera.params
+                elif camera.model == "SIMPLE_PINHOLE":
+                    f, cx, cy = camera.params
+                    fx = fy = f
+                else:
+                    # For other models, use basic pinhole approximation
+                    fx = fy = camera.params[0] if len(camera.params) > 0 else 1000
+                    cx = camera.width / 2
+                    cy = camera.height / 2
+                camera_intrinsics[camera_id] = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]])
+            intrinsics = np.stack([camera_intrinsics[image.camera_id] for image in images])
 
             typer.echo(f"Found {len(image_files)} valid images with pose data")
 
-            return image_files, np.array(extrinsics), np.array(intrinsics)
+            return image_files, extrinsics, intrinsics
 
         except Exception as e:
             raise typer.BadParameter(f"Failed to load COLMAP data: {e}")
@@ -187,9 +175,48 @@ class ColmapHandler(InputHandler):
 class VideoHandler(InputHandler):
     """Video handler"""
 
+    # Gap (in frames) between two sampled frames above which the decoder seeks
+    # instead of grabbing every frame in between
+    SEEK_MIN_GAP = 300
+
     @staticmethod
-    def process(video_path: str, output_dir: str, fps: float = 1.0) -> List[str]:
-        """Process video, extract frames"""
+    def sample_indices(video_fps: float, fps: float, total_frames: int = 0) -> Iterator[int]:
+        """
+        Indices of the frames nearest to the timestamps ``k / fps``.
+
+        Yields indices in increasing order without repeats, so every frame is kept
+        when ``fps`` exceeds ``video_fps``. Unbounded if ``total_frames`` is unknown.
+        """
+        last = -1
+        for k in itertools.count():
+            index = int(math.floor(k * video_fps / fps + 0.5))
+            if total_frames > 0 and index >= total_frames:
+                return
+            if index > last:
+                last = index
+                yield index
+
+    @staticmethod
+    def process(
+        video_path: str,
+        output_dir: str,
+        fps: float = 1.0,
+        save_frames: bool = False,
+        process_res: int = 0,
+        process_res_method: str = "upper_bound_resize",
+    ) -> Union[List[str], List[np.ndarray]]:
+        """
+        Sample frames of a video at ``fps``.
+
+        Only sampled frames are decoded: the frames in between are grabbed, or
+        skipped by seeking when more than ``SEEK_MIN_GAP`` apart. Sampled frames are
+        downscaled right away to the size the model resizes them to for
+        ``process_res`` (0 keeps the full resolution).
+
+        Returns:
+            RGB frames, or the paths of PNG files under ``output_dir/input_images``
+            if ``save_frames`` is set (e.g. for a backend that reads from disk)
+        """
         InputHandler.validate_path(video_path, "Video file")
 
         cap = cv2.VideoCapture(video_path)
@@ -197,14 +224,10 @@ class VideoHandler(InputHandler):
             raise typer.BadParameter(f"Cannot open video: {video_path}")
 
         # Get video properties
-        video_fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
         duration = total_frames / video_fps
 
-        # Calculate frame interval (ensure at least 1)
-        frame_interval = max(1, int(video_fps / fps))
-        actual_fps = video_fps / frame_interval
-
         typer.echo(f"Video FPS: {video_fps:.2f}, Duration: {duration:.2f}s")
 
         # Warn if requested FPS is higher than video FPS
@@ -214,42 +237,53 @@ class VideoHandler(InputHandler):
                 err=True,
             )
             typer.echo(
-                f"⚠️  Using maximum available FPS: {actual_fps:.2f} (extracting every frame)",
+                f"⚠️  Using maximum available FPS: {video_fps:.2f} (extracting every frame)",
                 err=True,
             )
+            fps = video_fps
 
-        typer.echo(f"Extracting frames at {actual_fps:.2f} FPS (every {frame_interval} frame(s))")
+        typer.echo(f"Extracting frames at {fps:.2f} FPS")
 
-        # Create output directory
-        frames_dir = os.path.join(output_dir, "input_images")
-        os.makedirs(frames_dir, exist_ok=True)
+        if save_frames:
+            frames_dir = os.path.join(output_dir, "input_images")
+            os.makedirs(frames_dir, exist_ok=True)
 
-        frame_count = 0
-        saved_count = 0
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            if frame_count % frame_interval == 0:
-                frame_path = os.path.join(frames_dir, f"{saved_count:06d}.png")
-                cv2.imwrite(frame_path, frame)
-                saved_count += 1
-
-            frame_count += 1
-
-        cap.release()
-        typer.echo(f"Extracted {saved_count} frames to {frames_dir}")
+        frames = []
+        position = 0  # index of the frame the next grab() returns
+        try:
+            for index in VideoHandler.sample_indices(video_fps, fps, total_frames):
+                if index - position > VideoHandler.SEEK_MIN_GAP and cap.set(
+                    cv2.CAP_PROP_POS_FRAMES, index
+                ):
+                    position = index
+                while position < index and cap.grab():
+                    position += 1
+                if position < index or not cap.grab():
+                    break
+                position += 1
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+
+                if process_res > 0:
+                    frame = prescale_frame(frame, process_res, process_res_method)
+                if save_frames:
+                    frame_path = os.path.join(frames_dir, f"{len(frames):06d}.png")
+                    cv2.imwrite(frame_path, frame)
+                    frames.append(frame_path)
+                else:
+                    frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        finally:
+            cap.release()
 
-        # Get frame file list
-        frame_files = sorted(
-            [f for f in os.listdir(frames_dir) if f.endswith((".png", ".jpg", ".jpeg"))]
-        )
-        if not frame_files:
+        if not frames:
             raise typer.BadParameter("No frames extracted from video")
 
-        return [os.path.join(frames_dir, f) for f in frame_files]
+        if save_frames:
+            typer.echo(f"Extracted {len(frames)} frames to {frames_dir}")
+        else:
+            typer.echo(f"Extracted {len(frames)} frames")
+        return frames
 
 
 def parse_export_feat(export_feat_str: str) -> List[int]:
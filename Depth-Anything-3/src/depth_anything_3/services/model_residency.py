@@ -0,0 +1,325 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Residency manager for serving several DepthAnything3 models from one process.
+
+Each registered model has a target device. A model is in one of three states:
+
+    unloaded  - weights not loaded
+    offloaded - weights in (pinned) CPU memory
+    resident  - weights on the target device
+
+``get`` promotes a model to its device on demand. When the weights resident on
+that device would exceed the VRAM budget, the least recently used other models
+are offloaded to pinned CPU memory, from where they are promoted back with a
+fast non-blocking host-to-device copy.
+
+Models held through ``acquire`` are in use: they are never offloaded to make room,
+and ``offload``/``reload`` wait until they are released.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import torch
+
+from ..api import DepthAnything3
+
+# Share of the device memory usable for resident weights when no budget is given
+DEFAULT_BUDGET_FRACTION = 0.6
+
+
+@dataclass
+class ModelEntry:
+    """Residency state and swap statistics of one registered model."""
+
+    name: str
+    model_dir: str
+    device: str
+    model: Optional[DepthAnything3] = None
+    state: str = "unloaded"  # "unloaded", "offloaded" or "resident"
+    size_gb: float = 0.0
+    last_used: Optional[float] = None
+    load_time: Optional[float] = None
+    loaded_at: Optional[float] = None
+    requests: int = 0
+    in_use: int = 0  # callers currently holding the model through ``acquire``
+    swap_in_count: int = 0
+    swap_out_count: int = 0
+    last_swap_in_sec: Optional[float] = None
+    last_swap_out_sec: Optional[float] = None
+    total_swap_in_sec: float = 0.0
+    total_swap_out_sec: float = 0.0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model_dir": self.model_dir,
+            "model_name": self.model.model_name if self.model is not None else None,
+            "device": self.device,
+            "state": self.state,
+            "size_gb": round(self.size_gb, 3),
+            "last_used": self.last_used,
+            "load_time": self.load_time,
+            "requests": self.requests,
+            "in_use": self.in_use,
+            "swap_in_count": self.swap_in_count,
+            "swap_out_count": self.swap_out_count,
+            "last_swap_in_sec": self.last_swap_in_sec,
+            "last_swap_out_sec": self.last_swap_out_sec,
+            "avg_swap_in_sec": (
+                self.total_swap_in_sec / self.swap_in_count if self.swap_in_count else None
+            ),
+            "avg_swap_out_sec": (
+                self.total_swap_out_sec / self.swap_out_count if self.swap_out_count else None
+            ),
+        }
+
+
+def parse_model_specs(spec: str, default_device: str = "cuda") -> Dict[str, Tuple[str, str]]:
+    """
+    Parse ``"name=model_dir[@device],..."`` into ``{name: (model_dir, device)}``.
+
+    Example: ``"nested=depth-anything/DA3NESTED-GIANT-LARGE@cuda:1,small=depth-anything/DA3-SMALL"``
+    """
+    models: Dict[str, Tuple[str, str]] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        if "=" not in item:
+            raise ValueError(f"Invalid model spec '{item}', expected name=model_dir[@device]")
+        name, target = (s.strip() for s in item.split("=", 1))
+        model_dir, _, device = target.partition("@")
+        models[name] = (model_dir, device or default_device)
+    return models
+
+
+class ModelResidencyManager:
+    """
+    LRU residency of several models under a per-device VRAM budget.
+
+    Args:
+        vram_budget_gb: Memory for resident weights per device. Defaults to
+            ``DEFAULT_BUDGET_FRACTION`` of each CUDA device's memory.
+        pin_memory: Keep offloaded weights in pinned CPU memory for faster promotion
+    """
+
+    def __init__(self, vram_budget_gb: Optional[float] = None, pin_memory: bool = True):
+        self.vram_budget_gb = vram_budget_gb
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.RLock()
+        self._released = threading.Condition(self._lock)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def register(self, name: str, model_dir: str, device: str = "cuda") -> None:
+        with self._lock:
+            if name in self._entries:
+                raise ValueError(f"Model '{name}' is already registered")
+            self._entries[name] = ModelEntry(name=name, model_dir=model_dir, device=device)
+
+    def entry(self, name: str) -> ModelEntry:
+        if name not in self._entries:
+            raise KeyError(f"Unknown model '{name}', available: {self.names}")
+        return self._entries[name]
+
+    def get(self, name: str) -> DepthAnything3:
+        """Return the model on its device, loading or promoting it if needed."""
+        with self._lock:
+            entry = self.entry(name)
+            entry.requests += 1
+            entry.last_used = time.time()
+
+            if entry.state == "unloaded":
+                self._load(entry)
+            if entry.state == "offloaded":
+                self._make_room(entry)
+                self._swap_in(entry)
+            return entry.model
+
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[DepthAnything3]:
+        """
+        Hold a model on its device for the duration of the block.
+
+        The model is not offloaded to make room for another model, nor offloaded or
+        reloaded on request, until the block exits.
+        """
+        with self._lock:
+            model = self.get(name)
+            entry = self.entry(name)
+            entry.in_use += 1
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                self._released.notify_all()
+
+    def offload(self, name: str) -> None:
+        """Move a resident model to CPU memory."""
+        with self._lock:
+            entry = self.entry(name)
+            self._wait_until_released(entry)
+            if entry.state == "resident":
+                self._swap_out(entry)
+
+    def reload(self, name: str) -> DepthAnything3:
+        """Drop a model's weights and load it again."""
+        with self._lock:
+            entry = self.entry(name)
+            self._wait_until_released(entry)
+            entry.model = None
+            entry.state = "unloaded"
+            _empty_cache()
+            return self.get(name)
+
+    def status(self) -> Dict[str, Any]:
+        """Residency state, swap latencies and budget usage per device."""
+        entries = list(self._entries.values())
+        devices = {}
+        for device in sorted({e.device for e in entries}):
+            resident = [e for e in entries if e.device == device and e.state == "resident"]
+            budget = self._budget_gb(device)
+            devices[device] = {
+                "budget_gb": round(budget, 2) if budget is not None else None,
+                "resident_gb": round(sum(e.size_gb for e in resident), 3),
+                "resident_models": [e.name for e in resident],
+            }
+        return {
+            "models": {e.name: e.status() for e in entries},
+            "devices": devices,
+        }
+
+    # ---------------------------------------------------------------- internals
+
+    def _wait_until_released(self, entry: ModelEntry) -> None:
+        if entry.in_use:
+            print(f"[RESIDENCY] Waiting for {entry.in_use} user(s) to release '{entry.name}'")
+        self._released.wait_for(lambda: entry.in_use == 0)
+
+    def _load(self, entry: ModelEntry) -> None:
+        print(f"[RESIDENCY] Loading model '{entry.name}' from {entry.model_dir}...")
+        start = time.time()
+        model = DepthAnything3.from_pretrained(entry.model_dir)
+        model.eval()
+        if self.pin_memory and entry.device.startswith("cuda"):
+            _pin_module(model)
+
+        entry.model = model
+        entry.size_gb = _module_size_gb(model)
+        entry.state = "offloaded"
+        entry.load_time = time.time() - start
+        entry.loaded_at = time.time()
+        print(
+            f"[RESIDENCY] Loaded '{entry.name}' ({entry.size_gb:.2f} GB) "
+            f"in {entry.load_time:.2f}s"
+        )
+
+    def _swap_in(self, entry: ModelEntry) -> None:
+        start = time.time()
+        entry.model.to(entry.device, non_blocking=True)
+        entry.model.device = None  # re-resolved from the parameters
+        _synchronize(entry.device)
+        elapsed = time.time() - start
+
+        entry.state = "resident"
+        entry.swap_in_count += 1
+        entry.last_swap_in_sec = elapsed
+        entry.total_swap_in_sec += elapsed
+        print(f"[RESIDENCY] Promoted '{entry.name}' to {entry.device} in {elapsed:.2f}s")
+
+    def _swap_out(self, entry: ModelEntry) -> None:
+        start = time.time()
+        entry.model.to("cpu")
+        entry.model.device = None
+        if self.pin_memory:
+            _pin_module(entry.model)
+        _empty_cache()
+        elapsed = time.time() - start
+
+        entry.state = "offloaded"
+        entry.swap_out_count += 1
+        entry.last_swap_out_sec = elapsed
+        entry.total_swap_out_sec += elapsed
+        print(f"[RESIDENCY] Offloaded '{entry.name}' to CPU in {elapsed:.2f}s")
+
+    def _make_room(self, entry: ModelEntry) -> None:
+        """
+        Offload least recently used models on the same device until ``entry`` fits.
+
+        Models in use are never offloaded, so the budget may be exceeded while they are.
+        """
+        budget = self._budget_gb(entry.device)
+        if budget is None:
+            return
+
+        resident = sorted(
+            (
+                e
+                for e in self._entries.values()
+                if e is not entry and e.device == entry.device and e.state == "resident"
+            ),
+            key=lambda e: e.last_used or 0.0,
+        )
+        used = sum(e.size_gb for e in resident)
+        for victim in resident:
+            if used + entry.size_gb <= budget:
+                break
+            if victim.in_use:
+                continue
+            self._swap_out(victim)
+            used -= victim.size_gb
+        if used + entry.size_gb > budget:
+            print(
+                f"[RESIDENCY] '{entry.name}' exceeds the {budget:.2f} GB budget of "
+                f"{entry.device}: the other resident models are in use"
+            )
+
+    def _budget_gb(self, device: str) -> Optional[float]:
+        if not device.startswith("cuda") or not torch.cuda.is_available():
+            return None
+        if self.vram_budget_gb is not None:
+            return self.vram_budget_gb
+        total = torch.cuda.get_device_properties(torch.device(device)).total_memory
+        return DEFAULT_BUDGET_FRACTION * total / 1024**3
+
+
+def _pin_module(module: torch.nn.Module) -> None:
+    """Move the CPU parameters and buffers of ``module`` into pinned memory."""
+    for tensor in itertools.chain(module.parameters(), module.buffers()):
+        if tensor.device.type == "cpu" and not tensor.is_pinned():
+            tensor.data = tensor.data.pin_memory()
+
+
+def _module_size_gb(module: torch.nn.Module) -> float:
+    tensors = itertools.chain(module.parameters(), module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / 1024**3
+
+
+def _synchronize(device: str) -> None:
+    if device.startswith("cuda") and torch.cuda.is_available():
+        torch.cuda.synchronize(torch.device(device))
+
+
+def _empty_cache() -> None:
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
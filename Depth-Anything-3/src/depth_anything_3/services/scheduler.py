@@ -0,0 +1,270 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Priority task scheduler for the inference backend.
+
+Tasks are ordered by
+
+    1. deadline urgency - tasks whose deadline is closer than their expected
+       runtime jump the queue (earliest deadline first),
+    2. effective priority class - ``interactive`` < ``normal`` < ``batch``, with
+       one class of promotion per ``aging_sec`` spent waiting so that large
+       jobs cannot starve,
+    3. estimated cost (token count) - shortest job first within a class,
+    4. submission time.
+
+Tasks that carry a ``batch_key`` can be coalesced: when such a task is picked,
+other pending tasks with the same key are run together in one batched forward.
+A single dispatcher thread executes tasks, so the GPU still sees one job at a
+time.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+PRIORITY_CLASSES = {"interactive": 0, "normal": 1, "batch": 2}
+
+
+@dataclass
+class ScheduledTask:
+    """
+    A pending task with its scheduling attributes.
+
+    Args:
+        task_id: Task identifier passed back to the run callbacks
+        priority: One of ``PRIORITY_CLASSES``
+        cost: Estimated cost (e.g. number of patch tokens), smaller runs first
+        submitted_at: Submission timestamp
+        deadline: Optional absolute timestamp the task should start before
+        batch_key: Tasks with equal non-None keys may be coalesced into one batch
+        expected_sec: Estimated runtime, used to decide when a deadline becomes urgent
+    """
+
+    task_id: str
+    priority: str = "normal"
+    cost: float = 0.0
+    submitted_at: float = field(default_factory=time.time)
+    deadline: Optional[float] = None
+    batch_key: Optional[Hashable] = None
+    expected_sec: float = 0.0
+
+    def sort_key(self, now: float, aging_sec: float, deadline_slack_sec: float) -> tuple:
+        rank = PRIORITY_CLASSES.get(self.priority, PRIORITY_CLASSES["normal"])
+        effective = rank - int((now - self.submitted_at) // aging_sec) if aging_sec > 0 else rank
+        urgent = (
+            self.deadline is not None
+            and self.deadline - now <= self.expected_sec + deadline_slack_sec
+        )
+        return (
+            0 if urgent else 1,
+            self.deadline if urgent else 0.0,
+            effective,
+            self.cost,
+            self.submitted_at,
+        )
+
+
+class _Percentiles:
+    """Sliding window of samples with percentile summaries."""
+
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, value: float) -> None:
+        self._samples.append(value)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self._samples:
+            return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+        values = sorted(self._samples)
+
+        def _pct(p: float) -> float:
+            return round(values[min(len(values) - 1, int(p * len(values)))], 4)
+
+        return {
+            "count": len(values),
+            "p50": _pct(0.50),
+            "p90": _pct(0.90),
+            "p99": _pct(0.99),
+            "max": round(values[-1], 4),
+        }
+
+
+class TaskScheduler:
+    """
+    Priority scheduler with deadline/aging policy and micro-batching.
+
+    Args:
+        run_single: Callback executing one task id
+        run_batch: Callback executing several coalesced task ids
+        aging_sec: Waiting time after which a task is promoted by one priority class
+        max_batch_size: Maximum number of tasks coalesced into one forward
+        batch_window_sec: Time to wait for compatible tasks before dispatching a batchable one
+        deadline_slack_sec: Margin before ``deadline - expected_sec`` at which a task becomes urgent
+        metrics_window: Number of samples kept for the percentile metrics
+    """
+
+    def __init__(
+        self,
+        run_single: Callable[[str], None],
+        run_batch: Optional[Callable[[List[str]], None]] = None,
+        aging_sec: float = 30.0,
+        max_batch_size: int = 8,
+        batch_window_sec: float = 0.02,
+        deadline_slack_sec: float = 10.0,
+        metrics_window: int = 1000,
+    ):
+        self._run_single = run_single
+        self._run_batch = run_batch
+        self.aging_sec = aging_sec
+        self.max_batch_size = max_batch_size
+        self.batch_window_sec = batch_window_sec
+        self.deadline_slack_sec = deadline_slack_sec
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, ScheduledTask] = {}
+        self._running: List[str] = []
+        self._started_at: Dict[str, float] = {}
+        self._stopped = False
+
+        self._queue_wait = _Percentiles(metrics_window)
+        self._latency = _Percentiles(metrics_window)
+        self._batch_sizes = _Percentiles(metrics_window)
+        self._completed = 0
+
+        self._thread = threading.Thread(
+            target=self._dispatch_loop, name="da3-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------ queue
+
+    def submit(self, task: ScheduledTask) -> None:
+        with self._cond:
+            self._pending[task.task_id] = task
+            self._cond.notify()
+
+    def cancel(self, task_id: str) -> bool:
+        """Remove a pending task. Returns False if it is not pending anymore."""
+        with self._cond:
+            return self._pending.pop(task_id, None) is not None
+
+    def position(self, task_id: str) -> Optional[int]:
+        """0-based position of a pending task in the current dispatch order."""
+        with self._cond:
+            order = self._ordered(time.time())
+        for i, task in enumerate(order):
+            if task.task_id == task_id:
+                return i
+        return None
+
+    @property
+    def running(self) -> List[str]:
+        with self._cond:
+            return list(self._running)
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state and queue-wait / batch-size / latency percentiles."""
+        now = time.time()
+        with self._cond:
+            order = self._ordered(now)
+            running = list(self._running)
+        return {
+            "pending": len(order),
+            "running": running,
+            "completed": self._completed,
+            "pending_by_priority": {
+                name: sum(1 for t in order if t.priority == name) for name in PRIORITY_CLASSES
+            },
+            "next": [t.task_id for t in order[:10]],
+            "queue_wait_sec": self._queue_wait.summary(),
+            "task_latency_sec": self._latency.summary(),
+            "batch_size": self._batch_sizes.summary(),
+        }
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # --------------------------------------------------------------- dispatch
+
+    def _ordered(self, now: float) -> List[ScheduledTask]:
+        return sorted(
+            self._pending.values(),
+            key=lambda t: t.sort_key(now, self.aging_sec, self.deadline_slack_sec),
+        )
+
+    def _next_batch(self) -> List[ScheduledTask]:
+        """Pop the best task and the compatible tasks coalesced with it."""
+        order = self._ordered(time.time())
+        head = order[0]
+        batch = [head]
+        if head.batch_key is not None and self._run_batch is not None:
+            for task in order[1:]:
+                if len(batch) >= self.max_batch_size:
+                    break
+                if task.batch_key == head.batch_key:
+                    batch.append(task)
+        for task in batch:
+            del self._pending[task.task_id]
+        return batch
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                head = self._ordered(time.time())[0]
+                if head.batch_key is not None and self._run_batch is not None:
+                    # Give concurrent compatible requests a chance to join the batch
+                    self._cond.wait(self.batch_window_sec)
+                    if not self._pending:
+                        continue
+                batch = self._next_batch()
+                started = time.time()
+                self._running = [t.task_id for t in batch]
+                for task in batch:
+                    self._started_at[task.task_id] = started
+                    self._queue_wait.add(started - task.submitted_at)
+                self._batch_sizes.add(len(batch))
+
+            try:
+                if len(batch) == 1:
+                    self._run_single(batch[0].task_id)
+                else:
+                    self._run_batch([t.task_id for t in batch])
+            except Exception as e:  # callbacks handle their own failures
+                print(f"[SCHEDULER] Task execution raised: {e}")
+            finally:
+                finished = time.time()
+                with self._cond:
+                    for task in batch:
+                        self._started_at.pop(task.task_id, None)
+                        self._latency.add(finished - task.submitted_at)
+                        self._completed += 1
+                    self._running = []
@@ -0,0 +1,117 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Task event broker for streaming task progress to SSE / WebSocket clients.
+
+Worker threads publish task snapshots with ``publish``; every subscriber is an
+``asyncio.Queue`` on the server event loop, so idle subscribers cost no thread.
+Queues are bounded: a slow subscriber drops its oldest pending snapshot, which
+is safe because every event carries the full task state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class TaskEventBroker:
+    """
+    Fan-out of task events from worker threads to asyncio subscribers.
+
+    Args:
+        queue_size: Maximum number of undelivered events kept per subscriber
+        keepalive_sec: Interval at which ``subscribe`` yields ``None`` while idle
+    """
+
+    def __init__(self, queue_size: int = 32, keepalive_sec: float = 15.0):
+        self.queue_size = queue_size
+        self.keepalive_sec = keepalive_sec
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def publish(self, task_id: str, event: Dict[str, Any]) -> None:
+        """Publish an event from any thread."""
+        with self._lock:
+            self._latest[task_id] = event
+            loop = self._loop
+            has_subscribers = bool(self._subscribers.get(task_id))
+
+        if loop is not None and has_subscribers:
+            try:
+                loop.call_soon_threadsafe(self._dispatch, task_id, event)
+            except RuntimeError:  # event loop closed
+                pass
+
+    def forget(self, task_id: str) -> None:
+        """Drop the last snapshot of a task removed from the task table."""
+        with self._lock:
+            self._latest.pop(task_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, task_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the latest snapshot of a task, then every new event until it finishes.
+
+        ``None`` is yielded every ``keepalive_sec`` without events so that the caller
+        can send a keep-alive and notice disconnected clients.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(task_id, set()).add(queue)
+            latest = self._latest.get(task_id)
+
+        try:
+            if latest is not None:
+                yield latest
+                if latest.get("status") in TERMINAL_STATUSES:
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.keepalive_sec)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                yield event
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            with self._lock:
+                queues = self._subscribers.get(task_id)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._subscribers[task_id]
+
+    def _dispatch(self, task_id: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to the subscriber queues (runs on the event loop)."""
+        with self._lock:
+            queues = list(self._subscribers.get(task_id, ()))
+
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
@@ -0,0 +1,363 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Task stores of the backend.
+
+A task store maps task ids to task models (pydantic models with ``task_id``,
+``status``, ``created_at`` and ``completed_at`` fields). Pending and running
+tasks are mutated in place by the worker threads and written back with
+``save``; finished tasks are read-only history.
+
+``SQLiteTaskStore`` keeps the history on disk, so it survives restarts and is
+queried page by page through indexes. Pending and running tasks additionally
+live in an in-memory write-through cache, so progress updates never touch the
+database. ``InMemoryTaskStore`` keeps everything in a dict.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+ACTIVE_STATUSES = ("pending", "running")
+FINISHED_STATUSES = ("completed", "failed")
+
+T = TypeVar("T")
+
+
+def _dump(task: Any) -> str:
+    if hasattr(task, "model_dump_json"):  # pydantic v2
+        return task.model_dump_json()
+    return task.json()
+
+
+def _load(model_cls: Type[T], data: str) -> T:
+    if hasattr(model_cls, "model_validate_json"):  # pydantic v2
+        return model_cls.model_validate_json(data)
+    return model_cls.parse_raw(data)
+
+
+class TaskStore(Generic[T]):
+    """Interface of the backend task table."""
+
+    def get(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        raise NotImplementedError
+
+    def __setitem__(self, task_id: str, task: T) -> None:
+        raise NotImplementedError
+
+    def save(self, task_id: str) -> None:
+        """Persist the current state of a task mutated in place."""
+        raise NotImplementedError
+
+    def pop(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        raise NotImplementedError
+
+    def active(self) -> List[T]:
+        """Pending and running tasks, oldest first."""
+        raise NotImplementedError
+
+    def list_tasks(
+        self, statuses: Optional[Sequence[str]] = None, limit: int = 50, offset: int = 0
+    ) -> Tuple[List[T], int]:
+        """
+        One page of tasks, newest first.
+
+        Returns:
+            (tasks of the page, total number of tasks matching ``statuses``)
+        """
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tasks per status."""
+        raise NotImplementedError
+
+    def prune(self, max_age_sec: float, max_count: int, batch: int = 100) -> List[T]:
+        """
+        Remove up to ``batch`` finished tasks, oldest first, that are older than
+        ``max_age_sec`` or exceed a history of ``max_count`` tasks.
+
+        Returns:
+            The removed tasks
+        """
+        raise NotImplementedError
+
+    def fail_interrupted(self, message: str) -> int:
+        """Mark tasks left pending or running by a previous process as failed."""
+        return 0
+
+    def __getitem__(self, task_id: str) -> T:
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def __len__(self) -> int:
+        return sum(self.counts().values())
+
+
+class InMemoryTaskStore(TaskStore[T]):
+    """Task store holding every task in a dict; history is lost on restart."""
+
+    def __init__(self):
+        self._tasks: Dict[str, T] = {}
+        self._lock = threading.RLock()
+
+    def get(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        return self._tasks.get(task_id, default)
+
+    def __setitem__(self, task_id: str, task: T) -> None:
+        self._tasks[task_id] = task
+
+    def save(self, task_id: str) -> None:
+        pass
+
+    def pop(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        return self._tasks.pop(task_id, default)
+
+    def active(self) -> List[T]:
+        with self._lock:
+            tasks = [t for t in self._tasks.values() if t.status in ACTIVE_STATUSES]
+        return sorted(tasks, key=lambda t: t.created_at)
+
+    def list_tasks(
+        self, statuses: Optional[Sequence[str]] = None, limit: int = 50, offset: int = 0
+    ) -> Tuple[List[T], int]:
+        with self._lock:
+            tasks = [t for t in self._tasks.values() if not statuses or t.status in statuses]
+        tasks.sort(key=lambda t: t.created_at, reverse=True)
+        return tasks[offset : offset + limit], len(tasks)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for task in self._tasks.values():
+                counts[task.status] = counts.get(task.status, 0) + 1
+        return counts
+
+    def prune(self, max_age_sec: float, max_count: int, batch: int = 100) -> List[T]:
+        with self._lock:
+            finished = sorted(
+                (t for t in self._tasks.values() if t.status in FINISHED_STATUSES),
+                key=lambda t: t.completed_at or 0,
+            )
+            cutoff = time.time() - max_age_sec
+            excess = max(len(self._tasks) - max_count, 0)
+            removed = [
+                t for i, t in enumerate(finished) if i < excess or (t.completed_at or 0) < cutoff
+            ][:batch]
+            for task in removed:
+                del self._tasks[task.task_id]
+        return removed
+
+
+class SQLiteTaskStore(TaskStore[T]):
+    """
+    Task store persisted in an SQLite database in WAL mode.
+
+    Tasks are stored as JSON next to indexed ``status``, ``created_at`` and
+    ``completed_at`` columns. Task counts per status are maintained in memory, so
+    a dashboard refresh reads one page of rows whatever the size of the history.
+
+    Args:
+        path: Database file, created if missing
+        model_cls: Task model class used to decode stored tasks
+    """
+
+    def __init__(self, path: str, model_cls: Type[T]):
+        self.path = path
+        self.model_cls = model_cls
+        self._hot: Dict[str, T] = {}  # Write-through cache of pending / running tasks
+        self._lock = threading.RLock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                completed_at REAL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at);
+            CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed_at);
+            """
+        )
+        self._counts: Dict[str, int] = dict(
+            self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        )
+
+    def get(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        with self._lock:
+            task = self._hot.get(task_id)
+            if task is not None:
+                return task
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return _load(self.model_cls, row[0]) if row is not None else default
+
+    def __contains__(self, task_id: str) -> bool:
+        with self._lock:
+            if task_id in self._hot:
+                return True
+            return (
+                self._conn.execute("SELECT 1 FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                is not None
+            )
+
+    def __setitem__(self, task_id: str, task: T) -> None:
+        with self._lock:
+            self._write(task_id, task)
+
+    def save(self, task_id: str) -> None:
+        with self._lock:
+            task = self._hot.get(task_id)
+            if task is not None:
+                self._write(task_id, task)
+
+    def pop(self, task_id: str, default: Optional[T] = None) -> Optional[T]:
+        with self._lock:
+            task = self.get(task_id)
+            if task is None:
+                return default
+            self._count(self._stored_status(task), -1)
+            self._hot.pop(task_id, None)
+            self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+        return task
+
+    def active(self) -> List[T]:
+        with self._lock:
+            tasks = list(self._hot.values())
+        return sorted(tasks, key=lambda t: t.created_at)
+
+    def list_tasks(
+        self, statuses: Optional[Sequence[str]] = None, limit: int = 50, offset: int = 0
+    ) -> Tuple[List[T], int]:
+        where, params = "", []
+        if statuses:
+            where = f"WHERE status IN ({', '.join('?' * len(statuses))})"
+            params = list(statuses)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id, data FROM tasks {where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+            hot = dict(self._hot)
+            counts = self._counts if not statuses else {s: self._counts.get(s, 0) for s in statuses}
+            total = sum(counts.values())
+
+        # Active tasks come from the cache, which is ahead of their stored row
+        tasks = [hot.get(task_id) or _load(self.model_cls, data) for task_id, data in rows]
+        return tasks, total
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {status: n for status, n in self._counts.items() if n}
+
+    def prune(self, max_age_sec: float, max_count: int, batch: int = 100) -> List[T]:
+        with self._lock:
+            # Only finished tasks have completed_at, so both queries skip active ones
+            rows = self._conn.execute(
+                "SELECT task_id, data FROM tasks WHERE completed_at < ? "
+                "ORDER BY completed_at LIMIT ?",
+                (time.time() - max_age_sec, batch),
+            ).fetchall()
+
+            excess = min(len(self) - len(rows) - max_count, batch - len(rows))
+            if excess > 0:
+                rows += self._conn.execute(
+                    "SELECT task_id, data FROM tasks WHERE completed_at IS NOT NULL "
+                    "ORDER BY completed_at LIMIT ? OFFSET ?",
+                    (excess, len(rows)),
+                ).fetchall()
+
+            removed = [_load(self.model_cls, data) for _, data in rows]
+            if rows:
+                self._conn.execute(
+                    f"DELETE FROM tasks WHERE task_id IN ({', '.join('?' * len(rows))})",
+                    [task_id for task_id, _ in rows],
+                )
+            for task in removed:
+                self._count(task.status, -1)
+        return removed
+
+    def fail_interrupted(self, message: str) -> int:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id, data FROM tasks "
+                f"WHERE status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES,
+            ).fetchall()
+            interrupted = [(t, d) for t, d in rows if t not in self._hot]
+            for task_id, data in interrupted:
+                task = _load(self.model_cls, data)
+                task.status = "failed"
+                task.completed_at = time.time()
+                task.message = f"[{task_id}] {message}"
+                self._write(task_id, task)
+        return len(interrupted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------------- internals
+
+    def _stored_status(self, task: T) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT status FROM tasks WHERE task_id = ?", (task.task_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def _write(self, task_id: str, task: T) -> None:
+        previous = self._stored_status(task)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, status, created_at, completed_at, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (task_id, task.status, task.created_at, task.completed_at, _dump(task)),
+        )
+        self._count(previous, -1)
+        self._count(task.status, 1)
+
+        if task.status in ACTIVE_STATUSES:
+            self._hot[task_id] = task
+        else:
+            self._hot.pop(task_id, None)
+
+    def _count(self, status: Optional[str], delta: int) -> None:
+        if status is not None:
+            self._counts[status] = self._counts.get(status, 0) + delta
+
+
+def open_task_store(path: Optional[str], model_cls: Type[T]) -> TaskStore[T]:
+    """SQLite task store at ``path``, or an in-memory one if ``path`` is empty or ``"memory"``."""
+    if not path or path == "memory":
+        return InMemoryTaskStore()
+    return SQLiteTaskStore(path, model_cls)
@@ -0,0 +1,181 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory decoding of uploaded videos and image sets for the backend.
+
+Uploads are streamed to a single spool file (the compressed upload itself, never
+per-frame images) and decoded straight into RGB arrays. Frames are sampled while
+decoding and downscaled to the processing resolution right away, so the memory
+held per upload is bounded by ``max_frames`` frames at ``process_res``.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import os
+import tarfile
+import zipfile
+from typing import IO, AsyncIterator, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], dest: IO[bytes], max_bytes: int) -> int:
+    """
+    Copy a streamed request body into ``dest`` chunk by chunk.
+
+    Args:
+        chunks: Async iterator over body chunks (e.g. ``request.stream()``)
+        dest: Writable binary file object
+        max_bytes: Maximum accepted upload size
+
+    Returns:
+        Number of bytes written
+    """
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the limit of {max_bytes / 2**20:.1f} MiB")
+        dest.write(chunk)
+    dest.flush()
+    return size
+
+
+def prescale_frame(rgb: np.ndarray, process_res: int, process_res_method: str) -> np.ndarray:
+    """
+    Downscale a frame to the boundary size the input processor would resize it to.
+
+    The input processor then finds the frame already at its target size, so the result
+    matches feeding the full-resolution image. Frames are never upscaled here.
+    """
+    h, w = rgb.shape[:2]
+    side = min(w, h) if process_res_method.startswith("lower_bound") else max(w, h)
+    scale = process_res / float(side)
+    if scale >= 1.0:
+        return rgb
+    new_w = max(1, int(round(w * scale)))
+    new_h = max(1, int(round(h * scale)))
+    return cv2.resize(rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+
+def sample_video_frames(
+    video_path: str,
+    fps: float,
+    max_frames: int,
+    process_res: int,
+    process_res_method: str = "upper_bound_resize",
+) -> Tuple[List[np.ndarray], float]:
+    """
+    Decode a video and keep frames at ``fps``, at most ``max_frames`` evenly spaced ones.
+
+    Skipped frames are only grabbed, not converted, and kept frames are downscaled
+    immediately.
+
+    Returns:
+        (RGB frames, effective sampling fps)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Cannot decode the uploaded video")
+
+    try:
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        interval = max(1, int(round(video_fps / fps))) if fps > 0 else 1
+        if max_frames > 0 and total_frames > 0:
+            interval = max(interval, int(math.ceil(total_frames / max_frames)))
+
+        frames: List[np.ndarray] = []
+        index = 0
+        while max_frames <= 0 or len(frames) < max_frames:
+            if not cap.grab():
+                break
+            if index % interval == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                frames.append(prescale_frame(rgb, process_res, process_res_method))
+            index += 1
+    finally:
+        cap.release()
+
+    if not frames:
+        raise ValueError("No frames could be decoded from the uploaded video")
+    return frames, video_fps / interval
+
+
+def decode_image(data: bytes, process_res: int, process_res_method: str) -> np.ndarray:
+    """Decode one encoded image into a downscaled RGB array."""
+    with Image.open(io.BytesIO(data)) as image:
+        rgb = np.asarray(image.convert("RGB"))
+    return prescale_frame(rgb, process_res, process_res_method)
+
+
+def _evenly(names: Sequence[str], max_frames: int) -> List[str]:
+    if max_frames <= 0 or len(names) <= max_frames:
+        return list(names)
+    step = len(names) / max_frames
+    return [names[int(i * step)] for i in range(max_frames)]
+
+
+def read_image_archive(
+    archive: IO[bytes],
+    max_frames: int,
+    process_res: int,
+    process_res_method: str = "upper_bound_resize",
+) -> List[np.ndarray]:
+    """
+    Decode the images of a zip or tar archive in name order.
+
+    At most ``max_frames`` evenly spaced images are decoded; the others are never read.
+    """
+    archive.seek(0)
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zf:
+            names = sorted(
+                n for n in zf.namelist() if os.path.splitext(n)[1].lower() in IMAGE_EXTENSIONS
+            )
+            return [
+                decode_image(zf.read(n), process_res, process_res_method)
+                for n in _evenly(names, max_frames)
+            ]
+
+    archive.seek(0)
+    try:
+        with tarfile.open(fileobj=archive, mode="r:*") as tf:
+            members = {
+                m.name: m
+                for m in tf.getmembers()
+                if m.isfile() and os.path.splitext(m.name)[1].lower() in IMAGE_EXTENSIONS
+            }
+            return [
+                decode_image(tf.extractfile(members[n]).read(), process_res, process_res_method)
+                for n in _evenly(sorted(members), max_frames)
+            ]
+    except tarfile.ReadError as e:
+        raise ValueError("Upload is neither a video nor a zip/tar archive of images") from e
@@ -0,0 +1,316 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local warm daemon for the CLI.
+
+``da3 daemon`` keeps a model resident and listens on a Unix socket. The
+inference commands try the socket first and fall back to loading the model in
+process when no daemon is listening, so a running daemon is used transparently.
+
+Messages are newline-delimited JSON. An inference request is answered with the
+daemon's console output as ``{"log": ...}`` lines followed by a final
+``{"ok": ...}`` line. This module only imports the model when serving.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Any, Dict, Optional
+
+# Path of the daemon socket; DA3_DAEMON=0 disables the lookup in the CLI
+DAEMON_SOCKET = os.environ.get(
+    "DA3_DAEMON_SOCKET",
+    os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+        f"da3-{os.getuid() if hasattr(os, 'getuid') else 0}.sock",
+    ),
+)
+DAEMON_ENABLED = os.environ.get("DA3_DAEMON", "1").lower() not in ("0", "false", "no", "off")
+CONNECT_TIMEOUT_SEC = 0.5
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon accepted a request but could not complete it."""
+
+
+# ---------------------------------------------------------------- client side
+
+
+def _connect(socket_path: str) -> Optional[socket.socket]:
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT_SEC)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _request(sock: socket.socket, message: Dict[str, Any]):
+    """Send one request and yield the decoded reply lines."""
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+    with sock.makefile("rb") as reader:
+        for line in reader:
+            yield json.loads(line)
+
+
+def daemon_available(socket_path: str = DAEMON_SOCKET) -> bool:
+    """Whether the CLI would send its inference requests to a daemon."""
+    if not DAEMON_ENABLED:
+        return False
+    sock = _connect(socket_path)
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+def daemon_status(socket_path: str = DAEMON_SOCKET) -> Optional[Dict[str, Any]]:
+    """Status of the daemon listening on ``socket_path``, or None if there is none."""
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    with sock:
+        for reply in _request(sock, {"op": "status"}):
+            return reply
+    return None
+
+
+def stop_daemon(socket_path: str = DAEMON_SOCKET) -> bool:
+    """Ask the daemon to exit; returns whether one was running."""
+    sock = _connect(socket_path)
+    if sock is None:
+        return False
+    with sock:
+        for _ in _request(sock, {"op": "shutdown"}):
+            break
+    return True
+
+
+def run_on_daemon(
+    model_dir: str,
+    device: str,
+    socket_path: str = DAEMON_SOCKET,
+    echo=print,
+    **inference_kwargs,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run inference on the warm daemon.
+
+    Args:
+        model_dir: Model to run; the daemon switches models if it holds another one
+        device: Device of the model
+        socket_path: Daemon socket
+        echo: Callable receiving the daemon's console output
+        **inference_kwargs: Arguments of ``InferenceService.run_local_inference``
+
+    Returns:
+        Final status message, or None if no daemon is listening or the inputs are
+        in-memory frames, which only in-process inference can take
+
+    Raises:
+        DaemonError: If inference failed on the daemon
+    """
+    if not DAEMON_ENABLED:
+        return None
+    # Frames kept in memory because no daemon was listening when they were extracted
+    if not all(isinstance(p, (str, os.PathLike)) for p in inference_kwargs["image_paths"]):
+        return None
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+
+    # The daemon has its own working directory
+    kwargs = dict(inference_kwargs)
+    kwargs["image_paths"] = [os.path.abspath(p) for p in kwargs["image_paths"]]
+    kwargs["export_dir"] = os.path.abspath(kwargs["export_dir"])
+    for key in ("extrinsics", "intrinsics"):
+        if kwargs.get(key) is not None:
+            kwargs[key] = kwargs[key].tolist()
+
+    message = {"op": "inference", "model_dir": model_dir, "device": device, "kwargs": kwargs}
+    with sock:
+        for reply in _request(sock, message):
+            if "log" in reply:
+                echo(reply["log"])
+            elif reply.get("ok"):
+                return reply
+            else:
+                raise DaemonError(reply.get("error", "unknown error"))
+    raise DaemonError("Daemon closed the connection")
+
+
+# ---------------------------------------------------------------- server side
+
+
+class _LineWriter:
+    """File-like object forwarding complete lines as log messages."""
+
+    def __init__(self, send):
+        self._send = send
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._send({"log": line})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._buffer:
+            self._send({"log": self._buffer})
+            self._buffer = ""
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: WarmDaemon
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+        except ValueError:
+            self._send({"ok": False, "error": "Malformed request"})
+            return
+
+        op = message.get("op")
+        if op == "status":
+            self._send({"ok": True, **self.server.status()})
+        elif op == "shutdown":
+            self._send({"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif op == "inference":
+            self._inference(message)
+        else:
+            self._send({"ok": False, "error": f"Unknown op: {op}"})
+
+    def _send(self, reply: Dict[str, Any]):
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def _inference(self, message: Dict[str, Any]):
+        import numpy as np
+
+        kwargs = message["kwargs"]
+        for key in ("extrinsics", "intrinsics"):
+            if kwargs.get(key) is not None:
+                kwargs[key] = np.array(kwargs[key], dtype=np.float32)
+
+        # One request at a time: the model and stdout redirection are shared
+        with self.server.lock:
+            start = time.time()
+            writer = _LineWriter(self._send)
+            try:
+                with redirect_stdout(writer):
+                    service = self.server.get_service(message["model_dir"], message["device"])
+                    service.run_local_inference(**kwargs)
+                writer.close()
+            except Exception as e:
+                writer.close()
+                print(f"[DAEMON] Inference failed: {e}")
+                self._send({"ok": False, "error": str(e)})
+                return
+            self.server.served += 1
+            elapsed = time.time() - start
+            print(f"[DAEMON] Served {len(kwargs['image_paths'])} images in {elapsed:.2f}s")
+            self._send({"ok": True, "elapsed": elapsed})
+
+
+class WarmDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server keeping one model resident between CLI calls.
+
+    Args:
+        socket_path: Socket to listen on (created with owner-only permissions)
+        model_dir: Model loaded at startup
+        device: Device of the model
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model_dir: str, device: str):
+        if _connect(socket_path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket of a daemon that did not exit cleanly
+
+        self.socket_path = socket_path
+        self.lock = threading.Lock()
+        self.served = 0
+        self.started_at = time.time()
+        self._service = None
+        self._service_key = None
+
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self.get_service(model_dir, device).load_model()
+
+    def get_service(self, model_dir: str, device: str):
+        """Inference service holding ``model_dir``, replacing the resident one if needed."""
+        from depth_anything_3.services.inference_service import InferenceService
+
+        if self._service_key != (model_dir, device):
+            self._service = None  # release the old weights before loading new ones
+            self._service = InferenceService(model_dir, device)
+            self._service_key = (model_dir, device)
+        return self._service
+
+    def status(self) -> Dict[str, Any]:
+        model_dir, device = self._service_key or (None, None)
+        return {
+            "pid": os.getpid(),
+            "model_dir": model_dir,
+            "device": device,
+            "served": self.served,
+            "uptime_sec": time.time() - self.started_at,
+        }
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def serve_daemon(model_dir: str, device: str, socket_path: str = DAEMON_SOCKET):
+    """Load ``model_dir`` and serve inference requests until stopped."""
+    server = WarmDaemon(socket_path, model_dir, device)
+    print(f"[DAEMON] Listening on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print("[DAEMON] Stopped")
@@ -0,0 +1,520 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming reconstruction of long frame sequences.
+
+``reconstruct`` consumes an iterator of in-memory frames (or paths) with an
+already-loaded model, runs inference on overlapping chunks of ``chunk_size``
+frames, Sim(3)-aligns every chunk to the previous one on the point maps of their
+``overlap`` frames (confidence-weighted Umeyama with Huber IRLS, as in
+``da3_streaming``) and hands the aligned new frames of each chunk to sinks.
+
+Only one chunk of frames and predictions is resident at a time, so memory does
+not grow with the sequence length as long as the sinks are bounded too:
+
+    - ``GlbSink``      - uniform sample of at most ``num_max_points`` points plus
+                         camera wireframes, written to ``scene.glb`` on close
+    - ``NpzChunkSink`` - one ``mini_npz``-style file per chunk, e.g. for upload to
+                         an object store, plus the camera trajectory on close
+
+Example:
+    >>> model = DepthAnything3.from_pretrained("depth-anything/DA3-LARGE").to("cuda")
+    >>> frames = (frame for frame in video_reader)
+    >>> result = reconstruct(frames, model, sinks=[GlbSink("out")])
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import imageio
+import numpy as np
+import trimesh
+
+from depth_anything_3.specs import Prediction
+from depth_anything_3.utils.export.glb import (
+    _add_cameras_to_scene,
+    _compute_alignment_transform_first_cam_glTF_center_by_points,
+    _depths_to_world_points_with_colors,
+    _estimate_scene_scale,
+    get_conf_thresh,
+)
+from depth_anything_3.utils.logger import logger
+from depth_anything_3.utils.pose_align import align_poses_umeyama, apply_umeyama_alignment_to_ext
+from depth_anything_3.utils.progress import ProgressCallback, ProgressReporter
+from depth_anything_3.utils.visualize import visualize_depth
+
+
+@dataclass
+class StreamingConfig:
+    """
+    Chunking and alignment parameters of ``reconstruct``.
+
+    Args:
+        chunk_size: Frames per inference call, overlap included
+        overlap: Frames shared by consecutive chunks, used for alignment
+        process_res: Processing resolution passed to ``inference``
+        process_res_method: Resize method passed to ``inference``
+        ref_view_strategy: Reference view strategy passed to ``inference``
+        align_stride: Pixel stride of the overlap point maps used for alignment
+        align_conf_percentile: Overlap pixels below this confidence percentile are ignored
+        huber_delta: Huber threshold, relative to the median distance of the
+            reference points to their centroid
+        irls_iters: Maximum IRLS iterations
+        min_align_points: Below this many valid overlap points, fall back to
+            aligning the overlap camera poses
+    """
+
+    chunk_size: int = 64
+    overlap: int = 16
+    process_res: int = 504
+    process_res_method: str = "upper_bound_resize"
+    ref_view_strategy: str = "saddle_balanced"
+    align_stride: int = 4
+    align_conf_percentile: float = 50.0
+    huber_delta: float = 0.05
+    irls_iters: int = 10
+    min_align_points: int = 100
+
+    def __post_init__(self):
+        if not 0 < self.overlap < self.chunk_size:
+            raise ValueError(
+                f"overlap must be in (0, chunk_size), got {self.overlap} / {self.chunk_size}"
+            )
+
+
+@dataclass
+class StreamingChunk:
+    """
+    Aligned output of one chunk.
+
+    Args:
+        index: Chunk index
+        start: Sequence index of the first frame of ``prediction``
+        end: Sequence index after the last frame of ``prediction``
+        prediction: Prediction of the frames ``[start, end)`` in the frame of the
+            first chunk; overlap frames already emitted by the previous chunk are dropped
+        alignment: Sim(3) and fit statistics of the chunk (empty for the first chunk)
+    """
+
+    index: int
+    start: int
+    end: int
+    prediction: Prediction
+    alignment: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StreamingResult:
+    """Summary of a ``reconstruct`` run: camera trajectory and per-chunk alignment."""
+
+    num_frames: int
+    num_chunks: int
+    extrinsics: np.ndarray  # N, 3, 4
+    intrinsics: np.ndarray  # N, 3, 3
+    alignments: List[Dict[str, Any]]
+
+
+class ChunkSink:
+    """Receives aligned chunks in sequence order."""
+
+    def write(self, chunk: StreamingChunk) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def reconstruct(
+    frames: Iterable,
+    model,
+    config: Optional[StreamingConfig] = None,
+    sinks: Sequence[ChunkSink] = (),
+    num_frames: Optional[int] = None,
+    progress_callback: ProgressCallback | ProgressReporter | None = None,
+) -> StreamingResult:
+    """
+    Reconstruct a frame sequence of arbitrary length chunk by chunk.
+
+    Args:
+        frames: Iterable of frames (numpy arrays, PIL Images or file paths)
+        model: Object with a ``DepthAnything3.inference``-compatible ``inference``
+            method, e.g. ``DepthAnything3`` or ``ResilientInference``
+        config: Chunking and alignment parameters
+        sinks: Receivers of the aligned chunks; closed when the sequence ends
+        num_frames: Expected sequence length, only used for progress reporting
+        progress_callback: Progress callback or reporter
+
+    Returns:
+        StreamingResult with the trajectory of all frames
+    """
+    config = config or StreamingConfig()
+    reporter = ProgressReporter.wrap(progress_callback)
+
+    buffer: list = []  # overlap frames of the previous chunk, then the new ones
+    prev: Optional[Prediction] = None  # aligned overlap views of the previous chunk
+    start = 0  # sequence index of buffer[0]
+    chunks: List[StreamingChunk] = []  # kept without predictions, for the summary
+    extrinsics: List[np.ndarray] = []
+    intrinsics: List[np.ndarray] = []
+
+    def run_chunk() -> None:
+        nonlocal prev, start
+        index = len(chunks)
+        end = start + len(buffer)
+        kept = 0 if prev is None else len(prev.depth)
+        chunk_reporter = None
+        if reporter.enabled and num_frames:
+            chunk_reporter = reporter.sub_range(start / num_frames, min(end / num_frames, 1.0))
+
+        pred = model.inference(
+            list(buffer),
+            process_res=config.process_res,
+            process_res_method=config.process_res_method,
+            ref_view_strategy=config.ref_view_strategy,
+            progress_callback=chunk_reporter,
+        )
+        if pred.extrinsics is None:
+            raise ValueError("Streaming reconstruction needs a model that predicts camera poses")
+
+        alignment: Dict[str, Any] = {}
+        if prev is not None:
+            pred, alignment = _align_chunk(prev, pred, config)
+            logger.info(
+                f"Chunk {index} aligned: scale {alignment['scale']:.4f}, "
+                f"residual {alignment['residual']:.4f}, inliers {alignment['inlier_ratio']:.2f}"
+            )
+
+        chunk = StreamingChunk(index, start + kept, end, _slice(pred, kept, None), alignment)
+        for sink in sinks:
+            sink.write(chunk)
+        chunks.append(replace(chunk, prediction=None))
+        extrinsics.append(chunk.prediction.extrinsics[:, :3].astype(np.float32))
+        intrinsics.append(chunk.prediction.intrinsics.astype(np.float32))
+
+        prev = _slice(pred, len(buffer) - config.overlap, None)
+        start = end - config.overlap
+        del buffer[: len(buffer) - config.overlap]
+
+    for frame in frames:
+        buffer.append(frame)
+        if len(buffer) == config.chunk_size:
+            run_chunk()
+    if len(buffer) > (0 if prev is None else config.overlap):
+        run_chunk()
+
+    for sink in sinks:
+        sink.close()
+
+    total = start + len(buffer) if chunks else 0
+    logger.info(f"Streaming reconstruction: {total} frames in {len(chunks)} chunks")
+    return StreamingResult(
+        num_frames=total,
+        num_chunks=len(chunks),
+        extrinsics=np.concatenate(extrinsics) if extrinsics else np.zeros((0, 3, 4), np.float32),
+        intrinsics=np.concatenate(intrinsics) if intrinsics else np.zeros((0, 3, 3), np.float32),
+        alignments=[c.alignment for c in chunks],
+    )
+
+
+def _align_chunk(
+    ref: Prediction, pred: Prediction, config: StreamingConfig
+) -> Tuple[Prediction, Dict[str, Any]]:
+    """Sim(3)-align ``pred`` to the aligned overlap views ``ref`` (its first frames)."""
+    overlap = len(ref.depth)
+    src, tgt, weights = _overlap_correspondences(ref, _slice(pred, 0, overlap), config)
+
+    if len(src) >= config.min_align_points:
+        scale, rot, trans, stats = _robust_sim3(src, tgt, weights, config)
+    else:
+        logger.warn(
+            f"Only {len(src)} confident overlap points, aligning the overlap camera poses"
+        )
+        rot, trans, scale = align_poses_umeyama(
+            _to_4x4(ref.extrinsics), _to_4x4(pred.extrinsics[:overlap])
+        )
+        stats = {"residual": float("nan"), "inlier_ratio": float("nan")}
+
+    ext = apply_umeyama_alignment_to_ext(rot, trans, scale, pred.extrinsics)
+    ext = ext[..., : pred.extrinsics.shape[-2], :].astype(pred.extrinsics.dtype)  # 3x4 stays 3x4
+    aligned = replace(pred, depth=pred.depth * scale, extrinsics=ext)
+    alignment = {
+        "scale": float(scale),
+        "rotation": rot,
+        "translation": np.asarray(trans).reshape(3),
+        "num_points": len(src),
+        **stats,
+    }
+    return aligned, alignment
+
+
+def _overlap_correspondences(ref: Prediction, cur: Prediction, config: StreamingConfig):
+    """Pixel-wise corresponding world points of the same frames in two chunks."""
+    step = config.align_stride
+    ref_pts = _world_points(ref, step)
+    cur_pts = _world_points(cur, step)
+    ref_conf = ref.conf[:, ::step, ::step].reshape(-1)
+    cur_conf = cur.conf[:, ::step, ::step].reshape(-1)
+
+    valid = np.isfinite(ref_pts).all(axis=1) & np.isfinite(cur_pts).all(axis=1)
+    valid &= ref_conf >= np.percentile(ref_conf, config.align_conf_percentile)
+    valid &= cur_conf >= np.percentile(cur_conf, config.align_conf_percentile)
+    weights = np.sqrt(ref_conf[valid] * cur_conf[valid])
+    return cur_pts[valid], ref_pts[valid], weights
+
+
+def _world_points(pred: Prediction, step: int) -> np.ndarray:
+    """Unproject the depth maps of ``pred`` on a ``step``-strided pixel grid to world points."""
+    N, H, W = pred.depth.shape
+    vs, us = np.mgrid[0:H:step, 0:W:step]
+    pix = np.stack([us, vs, np.ones_like(us)], axis=-1).reshape(-1, 3).astype(np.float64)
+    depth = pred.depth[:, ::step, ::step].reshape(N, -1, 1)
+    depth = np.where(depth > 0, depth, np.nan)
+
+    rays = pix @ np.linalg.inv(pred.intrinsics).transpose(0, 2, 1)  # N, P, 3
+    w2c = _to_4x4(pred.extrinsics).astype(np.float64)
+    rot_c2w = w2c[:, :3, :3].transpose(0, 2, 1)
+    center = -np.einsum("nij,nj->ni", rot_c2w, w2c[:, :3, 3])
+    points = (rays * depth) @ rot_c2w.transpose(0, 2, 1) + center[:, None]
+    return points.reshape(-1, 3)
+
+
+def _weighted_sim3(src: np.ndarray, tgt: np.ndarray, weights: np.ndarray):
+    """Weighted Umeyama: ``s, R, t`` minimizing ``sum w |tgt - (s R src + t)|^2``."""
+    w = weights / weights.sum()
+    mu_src = w @ src
+    mu_tgt = w @ tgt
+    src_c = src - mu_src
+    tgt_c = tgt - mu_tgt
+
+    cov = (tgt_c * w[:, None]).T @ src_c
+    U, D, Vt = np.linalg.svd(cov)
+    S = np.eye(3)
+    if np.linalg.det(U) * np.linalg.det(Vt) < 0:
+        S[2, 2] = -1.0
+    rot = U @ S @ Vt
+    scale = float(np.trace(np.diag(D) @ S) / (w @ np.square(src_c).sum(axis=1)))
+    trans = mu_tgt - scale * rot @ mu_src
+    return scale, rot, trans
+
+
+def _robust_sim3(src, tgt, weights, config: StreamingConfig):
+    """Huber IRLS around ``_weighted_sim3``; residuals are relative to the scene extent."""
+    extent = float(np.median(np.linalg.norm(tgt - np.median(tgt, axis=0), axis=1)))
+    extent = extent if extent > 0 else 1.0
+    delta = config.huber_delta * extent
+
+    scale, rot, trans = _weighted_sim3(src, tgt, weights)
+    prev_cost = np.inf
+    for _ in range(config.irls_iters):
+        res = np.linalg.norm(tgt - (scale * src @ rot.T + trans), axis=1)
+        huber = np.where(res <= delta, 1.0, delta / np.maximum(res, 1e-12))
+        cost = float(weights @ np.where(res <= delta, 0.5 * res**2, delta * (res - 0.5 * delta)))
+        if np.isfinite(prev_cost) and prev_cost - cost <= 1e-6 * prev_cost:
+            break
+        prev_cost = cost
+        scale, rot, trans = _weighted_sim3(src, tgt, weights * huber)
+
+    res = np.linalg.norm(tgt - (scale * src @ rot.T + trans), axis=1)
+    stats = {
+        "residual": float(weights @ res / weights.sum() / extent),
+        "inlier_ratio": float(np.mean(res <= delta)),
+    }
+    return scale, rot, trans, stats
+
+
+def _slice(pred: Prediction, start: Optional[int], end: Optional[int]) -> Prediction:
+    """Views ``[start, end)`` of a prediction; Gaussians and auxiliary outputs are dropped."""
+    sl = slice(start, end)
+    return replace(
+        pred,
+        depth=pred.depth[sl],
+        sky=pred.sky[sl] if pred.sky is not None else None,
+        conf=pred.conf[sl] if pred.conf is not None else None,
+        extrinsics=pred.extrinsics[sl] if pred.extrinsics is not None else None,
+        intrinsics=pred.intrinsics[sl] if pred.intrinsics is not None else None,
+        processed_images=(
+            pred.processed_images[sl] if pred.processed_images is not None else None
+        ),
+        gaussians=None,
+        aux={},
+    )
+
+
+def _to_4x4(ext: np.ndarray) -> np.ndarray:
+    if ext.shape[-2:] == (4, 4):
+        return ext
+    out = np.zeros((*ext.shape[:-2], 4, 4), dtype=ext.dtype)
+    out[..., :3, :4] = ext
+    out[..., 3, 3] = 1.0
+    return out
+
+
+# =========================
+# sinks
+# =========================
+
+
+class GlbSink(ChunkSink):
+    """
+    Point cloud and cameras of the whole sequence in ``export_dir/scene.glb``.
+
+    Points are filtered per chunk with the confidence threshold of ``export_to_glb``
+    and kept as a uniform random sample of at most ``num_max_points`` points of the
+    sequence (bottom-k of random keys), so memory is bounded by one chunk plus the
+    sample. ``scene.jpg`` is the depth visualization of the first frame.
+    """
+
+    def __init__(
+        self,
+        export_dir: str,
+        num_max_points: int = 1_000_000,
+        conf_thresh: float = 1.05,
+        conf_thresh_percentile: float = 40.0,
+        ensure_thresh_percentile: float = 90.0,
+        show_cameras: bool = True,
+        camera_size: float = 0.03,
+        seed: Optional[int] = None,
+    ):
+        self.export_dir = export_dir
+        self.num_max_points = num_max_points
+        self.conf_thresh = conf_thresh
+        self.conf_thresh_percentile = conf_thresh_percentile
+        self.ensure_thresh_percentile = ensure_thresh_percentile
+        self.show_cameras = show_cameras
+        self.camera_size = camera_size
+        self._rng = np.random.default_rng(seed)
+
+        self._points = np.zeros((0, 3), dtype=np.float32)
+        self._colors = np.zeros((0, 3), dtype=np.uint8)
+        self._keys = np.zeros(0)
+        self._extrinsics: List[np.ndarray] = []
+        self._intrinsics: List[np.ndarray] = []
+        self._image_sizes: List[Tuple[int, int]] = []
+
+    def write(self, chunk: StreamingChunk) -> None:
+        pred = chunk.prediction
+        if chunk.index == 0:
+            os.makedirs(self.export_dir, exist_ok=True)
+            vis = np.concatenate(
+                [pred.processed_images[0], visualize_depth(pred.depth[0]).astype(np.uint8)],
+                axis=1,
+            )
+            imageio.imwrite(os.path.join(self.export_dir, "scene.jpg"), vis, quality=95)
+
+        conf_thr = get_conf_thresh(
+            pred,
+            None,
+            self.conf_thresh,
+            self.conf_thresh_percentile,
+            self.ensure_thresh_percentile,
+        )
+        points, colors = _depths_to_world_points_with_colors(
+            pred.depth,
+            pred.intrinsics,
+            pred.extrinsics,
+            pred.processed_images,
+            pred.conf,
+            conf_thr,
+        )
+        finite = np.isfinite(points).all(axis=1)
+        self._points = np.concatenate([self._points, points[finite]])
+        self._colors = np.concatenate([self._colors, colors[finite]])
+        self._keys = np.concatenate([self._keys, self._rng.random(int(finite.sum()))])
+        if len(self._keys) > self.num_max_points:
+            keep = np.argpartition(self._keys, self.num_max_points)[: self.num_max_points]
+            self._points, self._colors, self._keys = (
+                self._points[keep],
+                self._colors[keep],
+                self._keys[keep],
+            )
+
+        self._extrinsics.append(pred.extrinsics)
+        self._intrinsics.append(pred.intrinsics)
+        self._image_sizes += [pred.depth.shape[1:]] * len(pred.depth)
+
+    def close(self) -> None:
+        if not self._extrinsics:
+            return
+        ext = np.concatenate(self._extrinsics)
+        A = _compute_alignment_transform_first_cam_glTF_center_by_points(ext[0], self._points)
+        points = self._points
+        if points.shape[0] > 0:
+            points = trimesh.transform_points(points, A)
+
+        scene = trimesh.Scene()
+        if scene.metadata is None:
+            scene.metadata = {}
+        scene.metadata["hf_alignment"] = A
+        if points.shape[0] > 0:
+            scene.add_geometry(trimesh.points.PointCloud(vertices=points, colors=self._colors))
+        if self.show_cameras:
+            _add_cameras_to_scene(
+                scene=scene,
+                K=np.concatenate(self._intrinsics),
+                ext_w2c=ext,
+                image_sizes=self._image_sizes,
+                scale=_estimate_scene_scale(points, fallback=1.0) * self.camera_size,
+            )
+
+        os.makedirs(self.export_dir, exist_ok=True)
+        out_path = os.path.join(self.export_dir, "scene.glb")
+        scene.export(out_path)
+        logger.info(f"Exported {points.shape[0]} points of {len(ext)} frames to {out_path}")
+
+
+class NpzChunkSink(ChunkSink):
+    """
+    ``mini_npz`` outputs written chunk by chunk.
+
+    Each chunk goes to ``exports/mini_npz/chunk_XXXX.npz`` (depth, conf, extrinsics,
+    intrinsics and its frame range). On close, ``results.npz`` holds the camera
+    trajectory of the whole sequence and the frame ranges of the chunk files.
+    """
+
+    def __init__(self, export_dir: str):
+        self.output_dir = os.path.join(export_dir, "exports", "mini_npz")
+        self._extrinsics: List[np.ndarray] = []
+        self._intrinsics: List[np.ndarray] = []
+        self._ranges: List[Tuple[int, int]] = []
+
+    def write(self, chunk: StreamingChunk) -> None:
+        pred = chunk.prediction
+        os.makedirs(self.output_dir, exist_ok=True)
+        save_dict = {
+            "depth": np.round(pred.depth, 8),
+            "extrinsics": pred.extrinsics,
+            "intrinsics": pred.intrinsics,
+            "frame_range": np.array([chunk.start, chunk.end]),
+        }
+        if pred.conf is not None:
+            save_dict["conf"] = np.round(pred.conf, 2)
+        np.savez_compressed(
+            os.path.join(self.output_dir, f"chunk_{chunk.index:04d}.npz"), **save_dict
+        )
+        self._extrinsics.append(pred.extrinsics)
+        self._intrinsics.append(pred.intrinsics)
+        self._ranges.append((chunk.start, chunk.end))
+
+    def close(self) -> None:
+        if not self._ranges:
+            return
+        np.savez_compressed(
+            os.path.join(self.output_dir, "results.npz"),
+            extrinsics=np.concatenate(self._extrinsics),
+            intrinsics=np.concatenate(self._intrinsics),
+            chunk_ranges=np.array(self._ranges),
+        )
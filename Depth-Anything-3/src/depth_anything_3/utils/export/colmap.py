@@ -13,14 +13,21 @@
 # limitations under the License.
 
 import os
-import pycolmap
-import cv2 as cv
 import numpy as np
 
 from PIL import Image
 
 from depth_anything_3.specs import Prediction
 from depth_anything_3.utils.logger import logger
+from depth_anything_3.utils.read_write_model import (
+    Camera,
+    Image as ColmapImage,
+    Points3DArrays,
+    rotmat2qvec,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3D_arrays,
+)
 
 from .glb import _depths_to_world_points_with_colors
 
@@ -30,8 +37,19 @@ def export_to_colmap(
     export_dir: str,
     image_paths: list[str],
     conf_thresh_percentile: float = 40.0,
+    process_res: int = 504,
     process_res_method: str = "upper_bound_resize",
 ) -> None:
+    """
+    Write the prediction as a COLMAP sparse model (cameras, images, points3D .bin).
+
+    Every kept depth pixel becomes a 3D point observed once, by its own frame.
+    Cameras and 2D observations are expressed in the original image resolution.
+    The model files are written directly from arrays; the tracks come from the
+    pixel / frame indices of the kept pixels.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+
     # 1. Data preparation
     conf_thresh = np.percentile(prediction.conf, conf_thresh_percentile)
     points, colors = _depths_to_world_points_with_colors(
@@ -46,85 +64,95 @@ def export_to_colmap(
     logger.info(f"Exporting to COLMAP with {num_points} points")
     num_frames = len(prediction.processed_images)
     h, w = prediction.processed_images.shape[1:3]
-    points_xyf = _create_xyf(num_frames, h, w)
-    points_xyf = points_xyf[prediction.conf >= conf_thresh]
-
-    # 2. Set Reconstruction
-    reconstruction = pycolmap.Reconstruction()
-
-    point3d_ids = []
-    for vidx in range(num_points):
-        point3d_id = reconstruction.add_point3D(points[vidx], pycolmap.Track(), colors[vidx])
-        point3d_ids.append(point3d_id)
-
+    # Same pixels as kept by _depths_to_world_points_with_colors, in the same order
+    depth = prediction.depth
+    valid = np.isfinite(depth) & (depth > 0) & (prediction.conf >= conf_thresh)
+    points_xyf = _create_xyf(num_frames, h, w)[valid]
+
+    # 2. Tracks: point i is observation number `point2d_idx[i]` of its frame
+    frame_idx = points_xyf[:, 2].astype(np.int64)
+    frame_counts = np.bincount(frame_idx, minlength=num_frames)
+    frame_starts = np.cumsum(frame_counts) - frame_counts
+    point2d_idx = np.arange(num_points) - frame_starts[frame_idx]
+    point3d_ids = np.arange(1, num_points + 1, dtype=np.uint64)
+
+    # 3. Cameras and images, in the original resolution
+    cameras, images = {}, {}
     for fidx in range(num_frames):
-        orig_w, orig_h = Image.open(image_paths[fidx]).size
+        with Image.open(image_paths[fidx]) as img:  # reads the header only
+            orig_w, orig_h = img.size
+        scale_x, scale_y, left, top = _processed_to_original(
+            orig_w, orig_h, w, h, process_res, process_res_method
+        )
 
         intrinsic = prediction.intrinsics[fidx]
-        if process_res_method.endswith("resize"):
-            intrinsic[:1] *= orig_w / w
-            intrinsic[1:2] *= orig_h / h
-        elif process_res_method == "crop":
-            raise NotImplementedError("COLMAP export for crop method is not implemented")
-        else:
-            raise ValueError(f"Unknown process_res_method: {process_res_method}")
-
-        pycolmap_intri = np.array(
-            [intrinsic[0, 0], intrinsic[1, 1], intrinsic[0, 2], intrinsic[1, 2]]
+        params = np.array(
+            [
+                intrinsic[0, 0] * scale_x,
+                intrinsic[1, 1] * scale_y,
+                (intrinsic[0, 2] + left) * scale_x,
+                (intrinsic[1, 2] + top) * scale_y,
+            ],
+            dtype=np.float64,
+        )
+        cameras[fidx + 1] = Camera(
+            id=fidx + 1, model="PINHOLE", width=orig_w, height=orig_h, params=params
         )
 
-        extrinsic = prediction.extrinsics[fidx]
-        cam_from_world = pycolmap.Rigid3d(pycolmap.Rotation3d(extrinsic[:3, :3]), extrinsic[:3, 3])
-
-        # set and add camera
-        camera = pycolmap.Camera()
-        camera.camera_id = fidx + 1
-        camera.model = pycolmap.CameraModelId.PINHOLE
-        camera.width = orig_w
-        camera.height = orig_h
-        camera.params = pycolmap_intri
-        reconstruction.add_camera(camera)
-
-        # set and add rig (from camera)
-        rig = pycolmap.Rig()
-        rig.rig_id = camera.camera_id
-        rig.add_ref_sensor(camera.sensor_id)
-        reconstruction.add_rig(rig)
-
-        # set image
-        image = pycolmap.Image()
-        image.image_id = fidx + 1
-        image.camera_id = camera.camera_id
-
-        # set and add frame (from image)
-        frame = pycolmap.Frame()
-        frame.frame_id = image.image_id
-        frame.rig_id = camera.camera_id
-        frame.add_data_id(image.data_id)
-        frame.rig_from_world = cam_from_world
-        reconstruction.add_frame(frame)
-
-        # set point2d and update track
-        point2d_list = []
-        points_in_frame = points_xyf[:, 2].astype(np.int32) == fidx
-        for vidx in np.where(points_in_frame)[0]:
-            point2d = points_xyf[vidx][:2]
-            point2d[0] *= orig_w / w
-            point2d[1] *= orig_h / h
-            point3d_id = point3d_ids[vidx]
-            point2d_list.append(pycolmap.Point2D(point2d, point3d_id))
-            reconstruction.point3D(point3d_id).track.add_element(
-                image.image_id, len(point2d_list) - 1
-            )
-
-        # set and add image
-        image.frame_id = image.image_id
-        image.name = os.path.basename(image_paths[fidx])
-        image.points2D = pycolmap.Point2DList(point2d_list)
-        reconstruction.add_image(image)
-
-    # 3. Export
-    reconstruction.write(export_dir)
+        extrinsic = prediction.extrinsics[fidx].astype(np.float64)
+        start, end = frame_starts[fidx], frame_starts[fidx] + frame_counts[fidx]
+        xys = points_xyf[start:end, :2].astype(np.float64)
+        xys[:, 0] = (xys[:, 0] + left) * scale_x
+        xys[:, 1] = (xys[:, 1] + top) * scale_y
+        images[fidx + 1] = ColmapImage(
+            id=fidx + 1,
+            qvec=rotmat2qvec(extrinsic[:3, :3]),
+            tvec=extrinsic[:3, 3].copy(),
+            camera_id=fidx + 1,
+            name=os.path.basename(image_paths[fidx]),
+            xys=xys,
+            point3D_ids=point3d_ids[start:end].astype(np.int64),
+        )
+
+    # 4. Export
+    write_cameras_binary(cameras, os.path.join(export_dir, "cameras.bin"))
+    write_images_binary(images, os.path.join(export_dir, "images.bin"))
+    write_points3D_arrays(
+        Points3DArrays(
+            ids=point3d_ids,
+            xyz=points,
+            rgb=colors,
+            error=np.full(num_points, -1.0),  # COLMAP's value for an unset error
+            track_lengths=np.ones(num_points, dtype=np.int64),
+            image_ids=frame_idx + 1,
+            point2D_idxs=point2d_idx,
+        ),
+        os.path.join(export_dir, "points3D.bin"),
+    )
+
+
+def _processed_to_original(orig_w, orig_h, w, h, process_res, process_res_method):
+    """
+    Map processed pixel coordinates to the original image: ``x_orig = (x + left) * scale_x``.
+
+    Mirrors the input processor: a boundary resize to ``process_res``, then a resize
+    ("*resize") or a center crop ("*crop") to multiples of the patch size.
+    """
+    if process_res_method.endswith("resize"):
+        return orig_w / w, orig_h / h, 0, 0
+    if process_res_method not in ("upper_bound_crop", "lower_bound_crop"):
+        raise ValueError(f"Unknown process_res_method: {process_res_method}")
+
+    side = max(orig_w, orig_h) if process_res_method == "upper_bound_crop" else min(orig_w, orig_h)
+    if side == process_res:
+        resized_w, resized_h = orig_w, orig_h
+    else:
+        scale = process_res / float(side)
+        resized_w = max(1, int(round(orig_w * scale)))
+        resized_h = max(1, int(round(orig_h * scale)))
+    left = (resized_w - w) // 2
+    top = (resized_h - h) // 2
+    return orig_w / resized_w, orig_h / resized_h, left, top
 
 
 def _create_xyf(num_frames, height, width):
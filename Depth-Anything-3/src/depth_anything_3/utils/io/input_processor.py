@@ -21,7 +21,7 @@ In addition, it parallelizes per-image preprocessing using the provided `paralle
 
 from __future__ import annotations
 
-from typing import Sequence
+from typing import Callable, Sequence
 import cv2
 import numpy as np
 import torch
@@ -74,8 +74,12 @@ class InputProcessor:
         print_progress: bool = False,
         sequential: bool | None = None,
         desc: str | None = "Preprocess",
+        on_image_done: Callable[[], None] | None = None,
     ) -> tuple[torch.Tensor, torch.Tensor | None, torch.Tensor | None]:
         """
+        Args:
+            on_image_done: Optional thread-safe callable invoked once per processed image
+
         Returns:
             (tensor, extrinsics_list, intrinsics_list)
             tensor shape: (1, N, 3, H, W)
@@ -93,6 +97,7 @@ class InputProcessor:
             print_progress=print_progress,
             sequential=sequential,
             desc=desc,
+            on_image_done=on_image_done,
         )
 
         proc_imgs, out_sizes, out_ixts, out_exts = self._unpack_results(results)
@@ -143,12 +148,19 @@ class InputProcessor:
         print_progress: bool,
         sequential: bool,
         desc: str | None,
+        on_image_done: Callable[[], None] | None = None,
     ):
+        def process_and_report(*args, **kwargs):
+            result = self._process_one(*args, **kwargs)
+            on_image_done()
+            return result
+
+        action = self._process_one if on_image_done is None else process_and_report
         results = parallel_execution(
             image,
             exts_list,
             ixts_list,
-            action=self._process_one,  # (img, extrinsic, intrinsic, ...)
+            action=action,  # (img, extrinsic, intrinsic, ...)
             num_processes=num_workers,
             print_progress=print_progress,
             sequential=sequential,
@@ -107,21 +107,38 @@ def check_memory_availability(required_gb: float = 2.0) -> tuple[bool, str]:
         )
     except Exception as e:
         return True, f"Memory check failed: {e}, proceeding anyway"
-def estimate_memory_requirement(num_images: int, process_res: int) -> float:
-    """Heuristic estimate for memory usage (GB) based on image count and resolution.
 
-    This mirrors the simple policy used by the backend service so other code
-    (e.g., Gradio UI) can make consistent decisions when checking available
-    memory before loading a model or running inference.
+
+def estimate_memory_requirement(
+    num_images: int,
+    process_res: int,
+    model_name: Optional[str] = None,
+    infer_gs: bool = False,
+    include_weights: bool = False,
+) -> float:
+    """Estimate peak GPU memory (GB) of an inference call.
+
+    Uses the calibrated per-model cost model from ``configs/memory_model.json``
+    (see ``depth_anything_3.utils.memory_model``) so the backend, the Gradio UI
+    and the worker make consistent admission decisions. Falls back to the old
+    resolution-only heuristic when ``model_name`` is not calibrated.
 
     Args:
         num_images: Number of images to process.
         process_res: Processing resolution.
+        model_name: Model preset name, e.g. ``"da3-large"``.
+        infer_gs: Whether the Gaussian branch is enabled.
+        include_weights: Add the model weights (model not loaded yet).
 
     Returns:
         Estimated memory requirement in GB.
     """
-    base_memory = 2.0
-    per_image_memory = (process_res / 504) ** 2 * 0.5
-    total_memory = base_memory + (num_images * per_image_memory * 0.1)
-    return total_memory
+    from depth_anything_3.utils.memory_model import get_memory_model
+
+    return get_memory_model().estimate_gb(
+        model_name,
+        num_images,
+        process_res,
+        infer_gs=infer_gs,
+        include_weights=include_weights,
+    )
@@ -0,0 +1,508 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Calibrated GPU memory model.
+
+Peak activation memory of a forward pass is modelled per model preset and
+precision as
+
+    peak_gb = const_gb + per_token_gb * T + per_token2_gb * T**2 + infer_gs * gs_per_token_gb * T
+
+with T = S * (H / 14) * (W / 14) the total number of patch tokens. The
+quadratic term covers the global attention blocks when they are not run by a
+memory-efficient kernel. Weights are stored separately (``weights_gb``) so the
+estimate can be used both before and after a model is loaded. Forward latency
+is fitted with the same token features, so job planners can trade frame count
+and resolution against both memory and time.
+
+Coefficients are fitted from a profiling sweep and persisted as JSON in
+``configs/memory_model.json``:
+
+    python -m depth_anything_3.utils.memory_model --models da3-small da3-large \\
+        --views 1 4 8 16 32 --res 280 392 504
+
+Only ``numpy`` is needed to load the model and plan jobs; ``torch`` is imported
+lazily by the profiler.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from depth_anything_3.utils.logger import logger
+
+PATCH_SIZE = 14
+MEMORY_MODEL_PATH = Path(__file__).resolve().parents[1] / "configs" / "memory_model.json"
+MEMORY_MODEL_ENV = "DA3_MEMORY_MODEL_PATH"
+DEFAULT_PRECISION = "bf16"
+
+
+@dataclass
+class MemoryCostModel:
+    """Fitted peak-memory coefficients of one (model, precision) pair, in GB."""
+
+    const_gb: float
+    per_token_gb: float
+    per_token2_gb: float = 0.0
+    gs_per_token_gb: float = 0.0
+    weights_gb: float = 0.0
+    num_samples: int = 0
+    max_rel_error: float = 0.0
+    latency_const_sec: float = 0.0
+    latency_per_token_sec: float = 0.0
+    latency_per_token2_sec: float = 0.0
+
+    def predict(self, num_tokens: int, infer_gs: bool = False) -> float:
+        peak = self.const_gb + self.per_token_gb * num_tokens + self.per_token2_gb * num_tokens**2
+        if infer_gs:
+            peak += self.gs_per_token_gb * num_tokens
+        return peak
+
+    @property
+    def has_latency(self) -> bool:
+        return self.latency_per_token_sec > 0 or self.latency_per_token2_sec > 0
+
+    def predict_latency(self, num_tokens: int) -> float:
+        return (
+            self.latency_const_sec
+            + self.latency_per_token_sec * num_tokens
+            + self.latency_per_token2_sec * num_tokens**2
+        )
+
+
+@dataclass
+class MemorySample:
+    """One profiled forward pass."""
+
+    num_views: int
+    height: int
+    width: int
+    infer_gs: bool
+    peak_gb: float
+    latency_sec: float = 0.0
+
+    @property
+    def num_tokens(self) -> int:
+        return self.num_views * (self.height // PATCH_SIZE) * (self.width // PATCH_SIZE)
+
+
+@dataclass
+class InferencePlan:
+    """
+    Resolution and chunking chosen to fit a memory budget.
+
+    Args:
+        num_views: Total number of views of the job
+        process_res: Processing resolution to use
+        max_views: Views per forward pass (== num_views when no chunking is needed)
+        estimated_gb: Estimated peak memory of one forward pass
+        fits: Whether the plan is expected to fit the budget
+    """
+
+    num_views: int
+    process_res: int
+    max_views: int
+    estimated_gb: float
+    fits: bool
+
+    @property
+    def chunked(self) -> bool:
+        return self.max_views < self.num_views
+
+
+def tokens_per_view(process_res: int, aspect_ratio: float = 1.0) -> int:
+    """
+    Number of patch tokens of one view resized with ``upper_bound_resize``.
+
+    Args:
+        process_res: Length of the longer side
+        aspect_ratio: Width / height of the input (1.0 is the worst case)
+    """
+    long_side = max(PATCH_SIZE, round(process_res / PATCH_SIZE) * PATCH_SIZE)
+    ratio = aspect_ratio if aspect_ratio <= 1.0 else 1.0 / aspect_ratio
+    short_side = max(PATCH_SIZE, round(long_side * ratio / PATCH_SIZE) * PATCH_SIZE)
+    return (long_side // PATCH_SIZE) * (short_side // PATCH_SIZE)
+
+
+def legacy_estimate_gb(num_images: int, process_res: int) -> float:
+    """Uncalibrated heuristic used when no fitted model is available."""
+    base_memory = 2.0
+    per_image_memory = (process_res / 504) ** 2 * 0.5
+    return base_memory + (num_images * per_image_memory * 0.1)
+
+
+def fit_cost_model(samples: Sequence[MemorySample], weights_gb: float = 0.0) -> MemoryCostModel:
+    """
+    Least-squares fit of the cost model, with coefficients constrained to be >= 0.
+
+    Args:
+        samples: Profiled forward passes
+        weights_gb: Memory taken by the model weights
+
+    Returns:
+        Fitted MemoryCostModel
+    """
+    if len(samples) == 0:
+        raise ValueError("At least one sample is required to fit the memory model")
+
+    tokens = np.array([s.num_tokens for s in samples], dtype=np.float64)
+    gs = np.array([float(s.infer_gs) for s in samples])
+    peaks = np.array([s.peak_gb for s in samples], dtype=np.float64)
+    features = np.stack([np.ones_like(tokens), tokens, tokens**2, tokens * gs], axis=1)
+    full = _fit_nonnegative(features, peaks)
+
+    # Latency is fitted on the samples without the Gaussian branch only
+    plain = (gs == 0) & (np.array([s.latency_sec for s in samples]) > 0)
+    latency = np.zeros(3)
+    if plain.any():
+        latency = _fit_nonnegative(
+            features[plain, :3], np.array([s.latency_sec for s in samples])[plain]
+        )
+
+    predicted = features @ full
+    rel_error = np.abs(predicted - peaks) / np.maximum(peaks, 1e-6)
+    return MemoryCostModel(
+        const_gb=float(full[0]),
+        per_token_gb=float(full[1]),
+        per_token2_gb=float(full[2]),
+        gs_per_token_gb=float(full[3]),
+        weights_gb=float(weights_gb),
+        num_samples=len(samples),
+        max_rel_error=float(rel_error.max()),
+        latency_const_sec=float(latency[0]),
+        latency_per_token_sec=float(latency[1]),
+        latency_per_token2_sec=float(latency[2]),
+    )
+
+
+def _fit_nonnegative(features: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    # Drop unobserved terms, then refit without any coefficient that went negative
+    active = [i for i in range(features.shape[1]) if np.any(features[:, i] != 0)]
+    while True:
+        coef, *_ = np.linalg.lstsq(features[:, active], targets, rcond=None)
+        negative = [a for a, c in zip(active, coef) if c < 0]
+        if not negative or len(active) == 1:
+            break
+        active = [a for a in active if a not in negative]
+    full = np.zeros(features.shape[1])
+    full[active] = np.clip(coef, 0.0, None)
+    return full
+
+
+class MemoryModel:
+    """
+    Per-model memory cost models loaded from JSON.
+
+    Args:
+        path: JSON file (defaults to ``DA3_MEMORY_MODEL_PATH`` or ``configs/memory_model.json``)
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path or os.environ.get(MEMORY_MODEL_ENV) or MEMORY_MODEL_PATH)
+        self.device: Optional[str] = None
+        self.models: Dict[str, Dict[str, MemoryCostModel]] = {}
+        self._warned: set = set()  # uncalibrated models already reported
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            self.device = data.get("device")
+            for name, per_precision in data.get("models", {}).items():
+                self.models[name] = {
+                    precision: MemoryCostModel(**coefs)
+                    for precision, coefs in per_precision.items()
+                }
+
+    def save(self, path: Optional[str | Path] = None) -> Path:
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": 1,
+            "device": self.device,
+            "models": {
+                name: {precision: asdict(m) for precision, m in per_precision.items()}
+                for name, per_precision in sorted(self.models.items())
+            },
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def get(
+        self, model_name: Optional[str], precision: str = DEFAULT_PRECISION
+    ) -> Optional[MemoryCostModel]:
+        per_precision = self.models.get(model_name or "")
+        if not per_precision:
+            return None
+        if precision in per_precision:
+            return per_precision[precision]
+        # fp16 and bf16 share the same footprint
+        if precision in ("fp16", "bf16"):
+            return per_precision.get("bf16") or per_precision.get("fp16")
+        return None
+
+    def set(self, model_name: str, precision: str, cost_model: MemoryCostModel) -> None:
+        self.models.setdefault(model_name, {})[precision] = cost_model
+
+    def estimate_gb(
+        self,
+        model_name: Optional[str],
+        num_views: int,
+        process_res: int,
+        infer_gs: bool = False,
+        aspect_ratio: float = 1.0,
+        include_weights: bool = False,
+        precision: str = DEFAULT_PRECISION,
+    ) -> float:
+        """
+        Estimated peak memory (GB) of one forward pass.
+
+        Falls back to the legacy heuristic when ``model_name`` is not calibrated.
+
+        Args:
+            model_name: Model preset name (e.g. "da3-large")
+            num_views: Number of views in the forward pass
+            process_res: Processing resolution
+            infer_gs: Whether the Gaussian branch is enabled
+            aspect_ratio: Width / height of the inputs (1.0 is the worst case)
+            include_weights: Add the weights footprint (model not loaded yet)
+            precision: "bf16", "fp16" or "fp32"
+        """
+        cost_model = self.get(model_name, precision)
+        if cost_model is None:
+            if model_name not in self._warned:
+                self._warned.add(model_name)
+                logger.warn(
+                    f"No calibrated memory model for {model_name} in {self.path}, using the "
+                    "resolution-only heuristic; run 'python -m "
+                    "depth_anything_3.utils.memory_model' on this GPU to calibrate it"
+                )
+            return legacy_estimate_gb(num_views, process_res)
+        num_tokens = num_views * tokens_per_view(process_res, aspect_ratio)
+        peak = cost_model.predict(num_tokens, infer_gs)
+        return peak + (cost_model.weights_gb if include_weights else 0.0)
+
+    def estimate_latency_sec(
+        self,
+        model_name: Optional[str],
+        num_views: int,
+        process_res: int,
+        aspect_ratio: float = 1.0,
+        precision: str = DEFAULT_PRECISION,
+    ) -> Optional[float]:
+        """
+        Estimated forward latency (seconds), or None if latency was not calibrated.
+
+        Args:
+            model_name: Model preset name (e.g. "da3-large")
+            num_views: Number of views in the forward pass
+            process_res: Processing resolution
+            aspect_ratio: Width / height of the inputs
+            precision: "bf16", "fp16" or "fp32"
+        """
+        cost_model = self.get(model_name, precision)
+        if cost_model is None or not cost_model.has_latency:
+            return None
+        return cost_model.predict_latency(num_views * tokens_per_view(process_res, aspect_ratio))
+
+    def max_views(
+        self,
+        model_name: Optional[str],
+        budget_gb: float,
+        process_res: int,
+        infer_gs: bool = False,
+        aspect_ratio: float = 1.0,
+        include_weights: bool = False,
+        precision: str = DEFAULT_PRECISION,
+    ) -> int:
+        """Largest number of views per forward pass that fits ``budget_gb`` (0 if none)."""
+        lo, hi = 0, 1
+        estimate = lambda s: self.estimate_gb(  # noqa: E731
+            model_name, s, process_res, infer_gs, aspect_ratio, include_weights, precision
+        )
+        while hi <= 1 << 16 and estimate(hi) <= budget_gb:
+            lo, hi = hi, hi * 2
+        # Estimates are monotonic in the number of views: binary search in (lo, hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if estimate(mid) <= budget_gb:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    def plan(
+        self,
+        model_name: Optional[str],
+        num_views: int,
+        process_res: int,
+        budget_gb: float,
+        infer_gs: bool = False,
+        aspect_ratio: float = 1.0,
+        include_weights: bool = False,
+        precision: str = DEFAULT_PRECISION,
+        min_views_per_chunk: int = 8,
+        min_res: int = 280,
+        res_step: int = 56,
+    ) -> InferencePlan:
+        """
+        Choose a resolution and views-per-pass that fit ``budget_gb``.
+
+        Keeps ``process_res`` and all views in one pass when possible, then
+        splits the views into chunks of at least ``min_views_per_chunk``, and
+        only then lowers the resolution by ``res_step`` down to ``min_res``.
+        """
+        min_chunk = min(min_views_per_chunk, num_views)
+        res = process_res
+        while True:
+            estimated = self.estimate_gb(
+                model_name, num_views, res, infer_gs, aspect_ratio, include_weights, precision
+            )
+            if estimated <= budget_gb:
+                return InferencePlan(num_views, res, num_views, estimated, True)
+            views = self.max_views(
+                model_name, budget_gb, res, infer_gs, aspect_ratio, include_weights, precision
+            )
+            if views >= min_chunk and not infer_gs:
+                estimated = self.estimate_gb(
+                    model_name, views, res, infer_gs, aspect_ratio, include_weights, precision
+                )
+                return InferencePlan(num_views, res, views, estimated, True)
+            if res - res_step < min_res:
+                return InferencePlan(num_views, res, num_views, estimated, False)
+            res -= res_step
+
+
+_default_model: Optional[MemoryModel] = None
+
+
+def get_memory_model(reload: bool = False) -> MemoryModel:
+    """Return the process-wide MemoryModel loaded from the default location."""
+    global _default_model
+    if _default_model is None or reload:
+        _default_model = MemoryModel()
+    return _default_model
+
+
+def get_precision(device_type: str = "cuda") -> str:
+    """Precision used by ``DepthAnything3.forward`` on ``device_type``."""
+    import torch
+
+    if device_type != "cuda" or not torch.cuda.is_available():
+        return "fp32"
+    return "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+
+
+def profile_memory(
+    model_name: str,
+    views: Sequence[int],
+    resolutions: Sequence[int],
+    infer_gs_options: Sequence[bool] = (False,),
+    device: str = "cuda",
+) -> tuple[List[MemorySample], float]:
+    """
+    Measure peak allocated memory and latency of ``DepthAnything3.forward`` over a sweep.
+
+    Args:
+        model_name: Model preset name
+        views: Numbers of views to profile
+        resolutions: Square processing resolutions to profile
+        infer_gs_options: Whether to profile with the Gaussian branch on/off
+        device: CUDA device
+
+    Returns:
+        (samples, weights_gb)
+    """
+    import torch
+
+    from depth_anything_3.api import DepthAnything3
+    from depth_anything_3.utils.memory import cleanup_cuda_memory
+
+    torch.cuda.empty_cache()
+    base = torch.cuda.memory_allocated(device)
+    model = DepthAnything3(model_name).to(device).eval()
+    weights_gb = (torch.cuda.memory_allocated(device) - base) / 1024**3
+
+    # Warm-up so kernel selection does not end up in the first latency sample
+    side = round(min(resolutions) / PATCH_SIZE) * PATCH_SIZE
+    model.forward(torch.randn(1, min(views), 3, side, side, device=device))
+
+    samples = []
+    for infer_gs in infer_gs_options:
+        for res in resolutions:
+            side = round(res / PATCH_SIZE) * PATCH_SIZE
+            for num_views in sorted(views):
+                imgs = torch.randn(1, num_views, 3, side, side, device=device)
+                torch.cuda.synchronize(device)
+                torch.cuda.reset_peak_memory_stats(device)
+                before = torch.cuda.memory_allocated(device)
+                start = time.time()
+                try:
+                    model.forward(imgs, infer_gs=infer_gs)
+                except torch.cuda.OutOfMemoryError:
+                    imgs = None
+                    cleanup_cuda_memory()
+                    print(f"{model_name}: OOM at S={num_views} res={side}, skipping larger S")
+                    break
+                torch.cuda.synchronize(device)
+                latency = time.time() - start
+                peak_gb = (torch.cuda.max_memory_allocated(device) - before) / 1024**3
+                samples.append(MemorySample(num_views, side, side, infer_gs, peak_gb, latency))
+                print(
+                    f"{model_name}: S={num_views} res={side} gs={infer_gs} "
+                    f"peak={peak_gb:.2f}GB latency={latency:.3f}s"
+                )
+                del imgs
+                torch.cuda.empty_cache()
+
+    del model
+    cleanup_cuda_memory()
+    return samples, weights_gb
+
+
+if __name__ == "__main__":
+    # Profile a sweep and write the fitted models next to the model configs.
+    import argparse
+
+    import torch
+
+    parser = argparse.ArgumentParser(description="Calibrate the DA3 GPU memory model")
+    parser.add_argument("--models", nargs="+", default=["da3-small", "da3-base", "da3-large"])
+    parser.add_argument("--views", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--res", nargs="+", type=int, default=[280, 392, 504])
+    parser.add_argument("--gs", action="store_true", help="Also profile with infer_gs=True")
+    parser.add_argument(
+        "--output", default=None, help="JSON path (default: configs/memory_model.json)"
+    )
+    args = parser.parse_args()
+
+    if not torch.cuda.is_available():
+        raise SystemExit("CUDA is required to calibrate the memory model")
+
+    memory_model = MemoryModel(args.output)
+    memory_model.device = torch.cuda.get_device_name()
+    precision = get_precision("cuda")
+    for name in args.models:
+        gs_options = (False, True) if args.gs else (False,)
+        samples, weights_gb = profile_memory(name, args.views, args.res, gs_options)
+        cost_model = fit_cost_model(samples, weights_gb)
+        memory_model.set(name, precision, cost_model)
+        print(f"{name} [{precision}]: {cost_model}")
+    print(f"Saved memory model to {memory_model.save(args.output)}")
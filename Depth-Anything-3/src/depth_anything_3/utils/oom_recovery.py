@@ -0,0 +1,454 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+OOM-resilient inference.
+
+``ResilientInference`` wraps ``DepthAnything3.inference`` and retries on CUDA
+out-of-memory errors with progressively cheaper strategies:
+
+    1. ``default``     - a plain ``inference`` call
+    2. ``head_chunk``  - smaller DPT/DualDPT head ``chunk_size`` (4, 2, 1)
+    3. ``view_chunks`` - overlapping view chunks, Sim(3)-aligned on their
+                         overlap with ``align_poses_umeyama`` and merged
+
+The strategy that succeeded is remembered per (model, view count bucket,
+process_res) in a ``FallbackMemory`` so later requests of the same shape start
+directly from it.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import torch
+
+from depth_anything_3.specs import Prediction
+from depth_anything_3.utils.logger import logger
+from depth_anything_3.utils.memory import cleanup_cuda_memory
+from depth_anything_3.utils.pose_align import align_poses_umeyama, apply_umeyama_alignment_to_ext
+from depth_anything_3.utils.progress import STAGE_RANGES, ProgressReporter
+
+FAKE_OOM_ENV = "DA3_FAKE_OOM"
+
+
+def is_oom_error(error: BaseException) -> bool:
+    """Return True if ``error`` is a CUDA (or injected) out-of-memory error."""
+    oom_cls = getattr(torch.cuda, "OutOfMemoryError", None)
+    if oom_cls is not None and isinstance(error, oom_cls):
+        return True
+    return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
+
+
+@dataclass(frozen=True)
+class FallbackAttempt:
+    """
+    One inference strategy.
+
+    Args:
+        strategy: "default", "head_chunk" or "view_chunks"
+        head_chunk_size: Number of views decoded at once by the head (None = model default)
+        view_chunk_size: Number of views per forward pass for "view_chunks"
+        overlap: Number of views shared by consecutive chunks for "view_chunks"
+    """
+
+    strategy: str = "default"
+    head_chunk_size: Optional[int] = None
+    view_chunk_size: Optional[int] = None
+    overlap: int = 0
+
+    def describe(self) -> str:
+        if self.strategy == "head_chunk":
+            return f"head_chunk(chunk_size={self.head_chunk_size})"
+        if self.strategy == "view_chunks":
+            return (
+                f"view_chunks(views={self.view_chunk_size}, overlap={self.overlap}, "
+                f"head_chunk_size={self.head_chunk_size})"
+            )
+        return "default"
+
+
+class FallbackMemory:
+    """
+    Thread-safe record of the cheapest strategy known to succeed per workload.
+
+    Args:
+        path: Optional JSON file the records are loaded from and saved to
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._records = json.load(f)
+            except Exception as e:
+                logger.warn(f"Failed to load OOM fallback memory from {path}: {e}")
+
+    @staticmethod
+    def key(model_name: str, num_views: int, process_res: int) -> str:
+        # Bucket view counts by power of two so nearby sizes share a record
+        bucket = 1 << max(num_views - 1, 0).bit_length()
+        return f"{model_name}|{bucket}|{process_res}"
+
+    def get(self, key: str) -> Optional[FallbackAttempt]:
+        with self._lock:
+            record = self._records.get(key)
+        return FallbackAttempt(**record) if record else None
+
+    def record(self, key: str, attempt: FallbackAttempt) -> None:
+        with self._lock:
+            self._records[key] = asdict(attempt)
+            if self.path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    with open(self.path, "w") as f:
+                        json.dump(self._records, f, indent=2)
+                except Exception as e:
+                    logger.warn(f"Failed to save OOM fallback memory to {self.path}: {e}")
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class FakeOOMInjector:
+    """
+    Raise synthetic OOM errors to exercise the fallback path without a GPU.
+
+    Args:
+        strategies: Strategies that should fail ("default", "head_chunk", "view_chunks")
+        max_failures: Stop injecting after this many failures (None = unlimited)
+    """
+
+    def __init__(self, strategies: Sequence[str] = ("default",), max_failures: int | None = None):
+        self.strategies = set(strategies)
+        self.max_failures = max_failures
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["FakeOOMInjector"]:
+        """Build from ``DA3_FAKE_OOM``, e.g. ``DA3_FAKE_OOM=default,head_chunk``."""
+        value = os.environ.get(FAKE_OOM_ENV, "").strip()
+        if not value:
+            return None
+        return cls([s.strip() for s in value.split(",") if s.strip()])
+
+    def maybe_raise(self, attempt: FallbackAttempt) -> None:
+        if attempt.strategy not in self.strategies:
+            return
+        if self.max_failures is not None and self.failures >= self.max_failures:
+            return
+        self.failures += 1
+        raise RuntimeError(f"CUDA out of memory (injected for {attempt.describe()})")
+
+
+class ResilientInference:
+    """
+    ``DepthAnything3.inference`` with automatic OOM fallbacks.
+
+    Args:
+        model: DepthAnything3 instance
+        head_chunk_sizes: Head chunk sizes tried after the default call fails
+        min_view_chunk: Smallest number of views per chunk for "view_chunks"
+        min_overlap: Minimum overlap between view chunks (>= 3 for Sim(3) alignment)
+        memory: Shared FallbackMemory (a private one is created if None)
+        oom_injector: Optional FakeOOMInjector (defaults to ``DA3_FAKE_OOM``)
+    """
+
+    def __init__(
+        self,
+        model,
+        head_chunk_sizes: Sequence[int] = (4, 2, 1),
+        min_view_chunk: int = 8,
+        min_overlap: int = 3,
+        memory: Optional[FallbackMemory] = None,
+        oom_injector: Optional[FakeOOMInjector] = None,
+    ):
+        self.model = model
+        self.head_chunk_sizes = tuple(head_chunk_sizes)
+        self.min_overlap = max(min_overlap, 3)
+        self.min_view_chunk = max(min_view_chunk, self.min_overlap + 1)
+        self.memory = memory if memory is not None else FallbackMemory()
+        self.oom_injector = oom_injector if oom_injector is not None else FakeOOMInjector.from_env()
+        self.last_attempt: Optional[FallbackAttempt] = None
+
+    def plan(self, num_views: int, infer_gs: bool = False) -> List[FallbackAttempt]:
+        """Return the ordered list of strategies for ``num_views`` views."""
+        attempts = [FallbackAttempt()]
+        attempts += [
+            FallbackAttempt("head_chunk", head_chunk_size=c) for c in self.head_chunk_sizes
+        ]
+        # Gaussians cannot be merged across independently predicted chunks
+        if infer_gs:
+            return attempts
+
+        smallest_head = self.head_chunk_sizes[-1] if self.head_chunk_sizes else None
+        divisor = 2
+        while True:
+            size = max(math.ceil(num_views / divisor), self.min_view_chunk)
+            if size >= num_views:
+                break
+            overlap = max(self.min_overlap, size // 4)
+            if overlap >= size:
+                break
+            attempt = FallbackAttempt("view_chunks", smallest_head, size, overlap)
+            if attempt not in attempts:
+                attempts.append(attempt)
+            if size == self.min_view_chunk:
+                break
+            divisor *= 2
+        return attempts
+
+    def inference(self, image: list, max_views_per_pass: int | None = None, **kwargs) -> Prediction:
+        """
+        Run ``model.inference(image, **kwargs)``, retrying on OOM.
+
+        Accepts the same keyword arguments as ``DepthAnything3.inference``. The
+        strategy that succeeded is available as ``self.last_attempt``.
+
+        Args:
+            image: Input images
+            max_views_per_pass: Optional up-front limit of views per forward pass
+                (e.g. from ``MemoryModel.plan``); starts directly with view chunks
+                when smaller than the number of views
+        """
+        num_views = len(image)
+        infer_gs = kwargs.get("infer_gs", False)
+        key = FallbackMemory.key(
+            getattr(self.model, "model_name", "unknown"), num_views, kwargs.get("process_res", 504)
+        )
+
+        attempts = self.plan(num_views, infer_gs)
+        known = self.memory.get(key)
+        if known is not None:
+            if known.strategy == "view_chunks" and known not in attempts:
+                # Recorded for another view count in the same bucket: rescale the chunking
+                known = next((a for a in attempts if a.strategy == "view_chunks"), None)
+            if known in attempts:
+                attempts = attempts[attempts.index(known) :]
+                logger.info(f"Starting from recorded OOM fallback: {known.describe()}")
+        if max_views_per_pass is not None and max_views_per_pass < num_views and not infer_gs:
+            size = max(max_views_per_pass, self.min_view_chunk)
+            planned = FallbackAttempt(
+                "view_chunks", None, size, min(max(self.min_overlap, size // 4), size - 1)
+            )
+            attempts = [planned] + [
+                a for a in attempts if a.strategy == "view_chunks" and a.view_chunk_size < size
+            ]
+            logger.info(f"Memory plan limits a pass to {size} views: {planned.describe()}")
+
+        last_error: Optional[BaseException] = None
+        for attempt in attempts:
+            try:
+                prediction = self._run_attempt(attempt, image, kwargs)
+            except Exception as e:
+                if not is_oom_error(e):
+                    raise
+                last_error = e
+                logger.warn(f"OOM with {attempt.describe()}, trying a cheaper strategy")
+                cleanup_cuda_memory()
+                continue
+
+            self.last_attempt = attempt
+            if attempt.strategy != "default":
+                self.memory.record(key, attempt)
+            return prediction
+
+        raise last_error
+
+    def _run_attempt(self, attempt: FallbackAttempt, image: list, kwargs: dict) -> Prediction:
+        if self.oom_injector is not None:
+            self.oom_injector.maybe_raise(attempt)
+        if attempt.head_chunk_size is not None:
+            self.model.set_head_chunk_size(attempt.head_chunk_size)
+        try:
+            if attempt.strategy == "view_chunks":
+                return self._run_view_chunks(attempt, image, kwargs)
+            return self.model.inference(image, **kwargs)
+        finally:
+            if attempt.head_chunk_size is not None:
+                self.model.set_head_chunk_size(self._default_head_chunk_size())
+
+    def _default_head_chunk_size(self) -> int:
+        from depth_anything_3.model.da3 import DepthAnything3Net
+
+        return DepthAnything3Net.HEAD_CHUNK_SIZE
+
+    def _run_view_chunks(self, attempt: FallbackAttempt, image: list, kwargs: dict) -> Prediction:
+        export_keys = (
+            "export_dir",
+            "export_format",
+            "infer_gs",
+            "render_exts",
+            "render_ixts",
+            "render_hw",
+            "process_res",
+            "process_res_method",
+            "conf_thresh_percentile",
+            "num_max_points",
+            "show_cameras",
+            "feat_vis_fps",
+            "export_kwargs",
+            "progress_callback",
+        )
+        export_args = {k: kwargs[k] for k in export_keys if k in kwargs}
+        export_dir = export_args.pop("export_dir", None)
+        chunk_kwargs = {k: v for k, v in kwargs.items() if k != "export_dir"}
+        progress = ProgressReporter.wrap(chunk_kwargs.pop("progress_callback", None))
+        export_args["progress_callback"] = progress.sub_range(STAGE_RANGES["export"][0], 1.0)
+        extrinsics = chunk_kwargs.pop("extrinsics", None)
+        intrinsics = chunk_kwargs.pop("intrinsics", None)
+        if chunk_kwargs.get("export_feat_layers"):
+            logger.warn("Feature export is not supported with view chunking, ignoring it")
+            chunk_kwargs["export_feat_layers"] = None
+
+        num_views = len(image)
+        size, overlap = attempt.view_chunk_size, attempt.overlap
+        ranges: List[Tuple[int, int]] = []
+        start = 0
+        while True:
+            end = min(start + size, num_views)
+            start = max(0, end - size)
+            ranges.append((start, end))
+            if end == num_views:
+                break
+            start = end - overlap
+
+        # Chunks share the pre-export part of the progress range
+        chunk_span = STAGE_RANGES["export"][0] / len(ranges)
+        parts: List[Tuple[int, int, Prediction]] = []
+        for i, (start, end) in enumerate(ranges):
+            pred = self.model.inference(
+                image[start:end],
+                extrinsics=extrinsics[start:end] if extrinsics is not None else None,
+                intrinsics=intrinsics[start:end] if intrinsics is not None else None,
+                progress_callback=progress.sub_range(i * chunk_span, (i + 1) * chunk_span),
+                **chunk_kwargs,
+            )
+            parts.append((start, end, pred))
+            cleanup_cuda_memory()
+
+        prediction = _merge_view_chunks(parts, align=extrinsics is None)
+        if export_dir is not None:
+            self.model.export_prediction(prediction, image, export_dir, **export_args)
+        return prediction
+
+
+def _merge_view_chunks(parts: List[Tuple[int, int, Prediction]], align: bool) -> Prediction:
+    """
+    Merge per-chunk predictions into one sequence.
+
+    Each chunk is Sim(3)-aligned to the already merged views it overlaps with
+    (unless the chunks share input extrinsics, in which case they are already in
+    a common frame); on overlapping views the earlier chunk's prediction is kept.
+    """
+    _, first_end, first = parts[0]
+    depth = [first.depth]
+    conf = [first.conf] if first.conf is not None else None
+    sky = [first.sky] if first.sky is not None else None
+    ext = [first.extrinsics] if first.extrinsics is not None else None
+    ixt = [first.intrinsics] if first.intrinsics is not None else None
+    imgs = [first.processed_images] if first.processed_images is not None else None
+    merged_end = first_end
+
+    for start, end, pred in parts[1:]:
+        overlap = merged_end - start
+        chunk_depth = pred.depth
+        chunk_ext = pred.extrinsics
+        if align and ext is not None and chunk_ext is not None:
+            ref_ext = np.concatenate(ext, axis=0)[start:merged_end]
+            rot, trans, scale = align_poses_umeyama(
+                _to_4x4(ref_ext), _to_4x4(chunk_ext[:overlap])
+            )
+            aligned = apply_umeyama_alignment_to_ext(rot, trans, scale, chunk_ext)
+            chunk_ext = aligned[..., : chunk_ext.shape[-2], :]  # keep 3x4 inputs 3x4
+            chunk_depth = chunk_depth * scale
+
+        keep = slice(overlap, None)
+        depth.append(chunk_depth[keep])
+        if conf is not None:
+            conf.append(pred.conf[keep])
+        if sky is not None:
+            sky.append(pred.sky[keep])
+        if ext is not None:
+            ext.append(chunk_ext[keep].astype(ext[0].dtype))
+        if ixt is not None:
+            ixt.append(pred.intrinsics[keep])
+        if imgs is not None:
+            imgs.append(pred.processed_images[keep])
+        merged_end = end
+
+    if first.aux:
+        logger.warn("Auxiliary outputs are dropped when merging view chunks")
+
+    return replace(
+        first,
+        depth=np.concatenate(depth, axis=0),
+        conf=np.concatenate(conf, axis=0) if conf is not None else None,
+        sky=np.concatenate(sky, axis=0) if sky is not None else None,
+        extrinsics=np.concatenate(ext, axis=0) if ext is not None else None,
+        intrinsics=np.concatenate(ixt, axis=0) if ixt is not None else None,
+        processed_images=np.concatenate(imgs, axis=0) if imgs is not None else None,
+        gaussians=None,
+        aux={},
+    )
+
+
+def _to_4x4(ext: np.ndarray) -> np.ndarray:
+    if ext.shape[-2:] == (4, 4):
+        return ext
+    out = np.zeros((*ext.shape[:-2], 4, 4), dtype=ext.dtype)
+    out[..., :3, :4] = ext
+    out[..., 3, 3] = 1.0
+    return out
+
+
+if __name__ == "__main__":
+    # Exercise the fallback chain on CPU with injected OOMs.
+    # Usage: python -m depth_anything_3.utils.oom_recovery [num_views]
+    import sys
+
+    from depth_anything_3.api import DepthAnything3
+
+    num_views = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (280, 504, 3), dtype=np.uint8) for _ in range(num_views)]
+
+    model = DepthAnything3("da3-small")
+    memory = FallbackMemory()
+    runner = ResilientInference(
+        model,
+        min_view_chunk=4,
+        memory=memory,
+        oom_injector=FakeOOMInjector(("default", "head_chunk")),
+    )
+    pred = runner.inference(images, process_res=280)
+    print(f"succeeded with {runner.last_attempt.describe()}")
+    print(f"depth {pred.depth.shape}, extrinsics {pred.extrinsics.shape}")
+
+    # The next call of the same shape starts from the recorded strategy
+    runner.oom_injector.failures = 0
+    runner.inference(images, process_res=280)
+    print(
+        f"second call used {runner.last_attempt.describe()}, "
+        f"injected OOMs={runner.oom_injector.failures}"
+    )
@@ -98,19 +98,63 @@ def _apply_sim3_to_poses(poses, r, t, s):
     return out
 
 
+def _umeyama_sim3_batch(P_ref, P_est):
+    """
+    Umeyama Sim(3) fits of a batch of position sets, as ``PosePath3D.align`` with
+    ``correct_scale=True`` computes them one at a time.
+
+    Args:
+        P_ref: Reference positions (B, n, 3)
+        P_est: Estimated positions (B, n, 3)
+
+    Returns:
+        r (B, 3, 3), t (B, 3), s (B,) mapping est onto ref, and a (B,) mask of the
+        fits that are not degenerate (evo raises on those)
+    """
+    n = P_ref.shape[1]
+    mean_ref = P_ref.mean(axis=1)
+    mean_est = P_est.mean(axis=1)
+    d_ref = P_ref - mean_ref[:, None]
+    d_est = P_est - mean_est[:, None]
+    sigma_est = np.square(d_est).sum(axis=(1, 2)) / n
+    cov = np.einsum("bni,bnj->bij", d_ref, d_est) / n
+    u, d, vh = np.linalg.svd(cov)
+    valid = np.count_nonzero(d > np.finfo(d.dtype).eps, axis=1) >= 2
+    S = np.tile(np.eye(3), (len(cov), 1, 1))
+    S[np.linalg.det(u) * np.linalg.det(vh) < 0.0, 2, 2] = -1
+    r = u @ S @ vh
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.einsum("bi,bii->b", d, S) / sigma_est
+    t = mean_ref - s[:, None] * np.einsum("bij,bj->bi", r, mean_est)
+    return r, t, s, valid & np.isfinite(s)
+
+
 def _median_nn_thresh(pose_ref, pose_est_aligned):
+    from scipy.spatial import cKDTree
+
     P_ref = pose_ref[:, :3, 3]
     P_est = pose_est_aligned[:, :3, 3]
-    dists = []
-    for p in P_est:
-        dd = np.linalg.norm(P_ref - p[None, :], axis=1)
-        dists.append(dd.min())
-    return float(np.median(dists)) if dists else 0.0
+    if len(P_est) == 0:
+        return 0.0
+    dists, _ = cKDTree(P_ref).query(P_est)
+    return float(np.median(dists))
 
 
 def _ransac_align_sim3(
-    pose_ref, pose_est, sub_n=None, inlier_thresh=None, max_iters=10, random_state=None
+    pose_ref,
+    pose_est,
+    sub_n=None,
+    inlier_thresh=None,
+    max_iters=10,
+    random_state=None,
+    batch_elems=2**22,
 ):
+    """
+    RANSAC Sim(3) alignment on camera positions. Hypotheses are fitted and scored in
+    batches (about ``batch_elems`` hypothesis-pose pairs at a time); the samples are
+    drawn exactly as one-at-a-time RANSAC would, so a fixed ``random_state`` gives
+    the same result whatever the batch size.
+    """
     rng = np.random.default_rng(random_state)
     N = pose_ref.shape[0]
     idx_all = np.arange(N)
@@ -125,27 +169,30 @@ def _ransac_align_sim3(
         inlier_thresh = _median_nn_thresh(pose_ref, pose_est0)
 
     P_ref_all = pose_ref[:, :3, 3]
+    P_est_all = pose_est[:, :3, 3]
+    samples = np.stack([rng.choice(idx_all, size=sub_n, replace=False) for _ in range(max_iters)])
 
     best_model = (r0, t0, s0)
     best_inliers = None
     best_score = (-1, np.inf)  # (num_inliers, mean_err)
 
-    for _ in range(max_iters):
-        sample = rng.choice(idx_all, size=sub_n, replace=False)
-        try:
-            r, t, s, _ = _umeyama_sim3_from_paths(pose_ref[sample], pose_est[sample])
-        except Exception:
-            continue
-        pose_h = _apply_sim3_to_poses(pose_est, r, t, s)
-        P_h = pose_h[:, :3, 3]
-        errs = np.linalg.norm(P_h - P_ref_all, axis=1)  # Match by same index
+    batch_size = max(1, batch_elems // max(N, sub_n))
+    for start in range(0, max_iters, batch_size):
+        sample = samples[start : start + batch_size]
+        r, t, s, valid = _umeyama_sim3_batch(P_ref_all[sample], P_est_all[sample])
+        P_h = s[:, None, None] * np.einsum("bij,nj->bni", r, P_est_all) + t[:, None]
+        errs = np.linalg.norm(P_h - P_ref_all[None], axis=-1)  # Match by same index
         inliers = errs <= inlier_thresh
-        k = int(inliers.sum())
-        mean_err = float(errs[inliers].mean()) if k > 0 else np.inf
-        if (k > best_score[0]) or (k == best_score[0] and mean_err < best_score[1]):
-            best_score = (k, mean_err)
-            best_model = (r, t, s)
-            best_inliers = inliers
+        k = np.where(valid, inliers.sum(axis=1), -1)
+        with np.errstate(invalid="ignore"):
+            mean_err = np.where(k > 0, (errs * inliers).sum(axis=1) / np.maximum(k, 1), np.inf)
+        # First hypothesis with the most inliers, then the lowest mean error
+        b = np.flatnonzero(k == k.max())
+        b = b[np.argmin(mean_err[b])]
+        if (k[b] > best_score[0]) or (k[b] == best_score[0] and mean_err[b] < best_score[1]):
+            best_score = (int(k[b]), float(mean_err[b]))
+            best_model = (r[b], t[b], float(s[b]))
+            best_inliers = inliers[b]
 
     # Fit again with best inliers
     if best_inliers is not None and best_inliers.sum() >= 3:
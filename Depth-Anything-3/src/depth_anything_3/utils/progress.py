@@ -0,0 +1,189 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Progress reporting hook for ``DepthAnything3.inference``.
+
+A progress callback receives ``ProgressEvent`` objects carrying the current stage,
+the fine-grained progress inside the stage and the overall progress of the call:
+
+    def on_progress(event: ProgressEvent):
+        print(f"{event.stage}: {event.progress:.0%} {event.message}")
+
+    model.inference(images, progress_callback=on_progress)
+
+Stages are ``preprocess`` (per image), ``forward`` (per transformer block),
+``postprocess`` and ``export`` (per export format), followed by ``done`` at the
+end of each ``inference`` call.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import torch.nn as nn
+
+from depth_anything_3.utils.logger import logger
+
+# Share of the overall progress spent in each stage
+STAGE_RANGES: Dict[str, Tuple[float, float]] = {
+    "preprocess": (0.0, 0.15),
+    "forward": (0.15, 0.75),
+    "postprocess": (0.75, 0.8),
+    "export": (0.8, 1.0),
+    "done": (1.0, 1.0),
+}
+
+
+@dataclass
+class ProgressEvent:
+    """One progress update emitted by the inference pipeline."""
+
+    stage: str
+    stage_progress: float  # 0..1 within the stage
+    progress: float  # 0..1 over the whole inference call
+    message: str = ""
+    current: Optional[int] = None
+    total: Optional[int] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """
+    Maps stage-local progress to overall progress and forwards it to a callback.
+
+    Exceptions raised by the callback are logged and never interrupt inference.
+    ``sub_range`` lets a caller running several ``inference`` calls (e.g. view
+    chunks) map each call onto a slice of its own progress range.
+
+    Args:
+        callback: Callable receiving ``ProgressEvent`` objects, or None to disable reporting
+        start: Overall progress at the beginning of this reporter's range
+        end: Overall progress at the end of this reporter's range
+        min_interval_sec: Minimum time between two events of the same stage
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback],
+        start: float = 0.0,
+        end: float = 1.0,
+        min_interval_sec: float = 0.05,
+    ):
+        self.callback = callback
+        self.start = start
+        self.end = end
+        self.min_interval_sec = min_interval_sec
+        self._lock = threading.Lock()
+        self._last_emit: Dict[str, float] = {}
+
+    @classmethod
+    def wrap(cls, callback: ProgressCallback | ProgressReporter | None) -> ProgressReporter:
+        """Return ``callback`` itself if it is a reporter, otherwise a reporter around it."""
+        if isinstance(callback, ProgressReporter):
+            return callback
+        return cls(callback)
+
+    @property
+    def enabled(self) -> bool:
+        return self.callback is not None
+
+    def sub_range(self, start: float, end: float) -> ProgressReporter:
+        """Reporter covering ``[start, end]`` of this reporter's range."""
+        span = self.end - self.start
+        return ProgressReporter(
+            self.callback,
+            self.start + span * start,
+            self.start + span * end,
+            self.min_interval_sec,
+        )
+
+    def report(
+        self,
+        stage: str,
+        stage_progress: float,
+        message: str = "",
+        current: Optional[int] = None,
+        total: Optional[int] = None,
+    ) -> None:
+        if self.callback is None:
+            return
+
+        stage_progress = min(max(stage_progress, 0.0), 1.0)
+        now = time.time()
+        with self._lock:
+            # Throttle intermediate updates; stage boundaries are always emitted
+            last = self._last_emit.get(stage)
+            throttled = last is not None and now - last < self.min_interval_sec
+            if 0.0 < stage_progress < 1.0 and throttled:
+                return
+            self._last_emit[stage] = now
+
+        lo, hi = STAGE_RANGES.get(stage, (0.0, 1.0))
+        overall = self.start + (self.end - self.start) * (lo + (hi - lo) * stage_progress)
+        event = ProgressEvent(stage, stage_progress, overall, message, current, total, now)
+        try:
+            self.callback(event)
+        except Exception as e:
+            logger.warn(f"Progress callback failed: {e}")
+
+    def counter(self, stage: str, total: int, message: str = "") -> Callable[[], None]:
+        """Thread-safe step function reporting ``stage`` progress over ``total`` steps."""
+        done = [0]
+        lock = threading.Lock()
+
+        def step() -> None:
+            with lock:
+                done[0] += 1
+                current = done[0]
+            self.report(stage, current / max(total, 1), message, current, total)
+
+        return step
+
+    @contextmanager
+    def track_forward(self, model: nn.Module) -> Iterator[None]:
+        """
+        Report ``forward`` progress per transformer block of every backbone in ``model``.
+
+        Forward hooks are registered on the blocks for the duration of the context.
+        """
+        if self.callback is None:
+            yield
+            return
+
+        blocks = [
+            block
+            for module in model.modules()
+            if isinstance(getattr(module, "blocks", None), nn.ModuleList)
+            for block in module.blocks
+        ]
+        step = self.counter("forward", len(blocks), "Running transformer blocks")
+        handles = [block.register_forward_hook(lambda *_: step()) for block in blocks]
+        self.report("forward", 0.0, "Running model forward", 0, len(blocks))
+        try:
+            yield
+        finally:
+            for handle in handles:
+                handle.remove()
+        self.report("forward", 1.0, "Model forward done", len(blocks), len(blocks))
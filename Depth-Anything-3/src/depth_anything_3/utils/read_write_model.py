@@ -45,6 +45,12 @@ BaseImage = collections.namedtuple(
 Point3D = collections.namedtuple(
     "Point3D", ["id", "xyz", "rgb", "error", "image_ids", "point2D_idxs"]
 )
+# All points of a model as flat arrays; the tracks of all points are concatenated
+# in point order, point i owning track_lengths[i] consecutive entries
+Points3DArrays = collections.namedtuple(
+    "Points3DArrays",
+    ["ids", "xyz", "rgb", "error", "track_lengths", "image_ids", "point2D_idxs"],
+)
 
 
 class Image(BaseImage):
@@ -68,6 +74,23 @@ CAMERA_MODELS = {
 CAMERA_MODEL_IDS = {camera_model.model_id: camera_model for camera_model in CAMERA_MODELS}
 CAMERA_MODEL_NAMES = {camera_model.model_name: camera_model for camera_model in CAMERA_MODELS}
 
+# Fixed-size parts of the binary records (packed, little-endian)
+IMAGE_HEADER = struct.Struct("<idddddddi")
+POINT2D_DTYPE = np.dtype([("xy", "<f8", 2), ("point3D_id", "<i8")])
+POINT3D_DTYPE = np.dtype(
+    [
+        ("id", "<u8"),
+        ("xyz", "<f8", 3),
+        ("rgb", "u1", 3),
+        ("error", "<f8"),
+        ("track_length", "<u8"),
+    ]
+)
+TRACK_DTYPE = np.dtype([("image_id", "<i4"), ("point2D_idx", "<i4")])
+
+# Records gathered / scattered per step, bounding the size of the index arrays
+_RECORD_CHUNK = 1 << 16
+
 
 def read_next_bytes(fid, num_bytes, format_char_sequence, endian_character="<"):
     """Read and unpack the next bytes from a binary file.
@@ -97,6 +120,50 @@ def write_next_bytes(fid, data, format_char_sequence, endian_character="<"):
     fid.write(bytes)
 
 
+def _gather_records(data, offsets, dtype):
+    """Read records of ``dtype`` starting at byte ``offsets`` of the uint8 array ``data``."""
+    records = np.empty(len(offsets), dtype)
+    raw = records.view(np.uint8).reshape(len(offsets), dtype.itemsize)
+    cols = np.arange(dtype.itemsize)
+    for start in range(0, len(offsets), _RECORD_CHUNK):
+        chunk = offsets[start : start + _RECORD_CHUNK]
+        raw[start : start + len(chunk)] = data[chunk[:, None] + cols]
+    return records
+
+
+def _scatter_records(data, offsets, records):
+    """Write ``records`` at byte ``offsets`` of the uint8 array ``data``."""
+    raw = records.view(np.uint8).reshape(len(records), records.dtype.itemsize)
+    cols = np.arange(records.dtype.itemsize)
+    for start in range(0, len(offsets), _RECORD_CHUNK):
+        chunk = offsets[start : start + _RECORD_CHUNK]
+        data[chunk[:, None] + cols] = raw[start : start + len(chunk)]
+
+
+def _track_offsets(record_offsets, track_lengths, header_size):
+    """Byte offsets of all track elements, given the offsets of their records."""
+    track_lengths = track_lengths.astype(np.int64)
+    firsts = np.cumsum(track_lengths) - track_lengths
+    element = np.arange(int(track_lengths.sum()), dtype=np.int64)
+    return np.repeat(record_offsets + header_size, track_lengths) + TRACK_DTYPE.itemsize * (
+        element - np.repeat(firsts, track_lengths)
+    )
+
+
+def _read_c_string(fid):
+    """Read a NUL-terminated string, leaving ``fid`` right after the terminator."""
+    name = b""
+    while True:
+        chunk = fid.read(64)
+        end = chunk.find(b"\x00")
+        if end >= 0:
+            fid.seek(end + 1 - len(chunk), os.SEEK_CUR)
+            return (name + chunk[:end]).decode("utf-8")
+        if not chunk:
+            raise EOFError("Unterminated image name")
+        name += chunk
+
+
 def read_cameras_text(path):
     """
     see: src/colmap/scene/reconstruction.cc
@@ -191,16 +258,18 @@ def write_cameras_binary(cameras, path_to_model_file):
             model_id = CAMERA_MODEL_NAMES[cam.model].model_id
             camera_properties = [cam.id, model_id, cam.width, cam.height]
             write_next_bytes(fid, camera_properties, "iiQQ")
-            for p in cam.params:
-                write_next_bytes(fid, float(p), "d")
+            fid.write(np.asarray(cam.params, dtype="<f8").tobytes())
     return cameras
 
 
-def read_images_text(path):
+def read_images_text(path, read_points2D=True):
     """
     see: src/colmap/scene/reconstruction.cc
         void Reconstruction::ReadImagesText(const std::string& path)
         void Reconstruction::WriteImagesText(const std::string& path)
+
+    With ``read_points2D=False`` the observations are skipped and ``xys`` /
+    ``point3D_ids`` are None.
     """
     images = {}
     with open(path) as fid:
@@ -216,14 +285,16 @@ def read_images_text(path):
                 tvec = np.array(tuple(map(float, elems[5:8])))
                 camera_id = int(elems[8])
                 image_name = elems[9]
-                elems = fid.readline().split()
-                xys = np.column_stack(
-                    [
-                        tuple(map(float, elems[0::3])),
-                        tuple(map(float, elems[1::3])),
-                    ]
-                )
-                point3D_ids = np.array(tuple(map(int, elems[2::3])))
+                xys = point3D_ids = None
+                elems = fid.readline().split() if read_points2D else fid.readline()
+                if read_points2D:
+                    xys = np.column_stack(
+                        [
+                            tuple(map(float, elems[0::3])),
+                            tuple(map(float, elems[1::3])),
+                        ]
+                    )
+                    point3D_ids = np.array(tuple(map(int, elems[2::3])))
                 images[image_id] = Image(
                     id=image_id,
                     qvec=qvec,
@@ -236,42 +307,38 @@ def read_images_text(path):
     return images
 
 
-def read_images_binary(path_to_model_file):
+def read_images_binary(path_to_model_file, read_points2D=True):
     """
     see: src/colmap/scene/reconstruction.cc
         void Reconstruction::ReadImagesBinary(const std::string& path)
         void Reconstruction::WriteImagesBinary(const std::string& path)
+
+    With ``read_points2D=False`` the observations are seeked over instead of read
+    and ``xys`` / ``point3D_ids`` are None.
     """
     images = {}
     with open(path_to_model_file, "rb") as fid:
         num_reg_images = read_next_bytes(fid, 8, "Q")[0]
         for _ in range(num_reg_images):
-            binary_image_properties = read_next_bytes(
-                fid, num_bytes=64, format_char_sequence="idddddddi"
-            )
+            binary_image_properties = IMAGE_HEADER.unpack(fid.read(IMAGE_HEADER.size))
             image_id = binary_image_properties[0]
             qvec = np.array(binary_image_properties[1:5])
             tvec = np.array(binary_image_properties[5:8])
             camera_id = binary_image_properties[8]
-            binary_image_name = b""
-            current_char = read_next_bytes(fid, 1, "c")[0]
-            while current_char != b"\x00":  # look for the ASCII 0 entry
-                binary_image_name += current_char
-                current_char = read_next_bytes(fid, 1, "c")[0]
-            image_name = binary_image_name.decode("utf-8")
+            image_name = _read_c_string(fid)
             num_points2D = read_next_bytes(fid, num_bytes=8, format_char_sequence="Q")[0]
-            x_y_id_s = read_next_bytes(
-                fid,
-                num_bytes=24 * num_points2D,
-                format_char_sequence="ddq" * num_points2D,
-            )
-            xys = np.column_stack(
-                [
-                    tuple(map(float, x_y_id_s[0::3])),
-                    tuple(map(float, x_y_id_s[1::3])),
-                ]
-            )
-            point3D_ids = np.array(tuple(map(int, x_y_id_s[2::3])))
+            xys = point3D_ids = None
+            if not read_points2D:
+                fid.seek(POINT2D_DTYPE.itemsize * num_points2D, os.SEEK_CUR)
+            elif num_points2D == 0:
+                xys = np.empty((0, 2))
+                point3D_ids = np.array(())
+            else:
+                points2D = np.frombuffer(
+                    fid.read(POINT2D_DTYPE.itemsize * num_points2D), dtype=POINT2D_DTYPE
+                )
+                xys = points2D["xy"].astype(np.float64)
+                point3D_ids = points2D["point3D_id"].astype(np.int64)
             images[image_id] = Image(
                 id=image_id,
                 qvec=qvec,
@@ -331,16 +398,14 @@ def write_images_binary(images, path_to_model_file):
     with open(path_to_model_file, "wb") as fid:
         write_next_bytes(fid, len(images), "Q")
         for _, img in images.items():
-            write_next_bytes(fid, img.id, "i")
-            write_next_bytes(fid, img.qvec.tolist(), "dddd")
-            write_next_bytes(fid, img.tvec.tolist(), "ddd")
-            write_next_bytes(fid, img.camera_id, "i")
-            for char in img.name:
-                write_next_bytes(fid, char.encode("utf-8"), "c")
-            write_next_bytes(fid, b"\x00", "c")
+            header = [img.id, *img.qvec.tolist(), *img.tvec.tolist(), img.camera_id]
+            fid.write(IMAGE_HEADER.pack(*header))
+            fid.write(img.name.encode("utf-8") + b"\x00")
             write_next_bytes(fid, len(img.point3D_ids), "Q")
-            for xy, p3d_id in zip(img.xys, img.point3D_ids):
-                write_next_bytes(fid, [*xy, p3d_id], "ddq")
+            points2D = np.empty(len(img.point3D_ids), dtype=POINT2D_DTYPE)
+            points2D["xy"] = np.asarray(img.xys).reshape(-1, 2)
+            points2D["point3D_id"] = img.point3D_ids
+            fid.write(points2D.tobytes())
 
 
 def read_points3D_text(path):
@@ -375,39 +440,91 @@ def read_points3D_text(path):
     return points3D
 
 
+def read_points3D_arrays(path_to_model_file):
+    """
+    Read ``points3D.bin`` into flat arrays (see ``Points3DArrays``).
+
+    Only the record offsets are found in a Python loop; the records and tracks
+    are then decoded with a few vectorized gathers.
+    """
+    data = np.fromfile(path_to_model_file, dtype=np.uint8)
+    buffer = data.data
+    num_points = struct.unpack_from("<Q", buffer, 0)[0]
+
+    header_size = POINT3D_DTYPE.itemsize
+    track_length = struct.Struct("<Q").unpack_from
+    length_at = POINT3D_DTYPE.fields["track_length"][1]
+    offsets = [0] * num_points
+    pos = 8
+    for i in range(num_points):
+        offsets[i] = pos
+        pos += header_size + TRACK_DTYPE.itemsize * track_length(buffer, pos + length_at)[0]
+    offsets = np.array(offsets, dtype=np.int64)
+
+    records = _gather_records(data, offsets, POINT3D_DTYPE)
+    tracks = _gather_records(
+        data, _track_offsets(offsets, records["track_length"], header_size), TRACK_DTYPE
+    )
+    return Points3DArrays(
+        ids=records["id"].copy(),
+        xyz=records["xyz"].copy(),
+        rgb=records["rgb"].copy(),
+        error=records["error"].copy(),
+        track_lengths=records["track_length"].astype(np.int64),
+        image_ids=tracks["image_id"].copy(),
+        point2D_idxs=tracks["point2D_idx"].copy(),
+    )
+
+
+def write_points3D_arrays(points, path_to_model_file):
+    """Write ``Points3DArrays`` to ``points3D.bin`` with vectorized scatters."""
+    num_points = len(points.ids)
+    track_lengths = np.asarray(points.track_lengths, dtype=np.int64)
+    header_size = POINT3D_DTYPE.itemsize
+    sizes = header_size + TRACK_DTYPE.itemsize * track_lengths
+    offsets = 8 + np.cumsum(sizes) - sizes
+
+    records = np.empty(num_points, dtype=POINT3D_DTYPE)
+    records["id"] = points.ids
+    records["xyz"] = points.xyz
+    records["rgb"] = points.rgb
+    records["error"] = points.error
+    records["track_length"] = track_lengths
+    tracks = np.empty(int(track_lengths.sum()), dtype=TRACK_DTYPE)
+    tracks["image_id"] = points.image_ids
+    tracks["point2D_idx"] = points.point2D_idxs
+
+    data = np.empty(8 + int(sizes.sum()), dtype=np.uint8)
+    data[:8] = np.array([num_points], dtype="<u8").view(np.uint8)
+    _scatter_records(data, offsets, records)
+    _scatter_records(data, _track_offsets(offsets, track_lengths, header_size), tracks)
+    data.tofile(path_to_model_file)
+
+
 def read_points3D_binary(path_to_model_file):
     """
     see: src/colmap/scene/reconstruction.cc
         void Reconstruction::ReadPoints3DBinary(const std::string& path)
         void Reconstruction::WritePoints3DBinary(const std::string& path)
     """
+    points = read_points3D_arrays(path_to_model_file)
+    ends = np.cumsum(points.track_lengths).tolist()
+    starts = [0] + ends[:-1]
+    image_ids = points.image_ids.astype(np.int64)
+    point2D_idxs = points.point2D_idxs.astype(np.int64)
+    rgbs = points.rgb.astype(np.int64)
+
     points3D = {}
-    with open(path_to_model_file, "rb") as fid:
-        num_points = read_next_bytes(fid, 8, "Q")[0]
-        for _ in range(num_points):
-            binary_point_line_properties = read_next_bytes(
-                fid, num_bytes=43, format_char_sequence="QdddBBBd"
-            )
-            point3D_id = binary_point_line_properties[0]
-            xyz = np.array(binary_point_line_properties[1:4])
-            rgb = np.array(binary_point_line_properties[4:7])
-            error = np.array(binary_point_line_properties[7])
-            track_length = read_next_bytes(fid, num_bytes=8, format_char_sequence="Q")[0]
-            track_elems = read_next_bytes(
-                fid,
-                num_bytes=8 * track_length,
-                format_char_sequence="ii" * track_length,
-            )
-            image_ids = np.array(tuple(map(int, track_elems[0::2])))
-            point2D_idxs = np.array(tuple(map(int, track_elems[1::2])))
-            points3D[point3D_id] = Point3D(
-                id=point3D_id,
-                xyz=xyz,
-                rgb=rgb,
-                error=error,
-                image_ids=image_ids,
-                point2D_idxs=point2D_idxs,
-            )
+    rows = zip(points.ids.tolist(), points.error.tolist(), starts, ends)
+    for i, (point3D_id, error, start, end) in enumerate(rows):
+        points3D[point3D_id] = Point3D(
+            id=point3D_id,
+            xyz=points.xyz[i],
+            rgb=rgbs[i],
+            error=np.array(error),
+            image_ids=image_ids[start:end] if end > start else np.array(()),
+            point2D_idxs=point2D_idxs[start:end] if end > start else np.array(()),
+        )
     return points3D
 
 
@@ -446,17 +563,19 @@ def write_points3D_binary(points3D, path_to_model_file):
         void Reconstruction::ReadPoints3DBinary(const std::string& path)
         void Reconstruction::WritePoints3DBinary(const std::string& path)
     """
-    with open(path_to_model_file, "wb") as fid:
-        write_next_bytes(fid, len(points3D), "Q")
-        for _, pt in points3D.items():
-            write_next_bytes(fid, pt.id, "Q")
-            write_next_bytes(fid, pt.xyz.tolist(), "ddd")
-            write_next_bytes(fid, pt.rgb.tolist(), "BBB")
-            write_next_bytes(fid, pt.error, "d")
-            track_length = pt.image_ids.shape[0]
-            write_next_bytes(fid, track_length, "Q")
-            for image_id, point2D_id in zip(pt.image_ids, pt.point2D_idxs):
-                write_next_bytes(fid, [image_id, point2D_id], "ii")
+    pts = list(points3D.values())
+    track_lengths = np.array([len(pt.image_ids) for pt in pts], dtype=np.int64)
+    has_tracks = [pt for pt in pts if len(pt.image_ids)]
+    points = Points3DArrays(
+        ids=np.array([pt.id for pt in pts], dtype=np.uint64),
+        xyz=np.array([pt.xyz for pt in pts], dtype=np.float64).reshape(-1, 3),
+        rgb=np.array([pt.rgb for pt in pts], dtype=np.uint8).reshape(-1, 3),
+        error=np.array([pt.error for pt in pts], dtype=np.float64),
+        track_lengths=track_lengths,
+        image_ids=np.concatenate([pt.image_ids for pt in has_tracks] or [[]]),
+        point2D_idxs=np.concatenate([pt.point2D_idxs for pt in has_tracks] or [[]]),
+    )
+    write_points3D_arrays(points, path_to_model_file)
 
 
 def detect_model_format(path, ext):
@@ -471,7 +590,14 @@ def detect_model_format(path, ext):
     return False
 
 
-def read_model(path, ext=""):
+def read_model(path, ext="", poses_only=False):
+    """
+    Read a COLMAP model.
+
+    With ``poses_only=True`` the 3D points are not read (``points3D`` is empty)
+    and the 2D observations of the images are skipped (``xys`` / ``point3D_ids``
+    are None), which is all that is needed to get cameras and poses.
+    """
     # try to detect the extension automatically
     if ext == "":
         if detect_model_format(path, ".bin"):
@@ -482,14 +608,17 @@ def read_model(path, ext=""):
             print("Provide model format: '.bin' or '.txt'")
             return
 
+    points3D = {}
     if ext == ".txt":
         cameras = read_cameras_text(os.path.join(path, "cameras" + ext))
-        images = read_images_text(os.path.join(path, "images" + ext))
-        points3D = read_points3D_text(os.path.join(path, "points3D") + ext)
+        images = read_images_text(os.path.join(path, "images" + ext), not poses_only)
+        if not poses_only:
+            points3D = read_points3D_text(os.path.join(path, "points3D") + ext)
     else:
         cameras = read_cameras_binary(os.path.join(path, "cameras" + ext))
-        images = read_images_binary(os.path.join(path, "images" + ext))
-        points3D = read_points3D_binary(os.path.join(path, "points3D") + ext)
+        images = read_images_binary(os.path.join(path, "images" + ext), not poses_only)
+        if not poses_only:
+            points3D = read_points3D_binary(os.path.join(path, "points3D") + ext)
     return cameras, images, points3D
 
 
@@ -527,6 +656,19 @@ def qvec2rotmat(qvec):
     )
 
 
+def qvecs2rotmats(qvecs):
+    """Batched ``qvec2rotmat``: ``(N, 4)`` quaternions to ``(N, 3, 3)`` rotations."""
+    w, x, y, z = np.asarray(qvecs, dtype=np.float64).T
+    return np.stack(
+        [
+            np.stack([1 - 2 * y**2 - 2 * z**2, 2 * x * y - 2 * w * z, 2 * z * x + 2 * w * y], -1),
+            np.stack([2 * x * y + 2 * w * z, 1 - 2 * x**2 - 2 * z**2, 2 * y * z - 2 * w * x], -1),
+            np.stack([2 * z * x - 2 * w * y, 2 * y * z + 2 * w * x, 1 - 2 * x**2 - 2 * y**2], -1),
+        ],
+        -2,
+    )
+
+
 def rotmat2qvec(R):
     Rxx, Ryx, Rzx, Rxy, Ryy, Rzy, Rxz, Ryz, Rzz = R.flat
     K = (
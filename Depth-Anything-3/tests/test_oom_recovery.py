@@ -0,0 +1,251 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests of the OOM fallback ladder of ``ResilientInference`` with injected OOMs."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from depth_anything_3.specs import Prediction  # noqa: E402
+from depth_anything_3.utils.oom_recovery import (  # noqa: E402
+    FakeOOMInjector,
+    FallbackAttempt,
+    FallbackMemory,
+    ResilientInference,
+)
+
+DEFAULT_HEAD_CHUNK = 8
+H, W = 4, 6
+
+
+def _rot_z(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def _gt_extrinsics(num_views):
+    """World-to-camera poses of a camera moving along x while turning about z."""
+    ext = np.zeros((num_views, 3, 4))
+    for i in range(num_views):
+        R = _rot_z(0.05 * i)
+        center = np.array([0.3 * i, 0.1 * np.sin(i), 2.0])
+        ext[i, :, :3] = R
+        ext[i, :, 3] = -R @ center
+    return ext
+
+
+class FakeModel:
+    """
+    Stand-in for ``DepthAnything3`` that predicts the ground-truth trajectory of the
+    views it is given, in a chunk-specific Sim(3) frame, as independent chunks would.
+
+    Args:
+        num_views: Length of the full sequence
+        oom_above: Raise a CUDA OOM when called with more views than this
+    """
+
+    model_name = "fake"
+
+    def __init__(self, num_views, oom_above=None):
+        self.gt = _gt_extrinsics(num_views)
+        self.oom_above = oom_above
+        self.head_chunk_size = DEFAULT_HEAD_CHUNK
+        self.calls = []  # (view indices, head chunk size) per inference call
+
+    def set_head_chunk_size(self, chunk_size):
+        self.head_chunk_size = chunk_size
+
+    def inference(self, image, progress_callback=None, **kwargs):
+        ids = [int(im[0, 0, 0]) for im in image]
+        self.calls.append((ids, self.head_chunk_size))
+        if self.oom_above is not None and len(ids) > self.oom_above:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+
+        # Express the chunk in a frame rotated, shifted and scaled per first view (the
+        # first chunk, starting at view 0, is in the ground-truth frame)
+        scale = 1.0 + 0.1 * ids[0]
+        R0, t0 = _rot_z(0.2 * ids[0]), ids[0] * np.array([1.0, -1.0, 0.5])
+        ext = np.zeros((len(ids), 3, 4), dtype=np.float32)
+        for k, i in enumerate(ids):
+            R, t = self.gt[i, :, :3], self.gt[i, :, 3]
+            ext[k, :, :3] = R @ R0.T
+            ext[k, :, 3] = scale * t - R @ R0.T @ t0
+        depth = np.stack([np.full((H, W), scale * (1.0 + i), dtype=np.float32) for i in ids])
+        return Prediction(
+            depth=depth,
+            is_metric=0,
+            conf=np.ones_like(depth),
+            extrinsics=ext,
+            intrinsics=np.tile(np.eye(3, dtype=np.float32), (len(ids), 1, 1)),
+        )
+
+
+def _images(num_views):
+    # The view index is encoded in the first pixel so the fake model can recover it
+    return [np.full((H, W, 3), i, dtype=np.uint8) for i in range(num_views)]
+
+
+@pytest.fixture(autouse=True)
+def _default_head_chunk(monkeypatch):
+    monkeypatch.setattr(
+        ResilientInference, "_default_head_chunk_size", lambda self: DEFAULT_HEAD_CHUNK
+    )
+
+
+def _runner(model, strategies=(), memory=None, **kwargs):
+    return ResilientInference(
+        model,
+        min_view_chunk=4,
+        memory=memory if memory is not None else FallbackMemory(),
+        oom_injector=FakeOOMInjector(strategies),
+        **kwargs,
+    )
+
+
+def test_default_attempt_without_oom():
+    model = FakeModel(16)
+    runner = _runner(model)
+
+    pred = runner.inference(_images(16))
+
+    assert runner.last_attempt == FallbackAttempt()
+    assert model.calls == [(list(range(16)), DEFAULT_HEAD_CHUNK)]
+    assert pred.depth.shape == (16, H, W)
+
+
+def test_head_chunk_fallback():
+    model = FakeModel(16)
+    memory = FallbackMemory()
+    runner = _runner(model, strategies=("default",), memory=memory)
+
+    runner.inference(_images(16), process_res=504)
+
+    assert runner.last_attempt == FallbackAttempt("head_chunk", head_chunk_size=4)
+    # The injected OOM fires before the model is called; the head chunk size is restored
+    assert model.calls == [(list(range(16)), 4)]
+    assert model.head_chunk_size == DEFAULT_HEAD_CHUNK
+    assert memory.get(FallbackMemory.key("fake", 16, 504)) == runner.last_attempt
+
+
+def test_smaller_head_chunks_are_tried_in_order():
+    # Every head chunk size fails too, with an OOM raised by the model itself
+    model = FakeModel(16, oom_above=8)
+    runner = _runner(model, strategies=("default",), head_chunk_sizes=(4, 2, 1))
+
+    runner.inference(_images(16))
+
+    head_sizes = [size for ids, size in model.calls if len(ids) == 16]
+    assert head_sizes == [4, 2, 1]
+    assert runner.last_attempt.strategy == "view_chunks"
+
+
+def test_view_chunk_fallback_merges_aligned_chunks():
+    num_views = 16
+    model = FakeModel(num_views)
+    runner = _runner(model, strategies=("default", "head_chunk"))
+
+    pred = runner.inference(_images(num_views))
+
+    attempt = runner.last_attempt
+    assert attempt.strategy == "view_chunks"
+    assert attempt.head_chunk_size == 1
+    chunks = [ids for ids, _ in model.calls]
+    assert len(chunks) > 1
+    assert all(len(ids) <= attempt.view_chunk_size for ids in chunks)
+    assert chunks[0][0] == 0 and chunks[-1][-1] == num_views - 1
+    # The last chunk is shifted back to full size, so it may overlap more
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert prev[-1] - cur[0] + 1 >= attempt.overlap
+
+    # Later chunks are Sim(3)-aligned to the first one, which is in the ground-truth frame
+    assert pred.depth.shape == (num_views, H, W)
+    np.testing.assert_allclose(pred.extrinsics, model.gt, atol=1e-4)
+    expected_depth = np.arange(1, num_views + 1, dtype=np.float32)[:, None, None]
+    np.testing.assert_allclose(
+        pred.depth, np.broadcast_to(expected_depth, (num_views, H, W)), rtol=1e-4
+    )
+
+
+def test_recorded_strategy_is_reused():
+    memory = FallbackMemory()
+    first = _runner(FakeModel(16), strategies=("default", "head_chunk"), memory=memory)
+    first.inference(_images(16))
+    recorded = first.last_attempt
+
+    # Same bucket (9..16 views) and resolution: the default and head chunk rungs are skipped
+    model = FakeModel(16)
+    second = _runner(model, memory=memory)
+    second.inference(_images(16))
+
+    assert second.last_attempt == recorded
+    assert all(len(ids) <= recorded.view_chunk_size for ids, _ in model.calls)
+    assert second.oom_injector.failures == 0
+
+
+def test_recorded_view_chunks_are_rescaled_within_bucket():
+    memory = FallbackMemory()
+    _runner(FakeModel(16), strategies=("default", "head_chunk"), memory=memory).inference(
+        _images(16)
+    )
+
+    model = FakeModel(12)
+    runner = _runner(model, memory=memory)
+    pred = runner.inference(_images(12))
+
+    assert runner.last_attempt.strategy == "view_chunks"
+    assert pred.depth.shape[0] == 12
+
+
+def test_memory_is_persisted(tmp_path):
+    path = str(tmp_path / "fallbacks.json")
+    _runner(FakeModel(16), strategies=("default",), memory=FallbackMemory(path)).inference(
+        _images(16)
+    )
+
+    reloaded = FallbackMemory(path)
+    assert reloaded.get(FallbackMemory.key("fake", 16, 504)) == FallbackAttempt(
+        "head_chunk", head_chunk_size=4
+    )
+
+
+def test_final_oom_propagates():
+    model = FakeModel(16)
+    runner = _runner(model, strategies=("default", "head_chunk", "view_chunks"))
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        runner.inference(_images(16))
+    assert runner.oom_injector.failures == len(runner.plan(16))
+    assert model.calls == []
+
+
+def test_gaussians_never_use_view_chunks():
+    runner = _runner(FakeModel(16), strategies=("default", "head_chunk"))
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        runner.inference(_images(16), infer_gs=True)
+    assert all(a.strategy != "view_chunks" for a in runner.plan(16, infer_gs=True))
+
+
+def test_non_oom_error_is_not_retried():
+    class BrokenModel(FakeModel):
+        def inference(self, image, **kwargs):
+            self.calls.append(([], self.head_chunk_size))
+            raise ValueError("bad input")
+
+    model = BrokenModel(16)
+    with pytest.raises(ValueError, match="bad input"):
+        _runner(model).inference(_images(16))
+    assert len(model.calls) == 1
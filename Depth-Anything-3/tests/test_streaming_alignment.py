@@ -0,0 +1,73 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests of the robust Sim(3) fit aligning consecutive chunks in ``streaming``."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("trimesh")
+pytest.importorskip("imageio")
+
+from depth_anything_3 import streaming  # noqa: E402
+from depth_anything_3.streaming import StreamingConfig, _robust_sim3  # noqa: E402
+
+SCALE = 2.0
+
+
+def _matches(num_points=2000, outlier_ratio=0.15, seed=0):
+    """Point matches related by a known Sim(3), with a share of gross outliers."""
+    rng = np.random.default_rng(seed)
+    angle = 0.3
+    rot = np.array(
+        [[np.cos(angle), -np.sin(angle), 0.0], [np.sin(angle), np.cos(angle), 0.0], [0, 0, 1]]
+    )
+    trans = np.array([0.5, -1.0, 2.0])
+    src = rng.uniform(-1.0, 1.0, (num_points, 3))
+    tgt = SCALE * src @ rot.T + trans + rng.normal(0.0, 1e-3, (num_points, 3))
+    outliers = rng.random(num_points) < outlier_ratio
+    tgt[outliers] += rng.uniform(0.5, 2.0, (int(outliers.sum()), 3))
+    return src, tgt, rot, trans, outliers
+
+
+def test_irls_downweights_outliers(monkeypatch):
+    src, tgt, rot, trans, outliers = _matches()
+    weights = np.ones(len(src))
+
+    fits = []
+    weighted_sim3 = streaming._weighted_sim3
+
+    def recording_sim3(src, tgt, weights):
+        fits.append(weights.copy())
+        return weighted_sim3(src, tgt, weights)
+
+    monkeypatch.setattr(streaming, "_weighted_sim3", recording_sim3)
+    scale, est_rot, est_trans, stats = _robust_sim3(src, tgt, weights, StreamingConfig())
+
+    # The initial fit plus at least one reweighted one
+    assert len(fits) > 1
+    last = fits[-1]
+    assert last[outliers].mean() < 0.5 * last[~outliers].mean()
+
+    assert scale == pytest.approx(SCALE, abs=1e-3)
+    np.testing.assert_allclose(est_rot, rot, atol=1e-3)
+    np.testing.assert_allclose(est_trans, trans, atol=1e-2)
+    assert stats["inlier_ratio"] == pytest.approx(1.0 - outliers.mean(), abs=0.02)
+
+
+def test_plain_fit_is_biased_by_outliers():
+    src, tgt, _, _, _ = _matches()
+    scale, _, _ = streaming._weighted_sim3(src, tgt, np.ones(len(src)))
+    assert abs(scale - SCALE) > 1e-3
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from app.application.ports import InferenceCostModelPort
+
+
+class Da3CostModelAdapter(InferenceCostModelPort):
+    """DA3の較正済みメモリモデル（configs/memory_model.json）で推論コストを見積もるアダプターです。"""
+
+    def __init__(self, fallback_sec_per_frame: float = 1.0, memory_reserve_gb: float = 1.0) -> None:
+        # レイテンシ未較正のモデルで使う 504px 1枚あたりの推論秒数
+        self._fallback_sec_per_frame = fallback_sec_per_frame
+        # 断片化やエクスポート処理のために残しておくGPUメモリ
+        self._memory_reserve_gb = memory_reserve_gb
+
+    def available_memory_gb(self) -> Optional[float]:
+        """空きGPUメモリから予備分を引いた量を返します。"""
+
+        from depth_anything_3.utils.memory import get_gpu_memory_info
+
+        mem_info = get_gpu_memory_info()
+        if mem_info is None:
+            return None
+
+        return max(0.0, mem_info["free_gb"] - self._memory_reserve_gb)
+
+    def estimate_memory_gb(self, model_id: str, frame_count: int, process_res: int, aspect_ratio: float) -> float:
+        """ワーカーはジョブごとにモデルを読み込むため、重みの分も含めて見積もります。"""
+
+        from depth_anything_3.utils.memory_model import get_memory_model
+
+        return get_memory_model().estimate_gb(
+            self._model_name(model_id),
+            frame_count,
+            process_res,
+            aspect_ratio=aspect_ratio,
+            include_weights=True,
+        )
+
+    def estimate_latency_sec(self, model_id: str, frame_count: int, process_res: int, aspect_ratio: float) -> float:
+        """較正済みならフィットしたレイテンシを、未較正ならトークン数比例の概算を返します。"""
+
+        from depth_anything_3.utils.memory_model import get_memory_model, tokens_per_view
+
+        latency = get_memory_model().estimate_latency_sec(
+            self._model_name(model_id),
+            frame_count,
+            process_res,
+            aspect_ratio=aspect_ratio,
+        )
+        if latency is not None:
+            return latency
+
+        token_ratio = tokens_per_view(process_res, aspect_ratio) / tokens_per_view(504)
+        return self._fallback_sec_per_frame * frame_count * token_ratio
+
+    def _model_name(self, model_id: str) -> str:
+        """HFのモデルID（depth-anything/DA3NESTED-GIANT-LARGE 等）をプリセット名へ変換します。"""
+
+        return model_id.rstrip("/").split("/")[-1].lower()
@@ -8,12 +8,27 @@ from app.domain.models import GlbExportResult
 class Da3PyTorchInferenceAdapter(Da3InferencePort):
     """Depth Anything 3 (PyTorch) を用いて画像列からGLBを出力するアダプターです。"""
 
+    def __init__(
+        self,
+        fallback_memory_path: Optional[str] = None,
+        streaming_min_frames: int = 256,
+        streaming_chunk_size: int = 64,
+        streaming_overlap: int = 16,
+    ) -> None:
+        # OOM時に成功したフォールバック戦略の記録先（Noneならジョブ内のみ保持）
+        self._fallback_memory_path = fallback_memory_path
+        # この枚数以上はチャンク単位のストリーミング再構成にする（GPU/ホストメモリが1チャンク分で済む）
+        self._streaming_min_frames = streaming_min_frames
+        self._streaming_chunk_size = streaming_chunk_size
+        self._streaming_overlap = streaming_overlap
+
     def export_glb_from_images(
         self,
         image_paths: Sequence[Path],
         output_dir: Path,
         model_id: str,
         progress_reporter: ProgressReporterPort,
+        process_res: int = 504,
     ) -> GlbExportResult:
         """DA3のPyTorch APIを使ってGLBを書き出します。"""
 
@@ -21,27 +36,86 @@ class Da3PyTorchInferenceAdapter(Da3InferencePort):
 
         import torch
         from depth_anything_3.api import DepthAnything3
+        from depth_anything_3.streaming import GlbSink, StreamingConfig, reconstruct
+        from depth_anything_3.utils.memory import get_gpu_memory_info
+        from depth_anything_3.utils.memory_model import get_memory_model
+        from depth_anything_3.utils.oom_recovery import FallbackMemory, ResilientInference
 
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
         model = DepthAnything3.from_pretrained(model_id)
         model = model.to(device=device)
+        runner = ResilientInference(model, memory=FallbackMemory(self._fallback_memory_path))
 
-        progress_reporter.report_phase(
-            "infer",
-            f"推論実行中（画像列をまとめて処理）: {len(image_paths)} 枚",
-        )
+        # 長い画像列はチャンクに分けて推論し、重なりフレームでSim(3)位置合わせしながらGLBに集約する
+        # チャンク間の位置合わせに推定姿勢を使うため、姿勢を出さないモデル（mono/metric）は対象外
+        if len(image_paths) >= self._streaming_min_frames and model.predicts_pose:
+            progress_reporter.report_phase(
+                "infer",
+                f"推論実行中（{self._streaming_chunk_size} 枚ずつのチャンクで逐次処理）: "
+                f"{len(image_paths)} 枚 process_res={process_res}",
+            )
+            progress_reporter.report_progress(0, len(image_paths), "DA3推論開始")
+            result = reconstruct(
+                [str(p) for p in image_paths],
+                runner,
+                StreamingConfig(
+                    chunk_size=self._streaming_chunk_size,
+                    overlap=self._streaming_overlap,
+                    process_res=process_res,
+                ),
+                sinks=[GlbSink(str(output_dir), show_cameras=False)],
+                num_frames=len(image_paths),
+            )
+            progress_reporter.report_progress(
+                len(image_paths),
+                len(image_paths),
+                f"DA3推論完了・GLB出力完了（{result.num_chunks} チャンク）",
+            )
+            return GlbExportResult(
+                output_dir=output_dir,
+                glb_path=self._find_exported_glb(output_dir),
+                frame_count=len(image_paths),
+            )
+
+        # 較正済みメモリモデルで、1回の推論に載る枚数を事前に決める
+        max_views_per_pass = None
+        mem_info = get_gpu_memory_info()
+        if mem_info is not None:
+            plan = get_memory_model().plan(model.model_name, len(image_paths), process_res, mem_info["free_gb"])
+            if plan.fits and plan.process_res == process_res and plan.chunked:
+                max_views_per_pass = plan.max_views
+
+        if max_views_per_pass is None:
+            progress_reporter.report_phase(
+                "infer",
+                f"推論実行中（画像列をまとめて処理）: {len(image_paths)} 枚 process_res={process_res}",
+            )
+        else:
+            progress_reporter.report_phase(
+                "infer",
+                f"推論実行中（{max_views_per_pass} 枚ずつ分割して処理）: {len(image_paths)} 枚",
+            )
         progress_reporter.report_progress(0, len(image_paths), "DA3推論開始")
 
         # DA3のREADME例に合わせて画像パス配列をそのまま渡す
         # export_format="glb" を指定すると output_dir にGLBが出力される
-        prediction = model.inference(
+        # OOM時はヘッドのchunk縮小 → 視点チャンク分割の順で自動リトライする
+        prediction = runner.inference(
             [str(p) for p in image_paths],
+            max_views_per_pass=max_views_per_pass,
+            process_res=process_res,
             export_dir=str(output_dir),
             export_format="glb",
             show_cameras=False,
         )
 
+        if runner.last_attempt is not None and runner.last_attempt.strategy != "default":
+            progress_reporter.report_phase(
+                "infer",
+                f"OOMフォールバックで推論しました: {runner.last_attempt.describe()}",
+            )
+
         progress_reporter.report_progress(len(image_paths), len(image_paths), "DA3推論完了・GLB出力完了")
 
         glb_path = self._find_exported_glb(output_dir)
@@ -0,0 +1,95 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+from app.application.ports import VideoProbePort
+from app.domain.models import VideoProbeResult
+
+
+class FfprobeVideoProbe(VideoProbePort):
+    """ffprobeで動画の長さ・解像度・fpsを取得するアダプターです。"""
+
+    def probe(self, input_video_path: Path) -> VideoProbeResult:
+        """ffprobeのJSON出力から先頭の映像ストリーム情報を読み取ります。"""
+
+        ffprobe_path = shutil.which("ffprobe")
+        if ffprobe_path is None:
+            raise RuntimeError(
+                "ffprobe コマンドが見つかりません。ffmpeg 一式をインストールして PATH を通してください。"
+            )
+
+        command = [
+            ffprobe_path,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames,duration:format=duration",
+            "-of",
+            "json",
+            str(input_video_path),
+        ]
+
+        completed = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+        )
+
+        if completed.returncode != 0:
+            raise RuntimeError(
+                "ffprobe による動画解析に失敗しました。\n"
+                f"stdout:\n{completed.stdout}\n\nstderr:\n{completed.stderr}"
+            )
+
+        data = json.loads(completed.stdout or "{}")
+        streams = data.get("streams", [])
+        if len(streams) == 0:
+            raise RuntimeError(f"映像ストリームが見つかりません: {input_video_path}")
+
+        stream = streams[0]
+        fps = self._parse_rate(stream.get("avg_frame_rate"))
+        if fps <= 0:
+            fps = self._parse_rate(stream.get("r_frame_rate"))
+
+        duration = self._parse_float(stream.get("duration"))
+        if duration <= 0:
+            duration = self._parse_float(data.get("format", {}).get("duration"))
+
+        frame_count = int(self._parse_float(stream.get("nb_frames")))
+        if frame_count <= 0 and duration > 0 and fps > 0:
+            frame_count = int(round(duration * fps))
+
+        return VideoProbeResult(
+            duration_sec=duration,
+            width=int(stream.get("width") or 0),
+            height=int(stream.get("height") or 0),
+            fps=fps,
+            frame_count=frame_count,
+        )
+
+    def _parse_rate(self, value) -> float:
+        """"30000/1001" 形式のフレームレートを数値へ変換します。"""
+
+        if value is None or value == "":
+            return 0.0
+
+        text = str(value)
+        if "/" in text:
+            num, den = text.split("/", 1)
+            den_value = self._parse_float(den)
+            if den_value == 0:
+                return 0.0
+            return self._parse_float(num) / den_value
+
+        return self._parse_float(text)
+
+    def _parse_float(self, value) -> float:
+        """数値文字列を変換します（"N/A" などは 0 とみなします）。"""
+
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
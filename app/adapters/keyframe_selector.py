@@ -0,0 +1,290 @@
+import math
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.application.ports import KeyframeSelectorPort, ProgressReporterPort
+from app.domain.models import KeyframeSelection
+
+
+class ContentAwareKeyframeSelector(KeyframeSelectorPort):
+    """縮小画像の安価な指標から、冗長・ブレたフレームを除いてキーフレームを選ぶアダプターです。
+
+    指標はすべてフレームを積み重ねた配列に対してベクトル化して計算します。
+
+    - 知覚ハッシュ（dHash 8x8）: 隣接フレーム間のハミング距離で見た目の変化量
+    - シャープネス: ラプラシアンの分散（ブレ検出）
+    - 重なり推定: 位相相関で求めた平行移動量から、隣接フレームの視野の重なり率
+
+    隣接フレーム間の「新規性」（見た目の変化と視野の非重複の大きい方）を累積し、
+    その累積曲線を予算枚数の区間へ等分します。各区間から最もシャープな1枚を選ぶため、
+    静止区間は1枚に縮退し、速い動きの区間には多くのキーフレームが割り当てられます。
+    静止に近い動画で min_frames 枚に満たない場合は、均等間隔の選択に切り替えます。
+    """
+
+    def __init__(
+        self,
+        thumbnail_width: int = 128,
+        min_novelty: float = 0.05,
+        batch_size: int = 256,
+    ) -> None:
+        # 指標計算に使う縮小画像の幅
+        self._thumbnail_width = thumbnail_width
+        # キーフレーム1枚あたりに必要な最小の新規性（静止シーンでの間引き量を決める）
+        self._min_novelty = min_novelty
+        self._batch_size = batch_size
+
+    def select_keyframes(
+        self,
+        image_paths: Sequence[Path],
+        max_frames: int,
+        progress_reporter: ProgressReporterPort,
+        min_frames: int = 1,
+    ) -> KeyframeSelection:
+        """予算 max_frames 枚以内で、少なくとも min_frames 枚のキーフレームを選びます。"""
+
+        total = len(image_paths)
+        if total == 0:
+            return KeyframeSelection(selected_indices=(), total_frames=0, max_frames=max_frames)
+
+        progress_reporter.report_phase("keyframes", f"キーフレーム選択用の指標を計算します: {total} 枚")
+        gray = self._load_thumbnails(image_paths, progress_reporter)
+
+        sharpness = laplacian_variance(gray)
+        novelty = frame_novelty(gray)
+        indices = select_by_coverage(
+            novelty, sharpness, max_frames, self._min_novelty, min_frames=min_frames
+        )
+
+        return KeyframeSelection(
+            selected_indices=tuple(int(i) for i in indices),
+            total_frames=total,
+            max_frames=max_frames,
+        )
+
+    def _load_thumbnails(self, image_paths: Sequence[Path], progress_reporter: ProgressReporterPort) -> np.ndarray:
+        """全フレームを同じサイズのグレースケール縮小画像 (N, h, w) として読み込みます。"""
+
+        with Image.open(image_paths[0]) as first:
+            width, height = first.size
+        thumb_w = min(self._thumbnail_width, width)
+        thumb_h = max(8, int(round(height * thumb_w / width)))
+
+        gray = np.empty((len(image_paths), thumb_h, thumb_w), dtype=np.float32)
+        for i, path in enumerate(image_paths):
+            with Image.open(path) as image:
+                # draft() でJPEGはデコード時に縮小される
+                image.draft("L", (thumb_w, thumb_h))
+                gray[i] = np.asarray(image.convert("L").resize((thumb_w, thumb_h), Image.BILINEAR), dtype=np.float32)
+
+            if (i + 1) % self._batch_size == 0:
+                progress_reporter.report_progress(i + 1, len(image_paths), "キーフレーム指標の計算中")
+
+        return gray / 255.0
+
+
+def perceptual_hash(gray: np.ndarray) -> np.ndarray:
+    """dHash（8x8 の横方向勾配の符号）を (N, 64) の bool 配列で返します。"""
+
+    n, h, w = gray.shape
+    # 9x8 へのブロック平均（面積平均）で縮小
+    ys = np.linspace(0, h, 9).astype(int)
+    xs = np.linspace(0, w, 10).astype(int)
+    cum = np.pad(gray.cumsum(axis=1).cumsum(axis=2), ((0, 0), (1, 0), (1, 0)))
+    y0, y1 = ys[:-1], ys[1:]
+    x0, x1 = xs[:-1], xs[1:]
+    area = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+    block_sum = (
+        cum[:, y1][:, :, x1]
+        - cum[:, y0][:, :, x1]
+        - cum[:, y1][:, :, x0]
+        + cum[:, y0][:, :, x0]
+    )
+    small = block_sum / np.maximum(area, 1)
+    return (small[:, :, 1:] > small[:, :, :-1]).reshape(n, 64)
+
+
+def laplacian_variance(gray: np.ndarray) -> np.ndarray:
+    """4近傍ラプラシアンの分散 (N,) を返します。値が小さいほどブレています。"""
+
+    lap = (
+        gray[:, 1:-1, :-2]
+        + gray[:, 1:-1, 2:]
+        + gray[:, :-2, 1:-1]
+        + gray[:, 2:, 1:-1]
+        - 4.0 * gray[:, 1:-1, 1:-1]
+    )
+    return lap.reshape(len(gray), -1).var(axis=1)
+
+
+def view_overlap(gray: np.ndarray) -> np.ndarray:
+    """位相相関で隣接フレーム間の平行移動を推定し、視野の重なり率 (N-1,) を返します。"""
+
+    n, h, w = gray.shape
+    if n < 2:
+        return np.ones(0, dtype=np.float32)
+
+    window = np.outer(np.hanning(h), np.hanning(w)).astype(np.float32)
+    spectra = np.fft.rfft2((gray - gray.mean(axis=(1, 2), keepdims=True)) * window)
+    cross = spectra[1:] * np.conj(spectra[:-1])
+    cross /= np.maximum(np.abs(cross), 1e-8)
+    corr = np.fft.irfft2(cross, s=(h, w))
+
+    peak = corr.reshape(n - 1, -1).argmax(axis=1)
+    dy, dx = np.unravel_index(peak, (h, w))
+    dy = np.where(dy > h // 2, dy - h, dy)
+    dx = np.where(dx > w // 2, dx - w, dx)
+
+    # 平行移動で説明できない変化（回転・前進など）はハッシュ距離の側で拾う
+    overlap = (1.0 - np.abs(dx) / w) * (1.0 - np.abs(dy) / h)
+    return np.clip(overlap, 0.0, 1.0)
+
+
+def frame_novelty(gray: np.ndarray) -> np.ndarray:
+    """各フレームが直前フレームに対して持つ新規性 (N,) を 0..1 で返します（先頭は 1）。"""
+
+    n = len(gray)
+    novelty = np.ones(n, dtype=np.float32)
+    if n < 2:
+        return novelty
+
+    hashes = perceptual_hash(gray)
+    hamming = (hashes[1:] != hashes[:-1]).mean(axis=1)
+    novelty[1:] = np.maximum(hamming, 1.0 - view_overlap(gray))
+    return novelty
+
+
+def select_by_coverage(
+    novelty: np.ndarray,
+    sharpness: np.ndarray,
+    max_frames: int,
+    min_novelty: float = 0.05,
+    min_frames: int = 1,
+) -> np.ndarray:
+    """累積新規性を等分した各区間から、最もシャープなフレームを1枚ずつ選びます。
+
+    静止・静止に近い動画では累積新規性がほぼ0になり1枚に縮退するため、
+    選択が min_frames 枚に満たない場合は均等間隔で min_frames 枚を選びます。
+
+    Args:
+        novelty: 直前フレームに対する新規性 (N,)
+        sharpness: シャープネス (N,)
+        max_frames: 選ぶ枚数の上限
+        min_novelty: キーフレーム1枚あたりに必要な最小の新規性
+        min_frames: 選ぶ枚数の下限（max_frames とフレーム数が優先）
+
+    Returns:
+        昇順に並んだ選択フレームのインデックス
+    """
+
+    n = len(novelty)
+    if n == 0 or max_frames <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # 先頭フレームの新規性は区間分割に含めない
+    steps = novelty.astype(np.float64).copy()
+    steps[0] = 0.0
+    cumulative = np.cumsum(steps)
+    total_novelty = float(cumulative[-1])
+
+    floor_count = min(min_frames, max_frames, n)
+    count = int(math.ceil(total_novelty / max(min_novelty, 1e-6))) + 1
+    count = min(max_frames, n, max(floor_count, 1, count))
+    if count >= n:
+        return np.arange(n)
+
+    # 累積新規性の等分点で区間を切る（静止区間は1区間へ縮退する）
+    edges = np.linspace(0.0, total_novelty, count + 1)
+    window_ids = np.clip(np.searchsorted(edges, cumulative, side="right") - 1, 0, count - 1)
+
+    # 区間ごとに最もシャープなフレームを選ぶ（区間ID昇順・シャープネス降順で並べ替え）
+    order = np.lexsort((-sharpness, window_ids))
+    first_in_window = np.ones(n, dtype=bool)
+    first_in_window[1:] = window_ids[order][1:] != window_ids[order][:-1]
+    selected = np.sort(order[first_in_window])
+
+    # 新規性がほぼ0だと区間が空になり、予算の最小枚数を下回る
+    if len(selected) < floor_count:
+        return np.array(select_evenly(n, floor_count), dtype=np.int64)
+    return selected
+
+
+def select_evenly(total: int, count: int) -> Tuple[int, ...]:
+    """比較用: 均等間隔で count 枚を選びます。"""
+
+    if count >= total:
+        return tuple(range(total))
+    if count <= 1:
+        return (0,)
+
+    step = (total - 1) / (count - 1)
+    return tuple(int(round(i * step)) for i in range(count))
+
+
+if __name__ == "__main__":
+    # 同梱サンプル動画で、キーフレーム選択と均等間引きの枚数・再構成品質を比較します。
+    # 使い方: python -m app.adapters.keyframe_selector [video] [fps] [max_frames]
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    from app.adapters.console_progress_reporter import ConsoleProgressReporter
+
+    repo_root = Path(__file__).resolve().parents[2]
+    video = Path(sys.argv[1]) if len(sys.argv) > 1 else repo_root / "Depth-Anything-3/assets/examples/robot_unitree.mp4"
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 6.0
+    max_frames = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    work_dir = Path(tempfile.mkdtemp(prefix="keyframes_"))
+    try:
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-i", str(video), "-vf", f"fps={fps}", str(work_dir / "frame_%06d.png")],
+            check=True,
+        )
+        frames = sorted(work_dir.glob("*.png"))
+
+        start = time.time()
+        selection = ContentAwareKeyframeSelector().select_keyframes(frames, max_frames, ConsoleProgressReporter())
+        elapsed = time.time() - start
+        keyframes = list(selection.selected_indices)
+        uniform = list(select_evenly(len(frames), len(keyframes)))
+
+        print(f"video={video.name} extracted={len(frames)} selected={len(keyframes)} "
+              f"saved={len(frames) - len(keyframes)} ({1 - len(keyframes) / len(frames):.0%}) "
+              f"selection_time={elapsed:.2f}s")
+        print(f"keyframes={keyframes}")
+
+        gray = ContentAwareKeyframeSelector()._load_thumbnails(frames, ConsoleProgressReporter())
+        sharp = laplacian_variance(gray)
+        print(f"mean sharpness: keyframes={sharp[keyframes].mean():.5f} uniform={sharp[uniform].mean():.5f}")
+
+        try:
+            import torch
+
+            from depth_anything_3.api import DepthAnything3
+            from depth_anything_3.utils.pose_align import align_poses_umeyama
+        except ImportError:
+            print("depth_anything_3 / torch not available: skipping reconstruction quality")
+            raise SystemExit(0)
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = DepthAnything3.from_pretrained("depth-anything/DA3-SMALL").to(device)
+        paths = [str(p) for p in frames]
+        full = model.inference(paths)
+
+        def _pose_error(indices):
+            pred = model.inference([paths[i] for i in indices])
+            _, _, _, aligned = align_poses_umeyama(full.extrinsics[indices], pred.extrinsics, return_aligned=True)
+            ref_centers = -np.einsum("nji,nj->ni", full.extrinsics[indices][:, :3, :3], full.extrinsics[indices][:, :3, 3])
+            est_centers = -np.einsum("nji,nj->ni", aligned[:, :3, :3], aligned[:, :3, 3])
+            extent = np.linalg.norm(ref_centers.max(0) - ref_centers.min(0)) + 1e-8
+            return float(np.linalg.norm(ref_centers - est_centers, axis=1).mean() / extent)
+
+        print(f"camera center error vs. all frames (relative to trajectory extent): "
+              f"keyframes={_pose_error(keyframes):.4f} uniform={_pose_error(uniform):.4f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
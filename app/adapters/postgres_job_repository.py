@@ -82,7 +82,7 @@ class PostgresJobRepositoryAdapter(JobRepositoryPort):
                         j.id::text,
                         j.input_object_key,
                         j.output_prefix,
-                        COALESCE((j.params_json->>'fps')::double precision, 2.0) AS fps,
+                        (j.params_json->>'fps')::double precision AS fps,
                         COALESCE(j.params_json->>'modelId', 'depth-anything/da3nested-giant-large') AS model_id
                     FROM jobs j
                     WHERE j.status = 'queued'
@@ -101,7 +101,7 @@ class PostgresJobRepositoryAdapter(JobRepositoryPort):
             job_id=str(row[0]),
             input_object_key=str(row[1]),
             output_prefix=str(row[2]),
-            fps=float(row[3]),
+            fps=float(row[3]) if row[3] is not None else None,
             model_id=str(row[4]),
         )
 
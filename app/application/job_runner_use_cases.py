@@ -1,3 +1,5 @@
+import json
+from dataclasses import asdict
 from pathlib import Path
 
 from app.application.ports import (
@@ -63,6 +65,25 @@ class RunSingleJobUseCase:
 
             convert_result = self._convert_video_to_glb_use_case.execute(convert_request)
 
+            if convert_result.sampling_plan is not None:
+                # プランナーの決定をテレメトリとして job_logs に残す
+                self._job_repository.add_job_log(
+                    job_id=job.job_id,
+                    attempt_id=attempt_info.attempt_id,
+                    level="info",
+                    message="sampling_plan " + json.dumps(asdict(convert_result.sampling_plan)),
+                    object_key=None,
+                )
+
+            if convert_result.keyframe_selection is not None:
+                self._job_repository.add_job_log(
+                    job_id=job.job_id,
+                    attempt_id=attempt_info.attempt_id,
+                    level="info",
+                    message="keyframe_selection " + json.dumps(asdict(convert_result.keyframe_selection)),
+                    object_key=None,
+                )
+
             if convert_result.glb_path is None:
                 raise RuntimeError("GLB出力に失敗しました。出力ファイルが見つかりません。")
 
@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import Optional, Protocol, Sequence
 
 from app.domain.job_models import JobAttemptInfo, VideoJob, WorkerInfo
-from app.domain.models import FrameExtractionResult, GlbExportResult
+from app.domain.models import FrameExtractionResult, GlbExportResult, KeyframeSelection, VideoProbeResult
 
 
 class ProgressReporterPort(Protocol):
@@ -28,6 +28,39 @@ class FrameExtractorPort(Protocol):
         """動画からフレームを抽出します。"""
 
 
+class VideoProbePort(Protocol):
+    """動画のメタデータを取得するポートです。"""
+
+    def probe(self, input_video_path: Path) -> VideoProbeResult:
+        """動画の長さ・解像度・fpsを取得します。"""
+
+
+class InferenceCostModelPort(Protocol):
+    """推論のメモリ・処理時間を見積もるポートです。"""
+
+    def available_memory_gb(self) -> Optional[float]:
+        """推論に使えるGPUメモリ量(GB)を返します。GPUが無ければNoneです。"""
+
+    def estimate_memory_gb(self, model_id: str, frame_count: int, process_res: int, aspect_ratio: float) -> float:
+        """モデル読み込みを含むピークメモリ量(GB)を見積もります。"""
+
+    def estimate_latency_sec(self, model_id: str, frame_count: int, process_res: int, aspect_ratio: float) -> float:
+        """推論時間(秒)を見積もります。"""
+
+
+class KeyframeSelectorPort(Protocol):
+    """抽出済みフレームからキーフレームを選ぶポートです。"""
+
+    def select_keyframes(
+        self,
+        image_paths: Sequence[Path],
+        max_frames: int,
+        progress_reporter: ProgressReporterPort,
+        min_frames: int = 1,
+    ) -> KeyframeSelection:
+        """冗長・ブレたフレームを除き、min_frames 枚以上 max_frames 枚以内のキーフレームを選びます。"""
+
+
 class FileGatewayPort(Protocol):
     """ローカルファイル操作のポートです。"""
 
@@ -53,6 +86,7 @@ class Da3InferencePort(Protocol):
         output_dir: Path,
         model_id: str,
         progress_reporter: ProgressReporterPort,
+        process_res: int = 504,
     ) -> GlbExportResult:
         """画像列からGLBを出力します。"""
 
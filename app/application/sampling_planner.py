@@ -0,0 +1,188 @@
+import math
+from typing import Optional, Tuple
+
+from app.application.ports import InferenceCostModelPort
+from app.domain.models import PlanningBudget, SamplingPlan, VideoProbeResult
+
+
+class SamplingPlanner:
+    """動画のメタデータと推論予算から、サンプリングfpsと推論解像度を決めます。"""
+
+    def __init__(self, cost_model: InferenceCostModelPort, budget: PlanningBudget) -> None:
+        self._cost_model = cost_model
+        self._budget = budget
+
+    @property
+    def budget(self) -> PlanningBudget:
+        """計画に使う推論予算です。"""
+
+        return self._budget
+
+    def plan(
+        self, probe: VideoProbeResult, requested_fps: Optional[float], model_id: str
+    ) -> SamplingPlan:
+        """予算内で最も解像度が高く、必要なフレーム数を満たす組み合わせを選びます。
+
+        クライアント指定のfpsは上限として扱い、それ以上には上げません。
+        解像度は高い順に試し、目標フレーム数（min_fps と min_frames から決まる）を
+        満たせる最初の解像度を採用します。どれも満たせない場合は、最も多くの
+        フレームを確保できる解像度を採用します。
+        """
+
+        budget = self._budget
+        duration = probe.duration_sec
+        if duration <= 0 and probe.frame_count > 0 and probe.fps > 0:
+            # ffprobe が長さを返さないコンテナでは、フレーム数とfpsから求める
+            duration = probe.frame_count / probe.fps
+
+        fps_cap = budget.max_fps
+        if requested_fps is not None:
+            fps_cap = min(fps_cap, requested_fps)
+        if probe.fps > 0:
+            fps_cap = min(fps_cap, probe.fps)
+
+        if duration > 0:
+            frames_cap = max(1, min(budget.max_frames, int(math.floor(duration * fps_cap))))
+        else:
+            # 長さが不明: 上限枚数まで計画し、抽出後に均等に間引く
+            frames_cap = budget.max_frames
+        if probe.frame_count > 0:
+            frames_cap = min(frames_cap, probe.frame_count)
+
+        target_frames = min(
+            frames_cap, max(budget.min_frames, int(math.ceil(duration * budget.min_fps)))
+        )
+        aspect_ratio = probe.width / probe.height if probe.width > 0 and probe.height > 0 else 1.0
+        memory_budget = budget.max_memory_gb
+        if memory_budget is None:
+            memory_budget = self._cost_model.available_memory_gb()
+
+        best: Optional[Tuple[int, int]] = None
+        chosen: Optional[Tuple[int, int]] = None
+        for process_res in self._resolution_candidates(probe):
+            frames = self._max_frames(
+                model_id, process_res, aspect_ratio, frames_cap, memory_budget
+            )
+            if frames == 0:
+                continue
+            if best is None or frames > best[1]:
+                best = (process_res, frames)
+            if frames >= target_frames:
+                chosen = (process_res, frames)
+                break
+
+        if chosen is None and best is not None:
+            chosen = best
+
+        if chosen is None:
+            # 予算内に収まる組み合わせが無い: 最小解像度・目標フレーム数でOOMフォールバックに任せる
+            process_res = min(budget.process_res_candidates)
+            frames = target_frames
+            reason = "over_budget"
+        else:
+            process_res, frames = chosen
+            reason = self._binding_constraint(
+                model_id,
+                process_res,
+                aspect_ratio,
+                frames,
+                frames_cap,
+                memory_budget,
+                requested_fps,
+            )
+
+        cost_args = (model_id, frames, process_res, aspect_ratio)
+        return SamplingPlan(
+            fps=frames / duration if duration > 0 else fps_cap,
+            process_res=process_res,
+            frame_count=frames,
+            requested_fps=requested_fps,
+            estimated_memory_gb=self._cost_model.estimate_memory_gb(*cost_args),
+            estimated_latency_sec=self._cost_model.estimate_latency_sec(*cost_args),
+            reason=reason,
+        )
+
+    def _resolution_candidates(self, probe: VideoProbeResult):
+        """入力より大きい解像度へは拡大しないよう候補を絞ります。"""
+
+        candidates = sorted(set(self._budget.process_res_candidates), reverse=True)
+        source_long_side = max(probe.width, probe.height)
+        if source_long_side <= 0:
+            return candidates
+
+        filtered = [r for r in candidates if r <= source_long_side]
+        if len(filtered) == 0:
+            return [candidates[-1]]
+
+        return filtered
+
+    def _fits(
+        self,
+        model_id: str,
+        process_res: int,
+        aspect_ratio: float,
+        frames: int,
+        memory_budget: Optional[float],
+    ) -> bool:
+        """指定フレーム数がメモリ・時間の予算に収まるか判定します。"""
+
+        if memory_budget is not None:
+            memory = self._cost_model.estimate_memory_gb(
+                model_id, frames, process_res, aspect_ratio
+            )
+            if memory > memory_budget:
+                return False
+
+        latency = self._cost_model.estimate_latency_sec(model_id, frames, process_res, aspect_ratio)
+        return latency <= self._budget.max_latency_sec
+
+    def _max_frames(
+        self,
+        model_id: str,
+        process_res: int,
+        aspect_ratio: float,
+        frames_cap: int,
+        memory_budget: Optional[float],
+    ) -> int:
+        """予算に収まる最大フレーム数を二分探索で求めます（見積もりはフレーム数に単調）。"""
+
+        if self._fits(model_id, process_res, aspect_ratio, frames_cap, memory_budget):
+            return frames_cap
+
+        lo, hi = 0, frames_cap
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._fits(model_id, process_res, aspect_ratio, mid, memory_budget):
+                lo = mid
+            else:
+                hi = mid
+
+        return lo
+
+    def _binding_constraint(
+        self,
+        model_id: str,
+        process_res: int,
+        aspect_ratio: float,
+        frames: int,
+        frames_cap: int,
+        memory_budget: Optional[float],
+        requested_fps: Optional[float],
+    ) -> str:
+        """フレーム数を決めた制約の名前を返します（テレメトリ用）。"""
+
+        if frames >= frames_cap:
+            if frames_cap >= self._budget.max_frames:
+                return "max_frames"
+            if requested_fps is not None and requested_fps <= self._budget.max_fps:
+                return "requested_fps"
+            return "max_fps"
+
+        if memory_budget is not None:
+            next_memory = self._cost_model.estimate_memory_gb(
+                model_id, frames + 1, process_res, aspect_ratio
+            )
+            if next_memory > memory_budget:
+                return "memory"
+
+        return "latency"
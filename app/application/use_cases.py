@@ -1,12 +1,21 @@
+import math
+from dataclasses import replace
 from pathlib import Path
+from typing import Optional, Sequence
 
 from app.application.ports import (
     Da3InferencePort,
     FileGatewayPort,
     FrameExtractorPort,
+    KeyframeSelectorPort,
     ProgressReporterPort,
+    VideoProbePort,
 )
-from app.domain.models import GlbExportResult, VideoToGlbRequest
+from app.application.sampling_planner import SamplingPlanner
+from app.domain.models import GlbExportResult, SamplingPlan, VideoToGlbRequest
+
+DEFAULT_FPS = 2.0
+DEFAULT_PROCESS_RES = 504
 
 
 class ConvertVideoToGlbUseCase:
@@ -18,11 +27,20 @@ class ConvertVideoToGlbUseCase:
         file_gateway: FileGatewayPort,
         da3_inference: Da3InferencePort,
         progress_reporter: ProgressReporterPort,
+        video_probe: Optional[VideoProbePort] = None,
+        sampling_planner: Optional[SamplingPlanner] = None,
+        keyframe_selector: Optional[KeyframeSelectorPort] = None,
+        keyframe_oversample: float = 3.0,
     ) -> None:
         self._frame_extractor = frame_extractor
         self._file_gateway = file_gateway
         self._da3_inference = da3_inference
         self._progress_reporter = progress_reporter
+        self._video_probe = video_probe
+        self._sampling_planner = sampling_planner
+        self._keyframe_selector = keyframe_selector
+        # キーフレーム選択時は予算枚数より多めに抽出し、その中から選ぶ
+        self._keyframe_oversample = keyframe_oversample
 
     def execute(self, request: VideoToGlbRequest) -> GlbExportResult:
         """動画からGLBを生成します。"""
@@ -35,10 +53,15 @@ class ConvertVideoToGlbUseCase:
         frames_dir = request.output_dir / "frames"
         self._file_gateway.ensure_dir(frames_dir)
 
+        plan = self._plan_sampling(request)
+        fps = plan.fps if plan is not None else (request.fps or DEFAULT_FPS)
+        process_res = plan.process_res if plan is not None else DEFAULT_PROCESS_RES
+        extract_fps = fps * self._keyframe_oversample if self._keyframe_selector is not None else fps
+
         extraction = self._frame_extractor.extract_frames(
             input_video_path=request.input_video_path,
             frames_dir=frames_dir,
-            fps=request.fps,
+            fps=extract_fps,
             progress_reporter=self._progress_reporter,
         )
 
@@ -46,6 +69,31 @@ class ConvertVideoToGlbUseCase:
         if len(image_paths) == 0:
             raise RuntimeError("フレーム抽出結果が0件でした。ffmpegの設定や入力動画を確認してください。")
 
+        selection = None
+        if self._keyframe_selector is not None:
+            if plan is not None:
+                max_frames = plan.frame_count
+            else:
+                max_frames = max(1, int(math.ceil(len(image_paths) / self._keyframe_oversample)))
+            # 静止に近い動画でも、予算の最小枚数は確保する
+            min_frames = 1
+            if self._sampling_planner is not None:
+                min_frames = min(self._sampling_planner.budget.min_frames, max_frames)
+            selection = self._keyframe_selector.select_keyframes(
+                image_paths=image_paths,
+                max_frames=max_frames,
+                progress_reporter=self._progress_reporter,
+                min_frames=min_frames,
+            )
+            image_paths = [image_paths[i] for i in selection.selected_indices]
+            self._progress_reporter.report_phase(
+                "keyframes",
+                f"キーフレーム {len(image_paths)}/{selection.total_frames} 枚を選択しました: {list(selection.selected_indices)}",
+            )
+        elif plan is not None and len(image_paths) > plan.frame_count:
+            # ffmpegのfpsフィルタは端数で数枚多く出ることがあるため、予算枚数へ均等に間引く
+            image_paths = self._subsample_evenly(image_paths, plan.frame_count)
+
         self._progress_reporter.report_phase(
             "infer",
             f"DA3推論を開始します。frames={len(image_paths)} model={request.model_id}",
@@ -56,8 +104,12 @@ class ConvertVideoToGlbUseCase:
             output_dir=request.output_dir,
             model_id=request.model_id,
             progress_reporter=self._progress_reporter,
+            process_res=process_res,
         )
 
+        if plan is not None or selection is not None:
+            result = replace(result, sampling_plan=plan, keyframe_selection=selection)
+
         if request.keep_frames == False:
             try:
                 self._progress_reporter.report_phase("cleanup", "中間フレームを削除します。")
@@ -75,5 +127,37 @@ class ConvertVideoToGlbUseCase:
         if request.input_video_path.exists() == False:
             raise FileNotFoundError(f"入力動画が見つかりません: {request.input_video_path}")
 
-        if request.fps <= 0:
-            raise ValueError("fps は 0 より大きい値を指定してください。")
\ No newline at end of file
+        if request.fps is not None and request.fps <= 0:
+            raise ValueError("fps は 0 より大きい値を指定してください。")
+
+    def _plan_sampling(self, request: VideoToGlbRequest) -> Optional[SamplingPlan]:
+        """動画を調べて、予算内のサンプリングfpsと推論解像度を決めます。"""
+
+        if self._video_probe is None or self._sampling_planner is None:
+            return None
+
+        self._progress_reporter.report_phase("plan", "動画を解析して推論計画を立てます。")
+        probe = self._video_probe.probe(request.input_video_path)
+        plan = self._sampling_planner.plan(probe, request.fps, request.model_id)
+
+        self._progress_reporter.report_phase(
+            "plan",
+            (
+                f"duration={probe.duration_sec:.1f}s source={probe.width}x{probe.height}@{probe.fps:.2f}fps "
+                f"-> fps={plan.fps:.3f} frames={plan.frame_count} process_res={plan.process_res} "
+                f"reason={plan.reason}"
+            ),
+        )
+        return plan
+
+    def _subsample_evenly(self, image_paths: Sequence[Path], count: int) -> Sequence[Path]:
+        """画像列から count 枚を均等間隔で選びます。"""
+
+        if count <= 0 or len(image_paths) <= count:
+            return image_paths
+
+        if count == 1:
+            return [image_paths[0]]
+
+        step = (len(image_paths) - 1) / (count - 1)
+        return [image_paths[round(i * step)] for i in range(count)]
\ No newline at end of file
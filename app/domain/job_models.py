@@ -9,7 +9,8 @@ class VideoJob:
     job_id: str
     input_object_key: str
     output_prefix: str
-    fps: float
+    # クライアント指定のfps上限（未指定ならNone）
+    fps: Optional[float]
     model_id: str
 
 
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -9,11 +9,50 @@ class VideoToGlbRequest:
 
     input_video_path: Path
     output_dir: Path
-    fps: float = 2.0
+    # サンプリングfpsの上限（Noneならプランナーが予算内で自動決定）
+    fps: Optional[float] = 2.0
     keep_frames: bool = True
     model_id: str = "depth-anything/da3nested-giant-large"
 
 
+@dataclass(frozen=True)
+class VideoProbeResult:
+    """動画のメタデータ（長さ・解像度・fps）を表します。"""
+
+    duration_sec: float
+    width: int
+    height: int
+    fps: float
+    frame_count: int
+
+
+@dataclass(frozen=True)
+class PlanningBudget:
+    """1ジョブあたりの推論予算を表します。"""
+
+    max_latency_sec: float = 300.0
+    # Noneなら空きGPUメモリを使う
+    max_memory_gb: Optional[float] = None
+    max_frames: int = 256
+    min_frames: int = 8
+    max_fps: float = 10.0
+    min_fps: float = 0.5
+    process_res_candidates: Tuple[int, ...] = (504, 448, 392, 336, 280)
+
+
+@dataclass(frozen=True)
+class SamplingPlan:
+    """プランナーが決定したサンプリングfpsと推論解像度を表します。"""
+
+    fps: float
+    process_res: int
+    frame_count: int
+    requested_fps: Optional[float]
+    estimated_memory_gb: Optional[float]
+    estimated_latency_sec: Optional[float]
+    reason: str
+
+
 @dataclass(frozen=True)
 class FrameExtractionResult:
     """フレーム抽出結果を表します。"""
@@ -22,10 +61,21 @@ class FrameExtractionResult:
     frame_count: int
 
 
+@dataclass(frozen=True)
+class KeyframeSelection:
+    """キーフレーム選択結果を表します。"""
+
+    selected_indices: Tuple[int, ...]
+    total_frames: int
+    max_frames: int
+
+
 @dataclass(frozen=True)
 class GlbExportResult:
     """GLB出力結果を表します。"""
 
     output_dir: Path
     glb_path: Optional[Path]
-    frame_count: int
\ No newline at end of file
+    frame_count: int
+    sampling_plan: Optional[SamplingPlan] = None
+    keyframe_selection: Optional[KeyframeSelection] = None
\ No newline at end of file
@@ -7,14 +7,19 @@ from typing import Optional
 
 from app.adapters.composite_progress_reporter import CompositeProgressReporter
 from app.adapters.console_progress_reporter import ConsoleProgressReporter
+from app.adapters.da3_cost_model import Da3CostModelAdapter
 from app.adapters.da3_pytorch_inference import Da3PyTorchInferenceAdapter
 from app.adapters.db_progress_reporter import DbProgressReporter
 from app.adapters.ffmpeg_frame_extractor import FfmpegFrameExtractor
+from app.adapters.ffprobe_video_probe import FfprobeVideoProbe
+from app.adapters.keyframe_selector import ContentAwareKeyframeSelector
 from app.adapters.local_file_gateway import LocalFileGateway
 from app.adapters.minio_object_storage import MinioObjectStorageAdapter
 from app.adapters.postgres_job_repository import PostgresJobRepositoryAdapter
 from app.application.job_runner_use_cases import RunSingleJobUseCase
+from app.application.sampling_planner import SamplingPlanner
 from app.application.use_cases import ConvertVideoToGlbUseCase
+from app.domain.models import PlanningBudget
 
 
 class WorkerState:
@@ -64,6 +69,31 @@ def main() -> int:
     idle_sleep_sec = _get_env_float("IDLE_SLEEP_SEC", 2.0)
     heartbeat_interval_sec = 2.0  # 要件固定
     keep_frames_for_debug = _get_env_bool("KEEP_FRAMES_FOR_DEBUG", False)
+    fallback_memory_path = os.getenv("DA3_FALLBACK_MEMORY_PATH")
+    # この枚数以上の画像列はチャンク単位のストリーミング再構成で推論する
+    streaming_min_frames = int(_get_env_float("DA3_STREAMING_MIN_FRAMES", 256))
+    streaming_chunk_size = int(_get_env_float("DA3_STREAMING_CHUNK_SIZE", 64))
+    streaming_overlap = int(_get_env_float("DA3_STREAMING_OVERLAP", 16))
+
+    # ジョブごとの推論予算（fps・解像度の自動決定に使う）
+    planning_budget = PlanningBudget(
+        max_latency_sec=_get_env_float("JOB_MAX_LATENCY_SEC", 300.0),
+        max_memory_gb=_get_env_optional_float("JOB_MAX_MEMORY_GB"),
+        max_frames=int(_get_env_float("JOB_MAX_FRAMES", 256)),
+        min_frames=int(_get_env_float("JOB_MIN_FRAMES", 8)),
+        max_fps=_get_env_float("JOB_MAX_FPS", 10.0),
+        min_fps=_get_env_float("JOB_MIN_FPS", 0.5),
+    )
+    sampling_planner = SamplingPlanner(
+        cost_model=Da3CostModelAdapter(
+            fallback_sec_per_frame=_get_env_float("DA3_FALLBACK_SEC_PER_FRAME", 1.0),
+        ),
+        budget=planning_budget,
+    )
+
+    # 冗長・ブレたフレームを推論前に除く（KEYFRAME_SELECTION=false で均等サンプリングに戻す）
+    keyframe_selector = ContentAwareKeyframeSelector() if _get_env_bool("KEYFRAME_SELECTION", True) else None
+    keyframe_oversample = _get_env_float("KEYFRAME_OVERSAMPLE", 3.0)
 
     job_repository = PostgresJobRepositoryAdapter(dsn=postgres_dsn)
     object_storage = MinioObjectStorageAdapter(
@@ -121,8 +151,17 @@ def main() -> int:
             convert_use_case = ConvertVideoToGlbUseCase(
                 frame_extractor=FfmpegFrameExtractor(),
                 file_gateway=file_gateway,
-                da3_inference=Da3PyTorchInferenceAdapter(),
+                da3_inference=Da3PyTorchInferenceAdapter(
+                    fallback_memory_path=fallback_memory_path,
+                    streaming_min_frames=streaming_min_frames,
+                    streaming_chunk_size=streaming_chunk_size,
+                    streaming_overlap=streaming_overlap,
+                ),
                 progress_reporter=progress_reporter,
+                video_probe=FfprobeVideoProbe(),
+                sampling_planner=sampling_planner,
+                keyframe_selector=keyframe_selector,
+                keyframe_oversample=keyframe_oversample,
             )
 
             run_job_use_case = RunSingleJobUseCase(
@@ -255,5 +294,15 @@ def _get_env_float(name: str, default_value: float) -> float:
     return float(value)
 
 
+def _get_env_optional_float(name: str) -> Optional[float]:
+    """未設定ならNoneを返す浮動小数の環境変数を取得します。"""
+
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return None
+
+    return float(value)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
\ No newline at end of file